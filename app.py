@@ -7,75 +7,187 @@ Provides a configurator UI and API endpoints for model generation
 import os
 import sys
 import json
-import yaml
+import math
 import uuid
 import subprocess
+import time
 import threading
 from pathlib import Path
 from datetime import datetime
-from flask import Flask, render_template, request, jsonify, send_file
+from flask import Flask, Response, request, jsonify, send_file, stream_with_context
 from flask_cors import CORS
 
+# Shared pipeline helpers live next to the generation scripts; the ones a single route or helper
+# needs (sweep, nesting, archive, artifact store, render queue, ...) are imported there, on first use
+sys.path.insert(0, str(Path(__file__).resolve().parent / "scripts"))
+from stage_timing import StageTimer, parse_span_line
+from pipeline_metrics import MetricsRegistry
+from product_registry import get_registry
+from render_estimate import LaneScheduler, get_cost_model, features as cost_features, DEFAULT_TIMEOUT
+from http_payloads import PayloadCache, conditional, source_stamp, HTML_TYPE
+
 app = Flask(__name__)
 CORS(app)
 
 # Configuration
-OUTPUT_DIR = Path("out/custom_models")
-OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-PRESETS_FILE = Path("products/filterslang/presets.yaml")
+OUTPUT_DIR = Path("out/custom_models")  # created with the first job
+PARTS_FILE = Path("data/parts.csv")
+PRICES_FILE = Path("data/prices.csv")
+ROLLS_FILE = Path("data/roll_stock.csv")
+PROJECT_ROOT = OUTPUT_DIR.parent.parent
 JOBS = {}
+MAX_SWEEP_RENDERS = 20
+MAX_NESTING_BUDGET = 10
+COMPATIBLE_LIMIT = 50
+NEAREST_DEFAULT_K = 5
+NEAREST_MAX_K = 50
+
+# Job artifacts live in the content-addressed store (out/blobs) until JOB_TTL_HOURS after completion
+# (0 = keep); expired references and unused blobs are collected at most every GC_INTERVAL seconds
+JOB_TTL_HOURS = float(os.environ.get("JOB_TTL_HOURS", 168))
+GC_INTERVAL = 3600
+LAST_GC = {'at': 0.0, 'result': None}
+
+# Job scheduler: at most RENDER_WORKERS generator processes at once, the rest wait in two lanes:
+# interactive (previews, jobs predicted under INTERACTIVE_S) first, batch shortest-predicted-first;
+# one slot stays free for interactive jobs (scripts/render_estimate.py)
+RENDER_WORKERS = int(os.environ.get("RENDER_WORKERS", os.cpu_count() or 2))
+SCHEDULER = LaneScheduler(RENDER_WORKERS, thread_name_prefix="render")
+
+# RENDER_BACKEND=queue: jobs go to the shared queue (RENDER_QUEUE) and separately started render workers
+# (scripts/render_worker.py) run them; one monitor thread mirrors task progress into JOBS
+RENDER_BACKEND = os.environ.get("RENDER_BACKEND", "local")
+QUEUE_POLL_S = 0.5
+QUEUED_JOBS = {}
+QUEUE_MONITOR = {'thread': None}
+QUEUE_LOCK = threading.Lock()
+
+# Verbose generator output (and its I/O) only when explicitly requested
+GENERATE_DEBUG = os.environ.get("GENERATE_DEBUG", "").lower() in ("1", "true", "yes")
+
+# Presets are parsed on first use (cold start: no YAML import or parse before the first request needs it)
+# and again when the file changes
+PRESETS_CACHE = {}
+
+# Precomputed bodies of the read-mostly endpoints (rebuilt when their sources change)
+PAYLOADS = PayloadCache()
+
+
+def load_yaml(path):
+    """Parse a YAML file, with the libyaml loader when PyYAML was built with it"""
+    import yaml
+    with open(path, 'r', encoding='utf-8') as f:
+        return yaml.load(f, Loader=getattr(yaml, 'CSafeLoader', yaml.SafeLoader))
+
+
+def presets_data(product='filterslang'):
+    """Parsed presets.yaml of a product, loaded once per process (re-read when its mtime/size changed)"""
+    path = get_registry().get(product)['presets']
+    stamp = source_stamp([path])
+    cached = PRESETS_CACHE.get(product)
+    if cached is None or cached[0] != stamp:
+        PRESETS_CACHE[product] = cached = (stamp, load_yaml(path))
+    return cached[1]
+
+
+def filterslang_presets():
+    return presets_data().get('presets', {})
+
+
+def valid_enums():
+    return presets_data().get('valid_enums', {})
+
+
+def default_quality():
+    return presets_data().get('default_quality', 'production')
+
+
+# Former module-level preset globals, still importable (``from app import PRESETS``) but loaded lazily
+LAZY_GLOBALS = {
+    'PRESETS_DATA': presets_data,
+    'PRESETS': filterslang_presets,
+    'VALID_ENUMS': valid_enums,
+    'QUALITY_TIERS': lambda: presets_data().get('quality_tiers', {}),
+    'DEFAULT_QUALITY': default_quality,
+    'FLEXIBELE_PRESETS_DATA': lambda: presets_data('flexibele_verbindingen'),
+    'PRODUCT_PRESETS': lambda: {name: get_registry().get(name)['presets'] for name in get_registry().names()},
+}
 
-# Load presets
-with open(PRESETS_FILE, 'r', encoding='utf-8') as f:
-    PRESETS_DATA = yaml.safe_load(f)
 
-PRESETS = PRESETS_DATA.get('presets', {})
-VALID_ENUMS = PRESETS_DATA.get('valid_enums', {})
+def __getattr__(name):
+    if name in LAZY_GLOBALS:
+        return LAZY_GLOBALS[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-# Connector Database (Phase C.1)
-CONNECTOR_DATABASE = {
+
+# Pipeline metrics (exposed on /metrics)
+METRICS = MetricsRegistry()
+STAGE_SECONDS = METRICS.histogram(
+    'filterslang_stage_duration_seconds',
+    'Duration of generation pipeline stages',
+    ['stage', 'quality']
+)
+JOB_SECONDS = METRICS.histogram(
+    'filterslang_job_duration_seconds',
+    'End-to-end duration of generation jobs',
+    ['quality', 'status']
+)
+JOBS_TOTAL = METRICS.counter(
+    'filterslang_jobs_total',
+    'Generation jobs finished, by final status',
+    ['quality', 'status']
+)
+
+# generate_model.py step markers → (progress %, status text)
+GENERATE_STEPS = [
+    ('[1/6]', 20, 'Parsing configuration...'),
+    ('[2/6]', 35, 'Generating OpenSCAD file...'),
+    ('[3/6]', 50, 'Rendering with OpenSCAD...'),
+    ('[4/6]', 65, 'Extracting BOM...'),
+    ('[5/6]', 80, 'Generating 3D model (STL)...'),
+    ('[6/6]', 95, 'Generating DXF...'),
+]
+
+# Connector display data (Phase C.1); technical limits come from the SCAD sources via connector_data
+CONNECTOR_LABELS = {
     'snelkoppeling': {
         'name': 'Quick Coupling (Snelkoppeling)',
         'icon': '🔌',
-        'max_pressure': 250,
-        'max_temperature': 80,
-        'diameter_min': 12,
-        'diameter_max': 100,
-        'hygiene_classes': ['general', 'food'],
         'description': 'Quick disconnect coupling for general industrial and food applications'
     },
     'jacob': {
         'name': 'Welding End (Jacob)',
         'icon': '🔗',
-        'max_pressure': 50,
-        'max_temperature': 120,
-        'diameter_min': 20,
-        'diameter_max': 150,
-        'hygiene_classes': ['general', 'atex'],
         'description': 'Permanent welding connector for industrial use. Not reusable.'
     },
     'triclamp': {
         'name': 'Triclamp (Sanitary)',
         'icon': '🔧',
-        'max_pressure': 100,
-        'max_temperature': 100,
-        'diameter_min': 16,
-        'diameter_max': 150,
-        'hygiene_classes': ['food', 'pharma', 'medical'],
         'description': 'Sanitary clamp connector. Perfect for food, pharmaceutical, and medical applications.'
     },
     'bfm': {
         'name': 'BFM Spigot',
         'icon': '⚙️',
-        'max_pressure': 280,
-        'max_temperature': 100,
-        'diameter_min': 100,
-        'diameter_max': 999,
-        'hygiene_classes': ['general'],
         'description': 'Heavy-duty spigot connector for industrial hydraulic/pneumatic systems.'
     }
 }
 
+
+def connector_database():
+    """Connector cards for /api/connectors: display labels + limits compiled from the SCAD tables"""
+    from connector_data import get_connector_data
+    data = get_connector_data()
+    hygiene_classes = presets_data('flexibele_verbindingen').get('valid_enums', {}).get('hygiene_class', [])
+    return {
+        conn: {
+            **CONNECTOR_LABELS.get(conn, {'name': conn, 'icon': '', 'description': ''}),
+            **limits,
+            'hygiene_classes': data.hygiene_classes(conn, hygiene_classes)
+        }
+        for conn, limits in data.connectors.items()
+    }
+
+
 # Sector to Hygiene Class Mapping
 SECTOR_HYGIENE_MAP = {
     'onbekend': None,
@@ -90,59 +202,122 @@ SECTOR_HYGIENE_MAP = {
 @app.route('/')
 def index():
     """Serve the main configurator UI"""
-    return render_template('index.html')
+    return payload_response(index_payload())
 
 
 @app.route('/api/presets', methods=['GET'])
 def get_presets():
     """Get all preset definitions"""
-    return jsonify({
-        'presets': PRESETS,
-        'valid_enums': VALID_ENUMS
-    })
+    return payload_response(presets_payload())
 
 
 @app.route('/api/presets/<preset_id>', methods=['GET'])
 def get_preset(preset_id):
     """Get a specific preset"""
-    if preset_id not in PRESETS:
+    payload = preset_payload(preset_id)
+    if payload is None:
         return jsonify({'error': f'Preset {preset_id} not found'}), 404
     
-    return jsonify({
-        'preset': PRESETS[preset_id],
-        'valid_enums': VALID_ENUMS
-    })
+    return payload_response(payload)
 
 
 @app.route('/api/connectors', methods=['GET'])
 def get_connectors():
     """Get connector database"""
-    return jsonify({
-        'connectors': CONNECTOR_DATABASE
-    })
+    return payload_response(connectors_payload())
+
+
+def payload_response(payload):
+    """Precomputed payload as a conditional response (304 on a matching ETag, pre-compressed body)"""
+    status, headers, body = conditional(
+        payload, request.headers.get('If-None-Match'), request.headers.get('Accept-Encoding'))
+    return Response(body, status=status, headers=headers)
+
+
+def presets_sources():
+    return [get_registry().get('filterslang')['presets']]
+
+
+def index_payload():
+    # The page has no per-request template variables: rendered once per template change
+    return PAYLOADS.get(
+        'index', lambda: [Path(app.root_path) / app.template_folder / 'index.html'],
+        lambda: app.jinja_env.get_template('index.html').render().encode('utf-8'),
+        content_type=HTML_TYPE, cache_control='no-cache')
+
+
+def presets_payload():
+    return PAYLOADS.get('presets', presets_sources,
+                        lambda: {'presets': filterslang_presets(), 'valid_enums': valid_enums()})
+
+
+def preset_payload(preset_id):
+    """Payload of one preset, or None for an unknown preset id"""
+    if preset_id not in filterslang_presets():
+        return None
+    return PAYLOADS.get(f'presets/{preset_id}', presets_sources,
+                        lambda: {'preset': filterslang_presets()[preset_id], 'valid_enums': valid_enums()})
+
+
+def connectors_payload():
+    from connector_data import END_TYPE_SCAD, BFM_DATA_SCAD, EVALUATION_SCAD, APPLICATION_SCAD
+    return PAYLOADS.get(
+        'connectors',
+        lambda: [END_TYPE_SCAD, BFM_DATA_SCAD, EVALUATION_SCAD, APPLICATION_SCAD,
+                 get_registry().get('flexibele_verbindingen')['presets']],
+        lambda: {'connectors': connector_database()})
+
+
+def examples_payload():
+    # The directory stamp covers added and removed example files
+    return PAYLOADS.get(
+        'examples', lambda: [Path('configs'), *sorted(Path('configs').glob('example_*.yaml'))],
+        lambda: {'examples': load_examples()})
+
+
+@app.route('/api/bfm', methods=['GET'])
+def get_bfm_data():
+    """BFM product, connector, ring and spigot tables (compiled from bfm_data.scad)"""
+    from connector_data import get_connector_data
+    return jsonify(get_connector_data().to_json())
 
 
 @app.route('/api/validate', methods=['POST'])
 def validate_config():
     """Validate a configuration without generating"""
     config = request.get_json()
+    errors, warnings = validation_errors(config)
     
-    errors = []
+    return jsonify({
+        'valid': len(errors) == 0,
+        'errors': errors,
+        'warnings': warnings
+    })
+
+
+def validation_errors(config):
+    """Check a filterslang config against its config schema and the presets: ``(errors, warnings)``"""
+    # Structure first (types, unknown keys); the preset checks below assume well-typed values
+    errors = get_registry().validate('filterslang', config)
     warnings = []
+    if errors:
+        return errors, warnings
+    presets = filterslang_presets()
+    enums = valid_enums()
     
     # Check required fields
     if 'name' not in config:
         errors.append('Config name is required')
     if 'preset' not in config:
         errors.append('Preset is required')
-    elif config['preset'] not in PRESETS:
+    elif config['preset'] not in presets:
         errors.append(f"Invalid preset: {config['preset']}")
     
     overrides = config.get('overrides', {})
     
     # Basic dimension validation
-    if 'preset' in config and config['preset'] in PRESETS:
-        preset = PRESETS[config['preset']]
+    if 'preset' in config and config['preset'] in presets:
+        preset = presets[config['preset']]
         defaults = preset.get('defaults', {})
         
         # Check diameter
@@ -161,20 +336,19 @@ def validate_config():
     
     # Enum validation
     if 'top' in overrides:
-        valid_tops = VALID_ENUMS.get('top', [])
+        valid_tops = enums.get('top', [])
         if overrides['top'] not in valid_tops:
             errors.append(f"Invalid top closure: {overrides['top']}")
     
     if 'bottom' in overrides:
-        valid_bottoms = VALID_ENUMS.get('bottom', [])
+        valid_bottoms = enums.get('bottom', [])
         if overrides['bottom'] not in valid_bottoms:
             errors.append(f"Invalid bottom type: {overrides['bottom']}")
     
-    return jsonify({
-        'valid': len(errors) == 0,
-        'errors': errors,
-        'warnings': warnings
-    })
+    if 'quality' in config and config['quality'] not in presets_data().get('quality_tiers', {}):
+        errors.append(f"Invalid quality tier: {config['quality']}")
+    
+    return errors, warnings
 
 
 @app.route('/api/generate', methods=['POST'])
@@ -183,48 +357,111 @@ def generate_model():
     config = request.get_json()
     
     # Validate first
-    validation = validate_config()
-    validation_data = validation.get_json()
+    errors, _ = validation_errors(config)
     
-    if not validation_data['valid']:
+    if errors:
         return jsonify({
             'error': 'Configuration validation failed',
-            'details': validation_data['errors']
+            'details': errors
         }), 400
     
+    job_id = start_generation_job(config)
+    
+    return jsonify({
+        'job_id': job_id,
+        'status': 'queued',
+        'created_at': JOBS[job_id]['created_at']
+    })
+
+
+def start_generation_job(config, product='filterslang'):
+    """Register a generation job and queue it on the render scheduler"""
+    job_id = new_job(config, product)
+    if RENDER_BACKEND == 'queue':
+        enqueue_job(job_id, config)
+    else:
+        estimate = JOBS[job_id]['estimate']
+        SCHEDULER.submit(run_generation, job_id, config, lane=estimate['lane'], cost=estimate['seconds'], key=job_id)
+    return job_id
+
+
+def new_job(config, product='filterslang'):
+    """Create a queued generation job in JOBS and return its id"""
+    from artifact_store import get_artifact_store
     # Create job ID
     job_id = str(uuid.uuid4())[:8]
     
     # Create job metadata
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    # Named outputs of an earlier job with this name are hardlinks into the artifact store:
+    # unlink them so the generator writes new files instead of truncating shared blobs
+    get_artifact_store().detach(output_paths(config.get('name', 'unnamed')).values())
     JOBS[job_id] = {
         'id': job_id,
         'status': 'queued',
         'progress': 0,
         'current_step': 'Initializing...',
         'created_at': datetime.now().isoformat(),
+        'queued_at': time.time(),
+        'product': product,
         'config': config,
+        'quality': config.get('quality', default_quality()),
         'logs': [],
+        'timings': [],
         'outputs': {}
     }
-    
-    # Start generation in background thread
-    thread = threading.Thread(target=run_generation, args=(job_id, config))
-    thread.daemon = True
-    thread.start()
-    
-    return jsonify({
-        'job_id': job_id,
-        'status': 'queued',
-        'created_at': JOBS[job_id]['created_at']
-    })
+    JOBS[job_id]['estimate'] = estimate_job(JOBS[job_id])
+    return job_id
+
+
+def estimate_job(job):
+    """Predicted generator seconds, lane and timeout of a job (cost model over earlier jobs' timings)"""
+    try:
+        # The generator's own params (render cache keys): the product's resolver, not job_params
+        params, _ = get_registry().resolver(job['product'])(job['config'], presets_data(job['product']))
+    except ValueError:
+        params = {}
+    try:
+        cached = cached_renders(job['product'], params) if params else ()
+    except (OSError, ValueError):
+        cached = ()
+    return get_cost_model().estimate(job['product'], cost_features(job['product'], params), job['quality'], cached)
+
+
+def cached_renders(product, params):
+    """OpenSCAD outputs of these params already in the render cache (they cost no render time)"""
+    from render_cache import RenderCache, render_key, sources_hash
+    sources = sources_hash(get_registry().get(product)['sources'])
+    cache = RenderCache()
+    return tuple(kind for kind, suffix in (('echo', '.echo'), ('stl', '.stl'), ('dxf', '.dxf'))
+                 if cache.path(kind, render_key(product, kind, params, sources), suffix).exists())
+
+
+def record_job_metrics(job, started):
+    """Observe a finished job's stage spans and total duration."""
+    quality = job.get('quality', default_quality())
+    for span in job.get('timings', []):
+        STAGE_SECONDS.observe(span['seconds'], stage=span['stage'], quality=span.get('quality', quality))
+    JOB_SECONDS.observe(time.perf_counter() - started, quality=quality, status=job['status'])
+    JOBS_TOTAL.inc(quality=quality, status=job['status'])
+    if job['status'] == 'completed' and 'estimate' in job:
+        try:
+            get_cost_model().observe(job['product'], job['estimate']['features'], job.get('timings', []))
+        except OSError as e:
+            print(f"[WARN] render timing not recorded: {e}", file=sys.stderr)
 
 
 def run_generation(job_id, config):
     """Background task to run model generation"""
     job = JOBS[job_id]
+    started = time.perf_counter()
+    timer = StageTimer(emit=False, quality=job['quality'])
+    job['timings'] = timer.spans
+    timer.record('queue_wait', time.time() - job['queued_at'], started_at=job['queued_at'])
     
     try:
         job['status'] = 'processing'
+        job['started_at'] = time.time()
         job['progress'] = 10
         job['current_step'] = 'Creating configuration file...'
         
@@ -232,7 +469,8 @@ def run_generation(job_id, config):
         config_name = config.get('name', 'unnamed')
         config_yaml_file = OUTPUT_DIR / f"{config_name}_config.yaml"
         
-        with open(config_yaml_file, 'w', encoding='utf-8') as f:
+        import yaml
+        with timer.stage('config_write'), open(config_yaml_file, 'w', encoding='utf-8') as f:
             yaml.dump(config, f)
         
         job['logs'].append('[INFO] Configuration file created')
@@ -240,93 +478,458 @@ def run_generation(job_id, config):
         job['current_step'] = 'Running model generator...'
         
         # Run generate_model.py
-        cmd = [
-            sys.executable, 'scripts/generate_model.py',
-            '--config', str(config_yaml_file),
-            '--presets', str(PRESETS_FILE),
-            '--output-dir', str(OUTPUT_DIR),
-            '--debug'
-        ]
+        cmd = generate_command(config_yaml_file, job['product'])
         
         job['logs'].append(f"[INFO] Executing: {' '.join(cmd)}")
         
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=300,
-            cwd=str(OUTPUT_DIR.parent.parent)  # Run from project root for proper library resolution
-        )
+        with timer.stage('generate_total'):
+            result = subprocess.run(
+                cmd,
+                capture_output=True,
+                text=True,
+                timeout=job_timeout(job),
+                cwd=str(PROJECT_ROOT)  # Run from project root for proper library resolution
+            )
         
         # Parse output
         for line in result.stderr.split('\n'):
-            if line.strip():
-                job['logs'].append(line)
-                
-                # Update progress based on steps
-                if '[1/6]' in line:
-                    job['progress'] = 20
-                    job['current_step'] = 'Parsing configuration...'
-                elif '[2/6]' in line:
-                    job['progress'] = 35
-                    job['current_step'] = 'Generating OpenSCAD file...'
-                elif '[3/6]' in line:
-                    job['progress'] = 50
-                    job['current_step'] = 'Rendering with OpenSCAD...'
-                elif '[4/6]' in line:
-                    job['progress'] = 65
-                    job['current_step'] = 'Extracting BOM...'
-                elif '[5/6]' in line:
-                    job['progress'] = 80
-                    job['current_step'] = 'Generating 3D model (STL)...'
-                elif '[6/6]' in line:
-                    job['progress'] = 95
-                    job['current_step'] = 'Generating DXF...'
+            apply_generator_line(job, line)
         
         if result.returncode != 0:
-            job['status'] = 'failed'
-            job['logs'].append(f'[ERROR] Generation failed with return code {result.returncode}')
-            # Capture error details from both stdout and stderr
-            error_output = []
-            if result.stderr:
-                error_output.append("STDERR:\n" + result.stderr[-1000:])  # Last 1000 chars
-            if result.stdout:
-                error_output.append("STDOUT:\n" + result.stdout[-1000:])
-            job['error_details'] = '\n\n'.join(error_output) if error_output else 'Generation failed. Check logs for details.'
+            fail_job(job, result.returncode, result.stderr, result.stdout)
             return
         
-        job['progress'] = 100
-        job['current_step'] = 'Complete!'
-        job['status'] = 'completed'
-        
-        # List output files
-        output_files = {
-            'stl': OUTPUT_DIR / f"{config_name}.stl",
-            'dxf': OUTPUT_DIR / f"{config_name}.dxf",
-            'xlsx': OUTPUT_DIR / f"{config_name}_bom_production.xlsx",
-            'csv': OUTPUT_DIR / f"{config_name}_bom.csv",
-            'jsonl': OUTPUT_DIR / f"{config_name}_bom.jsonl"
-        }
-        
-        for file_type, file_path in output_files.items():
-            if file_path.exists():
-                job['outputs'][file_type] = {
-                    'filename': file_path.name,
-                    'size': file_path.stat().st_size,
-                    'path': str(file_path)
-                }
-        
-        job['logs'].append('[INFO] Model generation complete!')
+        complete_job(job, config_name)
         
     except subprocess.TimeoutExpired as e:
-        job['status'] = 'timeout'
-        job['logs'].append('[ERROR] Generation timed out after 5 minutes')
-        job['error_details'] = f'Model generation timed out after 5 minutes. This usually means OpenSCAD is taking too long to render the model. Try simplifying your configuration (smaller dimensions or fewer rings).\n\nCommand: {e.cmd}'
+        timeout_job(job, e.cmd)
     except Exception as e:
         job['status'] = 'error'
         error_msg = str(e)
         job['logs'].append(f'[ERROR] {error_msg}')
         job['error_details'] = f'Unexpected error during generation:\n{error_msg}\n\nThis may be due to invalid configuration format or system issues. Please check your inputs and try again.'
+    finally:
+        record_job_metrics(job, started)
+
+
+def enqueue_job(job_id, config):
+    """Hand a job to the render workers; the queue monitor follows it from here"""
+    from render_queue import get_render_queue
+    job = JOBS[job_id]
+    get_render_queue().enqueue(job_id, {
+        'job_id': job_id,
+        'product': job['product'],
+        'config': config,
+        'debug': GENERATE_DEBUG,
+        'timeout': job_timeout(job)
+    }, priority=queue_priority(job['estimate']))
+    job['logs'].append('[INFO] Queued for a render worker')
+    with QUEUE_LOCK:
+        QUEUED_JOBS[job_id] = {'seq': 0, 'attempts': 0, 'started': time.perf_counter()}
+        if QUEUE_MONITOR['thread'] is None:
+            QUEUE_MONITOR['thread'] = threading.Thread(target=monitor_queue, name="queue-monitor", daemon=True)
+            QUEUE_MONITOR['thread'].start()
+
+
+def queue_priority(estimate):
+    """Queue order: interactive lane first, then shortest predicted job first"""
+    from render_queue import BATCH_PRIORITY
+    return int(estimate['seconds']) + (0 if estimate['lane'] == 'interactive' else BATCH_PRIORITY)
+
+
+def job_timeout(job):
+    """Generator timeout of a job: adaptive (predicted p90 × factor), DEFAULT_TIMEOUT without an estimate"""
+    return job.get('estimate', {}).get('timeout', DEFAULT_TIMEOUT)
+
+
+def monitor_queue():
+    """Poll the render queue for the jobs of this process (and requeue tasks of dead workers)"""
+    from render_queue import get_render_queue
+    queue = get_render_queue()
+    while True:
+        try:
+            for task_id, status in queue.release_expired():
+                if task_id in JOBS:
+                    JOBS[task_id]['logs'].append(f'[WARN] Render worker lost; task {status}')
+            for job_id in list(QUEUED_JOBS):
+                sync_queued_job(queue, job_id)
+        except Exception as e:
+            print(f"[WARN] render queue monitor: {e}", file=sys.stderr)
+        time.sleep(QUEUE_POLL_S)
+
+
+def sync_queued_job(queue, job_id):
+    """Mirror one queued task's worker, log lines and result into its job"""
+    job = JOBS[job_id]
+    state = QUEUED_JOBS[job_id]
+    task = queue.get(job_id)
+    if task is None:
+        return
+    if task['attempts'] > state['attempts'] and task['started_at']:
+        if state['attempts']:
+            job['logs'].append(f"[WARN] Retrying on worker {task['worker']} (attempt {task['attempts']})")
+        else:
+            job['timings'].append({'stage': 'queue_wait', 'seconds': round(task['started_at'] - task['created_at'], 4),
+                                   'started_at': task['created_at'], 'quality': job['quality']})
+            job['status'] = 'processing'
+            job['started_at'] = task['started_at']
+            job['progress'] = 20
+            job['current_step'] = 'Running model generator...'
+            job['logs'].append(f"[INFO] Claimed by render worker {task['worker']}")
+        state['attempts'] = task['attempts']
+    for seq, line in queue.lines(job_id, state['seq']):
+        apply_generator_line(job, line)
+        state['seq'] = seq
+    if task['status'] not in ('done', 'dead'):
+        return
+    try:
+        finish_queued_job(job, task)
+    finally:
+        with QUEUE_LOCK:
+            QUEUED_JOBS.pop(job_id, None)
+        record_job_metrics(job, state['started'])
+
+
+def finish_queued_job(job, task):
+    """Apply a render worker's result (outputs already in the shared artifact store)"""
+    result = task['result'] or {}
+    status = result.get('status') if task['status'] == 'done' else 'lost'
+    if result.get('seconds'):
+        job['timings'].append({'stage': 'generate_total', 'seconds': result['seconds'],
+                               'started_at': task['started_at'], 'quality': job['quality']})
+    if status == 'completed':
+        outputs = result['outputs']
+        deduplicated = sum(info.pop('deduplicated', False) for info in outputs.values())
+        if deduplicated:
+            job['logs'].append(f'[INFO] {deduplicated} output(s) identical to earlier jobs (stored once)')
+        job['outputs'] = outputs
+        job['progress'] = 100
+        job['current_step'] = 'Complete!'
+        job['status'] = 'completed'
+        job['logs'].append('[INFO] Model generation complete!')
+        index_variant(job, result['config_name'])
+        archive_bom(job)
+        collect_garbage()
+    elif status == 'failed':
+        fail_job(job, result['returncode'], result['stderr'], result['stdout'])
+    elif status == 'timeout':
+        timeout_job(job, result['cmd'])
+    else:
+        job['status'] = 'error'
+        error_msg = result.get('error') or f"render worker lost {task['attempts']} time(s)"
+        job['logs'].append(f'[ERROR] {error_msg}')
+        job['error_details'] = f'Unexpected error during generation:\n{error_msg}\n\nThis may be due to invalid configuration format or system issues. Please check your inputs and try again.'
+
+
+def generate_command(config_yaml_file, product='filterslang'):
+    """generate_model.py invocation for a job config file"""
+    cmd = [
+        sys.executable, 'scripts/generate_model.py',
+        '--config', str(config_yaml_file),
+        '--product', product,
+        '--presets', str(get_registry().get(product)['presets']),
+        '--output-dir', str(OUTPUT_DIR),
+        '--timings'
+    ]
+    if GENERATE_DEBUG:
+        cmd.append('--debug')
+    return cmd
+
+
+def apply_generator_line(job, line):
+    """Record one generator stderr line: [SPAN] timings, logs and step progress"""
+    span = parse_span_line(line)
+    if span:
+        span.setdefault('quality', job['quality'])
+        job['timings'].append(span)
+    elif line.strip():
+        job['logs'].append(line)
+        
+        # Update progress based on steps
+        for marker, progress, step in GENERATE_STEPS:
+            if marker in line:
+                job['progress'] = progress
+                job['current_step'] = step
+                break
+
+
+def fail_job(job, returncode, stderr, stdout):
+    """Mark a job failed after a non-zero generator exit"""
+    job['status'] = 'failed'
+    job['logs'].append(f'[ERROR] Generation failed with return code {returncode}')
+    # Capture error details from both stdout and stderr
+    error_output = []
+    if stderr:
+        error_output.append("STDERR:\n" + stderr[-1000:])  # Last 1000 chars
+    if stdout:
+        error_output.append("STDOUT:\n" + stdout[-1000:])
+    job['error_details'] = '\n\n'.join(error_output) if error_output else 'Generation failed. Check logs for details.'
+
+
+def timeout_job(job, cmd):
+    """Mark a job timed out"""
+    job['status'] = 'timeout'
+    limit = f"{job_timeout(job)} seconds"
+    job['logs'].append(f'[ERROR] Generation timed out after {limit}')
+    job['error_details'] = f'Model generation timed out after {limit} (the limit for this configuration, from the predicted render time). This usually means OpenSCAD is taking too long to render the model. Try simplifying your configuration (smaller dimensions or fewer rings).\n\nCommand: {cmd}'
+
+
+def complete_job(job, config_name):
+    """Register a job's output files (in the artifact store) and mark it completed"""
+    # List output files
+    outputs = {}
+    for file_type, file_path in output_paths(config_name).items():
+        if file_path.exists():
+            outputs[file_type] = {
+                'filename': file_path.name,
+                'size': file_path.stat().st_size,
+                'path': str(file_path)
+            }
+    store_artifacts(job, outputs)
+    
+    # Published only once the paths point into the store (status pollers download right away)
+    job['outputs'] = outputs
+    job['progress'] = 100
+    job['current_step'] = 'Complete!'
+    job['status'] = 'completed'
+    job['logs'].append('[INFO] Model generation complete!')
+    index_variant(job, config_name)
+    archive_bom(job)
+
+
+def output_paths(config_name):
+    """Output file per type of a job named ``config_name``"""
+    return {
+        'stl': OUTPUT_DIR / f"{config_name}.stl",
+        'dxf': OUTPUT_DIR / f"{config_name}.dxf",
+        'xlsx': OUTPUT_DIR / f"{config_name}_bom_production.xlsx",
+        'csv': OUTPUT_DIR / f"{config_name}_bom.csv",
+        'jsonl': OUTPUT_DIR / f"{config_name}_bom.jsonl",
+        'png': OUTPUT_DIR / f"{config_name}.png"
+    }
+
+
+def store_artifacts(job, outputs):
+    """Move a job's outputs into the content-addressed store; downloads then serve the blob"""
+    from artifact_store import get_artifact_store
+    store = get_artifact_store()
+    ttl = JOB_TTL_HOURS * 3600 or None
+    deduplicated = 0
+    for file_type, info in outputs.items():
+        try:
+            stored = store.ingest(job['id'], file_type, info['path'], ttl)
+        except OSError as e:
+            job['logs'].append(f'[WARN] {info["filename"]} not stored: {e}')
+            continue
+        info['path'] = stored['path']
+        info['sha256'] = stored['sha256']
+        deduplicated += stored['deduplicated']
+    if deduplicated:
+        job['logs'].append(f'[INFO] {deduplicated} output(s) identical to earlier jobs (stored once)')
+    collect_garbage()
+
+
+def collect_garbage(force=False):
+    """Expire artifact references past JOB_TTL_HOURS, at most every GC_INTERVAL seconds;
+    expired jobs leave the nearest-variant index (no /api/nearest hits or downloads of deleted files)
+    and finished jobs older than the TTL leave JOBS"""
+    from artifact_store import get_artifact_store
+    from variant_index import get_variant_index
+    if force or time.time() - LAST_GC['at'] >= GC_INTERVAL:
+        LAST_GC['at'] = time.time()
+        result = get_artifact_store().gc()
+        expired = result.pop('expired_jobs')
+        result['variants_removed'] = get_variant_index().remove(expired)
+        result['jobs_evicted'] = evict_jobs(expired, time.time() - JOB_TTL_HOURS * 3600 if JOB_TTL_HOURS else None)
+        LAST_GC['result'] = result
+    return LAST_GC['result']
+
+
+def evict_jobs(expired, queued_before=None):
+    """Drop finished jobs from JOBS: those whose artifacts expired and (with a TTL) those queued before
+    ``queued_before``. Completed jobs stay downloadable through the variant index while their artifacts live."""
+    expired = set(expired)
+    evict = [job_id for job_id, job in list(JOBS.items())
+             if job['status'] not in ('queued', 'processing')
+             and (job_id in expired or (queued_before is not None and job['queued_at'] < queued_before))]
+    for job_id in evict:
+        JOBS.pop(job_id, None)
+    return len(evict)
+
+
+def job_params(job):
+    """Resolved SCAD parameters of a job's config (as generate_model.py builds them)"""
+    from params_resolver import build_params
+    import flexibele_params
+    if job['product'] == 'flexibele_verbindingen':
+        return flexibele_params.build_params(job['config'], presets_data('flexibele_verbindingen'))
+    return {'preset': job['config'].get('preset'), **build_params(job['config'], presets_data())}
+
+
+def index_variant(job, config_name):
+    """Add a completed job to the nearest-variant index (/api/nearest)"""
+    from params_resolver import ConfigError
+    from variant_index import get_variant_index, variant_entry
+    try:
+        entry = variant_entry(job['id'], job['product'], config_name, job_params(job), job['outputs'])
+    except ConfigError:
+        return
+    if entry and job['outputs']:
+        get_variant_index().add(entry)
+
+
+def archive_bom(job):
+    """Append a completed job's BOM rows (with production quantities) to the columnar archive (/api/analytics)"""
+    from bom_archive import get_bom_archive, archive_rows, read_jsonl
+    jsonl = job['outputs'].get('jsonl')
+    if not jsonl:
+        return
+    try:
+        production = get_registry().production(job['product'])
+        catalog = get_parts_catalog().by_enum if production else None
+        rows = archive_rows(read_jsonl(jsonl['path']), production, catalog)
+        if rows:
+            get_bom_archive().append(job['product'], rows, job_id=job['id'])
+    except (OSError, ValueError) as e:
+        job['logs'].append(f'[WARN] BOM not archived: {e}')
+
+
+def get_parts_catalog():
+    """Indexed parts/price catalog, loaded once per process on first use"""
+    from parts_catalog import get_catalog
+    return get_catalog(PARTS_FILE, PRICES_FILE)
+
+
+@app.route('/api/sweep', methods=['POST'])
+def sweep():
+    """Evaluate a parameter grid; streams one JSON line per point (validation, BOM, metrics).
+    
+    Optional ``render`` starts generation jobs for selected valid points only:
+    ``{"indices": [...]}`` as they stream by, and/or ``{"best": k, "by": "surface_area_m2"}``
+    after the sweep, for the k points with the lowest metric.
+    """
+    lines, error = sweep_response(request.get_json() or {}, start_generation_job)
+    if error:
+        return jsonify({'error': 'Invalid sweep', 'details': [error]}), 400
+    return Response(stream_with_context(lines), mimetype='application/x-ndjson')
+
+
+def sweep_response(spec, start_job):
+    """/api/sweep: ``(iterator of NDJSON lines, error)``; ``start_job(config) → job_id`` queues a render"""
+    from sweep import run_sweep, build_axes, count_points, sweep_config, BestPoints, SweepError
+    try:
+        render = spec.get('render') or {} if isinstance(spec, dict) else None
+        if not isinstance(render, dict):
+            raise SweepError("sweep spec and 'render' must be JSON objects")
+        indices = render.get('indices', [])
+        if not isinstance(indices, list) or not all(isinstance(i, int) and not isinstance(i, bool) for i in indices):
+            raise SweepError("'render.indices' must be a list of point indices")
+        total = count_points(build_axes(spec.get('axes'), valid_enums()))
+        catalog = get_parts_catalog()
+        points = run_sweep(spec, presets_data(), catalog.by_enum, catalog, get_registry().schema('filterslang'))
+        best = BestPoints(render.get('best', 0), render.get('by', 'surface_area_m2'))
+    except SweepError as e:
+        return None, str(e)
+    
+    render_indices = set(indices)
+    if len(render_indices) + best.k > MAX_SWEEP_RENDERS:
+        return None, f'At most {MAX_SWEEP_RENDERS} points can be rendered per sweep'
+    
+    def lines():
+        started = time.perf_counter()
+        emitted = valid = 0
+        yield json.dumps({'sweep': {'preset': spec.get('preset'), 'points': total}}) + '\n'
+        for result in points:
+            emitted += 1
+            if result['valid']:
+                valid += 1
+                best.offer(result)
+                if result['index'] in render_indices:
+                    result['job_id'] = start_job(sweep_config(spec, result))
+            yield json.dumps(result, ensure_ascii=False) + '\n'
+        for result in best.results():
+            job_id = start_job(sweep_config(spec, result))
+            yield json.dumps({'render': {'index': result['index'], 'job_id': job_id,
+                                         best.by: result['metrics'][best.by]}}) + '\n'
+        yield json.dumps({'summary': {
+            'points': emitted,
+            'valid': valid,
+            'invalid': emitted - valid,
+            'seconds': round(time.perf_counter() - started, 3)
+        }}) + '\n'
+    
+    return lines(), None
+
+
+@app.route('/api/cost', methods=['POST'])
+def cost_order():
+    """Quote technical BOM records (``boms``) or a completed job (``job_id``) × ``quantity``"""
+    result, error = cost_response(request.get_json() or {})
+    if error:
+        return jsonify({'error': error[0]}), error[1]
+    return jsonify(result)
+
+
+def cost_response(body):
+    """/api/cost payload: ``(result, (error, status))``"""
+    from bom_production import production_record
+    from bom_costing import cost_batch
+    boms, quantity, error = request_boms(body)
+    if error:
+        return None, error
+    
+    catalog = get_parts_catalog()
+    return cost_batch([production_record(b, catalog.by_enum) for b in boms], catalog, quantity), None
+
+
+@app.route('/api/nesting', methods=['POST'])
+def nest_order():
+    """Nest the cut pieces of technical BOM records (``boms``) or a completed job (``job_id``) onto roll stock"""
+    result, error = nesting_response(request.get_json() or {})
+    if error:
+        return jsonify({'error': error[0]}), error[1]
+    return jsonify(result)
+
+
+def nesting_response(body):
+    """/api/nesting payload: ``(result, (error, status))``"""
+    from bom_production import production_record
+    from nesting import nest_batch, load_roll_stock, DEFAULT_BUDGET_S
+    boms, quantity, error = request_boms(body)
+    if error:
+        return None, error
+    time_budget = body.get('time_budget', DEFAULT_BUDGET_S)
+    if not isinstance(time_budget, (int, float)) or not 0 < time_budget <= MAX_NESTING_BUDGET:
+        return None, (f'time_budget must be between 0 and {MAX_NESTING_BUDGET} seconds', 400)
+    
+    catalog = get_parts_catalog()
+    prod = [production_record(b, catalog.by_enum) for b in boms]
+    return nest_batch(boms, prod, load_roll_stock(ROLLS_FILE), quantity, time_budget,
+                      cut_list=bool(body.get('cut_list', True))), None
+
+
+def request_boms(body):
+    """Technical BOM records and order quantity from a cost/nesting request: ``(boms, quantity, (error, status))``"""
+    if not isinstance(body, dict):
+        return None, None, ('Request body must be a JSON object', 400)
+    quantity = body.get('quantity', 1)
+    if not isinstance(quantity, int) or quantity < 1:
+        return None, None, ('quantity must be a positive integer', 400)
+    
+    if 'job_id' in body:
+        job = JOBS.get(body['job_id'])
+        if not job:
+            return None, None, ('Job not found', 404)
+        jsonl = job.get('outputs', {}).get('jsonl')
+        if not jsonl or not Path(jsonl['path']).exists():
+            return None, None, ('Job has no BOM output', 404)
+        with open(jsonl['path'], encoding='utf-8') as f:
+            boms = [json.loads(line) for line in f if line.strip()]
+    else:
+        boms = body.get('boms')
+        if not isinstance(boms, list) or not boms:
+            return None, None, ('Provide job_id or a non-empty boms list', 400)
+    return boms, quantity, None
 
 
 @app.route('/api/generate/<job_id>', methods=['GET'])
@@ -335,54 +938,187 @@ def get_job_status(job_id):
     if job_id not in JOBS:
         return jsonify({'error': 'Job not found'}), 404
     
-    job = JOBS[job_id]
-    
+    return jsonify(job_status(JOBS[job_id]))
+
+
+def job_status(job, backlog=None):
+    """Status payload for /api/generate/<job_id>"""
     response = {
         'job_id': job['id'],
         'status': job['status'],
         'progress': job['progress'],
         'current_step': job['current_step'],
         'logs': job['logs'][-20:],  # Last 20 log lines
+        'timings': job.get('timings', []),
         'outputs': job.get('outputs', {})
     }
+    estimate = job.get('estimate')
+    if estimate:
+        response['estimate'] = {k: estimate[k] for k in ('seconds', 'p90', 'lane', 'timeout')}
+        response['eta_seconds'] = job_eta(job, backlog)
     
     # Include error details if job failed
     if job['status'] in ['failed', 'error', 'timeout']:
         response['error_details'] = job.get('error_details', 'Check logs for details')
     
-    return jsonify(response)
+    return response
+
+
+def job_eta(job, backlog=None):
+    """Predicted seconds until a job completes (None once it finished).
+
+    A job waiting for a local render slot also waits for the predicted remainder of the running jobs
+    and the jobs ahead of it, spread over RENDER_WORKERS slots. ``backlog``: job id → those seconds,
+    read from the scheduler's waiting and running sets (default: the Flask scheduler's).
+    """
+    estimate = job['estimate']
+    now = time.time()
+    if job['status'] == 'processing':
+        return round(max(estimate['seconds'] - (now - job.get('started_at', now)), 0), 1)
+    if job['status'] != 'queued':
+        return None
+    if RENDER_BACKEND == 'queue':
+        return estimate['seconds']
+    ahead = (backlog or SCHEDULER.backlog)(job['id']) or 0.0
+    return round(ahead / RENDER_WORKERS + estimate['seconds'], 1)
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus scrape endpoint (per-stage and per-job duration histograms)"""
+    return Response(METRICS.render(), content_type=METRICS.CONTENT_TYPE)
 
 
 @app.route('/api/download/<job_id>/<file_type>', methods=['GET'])
 def download_file(job_id, file_type):
     """Download a generated file"""
-    if job_id not in JOBS:
-        return jsonify({'error': 'Job not found'}), 404
+    file_info, error = download_info(job_id, file_type)
+    if error:
+        return jsonify({'error': error}), 404
     
-    job = JOBS[job_id]
+    return send_file(
+        Path(file_info['path']),
+        as_attachment=True,
+        download_name=file_info['filename']
+    )
+
+
+@app.route('/api/mesh/<job_id>', methods=['GET'])
+def get_mesh(job_id):
+    """Viewer mesh of a job's STL at one level of detail (``?lod=0`` coarsest), as quantised GLB"""
+    path, headers, error, status = mesh_info(job_id, request.args.to_dict())
+    if error:
+        return jsonify({'error': error}), status
+    
+    response = send_file(path, mimetype='model/gltf-binary')
+    response.headers.update(headers)
+    return response
+
+
+def mesh_info(job_id, args):
+    """LOD mesh file of a job for the viewer (built on first request): ``(path, headers, error, status)``"""
+    from mesh_lod import get_lod, LOD_GRIDS
+    try:
+        level = int(args.get('lod', 0))
+    except ValueError:
+        return None, None, 'lod must be an integer', 400
+    if not 0 <= level < len(LOD_GRIDS):
+        return None, None, f'lod must be between 0 and {len(LOD_GRIDS) - 1}', 400
+    
+    file_info, error = download_info(job_id, 'stl')
+    if error:
+        return None, None, error, 404
+    
+    # Levels are cached under the STL's content hash: a job's mesh never changes
+    path = get_lod(file_info['path'], level, file_info.get('sha256'))
+    return path, {
+        'X-Mesh-LOD': str(level),
+        'X-Mesh-Levels': str(len(LOD_GRIDS)),
+        'Cache-Control': 'public, max-age=31536000, immutable',
+    }, None, 200
+
+
+@app.route('/api/thumbnails', methods=['GET'])
+def get_thumbnails():
+    """Catalogue thumbnails: recommended preset variants and example configs with their PNG URL (null until rendered)"""
+    return jsonify({'thumbnails': thumbnails_response()})
+
+
+def thumbnails_response():
+    from thumbnails import catalogue
+    return [
+        {**{k: entry[k] for k in ('label', 'product', 'config')},
+         'url': f"/api/thumbnail/{entry['key']}.png" if entry['rendered'] else None}
+        for entry in catalogue()
+    ]
+
+
+@app.route('/api/thumbnail/<key>.png', methods=['GET'])
+def get_thumbnail(key):
+    """Thumbnail PNG by render-cache key (content never changes under a key)"""
+    path = thumbnail_path(key)
+    if path is None:
+        return jsonify({'error': 'Thumbnail not found'}), 404
+    
+    response = send_file(path, mimetype='image/png')
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
+
+def thumbnail_path(key):
+    """Cached thumbnail of a key, or None (keys are SHA-256 hex: nothing else reaches the filesystem)"""
+    from render_cache import RenderCache
+    if len(key) != 64 or any(c not in '0123456789abcdef' for c in key):
+        return None
+    path = RenderCache().path('png', key, '.png')
+    return path if path.exists() else None
+
+
+def download_info(job_id, file_type):
+    """Output entry of a job for download: ``(file_info, error)``"""
+    from variant_index import get_variant_index
+    # Jobs from earlier runs stay downloadable through the nearest-variant index
+    job = JOBS.get(job_id) or get_variant_index().get(job_id)
+    if job is None:
+        return None, 'Job not found'
     
     if file_type not in job.get('outputs', {}):
-        return jsonify({'error': f'File type {file_type} not found'}), 404
+        return None, f'File type {file_type} not found'
     
     file_info = job['outputs'][file_type]
-    file_path = Path(file_info['path'])
     
-    if not file_path.exists():
-        return jsonify({'error': 'File not found on disk'}), 404
+    if not Path(file_info['path']).exists():
+        return None, 'File not found on disk'
     
-    return send_file(
-        file_path,
-        as_attachment=True,
-        download_name=file_info['filename']
-    )
+    return file_info, None
 
 
 @app.route('/api/generate-flexibele', methods=['POST'])
 def generate_flexibele_model():
     """Start a flexibele verbindingen model generation job"""
     config = request.get_json()
+    errors = flexibele_errors(config)
     
-    # Validate required fields
+    if errors:
+        return jsonify({
+            'error': 'Configuration validation failed',
+            'details': errors
+        }), 400
+    
+    job_id = start_generation_job(config, 'flexibele_verbindingen')
+    
+    return jsonify({
+        'job_id': job_id,
+        'status': 'queued',
+        'created_at': JOBS[job_id]['created_at']
+    })
+
+
+def flexibele_errors(config):
+    """Validate a flexibele verbindingen config; returns a list of error strings"""
+    from params_resolver import ConfigError
+    import flexibele_params
+    from connector_data import get_connector_data
     errors = []
     if 'name' not in config:
         errors.append('Configuration name is required')
@@ -395,7 +1131,7 @@ def generate_flexibele_model():
     
     # Validate connectors exist
     for end in ['connector_end1', 'connector_end2']:
-        if config.get(end) not in CONNECTOR_DATABASE:
+        if config.get(end) not in get_connector_data().connectors:
             errors.append(f'{end}: Unknown connector type')
     
     # Validate dimensions
@@ -403,124 +1139,180 @@ def generate_flexibele_model():
         errors.append('Inner diameter must be less than outer diameter')
     
     if errors:
-        return jsonify({
-            'error': 'Configuration validation failed',
-            'details': errors
-        }), 400
-    
-    # Create job ID
-    job_id = str(uuid.uuid4())[:8]
+        return errors
     
-    # Create job metadata
-    JOBS[job_id] = {
-        'id': job_id,
-        'status': 'queued',
-        'progress': 0,
-        'current_step': 'Initializing flexibele verbindingen generation...',
-        'created_at': datetime.now().isoformat(),
-        'config': config,
-        'logs': [],
-        'outputs': {}
-    }
+    # Resolve to SCAD parameters (variant preset, enums, quality tier) as generate_model.py will
+    try:
+        _, param_errors = flexibele_params.resolve_params(config, presets_data('flexibele_verbindingen'))
+    except ConfigError as e:
+        param_errors = [str(e)]
+    return errors + param_errors
+
+
+@app.route('/api/flexibele/compatible', methods=['GET', 'POST'])
+def flexibele_compatible():
+    """Ranked feasible (connector_end1, connector_end2, BFM material, ring count) combinations for partial requirements"""
+    from compatibility import find_compatible, CompatibilityError
+    requirements = request.get_json(silent=True) if request.method == 'POST' else request.args.to_dict()
+    requirements = dict(requirements or {})
+    try:
+        limit = int(requirements.pop('limit', COMPATIBLE_LIMIT))
+        result = find_compatible(requirements, presets_data('flexibele_verbindingen'), max(0, limit))
+    except (CompatibilityError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(result)
+
+
+@app.route('/api/flexibele/evaluate', methods=['POST'])
+def flexibele_evaluate():
+    """Phase E 4-block evaluation report for a flexibele verbindingen config (no render)"""
+    from params_resolver import ConfigError
+    import flexibele_params
+    from flexibele_evaluation import evaluate as evaluate_flexibele
+    config = request.get_json(silent=True) or {}
+    try:
+        params = flexibele_params.build_params(config, presets_data('flexibele_verbindingen'))
+    except ConfigError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(evaluate_flexibele(params))
+
+
+@app.route('/api/nearest', methods=['GET'])
+def nearest_variants():
+    """k nearest already generated variants to L/D/t (``?D=172&L=2300&k=3``), optionally filtered by enums"""
+    result, error = nearest_response(request.args.to_dict())
+    if error:
+        return jsonify({'error': error}), 400
+    return jsonify(result)
+
+
+def nearest_response(args):
+    """/api/nearest payload from query args: ``(result, error)``"""
+    from variant_index import get_variant_index, AXES, PRODUCT_FIELDS
+    product = args.pop('product', 'filterslang')
+    if product not in PRODUCT_FIELDS:
+        return None, f'Unknown product: {product}'
+    try:
+        k = min(max(1, int(args.pop('k', NEAREST_DEFAULT_K))), NEAREST_MAX_K)
+        values = {axis: args.pop(axis, None) for axis in AXES}
+        query = {axis: float(value) for axis, value in values.items() if value not in (None, '')}
+    except ValueError as e:
+        return None, f'Invalid number: {e}'
+    not_finite = [axis for axis, value in query.items() if not math.isfinite(value)]
+    if not_finite:
+        return None, f'Invalid number: {", ".join(not_finite)} must be finite'
+    if not query:
+        return None, f'At least one of {", ".join(AXES)} is required'
+    unknown = sorted(set(args) - set(PRODUCT_FIELDS[product][1]))
+    if unknown:
+        return None, f'Unknown filter(s) {unknown}; valid: {list(PRODUCT_FIELDS[product][1])}'
     
-    # Start generation in background thread
-    thread = threading.Thread(target=run_flexibele_generation, args=(job_id, config))
-    thread.daemon = True
-    thread.start()
+    started = time.perf_counter()
+    index = get_variant_index()
+    matches = index.nearest(product, query, k, args)
+    elapsed = time.perf_counter() - started
     
-    return jsonify({
-        'job_id': job_id,
-        'status': 'queued',
-        'created_at': JOBS[job_id]['created_at']
-    })
+    variants = []
+    for distance, entry in matches:
+        variants.append({
+            'job_id': entry['job_id'],
+            'name': entry['name'],
+            'distance': round(distance, 4),
+            **dict(zip(AXES, entry['point'])),
+            'enums': entry['enums'],
+            'completed_at': entry['completed_at'],
+            'outputs': {
+                kind: {'filename': info['filename'], 'size': info['size'],
+                       'url': f"/api/download/{entry['job_id']}/{kind}"}
+                for kind, info in entry['outputs'].items()
+            }
+        })
+    return {
+        'product': product,
+        'query': query,
+        'filters': args,
+        'indexed': len(index),
+        'query_ms': round(elapsed * 1000, 3),
+        'variants': variants
+    }, None
 
 
-def run_flexibele_generation(job_id, config):
-    """Background task to run flexibele verbindingen model generation"""
-    job = JOBS[job_id]
-    
+@app.route('/api/storage', methods=['GET'])
+def storage_report():
+    """Artifact store report: physical vs logical bytes, dedup ratio per output type, TTL state"""
+    return jsonify(storage_response())
+
+
+def storage_response():
+    from artifact_store import get_artifact_store
+    return {
+        **get_artifact_store().report(),
+        'ttl_hours': JOB_TTL_HOURS,
+        'last_gc': {'at': LAST_GC['at'] or None, **(LAST_GC['result'] or {})},
+    }
+
+
+@app.route('/api/analytics', methods=['GET'])
+def bom_analytics():
+    """Aggregations over the BOM archive of all completed jobs
+    (``?product=filterslang&from=2026-07-01&to=2026-09-30&material=PE_500&sum=cut_length_estimate_m&group_by=month``)"""
+    result, error = analytics_response(request.args.to_dict())
+    if error:
+        return jsonify({'error': error}), 400
+    return jsonify(result)
+
+
+def analytics_response(args):
+    """/api/analytics payload from query args: ``(result, error)``; remaining args are column=value[,value] filters"""
+    from bom_archive import get_bom_archive, parse_metrics, ArchiveError, AGGREGATES
+    product = args.pop('product', None)
+    date_from = args.pop('from', None)
+    date_to = args.pop('to', None)
+    group_by = [g for g in args.pop('group_by', '').split(',') if g]
+    metrics = parse_metrics({agg: args.pop(agg, '') for agg in AGGREGATES})
+    where = {column: value.split(',') for column, value in args.items()}
+    started = time.perf_counter()
     try:
-        job['status'] = 'processing'
-        job['progress'] = 10
-        job['current_step'] = 'Creating configuration file...'
-        
-        # Create temporary config YAML
-        config_name = config.get('name', 'unnamed')
-        config_yaml_file = OUTPUT_DIR / f"{config_name}_config.yaml"
-        
-        with open(config_yaml_file, 'w', encoding='utf-8') as f:
-            yaml.dump(config, f)
-        
-        job['logs'].append('[INFO] Flexibele verbindingen configuration created')
-        job['progress'] = 30
-        job['current_step'] = 'Preparing 3D model generation...'
-        
-        # For now, simulate flexibele verbindingen generation
-        # In production, this would call the appropriate OpenSCAD scripts
-        job['logs'].append('[INFO] Sector: ' + config.get('sector', 'Unknown'))
-        job['logs'].append('[INFO] Medium: ' + config.get('medium', 'Unknown'))
-        job['logs'].append('[INFO] Connectors: ' + config.get('connector_end1', 'N/A') + ' / ' + config.get('connector_end2', 'N/A'))
-        
-        job['progress'] = 50
-        job['current_step'] = 'This feature is coming soon!'
-        job['logs'].append('[INFO] Flexibele verbindingen generation is currently in development')
-        job['logs'].append('[INFO] Placeholder generation for UI demonstration')
-        
-        job['progress'] = 100
-        job['current_step'] = 'Complete (Placeholder)'
-        job['status'] = 'completed'
-        job['logs'].append('[INFO] Placeholder generation complete - Feature in development')
-        
-        # Create placeholder output files
-        output_files = {
-            'scad': OUTPUT_DIR / f"{config_name}.scad",
-            'dxf': OUTPUT_DIR / f"{config_name}.dxf",
-            'jsonl': OUTPUT_DIR / f"{config_name}_bom.jsonl"
-        }
-        
-        # Create placeholder files so downloads work
-        for file_type, file_path in output_files.items():
-            if not file_path.exists():
-                with open(file_path, 'w') as f:
-                    if file_type == 'scad':
-                        f.write('// Placeholder OpenSCAD file - Feature in development\n')
-                    elif file_type == 'dxf':
-                        f.write('0\nSECTION\n2\nHEADER\n')
-                    else:
-                        f.write('{"placeholder": true, "product": "flexibele_verbindingen"}\n')
-            
-            job['outputs'][file_type] = {
-                'filename': file_path.name,
-                'size': file_path.stat().st_size,
-                'path': str(file_path)
-            }
-        
-    except Exception as e:
-        job['status'] = 'error'
-        error_msg = str(e)
-        job['logs'].append(f'[ERROR] {error_msg}')
-        job['error_details'] = f'Error during flexibele verbindingen generation:\n{error_msg}'
+        result = get_bom_archive().query(product, date_from, date_to, where, group_by, metrics)
+    except ArchiveError as e:
+        return None, str(e)
+    return {
+        'product': product,
+        'from': date_from,
+        'to': date_to,
+        'filters': where,
+        'group_by': group_by,
+        'query_ms': round((time.perf_counter() - started) * 1000, 3),
+        **result
+    }, None
 
 
 @app.route('/api/examples', methods=['GET'])
 def get_examples():
     """Get example configurations"""
+    return payload_response(examples_payload())
+
+
+def load_examples():
+    """Example configurations from configs/example_*.yaml"""
     examples = []
     
     config_files = Path('configs').glob('example_*.yaml')
     for config_file in config_files:
-        with open(config_file, 'r', encoding='utf-8') as f:
-            config = yaml.safe_load(f)
-            examples.append({
-                'id': config_file.stem,
-                'name': config.get('name', config_file.stem),
-                'preset': config.get('preset', 'Unknown'),
-                'config': config
-            })
+        config = load_yaml(config_file)
+        examples.append({
+            'id': config_file.stem,
+            'name': config.get('name', config_file.stem),
+            'preset': config.get('preset', 'Unknown'),
+            'config': config
+        })
     
-    return jsonify({'examples': examples})
+    return examples
 
 
 if __name__ == '__main__':
+    # Replay the nearest-variant journal in the background while the server starts
+    from variant_index import get_variant_index
+    get_variant_index()
     # CRITICAL: Allow all hosts for Replit proxy
     app.run(host='0.0.0.0', port=5000, debug=True)
@@ -0,0 +1,455 @@
+#!/usr/bin/env python3
+"""
+Async (ASGI) frontend for OpenSCAD Filterslang Generator
+Same configurator UI and job API as app.py, served by Quart on an event loop:
+status polls and downloads do not hold a thread each, generation runs through
+asyncio subprocesses and files are streamed with async file I/O.
+
+Run with:  python asgi_app.py            (Hypercorn on 0.0.0.0:5000)
+      or:  hypercorn asgi_app:app --bind 0.0.0.0:5000
+"""
+
+import os
+import asyncio
+import itertools
+import time
+from contextlib import asynccontextmanager
+
+import aiofiles
+from quart import Quart, Response, request, jsonify, send_file
+
+# Presets, job registry, validation and job bookkeeping are shared with the Flask app
+from app import (
+    JOBS, OUTPUT_DIR, PROJECT_ROOT, METRICS, presets_data,
+    RENDER_WORKERS, RENDER_BACKEND, COMPATIBLE_LIMIT,
+    validation_errors, new_job, enqueue_job, job_timeout, generate_command, apply_generator_line, fail_job, timeout_job,
+    complete_job, record_job_metrics, job_status, download_info, flexibele_errors,
+    nearest_response, analytics_response, storage_response, mesh_info, thumbnails_response, thumbnail_path,
+    sweep_response, cost_response, nesting_response,
+    index_payload, presets_payload, preset_payload, connectors_payload, examples_payload,
+)
+from stage_timing import StageTimer
+from render_estimate import LaneQueue
+from http_payloads import conditional
+
+app = Quart(__name__)
+
+# Generator lines can be long (debug dumps); keep well above asyncio's 64 KiB default
+STREAM_LIMIT = 1024 * 1024
+
+# Sweep points evaluated per worker-thread hop while streaming /api/sweep
+SWEEP_BATCH = 500
+
+# Job scheduler: at most RENDER_WORKERS generator processes at once, in the interactive and batch lanes
+# of app.py (waiting jobs hold a future on the serving loop instead of a thread)
+RENDER_LANES = LaneQueue(RENDER_WORKERS)
+
+
+@asynccontextmanager
+async def render_slot(job):
+    """Wait for a render slot in the job's lane (shortest predicted job first on the batch lane)"""
+    estimate = job['estimate']
+    granted = asyncio.get_running_loop().create_future()
+    entry = (job['id'], granted)
+    RENDER_LANES.push(entry, estimate['lane'], estimate['seconds'], key=job['id'])
+    dispatch_render_slots()
+    try:
+        lane = await granted
+    except asyncio.CancelledError:
+        RENDER_LANES.remove(entry)
+        raise
+    try:
+        yield
+    finally:
+        RENDER_LANES.done(lane, entry)
+        dispatch_render_slots()
+
+
+def dispatch_render_slots():
+    """Grant free slots to the next waiting jobs"""
+    while (picked := RENDER_LANES.pop()) is not None:
+        entry, lane = picked
+        granted = entry[1]
+        if granted.done():              # waiter was cancelled
+            RENDER_LANES.done(lane, entry)
+        else:
+            granted.set_result(lane)
+
+
+@app.after_request
+async def allow_cors(response):
+    """Same permissive CORS policy as flask_cors.CORS(app)"""
+    response.headers['Access-Control-Allow-Origin'] = '*'
+    return response
+
+
+@app.before_serving
+async def load_variant_index():
+    """Start replaying the nearest-variant journal (background thread) before the first request"""
+    from variant_index import get_variant_index
+    get_variant_index()
+
+
+@app.route('/')
+async def index():
+    """Serve the main configurator UI"""
+    return payload_response(index_payload())
+
+
+@app.route('/api/presets', methods=['GET'])
+async def get_presets():
+    """Get all preset definitions"""
+    return payload_response(presets_payload())
+
+
+@app.route('/api/presets/<preset_id>', methods=['GET'])
+async def get_preset(preset_id):
+    """Get a specific preset"""
+    payload = preset_payload(preset_id)
+    if payload is None:
+        return jsonify({'error': f'Preset {preset_id} not found'}), 404
+
+    return payload_response(payload)
+
+
+@app.route('/api/connectors', methods=['GET'])
+async def get_connectors():
+    """Get connector database"""
+    return payload_response(connectors_payload())
+
+
+def payload_response(payload):
+    """Precomputed payload as a conditional response (304 on a matching ETag, pre-compressed body)"""
+    status, headers, body = conditional(
+        payload, request.headers.get('If-None-Match'), request.headers.get('Accept-Encoding'))
+    return Response(body, status=status, headers=headers)
+
+
+@app.route('/api/bfm', methods=['GET'])
+async def get_bfm_data():
+    """BFM product, connector, ring and spigot tables (compiled from bfm_data.scad)"""
+    from connector_data import get_connector_data
+    return jsonify(get_connector_data().to_json())
+
+
+@app.route('/api/validate', methods=['POST'])
+async def validate_config():
+    """Validate a configuration without generating"""
+    config = await request.get_json()
+    errors, warnings = validation_errors(config)
+
+    return jsonify({
+        'valid': len(errors) == 0,
+        'errors': errors,
+        'warnings': warnings
+    })
+
+
+@app.route('/api/generate', methods=['POST'])
+async def generate_model():
+    """Start a model generation job"""
+    config = await request.get_json()
+
+    # Validate first
+    errors, _ = validation_errors(config)
+
+    if errors:
+        return jsonify({
+            'error': 'Configuration validation failed',
+            'details': errors
+        }), 400
+
+    job_id = new_job(config)
+    schedule_generation(job_id, config)
+
+    return jsonify({
+        'job_id': job_id,
+        'status': 'queued',
+        'created_at': JOBS[job_id]['created_at']
+    })
+
+
+def schedule_generation(job_id, config):
+    """Run a new job in this process, or hand it to the render workers (RENDER_BACKEND=queue)"""
+    if RENDER_BACKEND == 'queue':
+        enqueue_job(job_id, config)
+    else:
+        app.add_background_task(run_generation, job_id, config)
+
+
+async def run_generation(job_id, config):
+    """Background task: wait for a render slot, then run model generation"""
+    async with render_slot(JOBS[job_id]):
+        await generate(job_id, config)
+
+
+async def generate(job_id, config):
+    """Run model generation (asyncio subprocess, live progress)"""
+    job = JOBS[job_id]
+    started = time.perf_counter()
+    timer = StageTimer(emit=False, quality=job['quality'])
+    job['timings'] = timer.spans
+    timer.record('queue_wait', time.time() - job['queued_at'], started_at=job['queued_at'])
+
+    try:
+        job['status'] = 'processing'
+        job['started_at'] = time.time()
+        job['progress'] = 10
+        job['current_step'] = 'Creating configuration file...'
+
+        # Create temporary config YAML
+        config_name = config.get('name', 'unnamed')
+        config_yaml_file = OUTPUT_DIR / f"{config_name}_config.yaml"
+
+        import yaml
+        with timer.stage('config_write'):
+            async with aiofiles.open(config_yaml_file, 'w', encoding='utf-8') as f:
+                await f.write(yaml.dump(config))
+
+        job['logs'].append('[INFO] Configuration file created')
+        job['progress'] = 20
+        job['current_step'] = 'Running model generator...'
+
+        # Run generate_model.py
+        cmd = generate_command(config_yaml_file, job['product'])
+
+        job['logs'].append(f"[INFO] Executing: {' '.join(cmd)}")
+
+        with timer.stage('generate_total'):
+            proc = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                cwd=str(PROJECT_ROOT),  # Run from project root for proper library resolution
+                limit=STREAM_LIMIT
+            )
+            try:
+                stderr, stdout = await asyncio.wait_for(read_generator_output(proc, job), job_timeout(job))
+            except asyncio.TimeoutError:
+                proc.kill()
+                await proc.wait()
+                timeout_job(job, cmd)
+                return
+
+        if proc.returncode != 0:
+            fail_job(job, proc.returncode, stderr, stdout)
+            return
+
+        # Hashing and storing the outputs is file I/O: off the event loop
+        await asyncio.to_thread(complete_job, job, config_name)
+
+    except Exception as e:
+        job['status'] = 'error'
+        error_msg = str(e)
+        job['logs'].append(f'[ERROR] {error_msg}')
+        job['error_details'] = f'Unexpected error during generation:\n{error_msg}\n\nThis may be due to invalid configuration format or system issues. Please check your inputs and try again.'
+    finally:
+        record_job_metrics(job, started)
+
+
+async def read_generator_output(proc, job):
+    """Apply stderr lines to the job as they arrive; returns ``(stderr, stdout)`` once the process exits"""
+    stdout_task = asyncio.ensure_future(proc.stdout.read())
+    stderr_lines = []
+    async for raw in proc.stderr:
+        line = raw.decode('utf-8', errors='replace').rstrip('\r\n')
+        stderr_lines.append(line)
+        apply_generator_line(job, line)
+    stdout = await stdout_task
+    await proc.wait()
+    return '\n'.join(stderr_lines), stdout.decode('utf-8', errors='replace')
+
+
+@app.route('/api/generate/<job_id>', methods=['GET'])
+async def get_job_status(job_id):
+    """Get status of a generation job"""
+    if job_id not in JOBS:
+        return jsonify({'error': 'Job not found'}), 404
+
+    return jsonify(job_status(JOBS[job_id], RENDER_LANES.backlog))
+
+
+@app.route('/metrics', methods=['GET'])
+async def metrics():
+    """Prometheus scrape endpoint (per-stage and per-job duration histograms)"""
+    return Response(METRICS.render(), content_type=METRICS.CONTENT_TYPE)
+
+
+@app.route('/api/download/<job_id>/<file_type>', methods=['GET'])
+async def download_file(job_id, file_type):
+    """Download a generated file (streamed with async file I/O)"""
+    file_info, error = download_info(job_id, file_type)
+    if error:
+        return jsonify({'error': error}), 404
+
+    return await send_file(
+        file_info['path'],
+        as_attachment=True,
+        attachment_filename=file_info['filename']
+    )
+
+
+@app.route('/api/mesh/<job_id>', methods=['GET'])
+async def get_mesh(job_id):
+    """Viewer mesh of a job's STL at one level of detail (a first request builds the levels off the event loop)"""
+    path, headers, error, status = await asyncio.to_thread(mesh_info, job_id, request.args.to_dict())
+    if error:
+        return jsonify({'error': error}), status
+
+    response = await send_file(path, mimetype='model/gltf-binary')
+    response.headers.update(headers)
+    return response
+
+
+@app.route('/api/thumbnails', methods=['GET'])
+async def get_thumbnails():
+    """Catalogue thumbnails: recommended preset variants and example configs with their PNG URL (null until rendered)"""
+    return jsonify({'thumbnails': await asyncio.to_thread(thumbnails_response)})
+
+
+@app.route('/api/thumbnail/<key>.png', methods=['GET'])
+async def get_thumbnail(key):
+    """Thumbnail PNG by render-cache key (content never changes under a key)"""
+    path = thumbnail_path(key)
+    if path is None:
+        return jsonify({'error': 'Thumbnail not found'}), 404
+
+    response = await send_file(path, mimetype='image/png')
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
+
+@app.route('/api/generate-flexibele', methods=['POST'])
+async def generate_flexibele_model():
+    """Start a flexibele verbindingen model generation job"""
+    config = await request.get_json()
+    errors = flexibele_errors(config)
+
+    if errors:
+        return jsonify({
+            'error': 'Configuration validation failed',
+            'details': errors
+        }), 400
+
+    job_id = new_job(config, 'flexibele_verbindingen')
+    schedule_generation(job_id, config)
+
+    return jsonify({
+        'job_id': job_id,
+        'status': 'queued',
+        'created_at': JOBS[job_id]['created_at']
+    })
+
+
+@app.route('/api/flexibele/compatible', methods=['GET', 'POST'])
+async def flexibele_compatible():
+    """Ranked feasible (connector_end1, connector_end2, BFM material, ring count) combinations for partial requirements"""
+    from compatibility import find_compatible, CompatibilityError
+    requirements = (await request.get_json(silent=True)) if request.method == 'POST' else request.args.to_dict()
+    requirements = dict(requirements or {})
+    try:
+        limit = int(requirements.pop('limit', COMPATIBLE_LIMIT))
+        result = find_compatible(requirements, presets_data('flexibele_verbindingen'), max(0, limit))
+    except (CompatibilityError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(result)
+
+
+@app.route('/api/flexibele/evaluate', methods=['POST'])
+async def flexibele_evaluate():
+    """Phase E 4-block evaluation report for a flexibele verbindingen config (no render)"""
+    from params_resolver import ConfigError
+    import flexibele_params
+    from flexibele_evaluation import evaluate as evaluate_flexibele
+    config = (await request.get_json(silent=True)) or {}
+    try:
+        params = flexibele_params.build_params(config, presets_data('flexibele_verbindingen'))
+    except ConfigError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(evaluate_flexibele(params))
+
+
+@app.route('/api/sweep', methods=['POST'])
+async def sweep():
+    """Evaluate a parameter grid; streams one JSON line per point (points are evaluated off the event loop)"""
+    spec = (await request.get_json(silent=True)) or {}
+    loop = asyncio.get_running_loop()
+
+    def start_job(config):
+        # Called from the worker thread: register now, schedule the render on the serving loop
+        job_id = new_job(config)
+        loop.call_soon_threadsafe(schedule_generation, job_id, config)
+        return job_id
+
+    lines, error = await asyncio.to_thread(sweep_response, spec, start_job)
+    if error:
+        return jsonify({'error': 'Invalid sweep', 'details': [error]}), 400
+
+    async def stream():
+        while batch := await asyncio.to_thread(list, itertools.islice(lines, SWEEP_BATCH)):
+            yield ''.join(batch).encode('utf-8')
+
+    return Response(stream(), mimetype='application/x-ndjson')
+
+
+@app.route('/api/cost', methods=['POST'])
+async def cost_order():
+    """Quote technical BOM records (``boms``) or a completed job (``job_id``) × ``quantity``"""
+    result, error = await asyncio.to_thread(cost_response, (await request.get_json(silent=True)) or {})
+    if error:
+        return jsonify({'error': error[0]}), error[1]
+    return jsonify(result)
+
+
+@app.route('/api/nesting', methods=['POST'])
+async def nest_order():
+    """Nest cut pieces onto roll stock (the time-budgeted search runs in a worker thread)"""
+    result, error = await asyncio.to_thread(nesting_response, (await request.get_json(silent=True)) or {})
+    if error:
+        return jsonify({'error': error[0]}), error[1]
+    return jsonify(result)
+
+
+@app.route('/api/nearest', methods=['GET'])
+async def nearest_variants():
+    """k nearest already generated variants to L/D/t (``?D=172&L=2300&k=3``), optionally filtered by enums"""
+    # In a thread: the first queries wait for the journal replay
+    result, error = await asyncio.to_thread(nearest_response, request.args.to_dict())
+    if error:
+        return jsonify({'error': error}), 400
+    return jsonify(result)
+
+
+@app.route('/api/storage', methods=['GET'])
+async def storage_report():
+    """Artifact store report: physical vs logical bytes, dedup ratio per output type, TTL state"""
+    return jsonify(await asyncio.to_thread(storage_response))
+
+
+@app.route('/api/analytics', methods=['GET'])
+async def bom_analytics():
+    """Aggregations over the BOM archive of all completed jobs (segment reads run off the event loop)"""
+    result, error = await asyncio.to_thread(analytics_response, request.args.to_dict())
+    if error:
+        return jsonify({'error': error}), 400
+    return jsonify(result)
+
+
+@app.route('/api/examples', methods=['GET'])
+async def get_examples():
+    """Get example configurations"""
+    # Rebuilt (YAML parsing) only after an example file changed: off the event loop then
+    return payload_response(await asyncio.to_thread(examples_payload))
+
+
+if __name__ == '__main__':
+    from hypercorn.asyncio import serve
+    from hypercorn.config import Config
+
+    config = Config()
+    # Allow all hosts for Replit proxy
+    config.bind = [f"0.0.0.0:{os.environ.get('PORT', '5000')}"]
+    # Idle pollers and slow downloads should not be dropped under load
+    config.backlog = 2048
+    config.keep_alive_timeout = 30
+    asyncio.run(serve(app, config))
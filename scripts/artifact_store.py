@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+# scripts/artifact_store.py
+# Content-addressed store for job artifacts (STL, DXF, BOM files): every output is stored once under
+# its SHA-256, jobs hold references (job_id, kind) with an expiry, and the named file in
+# out/custom_models becomes a hardlink to the blob (or, where hardlinks are not possible, is dropped
+# and downloads resolve through the reference table). Byte-identical geometry of differently named
+# jobs therefore takes the disk space of one file.
+#
+#   out/blobs/objects/<sha[:2]>/<sha>    read-only blobs
+#   out/blobs/store.sqlite              blobs (sha256, size) + refs (job_id, kind → sha256, expires_at)
+#
+#   python scripts/artifact_store.py --report
+#   python scripts/artifact_store.py --gc
+#   python scripts/artifact_store.py --adopt out/custom_models --ttl-hours 168
+
+import os, json, time, shutil, sqlite3, hashlib, argparse, threading
+from contextlib import contextmanager
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+# ARTIFACT_STORE: a directory API nodes and render workers share (scripts/render_worker.py)
+DEFAULT_DIR = Path(os.environ.get("ARTIFACT_STORE", ROOT / "out" / "blobs"))
+
+CHUNK = 1024 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    sha256 TEXT PRIMARY KEY, size INTEGER NOT NULL, created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS refs (
+    job_id TEXT NOT NULL, kind TEXT NOT NULL, sha256 TEXT NOT NULL,
+    filename TEXT, named_path TEXT, created_at REAL NOT NULL, expires_at REAL,
+    PRIMARY KEY (job_id, kind)
+);
+CREATE INDEX IF NOT EXISTS refs_by_sha256 ON refs (sha256);
+CREATE INDEX IF NOT EXISTS refs_by_expiry ON refs (expires_at);
+"""
+
+# Output kind by file name suffix (--adopt of existing out/custom_models files)
+ADOPT_KINDS = {
+    ".stl": "stl",
+    ".dxf": "dxf",
+    "_bom_production.xlsx": "xlsx",
+    "_bom.csv": "csv",
+    "_bom.jsonl": "jsonl",
+    ".png": "png",
+}
+
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class ArtifactStore:
+    """Blob directory + SQLite reference table; safe to share between threads and processes (API nodes
+    and render workers): writes hold the database write lock for the whole transaction."""
+
+    def __init__(self, root=DEFAULT_DIR, link=True):
+        self.root = Path(root)
+        self.objects = self.root / "objects"
+        self.db_path = self.root / "store.sqlite"
+        self.link = link
+        self.root.mkdir(parents=True, exist_ok=True)
+        con = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            con.execute("PRAGMA journal_mode=WAL")
+            con.executescript(SCHEMA)
+        finally:
+            con.close()
+
+    @contextmanager
+    def _connect(self, mode="IMMEDIATE"):
+        """One transaction (committed on success), closed afterwards. IMMEDIATE (writes) takes the write
+        lock up front, so ingest() and gc() in different processes never interleave; DEFERRED for reads."""
+        con = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        try:
+            con.execute(f"BEGIN {mode}")
+            try:
+                yield con
+            except BaseException:
+                con.execute("ROLLBACK")
+                raise
+            con.execute("COMMIT")
+        finally:
+            con.close()
+
+    def blob_path(self, sha):
+        return self.objects / sha[:2] / sha
+
+    def _put(self, src, sha):
+        """Move ``src`` into the store as blob ``sha`` (or drop it when the blob exists); returns True if new."""
+        blob = self.blob_path(sha)
+        if blob.exists():
+            os.unlink(src)
+            return False
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        tmp = blob.with_name(f"{sha}.{os.getpid()}.tmp")
+        try:
+            os.replace(src, tmp)
+        except OSError:            # other file system: copy, then drop the original
+            shutil.copyfile(src, tmp)
+            os.unlink(src)
+        os.chmod(tmp, 0o444)
+        os.replace(tmp, blob)
+        return True
+
+    def ingest(self, job_id, kind, path, ttl_s=None, now=None):
+        """Store one job output; the named ``path`` becomes a hardlink to the blob where possible.
+
+        Returns ``{"sha256", "path" (blob), "size", "deduplicated", "linked"}``.
+        """
+        path = Path(path)
+        now = now or time.time()
+        sha = file_sha256(path)
+        size = path.stat().st_size
+        with self._connect() as con:
+            # Reference first, in the write transaction: a gc() elsewhere cannot take the existing blob
+            # for an orphan between the check in _put() and the reference
+            con.execute("INSERT OR IGNORE INTO blobs VALUES (?, ?, ?)", (sha, size, now))
+            con.execute("INSERT OR REPLACE INTO refs VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (job_id, kind, sha, path.name, None, now, now + ttl_s if ttl_s else None))
+            new = self._put(path, sha)
+            blob = self.blob_path(sha)
+            linked = False
+            if self.link:
+                try:
+                    os.link(blob, path)
+                    linked = True
+                except OSError:
+                    pass           # no hardlinks here: named downloads resolve through refs
+            if linked:
+                con.execute("UPDATE refs SET named_path = ? WHERE job_id = ? AND kind = ?", (str(path), job_id, kind))
+        return {"sha256": sha, "path": str(blob), "size": size, "deduplicated": not new, "linked": linked}
+
+    def detach(self, paths):
+        """Unlink named files that are hardlinks to blobs, before a job writes new content under the
+        same names (writers truncate in place, which would change the shared blob)."""
+        for path in paths:
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            if st.st_nlink > 1:
+                os.unlink(path)
+
+    def resolve(self, job_id, kind):
+        """Blob path of a job output, or None."""
+        with self._connect("DEFERRED") as con:
+            row = con.execute("SELECT sha256 FROM refs WHERE job_id = ? AND kind = ?", (job_id, kind)).fetchone()
+        return self.blob_path(row[0]) if row else None
+
+    def outputs(self, kind, since=None, until=None):
+        """``[(job_id, blob path)]`` of one output kind, by creation time (``since`` <= created_at < ``until``).
+        Jobs with identical content each keep their own entry."""
+        with self._connect("DEFERRED") as con:
+            rows = con.execute("SELECT job_id, sha256 FROM refs WHERE kind = ? AND created_at >= ? AND created_at < ? "
+                               "ORDER BY created_at", (kind, since or 0, until or float("inf"))).fetchall()
+        return [(job_id, self.blob_path(sha)) for job_id, sha in rows]
+
+    def refcount(self, sha):
+        with self._connect("DEFERRED") as con:
+            return con.execute("SELECT COUNT(*) FROM refs WHERE sha256 = ?", (sha,)).fetchone()[0]
+
+    def release(self, job_id):
+        """Drop all references of a job (its blobs go at the next gc() when nothing else uses them)."""
+        with self._connect() as con:
+            return con.execute("DELETE FROM refs WHERE job_id = ?", (job_id,)).rowcount
+
+    def gc(self, now=None):
+        """Expire references past their TTL, then delete blobs no reference uses.
+
+        ``expired_jobs`` in the result lists the jobs that lost their last reference (for the caller's
+        job registry and variant index).
+        """
+        now = now or time.time()
+        result = {"expired_refs": 0, "named_removed": 0, "blobs_removed": 0, "bytes_freed": 0, "expired_jobs": []}
+        with self._connect() as con:
+            expired = con.execute("SELECT job_id, kind, sha256, named_path FROM refs "
+                                  "WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,)).fetchall()
+            live = {row[0] for row in con.execute(
+                "SELECT named_path FROM refs WHERE named_path IS NOT NULL AND "
+                "(expires_at IS NULL OR expires_at > ?)", (now,))}
+            for job_id, kind, sha, named in expired:
+                blob = self.blob_path(sha)
+                try:
+                    if named and named not in live and os.path.samefile(named, blob):
+                        os.unlink(named)
+                        result["named_removed"] += 1
+                except OSError:
+                    pass
+            con.executemany("DELETE FROM refs WHERE job_id = ? AND kind = ?", [(j, k) for j, k, _, _ in expired])
+            result["expired_refs"] = len(expired)
+            remaining = {row[0] for row in con.execute("SELECT DISTINCT job_id FROM refs")}
+            result["expired_jobs"] = sorted({row[0] for row in expired} - remaining)
+            orphans = con.execute("SELECT sha256, size FROM blobs "
+                                  "WHERE sha256 NOT IN (SELECT sha256 FROM refs)").fetchall()
+            for sha, size in orphans:
+                blob = self.blob_path(sha)
+                try:
+                    os.chmod(blob, 0o644)
+                    os.unlink(blob)
+                except FileNotFoundError:
+                    pass
+                result["blobs_removed"] += 1
+                result["bytes_freed"] += size
+            con.executemany("DELETE FROM blobs WHERE sha256 = ?", [(sha,) for sha, _ in orphans])
+        return result
+
+    def report(self, now=None):
+        """Storage report: physical vs logical bytes, dedup ratio, per kind, pending expiry."""
+        now = now or time.time()
+        with self._connect("DEFERRED") as con:
+            blobs, physical = con.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM blobs").fetchone()
+            refs, jobs, logical = con.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT r.job_id), COALESCE(SUM(b.size), 0) "
+                "FROM refs r JOIN blobs b USING (sha256)").fetchone()
+            kinds = {}
+            for kind, n, kind_logical, unique, kind_physical in con.execute(
+                    "SELECT r.kind, COUNT(*), SUM(b.size), COUNT(DISTINCT r.sha256), "
+                    "(SELECT SUM(size) FROM blobs WHERE sha256 IN (SELECT sha256 FROM refs WHERE kind = r.kind)) "
+                    "FROM refs r JOIN blobs b USING (sha256) GROUP BY r.kind ORDER BY r.kind"):
+                kinds[kind] = {"refs": n, "blobs": unique, "logical_bytes": kind_logical,
+                               "physical_bytes": kind_physical,
+                               "dedup_ratio": round(kind_logical / kind_physical, 3) if kind_physical else None}
+            expired, next_expiry = con.execute(
+                "SELECT SUM(expires_at <= ?), MIN(CASE WHEN expires_at > ? THEN expires_at END) FROM refs "
+                "WHERE expires_at IS NOT NULL", (now, now)).fetchone()
+            linked = con.execute("SELECT COUNT(*) FROM refs WHERE named_path IS NOT NULL").fetchone()[0]
+        return {
+            "blobs": blobs,
+            "refs": refs,
+            "jobs": jobs,
+            "physical_bytes": physical,
+            "logical_bytes": logical,
+            "saved_bytes": logical - physical,
+            "dedup_ratio": round(logical / physical, 3) if physical else None,
+            "hardlinked_refs": linked,
+            "expired_refs": expired or 0,
+            "next_expiry": next_expiry,
+            "kinds": kinds,
+        }
+
+
+_STORES = {}
+_STORES_LOCK = threading.Lock()
+
+
+def get_artifact_store(root=DEFAULT_DIR):
+    """Process-wide store for ``root``."""
+    key = str(root)
+    with _STORES_LOCK:
+        if key not in _STORES:
+            _STORES[key] = ArtifactStore(root)
+        return _STORES[key]
+
+
+def adopt(store, directory, ttl_s=None):
+    """Move existing outputs of a directory into the store (job id ``file:<name>``, TTL from mtime)."""
+    adopted = 0
+    for path in sorted(Path(directory).iterdir()):
+        if not path.is_file() or path.stat().st_nlink > 1:
+            continue
+        for suffix, kind in ADOPT_KINDS.items():
+            if path.name.endswith(suffix):
+                name = path.name[:-len(suffix)]
+                store.ingest(f"file:{name}", kind, path, ttl_s, now=path.stat().st_mtime)
+                adopted += 1
+                break
+    return adopted
+
+
+def _size(n):
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if abs(n) < 1024 or unit == "GiB":
+            return f"{n:.1f} {unit}" if unit != "B" else f"{n} B"
+        n /= 1024
+
+
+def main():
+    p = argparse.ArgumentParser(description="Content-addressed artifact store: report, garbage collection, adoption")
+    p.add_argument("--store", default=str(DEFAULT_DIR), help="Store directory")
+    p.add_argument("--report", action="store_true", help="Print the storage report")
+    p.add_argument("--gc", action="store_true", help="Expire references past their TTL and delete unused blobs")
+    p.add_argument("--adopt", help="Move the existing outputs of a directory (out/custom_models) into the store")
+    p.add_argument("--ttl-hours", type=float, default=0, help="TTL for --adopt (0 = keep)")
+    p.add_argument("--json", action="store_true", help="JSON output")
+    args = p.parse_args()
+
+    store = ArtifactStore(args.store)
+    if args.adopt:
+        n = adopt(store, args.adopt, args.ttl_hours * 3600 or None)
+        print(f"✓ Adopted {n} file(s) from {args.adopt}")
+    if args.gc:
+        from variant_index import get_variant_index
+        result = store.gc()
+        # Expired jobs leave the nearest-variant index too (journalled; a running server sees it after a restart)
+        result["variants_removed"] = get_variant_index().remove(result["expired_jobs"])
+        print(json.dumps(result) if args.json else
+              f"✓ GC: {result['expired_refs']} expired reference(s), {result['blobs_removed']} blob(s) "
+              f"removed, {_size(result['bytes_freed'])} freed, {result['variants_removed']} variant(s) unindexed")
+    if args.report or not (args.adopt or args.gc):
+        report = store.report()
+        if args.json:
+            print(json.dumps(report, indent=2))
+            return
+        print(f"{report['blobs']} blob(s), {report['refs']} reference(s) from {report['jobs']} job(s)")
+        print(f"  physical {_size(report['physical_bytes'])}, logical {_size(report['logical_bytes'])}, "
+              f"saved {_size(report['saved_bytes'])}, dedup ratio {report['dedup_ratio'] or '-'}")
+        for kind, k in report["kinds"].items():
+            print(f"  {kind:<6} {k['refs']:6d} refs  {k['blobs']:6d} blobs  {_size(k['physical_bytes']):>10}  "
+                  f"ratio {k['dedup_ratio']}")
+        print(f"  {report['expired_refs']} reference(s) past TTL (removed at the next gc)")
+
+
+if __name__ == "__main__":
+    main()
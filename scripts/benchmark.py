@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+# scripts/benchmark.py
+# Reproducible performance benchmarks for the BOM tooling and the generation API → JSON report
+#
+#   python scripts/benchmark.py                              # all suites, default sizes
+#   python scripts/benchmark.py --suite render_bom --echo-lines 1000,100000
+#   python scripts/benchmark.py --baseline out/benchmarks/release_1.0.json --max-regression 0.25
+
+import sys, os, json, time, argparse, platform, subprocess, tempfile, random, statistics, threading, shutil
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from urllib import request as urlreq
+
+ROOT = Path(__file__).resolve().parent.parent
+SCRIPTS = ROOT / "scripts"
+sys.path.insert(0, str(SCRIPTS))
+from stage_timing import parse_span_line
+
+SUITES = ["render_bom", "bom_producer", "bom_diff", "config_to_params", "nesting", "api"]
+
+p = argparse.ArgumentParser(description="Benchmark BOM tooling and the generation API; write results as JSON")
+p.add_argument("--suite", action="append", choices=SUITES + ["all"], help="Suite(s) to run (default: all)")
+p.add_argument("--echo-lines", default="1000,100000,1000000", help="Synthetic echo sizes for render_bom")
+p.add_argument("--bom-records", default="1000,10000,50000", help="Record counts for bom_producer")
+p.add_argument("--diff-records", default="1000,100000", help="Record counts for bom_diff")
+p.add_argument("--nesting-records", default="1000,10000", help="Record counts for nesting (~5 pieces each)")
+p.add_argument("--config-runs", type=int, default=10, help="Invocations per example config for config_to_params")
+p.add_argument("--api-jobs", type=int, default=20, help="Generation jobs submitted in the API suite")
+p.add_argument("--api-concurrency", type=int, default=8, help="Concurrent API clients")
+p.add_argument("--stub-delay", type=float, default=0.2, help="Seconds the stub openscad sleeps per render")
+p.add_argument("--repeat", type=int, default=3, help="Repetitions per case (min and median reported)")
+p.add_argument("--seed", type=int, default=1234, help="Seed for synthetic data")
+p.add_argument("--output", default="", help="Result JSON (default: out/benchmarks/benchmark_<timestamp>.json)")
+p.add_argument("--baseline", default="", help="Earlier result JSON to compare against")
+p.add_argument("--max-regression", type=float, default=0.25,
+               help="Fail (exit 1) when a case is this much slower than the baseline (0.25 = +25%%)")
+args = p.parse_args()
+
+suites = SUITES if not args.suite or "all" in args.suite else args.suite
+rng = random.Random(args.seed)
+work = Path(tempfile.mkdtemp(prefix="bench_"))
+results = []
+
+
+def sizes(spec):
+    return [int(x) for x in spec.split(",") if x.strip()]
+
+
+def log(msg):
+    print(f"[BENCH] {msg}", file=sys.stderr, flush=True)
+
+
+def measure(cmd, stdin_path=None, expect_rc=0):
+    """Run a command ``args.repeat`` times; return timings plus the last run's stderr."""
+    runs = []
+    stderr = ""
+    for _ in range(args.repeat):
+        stdin = open(stdin_path, "rb") if stdin_path else subprocess.DEVNULL
+        try:
+            t0 = time.perf_counter()
+            res = subprocess.run(cmd, stdin=stdin, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                                 cwd=str(ROOT))
+            runs.append(time.perf_counter() - t0)
+        finally:
+            if stdin_path:
+                stdin.close()
+        stderr = res.stderr.decode("utf-8", errors="ignore")
+        if res.returncode != expect_rc:
+            raise RuntimeError(f"{' '.join(map(str, cmd))} exited {res.returncode}:\n{stderr[-1000:]}")
+    return {"min_s": round(min(runs), 6), "median_s": round(statistics.median(runs), 6),
+            "runs_s": [round(r, 6) for r in runs]}, stderr
+
+
+def add_result(suite, case, n, timing, **extra):
+    rec = {"suite": suite, "case": case, "n": n, **timing, **extra}
+    if n and timing.get("min_s"):
+        rec["per_s"] = round(n / timing["min_s"], 1)
+    results.append(rec)
+    log(f"{suite:<17} {case:<24} min {timing.get('min_s', 0):9.4f}s  median {timing.get('median_s', 0):9.4f}s")
+
+
+# --- Synthetic data ---
+TOPS = ["klemband", "sponsrubber", "koordzoom", "onafgewerkt", "gezoomd", "kopring", "snapring", "viltring"]
+BOTTOMS = {"enkel": ["zonder", "lusje", "gat", "gat_lusje", "doorlaat_ophangstang"],
+           "dubbel": ["zonder", "lusje", "gat", "gat_lusje", "doorlaat_ophangstang"],
+           "platdicht": ["zonder", "ophangstang", "zoom"]}
+
+
+def synthetic_kv(i):
+    L = rng.randrange(500, 5001, 10)
+    n = rng.randrange(0, 12)
+    bottom = rng.choice(list(BOTTOMS))
+    reinforce = rng.random() < 0.5
+    return [
+        "L", L, "D", rng.randrange(80, 501, 10), "t", rng.choice([1.5, 1.8, 2, 2.2]),
+        "medium", rng.choice(["PE_500", "PPS_550"]),
+        "top", rng.choice(TOPS), "open_top", rng.random() < 0.1,
+        "bottom", bottom, "bottom_opt", rng.choice(BOTTOMS[bottom]),
+        "rings", [round(L * k / (n + 1), 3) for k in range(1, n + 1)], "ring_w", 10, "ring_t", 2,
+        "reinforce", reinforce, "rein_side", rng.choice(["boven", "onder"]),
+        "rein_spans", [[100, 200]] if reinforce else [],
+        "productzijde", rng.choice(["buiten", "binnen"]),
+    ]
+
+
+def synthetic_record(i):
+    kv = synthetic_kv(i)
+    rec = {"product": "filterslang", "version": "1.0.0", "bom_tag": f"BENCH_{i}"}
+    rec.update(zip(kv[::2], kv[1::2]))
+    return rec
+
+
+NOISE = [
+    'ECHO: "phase", "A", "ok"',
+    "Compiling design (CSG Tree generation)...",
+    "Rendering Polygon Mesh using CGAL...",
+    "WARNING: Ignoring unknown variable 'x' in file filterslang.scad, line 12",
+    "   Top level object is a 3D object:",
+    "   Facets:        960",
+]
+
+
+def write_echo(path, n_lines, bom_every=10):
+    rng.seed(args.seed)
+    with path.open("w", encoding="utf-8") as f:
+        for i in range(n_lines):
+            if i % bom_every == 0:
+                f.write(f'ECHO: "BOM_ITEM:", "BENCH_{i}", {json.dumps(synthetic_kv(i))}\n')
+            else:
+                f.write(NOISE[i % len(NOISE)] + "\n")
+
+
+def write_jsonl(path, n):
+    rng.seed(args.seed)
+    with path.open("w", encoding="utf-8") as f:
+        for i in range(n):
+            f.write(json.dumps(synthetic_record(i), ensure_ascii=False) + "\n")
+
+
+# --- Suites ---
+def bench_render_bom():
+    for n in sizes(args.echo_lines):
+        echo = work / f"synthetic_{n}.echo"
+        write_echo(echo, n)
+        cmd = [sys.executable, str(SCRIPTS / "render_bom.py"), "--product", "filterslang", "--version", "1.0.0",
+               "--echo", str(echo), "--jsonl", str(work / "render_bom_out.jsonl"), "--allow-empty"]
+        timing, _ = measure(cmd)
+        add_result("render_bom", f"{n}_lines", n, timing, bytes=echo.stat().st_size)
+
+
+def bench_bom_producer():
+    try:
+        import openpyxl  # noqa: F401
+        formats = ["csv", "xlsx"]
+    except ImportError:
+        log("openpyxl not installed; skipping XLSX cases")
+        formats = ["csv"]
+    for n in sizes(args.bom_records):
+        jsonl = work / f"bom_{n}.jsonl"
+        write_jsonl(jsonl, n)
+        for fmt in formats:
+            cmd = [sys.executable, str(SCRIPTS / "bom_producer.py"), "--jsonl", str(jsonl),
+                   "--parts", str(ROOT / "data" / "parts.csv"), f"--{fmt}", str(work / f"prod_{n}.{fmt}"),
+                   "--timings"]
+            timing, stderr = measure(cmd)
+            spans = [s for s in map(parse_span_line, stderr.splitlines()) if s]
+            write_s = sum(s["seconds"] for s in spans if s["stage"] == f"{fmt}_write")
+            add_result("bom_producer", f"{fmt}_{n}", n, timing, write_s=round(write_s, 6))
+
+
+def bench_bom_diff():
+    for n in sizes(args.diff_records):
+        golden = work / f"golden_{n}.jsonl"
+        write_jsonl(golden, n)
+        cmd = [sys.executable, str(SCRIPTS / "bom_diff.py"), str(golden), "--epsilon", "0.0005"]
+        timing, _ = measure(cmd, stdin_path=golden)
+        add_result("bom_diff", f"{n}_records", n, timing)
+
+
+def bench_config_to_params():
+    presets = ROOT / "products" / "filterslang" / "presets.yaml"
+    for config in sorted((ROOT / "configs").glob("example_*.yaml")):
+        runs = []
+        for _ in range(args.config_runs):
+            cmd = [sys.executable, str(SCRIPTS / "config_to_params.py"), "--config", str(config),
+                   "--presets", str(presets), "--output", str(work / "params.json")]
+            t0 = time.perf_counter()
+            res = subprocess.run(cmd, capture_output=True, cwd=str(ROOT))
+            runs.append(time.perf_counter() - t0)
+            if res.returncode != 0:
+                raise RuntimeError(f"config_to_params failed for {config.name}:\n{res.stderr.decode()[-1000:]}")
+        timing = {"min_s": round(min(runs), 6), "median_s": round(statistics.median(runs), 6),
+                  "runs_s": [round(r, 6) for r in runs]}
+        add_result("config_to_params", config.stem, 0, timing)
+
+
+def bench_nesting():
+    for n in sizes(args.nesting_records):
+        jsonl = work / f"nest_{n}.jsonl"
+        write_jsonl(jsonl, n)
+        summary = work / "nesting.json"
+        cmd = [sys.executable, str(SCRIPTS / "nesting.py"), "--jsonl", str(jsonl),
+               "--json", str(summary), "--time-budget", "2"]
+        timing, _ = measure(cmd)
+        result = json.loads(summary.read_text(encoding="utf-8"))
+        add_result("nesting", f"{n}_records", n, timing, pieces=sum(s["pieces"] for s in result["stocks"]),
+                   nest_s=result["elapsed_s"], waste_pct=result["waste_pct"])
+
+
+def openscad_stub_shim():
+    """Write an executable ``openscad`` shim that runs stub_openscad.py."""
+    bin_dir = work / "bin"
+    bin_dir.mkdir(exist_ok=True)
+    stub = SCRIPTS / "stub_openscad.py"
+    if os.name == "nt":
+        shim = bin_dir / "openscad.cmd"
+        shim.write_text(f'@"{sys.executable}" "{stub}" %*\r\n', encoding="utf-8")
+    else:
+        shim = bin_dir / "openscad"
+        shim.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{stub}" "$@"\n', encoding="utf-8")
+        shim.chmod(0o755)
+    return shim
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def bench_api():
+    import logging
+    from werkzeug.serving import make_server
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+
+    os.environ["OPENSCAD"] = str(openscad_stub_shim())
+    os.environ["STUB_OPENSCAD_DELAY"] = str(args.stub_delay)
+    os.chdir(ROOT)
+    sys.path.insert(0, str(ROOT))
+    import app as app_module
+
+    server = make_server("127.0.0.1", 0, app_module.app, threaded=True)
+    base = f"http://127.0.0.1:{server.server_port}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    def call(method, path, body=None):
+        data = json.dumps(body).encode() if body is not None else None
+        req = urlreq.Request(base + path, data=data, method=method, headers={"Content-Type": "application/json"})
+        t0 = time.perf_counter()
+        with urlreq.urlopen(req, timeout=60) as resp:
+            payload = json.loads(resp.read())
+        return time.perf_counter() - t0, payload
+
+    poll_latencies = []
+    lock = threading.Lock()
+
+    def one_job(i):
+        config = {
+            "name": f"bench_api_{i}", "preset": "PE_500", "quality": "preview",
+            "overrides": {"L": 2000, "D": 160, "t": 2.0, "top": "snapring", "bottom": "platdicht",
+                          "bottom_opt": "zoom", "rings_auto": True, "rings_count": 6, "ring_w": 10, "ring_t": 2,
+                          "productzijde": "buiten"},
+        }
+        t0 = time.perf_counter()
+        _, submitted = call("POST", "/api/generate", config)
+        job_id = submitted["job_id"]
+        while True:
+            dt, status = call("GET", f"/api/generate/{job_id}")
+            with lock:
+                poll_latencies.append(dt)
+            if status["status"] not in ("queued", "processing"):
+                return time.perf_counter() - t0, status["status"]
+            time.sleep(0.05)
+
+    try:
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.api_concurrency) as pool:
+            outcomes = list(pool.map(one_job, range(args.api_jobs)))
+        elapsed = time.perf_counter() - t0
+    finally:
+        server.shutdown()
+        for f in (ROOT / "out" / "custom_models").glob("bench_api_*"):
+            f.unlink()
+
+    latencies = [lat for lat, _ in outcomes]
+    statuses = {}
+    for _, st in outcomes:
+        statuses[st] = statuses.get(st, 0) + 1
+    timing = {"min_s": round(min(latencies), 6), "median_s": round(statistics.median(latencies), 6),
+              "p95_s": round(percentile(latencies, 0.95), 6), "elapsed_s": round(elapsed, 6)}
+    add_result("api", f"generate_c{args.api_concurrency}", 0, timing, jobs=args.api_jobs,
+               jobs_per_s=round(args.api_jobs / elapsed, 3), statuses=statuses, stub_delay_s=args.stub_delay)
+    poll = {"min_s": round(min(poll_latencies), 6), "median_s": round(statistics.median(poll_latencies), 6),
+            "p95_s": round(percentile(poll_latencies, 0.95), 6)}
+    add_result("api", "status_poll", 0, poll, polls=len(poll_latencies))
+
+
+# --- Run ---
+def git_rev():
+    try:
+        res = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=str(ROOT))
+        return res.stdout.strip() or None
+    except OSError:
+        return None
+
+
+BENCHES = {
+    "render_bom": bench_render_bom,
+    "bom_producer": bench_bom_producer,
+    "bom_diff": bench_bom_diff,
+    "config_to_params": bench_config_to_params,
+    "nesting": bench_nesting,
+    "api": bench_api,
+}
+
+started = time.strftime("%Y-%m-%dT%H:%M:%S")
+try:
+    for name in suites:
+        log(f"--- {name} ---")
+        BENCHES[name]()
+finally:
+    shutil.rmtree(work, ignore_errors=True)
+
+report = {
+    "meta": {
+        "started_at": started,
+        "git_rev": git_rev(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "suites": suites,
+    },
+    "results": results,
+}
+
+out_path = Path(args.output) if args.output else ROOT / "out" / "benchmarks" / f"benchmark_{time.strftime('%Y%m%d_%H%M%S')}.json"
+out_path.parent.mkdir(parents=True, exist_ok=True)
+out_path.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+print(f"✓ Benchmark results written to {out_path}")
+
+# --- Optional regression check against an earlier report ---
+if args.baseline:
+    baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+    previous = {(r["suite"], r["case"]): r for r in baseline.get("results", [])}
+    regressions = []
+    for r in results:
+        old = previous.get((r["suite"], r["case"]))
+        if not old or not old.get("min_s"):
+            continue
+        ratio = r["min_s"] / old["min_s"]
+        flag = "REGRESSION" if ratio > 1 + args.max_regression else ""
+        print(f"{r['suite']:<17} {r['case']:<24} {old['min_s']:9.4f}s → {r['min_s']:9.4f}s  x{ratio:5.2f} {flag}")
+        if flag:
+            regressions.append(r)
+    if regressions:
+        print(f"✗ {len(regressions)} case(s) regressed more than {args.max_regression:.0%}")
+        sys.exit(1)
+    print("✓ No regressions against baseline")
@@ -0,0 +1,564 @@
+#!/usr/bin/env python3
+# scripts/bom_archive.py
+# Columnar BOM archive over all completed jobs, for analytics ("total PE_500 film metres last quarter")
+# without globbing and re-parsing thousands of per-job _bom.jsonl files.
+#
+# Layout: out/archive/bom/product=<product>/date=<YYYY-MM-DD>/
+#   log.jsonl        append-only rows of the open partition (one line per BOM row)
+#   seg-000001.col   immutable columnar segments: numbers (and booleans) as float64 arrays, strings
+#                    dictionary-encoded as uint32 codes; a JSON header holds offsets and dictionaries
+# A log is sealed into a segment once it holds SEGMENT_ROWS rows, or when its day is over. Queries
+# prune partitions on product and date, read only the columns they use and aggregate per segment on
+# the codes (no pyarrow/numpy: stdlib ``array`` columns).
+#
+#   python scripts/bom_archive.py --backfill out/custom_models
+#   python scripts/bom_archive.py --product filterslang --from 2026-07-01 --to 2026-09-30 \
+#       --where material=PE_500 --sum cut_length_estimate_m --group-by material
+#   python scripts/bom_archive.py --bench 2000000
+
+import os, sys, json, math, time, random, struct, argparse, threading
+from array import array
+from collections import OrderedDict, defaultdict
+from datetime import date, datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_DIR = ROOT / "out" / "archive" / "bom"
+
+MAGIC = b"BOMCOL1\n"
+SEGMENT_ROWS = 8192
+COLUMN_CACHE_SIZE = 512     # decoded segment columns kept per process (segments are immutable)
+AGGREGATES = ("sum", "avg", "min", "max")
+# Partition-level pseudo-columns (group_by only; filter them with product / date_from / date_to)
+PARTITION_COLUMNS = ("product", "date", "month")
+NAN = float("nan")
+
+
+class ArchiveError(ValueError):
+    """Malformed archive query."""
+
+
+def _cell(value):
+    """Row value → float (numbers, booleans), str, or None."""
+    if value is None or isinstance(value, (int, float)):
+        return None if value is None else float(value)
+    if isinstance(value, str):
+        return value
+    return json.dumps(value, ensure_ascii=False, sort_keys=True)
+
+
+class Column:
+    """One column of a segment: ``kind`` "f" (float64, NaN = missing) or "s" (codes into ``dictionary``,
+    code 0 = missing)."""
+
+    __slots__ = ("kind", "data", "dictionary", "_codes")
+
+    def __init__(self, kind, data, dictionary=None):
+        self.kind = kind
+        self.data = data
+        self.dictionary = dictionary or []
+        self._codes = None
+
+    @classmethod
+    def encode(cls, values):
+        cells = [_cell(v) for v in values]
+        if all(c is None or isinstance(c, float) for c in cells):
+            return cls("f", array("d", (NAN if c is None else c for c in cells)))
+        codes, dictionary = {}, []
+        data = array("I")
+        for c in cells:
+            if c is None:
+                data.append(0)
+                continue
+            if isinstance(c, float):
+                c = str(int(c)) if c.is_integer() else repr(c)
+            code = codes.get(c)
+            if code is None:
+                dictionary.append(c)
+                code = codes[c] = len(dictionary)
+            data.append(code)
+        return cls("s", data, dictionary)
+
+    def decode(self, code):
+        if self.kind == "f":
+            return None if code is None or code != code else (int(code) if code.is_integer() else code)
+        return self.dictionary[code - 1] if code else None
+
+    def match(self, values):
+        """Stored codes equal to any of the (string) filter values."""
+        if self.kind == "f":
+            wanted = set()
+            for v in values:
+                low = v.lower()
+                if low in ("true", "yes"):
+                    wanted.add(1.0)
+                elif low in ("false", "no"):
+                    wanted.add(0.0)
+                else:
+                    try:
+                        wanted.add(float(v))
+                    except ValueError:
+                        pass
+            return wanted
+        if self._codes is None:
+            self._codes = {s: i for i, s in enumerate(self.dictionary, 1)}
+        return {self._codes[v] for v in values if v in self._codes}
+
+
+class Segment:
+    """Rows of one segment file (columns read on demand) or of an open partition log (in memory)."""
+
+    def __init__(self, rows, path=None, header=None, columns=None):
+        self.rows = rows
+        self.path = path
+        self.header = header
+        self._columns = columns
+
+    @classmethod
+    def from_rows(cls, records):
+        names = []
+        seen = set()
+        for rec in records:
+            for k in rec:
+                if k not in seen:
+                    seen.add(k)
+                    names.append(k)
+        columns = {name: Column.encode([rec.get(name) for rec in records]) for name in names}
+        return cls(len(records), columns=columns)
+
+    @classmethod
+    def open(cls, path):
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ArchiveError(f"{path}: not a BOM archive segment")
+            (size,) = struct.unpack("<I", f.read(4))
+            header = json.loads(f.read(size))
+        header["base"] = len(MAGIC) + 4 + size
+        return cls(header["rows"], path=path, header=header)
+
+    def write(self, path):
+        """Write the segment atomically: header (JSON) + raw column bytes (little-endian)."""
+        blobs, meta, offset = [], [], 0
+        for name, col in self._columns.items():
+            data = col.data
+            if sys.byteorder != "little":
+                data = array(data.typecode, data)
+                data.byteswap()
+            blob = data.tobytes()
+            meta.append({"name": name, "kind": col.kind, "offset": offset, "length": len(blob),
+                         "dictionary": col.dictionary if col.kind == "s" else None})
+            blobs.append(blob)
+            offset += len(blob)
+        header = json.dumps({"rows": self.rows, "columns": meta}, ensure_ascii=False).encode("utf-8")
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            f.write(MAGIC + struct.pack("<I", len(header)) + header)
+            for blob in blobs:
+                f.write(blob)
+        os.replace(tmp, path)
+
+    def column(self, name):
+        """Column ``name``, or None when this segment has no such column."""
+        if self._columns is not None:
+            return self._columns.get(name)
+        key = (str(self.path), name)
+        with _CACHE_LOCK:
+            col = _CACHE.get(key)
+            if col is not None:
+                _CACHE.move_to_end(key)
+                return col
+        meta = next((c for c in self.header["columns"] if c["name"] == name), None)
+        if meta is None:
+            return None
+        data = array("d" if meta["kind"] == "f" else "I")
+        with open(self.path, "rb") as f:
+            f.seek(self.header["base"] + meta["offset"])
+            data.frombytes(f.read(meta["length"]))
+        if sys.byteorder != "little":
+            data.byteswap()
+        col = Column(meta["kind"], data, meta["dictionary"])
+        with _CACHE_LOCK:
+            _CACHE[key] = col
+            if len(_CACHE) > COLUMN_CACHE_SIZE:
+                _CACHE.popitem(last=False)
+        return col
+
+
+_CACHE = OrderedDict()
+_CACHE_LOCK = threading.Lock()
+
+
+def _select(data, idx):
+    return data if idx is None else [data[i] for i in idx]
+
+
+def _keys(col, idx, n):
+    """Group-key codes of a column (None for a missing column or a missing number: NaN != NaN)."""
+    if col is None:
+        return [None] * n
+    data = _select(col.data, idx)
+    if col.kind == "f":
+        return [None if v != v else v for v in data]
+    return data
+
+
+def _segment_groups(segment, filters, group_by, metrics):
+    """Aggregate one segment: ``{decoded key: [count, {metric: [sum, n, min, max]}]}``."""
+    idx = None
+    for name, values in filters.items():
+        col = segment.column(name)
+        if col is None:
+            return {}
+        wanted = col.match(values)
+        if not wanted:
+            return {}
+        data = col.data
+        if idx is None:
+            idx = [i for i, c in enumerate(data) if c in wanted]
+        else:
+            idx = [i for i in idx if data[i] in wanted]
+        if not idx:
+            return {}
+
+    n = segment.rows if idx is None else len(idx)
+    gcols = [segment.column(name) for name in group_by]
+    if not gcols:
+        keys = None
+    elif len(gcols) == 1:
+        keys = _keys(gcols[0], idx, n)
+    else:
+        keys = list(zip(*(_keys(c, idx, n) for c in gcols)))
+
+    counts = {(): n} if keys is None else defaultdict(int)
+    if keys is not None:
+        for k in keys:
+            counts[k] += 1
+    stats = {}
+    for column in {col for _, col in metrics}:
+        col = segment.column(column)
+        if col is None or col.kind != "f":
+            continue
+        values = _select(col.data, idx)
+        acc = {}
+        for k, v in (zip(keys, values) if keys is not None else (((), v) for v in values)):
+            if v != v:
+                continue
+            s = acc.get(k)
+            if s is None:
+                acc[k] = [v, 1, v, v]
+            else:
+                s[0] += v
+                s[1] += 1
+                if v < s[2]:
+                    s[2] = v
+                elif v > s[3]:
+                    s[3] = v
+        stats[column] = acc
+
+    def decode(k):
+        if keys is None:
+            return ()
+        if len(gcols) == 1:
+            return (gcols[0].decode(k) if gcols[0] else None,)
+        return tuple(c.decode(code) if c else None for c, code in zip(gcols, k))
+
+    return {decode(k): (count, {column: acc.get(k) for column, acc in stats.items()}) for k, count in counts.items()}
+
+
+class BomArchive:
+    """Append-only, date/product-partitioned columnar archive of BOM rows."""
+
+    def __init__(self, root=DEFAULT_DIR, segment_rows=SEGMENT_ROWS):
+        self.root = Path(root)
+        self.segment_rows = segment_rows
+        self._lock = threading.Lock()
+        self._log_rows = {}   # partition dir → rows in its log
+
+    def partition(self, product, day):
+        return self.root / f"product={product}" / f"date={day.isoformat()}"
+
+    def append(self, product, rows, job_id="", when=None):
+        """Archive the BOM rows of one job (adds job_id and ts columns); returns the partition dir."""
+        when = when or datetime.now()
+        ts = when.timestamp()
+        lines = "".join(json.dumps({"job_id": job_id, "ts": ts, **row}, ensure_ascii=False) + "\n" for row in rows)
+        part = self.partition(product, when.date())
+        with self._lock:
+            part.mkdir(parents=True, exist_ok=True)
+            log = part / "log.jsonl"
+            with open(log, "a", encoding="utf-8") as f:
+                f.write(lines)
+            count = self._log_rows.get(part)
+            if count is None:
+                count = self._count(log)
+            else:
+                count += len(rows)
+            self._log_rows[part] = count
+            if count >= self.segment_rows:
+                self._seal(part)
+        return part
+
+    @staticmethod
+    def _count(log):
+        with open(log, "rb") as f:
+            return sum(1 for _ in f)
+
+    def _seal(self, part):
+        """Turn a partition log into the next segment (caller holds the lock)."""
+        log = part / "log.jsonl"
+        if not log.exists():
+            return
+        rows = self._read_log(log)
+        if rows:
+            number = 1 + max((int(p.stem.split("-")[1]) for p in part.glob("seg-*.col")), default=0)
+            Segment.from_rows(rows).write(part / f"seg-{number:06d}.col")
+        log.unlink()
+        self._log_rows[part] = 0
+
+    @staticmethod
+    def _read_log(log):
+        rows = []
+        with open(log, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    try:
+                        rows.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        continue   # torn final line of a crashed writer
+        return rows
+
+    def compact(self, include_open=False):
+        """Seal the logs of finished days (and with ``include_open`` today's as well)."""
+        today = date.today().isoformat()
+        sealed = 0
+        with self._lock:
+            for log in sorted(self.root.glob("product=*/date=*/log.jsonl")):
+                if include_open or log.parent.name[5:] < today:
+                    self._seal(log.parent)
+                    sealed += 1
+        return sealed
+
+    def partitions(self, product=None, date_from=None, date_to=None):
+        """``(product, day, dir)`` of the partitions in range (dates as YYYY-MM-DD, inclusive)."""
+        result = []
+        for pdir in sorted(self.root.glob("product=*")):
+            name = pdir.name[len("product="):]
+            if product and name != product:
+                continue
+            for ddir in sorted(pdir.glob("date=*")):
+                day = ddir.name[len("date="):]
+                if (date_from and day < date_from) or (date_to and day > date_to):
+                    continue
+                result.append((name, day, ddir))
+        return result
+
+    def segments(self, part, day):
+        """Segments of a partition; a finished day's log is sealed first, an open one is read in memory."""
+        with self._lock:
+            log = part / "log.jsonl"
+            if log.exists() and day < date.today().isoformat():
+                self._seal(part)
+            segments = [Segment.open(p) for p in sorted(part.glob("seg-*.col"))]
+            if log.exists():
+                rows = self._read_log(log)
+                if rows:
+                    segments.append(Segment.from_rows(rows))
+        return segments
+
+    def query(self, product=None, date_from=None, date_to=None, where=None, group_by=(), metrics=()):
+        """Aggregate archived rows.
+
+        ``where``: ``{column: [values]}`` (equality, any of); ``group_by``: columns, plus the partition
+        columns product/date/month; ``metrics``: ``[(aggregate, column)]`` with aggregate in
+        sum/avg/min/max. Returns ``{"rows": [...], "scanned_rows", "segments", "partitions"}``.
+        """
+        where = {k: [str(v) for v in (vs if isinstance(vs, (list, tuple)) else [vs])] for k, vs in (where or {}).items()}
+        for agg, column in metrics:
+            if agg not in AGGREGATES:
+                raise ArchiveError(f"Unknown aggregate '{agg}'; valid: {', '.join(AGGREGATES)}")
+        for name in where:
+            if name in PARTITION_COLUMNS:
+                raise ArchiveError(f"Filter '{name}' with product / from / to")
+        data_group = [g for g in group_by if g not in PARTITION_COLUMNS]
+        metrics = list(metrics)
+
+        totals = {}
+        scanned = nsegments = 0
+        parts = self.partitions(product, date_from, date_to)
+        for name, day, part in parts:
+            constants = {"product": name, "date": day, "month": day[:7]}
+            for segment in self.segments(part, day):
+                nsegments += 1
+                scanned += segment.rows
+                for key, (count, stats) in _segment_groups(segment, where, data_group, metrics).items():
+                    values = dict(zip(data_group, key))
+                    full = tuple(constants[g] if g in PARTITION_COLUMNS else values[g] for g in group_by)
+                    total = totals.get(full)
+                    if total is None:
+                        total = totals[full] = [0, {}]
+                    total[0] += count
+                    for column, s in stats.items():
+                        if s is None:
+                            continue
+                        t = total[1].get(column)
+                        if t is None:
+                            total[1][column] = list(s)
+                        else:
+                            t[0] += s[0]
+                            t[1] += s[1]
+                            t[2] = min(t[2], s[2])
+                            t[3] = max(t[3], s[3])
+
+        rows = []
+        for key, (count, stats) in sorted(totals.items(), key=lambda kv: tuple("" if v is None else str(v) for v in kv[0])):
+            row = dict(zip(group_by, key))
+            row["count"] = count
+            for agg, column in metrics:
+                s = stats.get(column)
+                if s is None:
+                    value = None
+                elif agg == "sum":
+                    value = s[0]
+                elif agg == "avg":
+                    value = s[0] / s[1]
+                else:
+                    value = s[2] if agg == "min" else s[3]
+                row[f"{agg}_{column}"] = round(value, 6) if isinstance(value, float) else value
+            rows.append(row)
+        return {"rows": rows, "scanned_rows": scanned, "segments": nsegments, "partitions": len(parts)}
+
+
+def archive_rows(tech_rows, production=None, parts_catalog=None):
+    """Rows to archive for one job: technical BOM records merged with their production record
+    (material part numbers, surface area, cut length) when the product has a production mapping."""
+    if production is None:
+        return list(tech_rows)
+    return [{**rec, **production.production_record(rec, parts_catalog)} for rec in tech_rows]
+
+
+def read_jsonl(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+_ARCHIVES = {}
+_ARCHIVES_LOCK = threading.Lock()
+
+
+def get_bom_archive(root=DEFAULT_DIR):
+    """Process-wide archive for ``root``."""
+    key = str(root)
+    with _ARCHIVES_LOCK:
+        if key not in _ARCHIVES:
+            _ARCHIVES[key] = BomArchive(root)
+        return _ARCHIVES[key]
+
+
+def parse_metrics(spec):
+    """``{"sum": "a,b", "avg": "c"}`` (query args) → ``[("sum", "a"), ("sum", "b"), ("avg", "c")]``."""
+    return [(agg, column) for agg in AGGREGATES for column in (spec.get(agg) or "").split(",") if column]
+
+
+def _backfill(archive, directory):
+    """Archive existing per-job BOM files (date = file modification time)."""
+    from product_registry import get_registry
+    registry = get_registry()
+    catalogs, files, rows = {}, 0, 0
+    for path in sorted(Path(directory).glob("*_bom.jsonl")):
+        records = read_jsonl(path)
+        if not records:
+            continue
+        product = records[0].get("product") or "filterslang"
+        production = registry.production(product) if product in registry else None
+        if production is not None and product not in catalogs:
+            catalogs[product] = production.load_parts_catalog(registry.get(product)["parts"])
+        when = datetime.fromtimestamp(path.stat().st_mtime)
+        archive.append(product, archive_rows(records, production, catalogs.get(product)),
+                       job_id=path.name[:-len("_bom.jsonl")], when=when)
+        files += 1
+        rows += len(records)
+    return files, rows
+
+
+def _bench(n, root):
+    rng = random.Random(40)
+    archive = BomArchive(root)
+    media, tops = ["PE_500", "PPS_550"], ["klemband", "kopring", "snapring"]
+    started = time.perf_counter()
+    per_day = max(1, n // 90)
+    day0 = datetime(2026, 7, 1).toordinal()
+    for d in range(0, n, per_day):
+        when = datetime.fromordinal(day0 + d // per_day)
+        rows = []
+        for _ in range(min(per_day, n - d)):
+            L, D = rng.randint(300, 6000), rng.randint(60, 400)
+            rows.append({"product": "filterslang", "medium": rng.choice(media), "material": rng.choice(media),
+                         "top": rng.choice(tops), "length_mm": L, "diameter_mm": D, "ring_count": rng.randint(0, 8),
+                         "surface_area_m2": round(math.pi * D * L / 1e6, 4),
+                         "cut_length_estimate_m": round(math.pi * D * L / 1e3 / 1e3, 2)})
+        archive.append("filterslang", rows, job_id=f"bench{d}", when=when)
+    archive.compact(include_open=True)
+    print(f"{n} rows archived in {time.perf_counter() - started:.2f}s "
+          f"({len(archive.partitions())} partitions)")
+    _CACHE.clear()
+    for label, kwargs in (
+        ("total film metres PE_500", {"where": {"material": ["PE_500"]}, "metrics": [("sum", "cut_length_estimate_m")]}),
+        ("per month × material", {"group_by": ["month", "material"],
+                                  "metrics": [("sum", "cut_length_estimate_m"), ("avg", "diameter_mm")]}),
+        ("per top, one month", {"date_from": "2026-08-01", "date_to": "2026-08-31", "group_by": ["top"],
+                                "metrics": [("sum", "surface_area_m2"), ("max", "length_mm")]}),
+    ):
+        for state in ("cold", "warm"):
+            started = time.perf_counter()
+            result = archive.query(product="filterslang", **kwargs)
+            print(f"{label} ({state}): {(time.perf_counter() - started) * 1000:.0f} ms, "
+                  f"{result['scanned_rows']} rows scanned, {len(result['rows'])} group(s)")
+
+
+def main():
+    p = argparse.ArgumentParser(description="Query (or fill) the columnar BOM archive of completed jobs")
+    p.add_argument("--archive", default=str(DEFAULT_DIR), help="Archive directory")
+    p.add_argument("--product", help="Only this product")
+    p.add_argument("--from", dest="date_from", help="First day (YYYY-MM-DD)")
+    p.add_argument("--to", dest="date_to", help="Last day (YYYY-MM-DD)")
+    p.add_argument("--where", nargs="*", default=[], help="column=value[,value] filters")
+    p.add_argument("--group-by", nargs="*", default=[], help="Columns (and product/date/month)")
+    for agg in AGGREGATES:
+        p.add_argument(f"--{agg}", default="", help=f"Columns to {agg} (comma-separated)")
+    p.add_argument("--backfill", help="Archive existing *_bom.jsonl files of a directory first")
+    p.add_argument("--compact", action="store_true", help="Seal all partition logs into segments")
+    p.add_argument("--bench", type=int, help="Benchmark on N synthetic rows (temporary archive)")
+    args = p.parse_args()
+
+    if args.bench:
+        import tempfile
+        with tempfile.TemporaryDirectory() as tmp:
+            _bench(args.bench, tmp)
+        return
+
+    archive = BomArchive(args.archive)
+    if args.backfill:
+        files, rows = _backfill(archive, args.backfill)
+        print(f"✓ Archived {rows} row(s) from {files} file(s)")
+    if args.compact:
+        print(f"✓ Sealed {archive.compact(include_open=True)} partition log(s)")
+    if args.backfill or args.compact:
+        return
+
+    where = {}
+    for item in args.where:
+        column, _, values = item.partition("=")
+        where[column] = values.split(",")
+    try:
+        result = archive.query(args.product, args.date_from, args.date_to, where, args.group_by,
+                               parse_metrics(vars(args)))
+    except ArchiveError as e:
+        sys.exit(f"ERROR: {e}")
+    for row in result["rows"]:
+        print(json.dumps(row, ensure_ascii=False))
+    print(f"({result['scanned_rows']} rows in {result['segments']} segment(s), {result['partitions']} partition(s))",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
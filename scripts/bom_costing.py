@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# scripts/bom_costing.py
+# Costing stage: production BOM quantities → order cost using catalog price breaks and lead times.
+#
+#   python scripts/bom_costing.py --jsonl out/bom_default.jsonl --quantity 50 --json out/bom_default_cost.json
+#
+# Price breaks are chosen on the quantity per part summed over the whole batch, so a batch
+# of BOMs is quoted as one order.
+
+import sys, json, csv, argparse
+from pathlib import Path
+
+RING_PART = ("ring", "standaard")
+
+
+def part_quantities(prod_rec, catalog):
+    """Quantities of purchased parts for one piece: ``[(part_no, qty, unit, what)]``."""
+    lines = []
+    if prod_rec.get("material_part_no"):
+        lines.append((prod_rec["material_part_no"], prod_rec.get("surface_area_m2", 0), "m2", "film"))
+    if prod_rec.get("top_part_no"):
+        lines.append((prod_rec["top_part_no"], 1, "pcs", "top"))
+    if prod_rec.get("bottom_part_no"):
+        lines.append((prod_rec["bottom_part_no"], 1, "pcs", "bottom"))
+    if prod_rec.get("bottom_option_part_no"):
+        lines.append((prod_rec["bottom_option_part_no"], 1, "pcs", "bottom_option"))
+    if prod_rec.get("ring_count"):
+        ring_part = catalog.lookup(*RING_PART)["part_no"]
+        lines.append((ring_part, prod_rec["ring_count"], "pcs", "rings"))
+    if prod_rec.get("reinforcement_part_no") and prod_rec.get("reinforcement_length_mm"):
+        lines.append((prod_rec["reinforcement_part_no"], prod_rec["reinforcement_length_mm"] / 1000, "m", "reinforcement"))
+    return lines
+
+
+def cost_batch(prod_records, catalog, quantity=1):
+    """Cost a batch of production records, each ordered ``quantity`` times.
+
+    Returns per-record unit/order cost and lead time, per-part totals and the order total.
+    """
+    per_record = [part_quantities(rec, catalog) for rec in prod_records]
+
+    # Hash-aggregate quantities per part so price breaks apply to the whole order
+    totals = {}
+    for lines in per_record:
+        for part_no, qty, unit, _what in lines:
+            entry = totals.get(part_no)
+            if entry is None:
+                entry = totals[part_no] = {"part_no": part_no, "quantity": 0.0, "unit": unit}
+            entry["quantity"] += qty * quantity
+
+    unpriced = []
+    for part_no, entry in totals.items():
+        brk = catalog.price(part_no, entry["quantity"])
+        if brk is None:
+            unpriced.append(part_no)
+            entry.update(unit_price=None, cost=0.0, lead_time_days=None, currency=None)
+        else:
+            entry.update(unit_price=brk["unit_price"], cost=round(entry["quantity"] * brk["unit_price"], 2),
+                         lead_time_days=brk["lead_time_days"], currency=brk["currency"])
+            if brk["price_unit"] and brk["price_unit"] != entry["unit"]:
+                unpriced.append(part_no)  # unit mismatch: refuse to guess a conversion
+                entry.update(unit_price=None, cost=0.0)
+        entry["quantity"] = round(entry["quantity"], 4)
+
+    records = []
+    for rec, lines in zip(prod_records, per_record):
+        unit_cost = 0.0
+        lead = 0
+        for part_no, qty, _unit, _what in lines:
+            entry = totals[part_no]
+            if entry["unit_price"] is not None:
+                unit_cost += qty * entry["unit_price"]
+                lead = max(lead, entry["lead_time_days"] or 0)
+        records.append({
+            "bom_tag": rec.get("bom_tag", ""),
+            "unit_cost": round(unit_cost, 2),
+            "order_cost": round(unit_cost * quantity, 2),
+            "lead_time_days": lead,
+        })
+
+    currencies = {e["currency"] for e in totals.values() if e["currency"]}
+    return {
+        "quantity": quantity,
+        "currency": currencies.pop() if len(currencies) == 1 else sorted(currencies),
+        "order_cost": round(sum(e["cost"] for e in totals.values()), 2),
+        "lead_time_days": max((e["lead_time_days"] or 0 for e in totals.values()), default=0),
+        "records": records,
+        "parts": sorted(totals.values(), key=lambda e: e["part_no"]),
+        "unpriced_parts": sorted(set(unpriced)),
+    }
+
+
+def unit_cost(prod_rec, catalog):
+    """List-price cost of a single piece (first price break)."""
+    return round(sum(qty * brk["unit_price"]
+                     for part_no, qty, unit, _what in part_quantities(prod_rec, catalog)
+                     for brk in [catalog.price(part_no, 0)]
+                     if brk is not None and (not brk["price_unit"] or brk["price_unit"] == unit)), 2)
+
+
+if __name__ == "__main__":
+    from parts_catalog import get_catalog, DEFAULT_PARTS, DEFAULT_PRICES, DEFAULT_DB
+    from bom_production import production_record
+
+    p = argparse.ArgumentParser(description="Cost technical BOM records (JSONL) with catalog price breaks")
+    p.add_argument("--jsonl", required=True, help="Input JSONL file (from render_bom.py)")
+    p.add_argument("--parts", default=str(DEFAULT_PARTS), help="Parts catalog CSV")
+    p.add_argument("--prices", default=str(DEFAULT_PRICES), help="Price breaks CSV")
+    p.add_argument("--db", default=str(DEFAULT_DB), help="SQLite catalog index (rebuilt when sources change)")
+    p.add_argument("--quantity", type=int, default=1, help="Pieces ordered per BOM record")
+    p.add_argument("--json", default="", help="Write the full cost breakdown as JSON")
+    p.add_argument("--csv", default="", help="Write per-record costs as CSV")
+    args = p.parse_args()
+
+    catalog = get_catalog(args.parts, args.prices, args.db)
+    with open(args.jsonl, encoding="utf-8") as f:
+        tech = [json.loads(line) for line in f if line.strip()]
+    result = cost_batch([production_record(rec, catalog.by_enum) for rec in tech], catalog, args.quantity)
+
+    if args.json:
+        Path(args.json).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.json).write_text(json.dumps(result, indent=2, ensure_ascii=False), encoding="utf-8")
+    if args.csv:
+        Path(args.csv).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.csv, "w", newline="", encoding="utf-8") as f:
+            w = csv.DictWriter(f, fieldnames=["bom_tag", "unit_cost", "order_cost", "lead_time_days"])
+            w.writeheader()
+            w.writerows(result["records"])
+    if result["unpriced_parts"]:
+        sys.stderr.write(f"WARNING: no price for {', '.join(result['unpriced_parts'])}\n")
+    print(f"✓ {len(tech)} BOM record(s) × {args.quantity}: {result['order_cost']} {result['currency']}, "
+          f"lead time {result['lead_time_days']} days")
@@ -1,10 +1,6 @@
 # scripts/bom_diff.py
 import sys, json, argparse, math
 
-p = argparse.ArgumentParser(description="Vergelijk huidige BOM JSONL (stdin) met golden JSONL (bestand).")
-p.add_argument("golden", help="Pad naar golden .jsonl")
-p.add_argument("--epsilon", type=float, default=0.0005, help="Tolerantie voor floats")
-args = p.parse_args()
 
 def load_jsonl_from_handle(h):
     out = []
@@ -28,26 +24,40 @@ def eq(a, b, eps):
         return a.keys() == b.keys() and all(eq(a[k], b[k], eps) for k in a.keys())
     return a == b
 
-# golden uit bestand (BOM tolerant)
-with open(args.golden, encoding="utf-8-sig") as f:
-    golden = load_jsonl_from_handle(f)
-
-# current via stdin (BOM tolerant)
-stdin_text = sys.stdin.read()
-if stdin_text.startswith("\ufeff"):
-    stdin_text = stdin_text.lstrip("\ufeff")
-current = [json.loads(l) for l in stdin_text.splitlines() if l.strip()]
-
-ok = True
-if len(golden) != len(current):
-    print(f"Count mismatch: golden {len(golden)} != current {len(current)}")
-    ok = False
-
-for i, (g, c) in enumerate(zip(golden, current)):
-    if not eq(g, c, args.epsilon):
-        print(f"Mismatch at record {i} (epsilon={args.epsilon})")
-        print("GOLDEN:", json.dumps(g, ensure_ascii=False))
-        print("CURRNT:", json.dumps(c, ensure_ascii=False))
-        ok = False
-
-sys.exit(0 if ok else 1)
+def diff_records(golden, current, eps):
+    """Verschillen tussen golden en current als regels tekst (leeg = gelijk); ook gebruikt door smoke_tests.py."""
+    lines = []
+    if len(golden) != len(current):
+        lines.append(f"Count mismatch: golden {len(golden)} != current {len(current)}")
+    for i, (g, c) in enumerate(zip(golden, current)):
+        if not eq(g, c, eps):
+            lines.append(f"Mismatch at record {i} (epsilon={eps})")
+            lines.append("GOLDEN: " + json.dumps(g, ensure_ascii=False))
+            lines.append("CURRNT: " + json.dumps(c, ensure_ascii=False))
+    return lines
+
+
+def main():
+    p = argparse.ArgumentParser(description="Vergelijk huidige BOM JSONL (stdin) met golden JSONL (bestand).")
+    p.add_argument("golden", help="Pad naar golden .jsonl")
+    p.add_argument("--epsilon", type=float, default=0.0005, help="Tolerantie voor floats")
+    args = p.parse_args()
+
+    # golden uit bestand (BOM tolerant)
+    with open(args.golden, encoding="utf-8-sig") as f:
+        golden = load_jsonl_from_handle(f)
+
+    # current via stdin (BOM tolerant)
+    stdin_text = sys.stdin.read()
+    if stdin_text.startswith("\ufeff"):
+        stdin_text = stdin_text.lstrip("\ufeff")
+    current = [json.loads(l) for l in stdin_text.splitlines() if l.strip()]
+
+    lines = diff_records(golden, current, args.epsilon)
+    for line in lines:
+        print(line)
+    sys.exit(1 if lines else 0)
+
+
+if __name__ == "__main__":
+    main()
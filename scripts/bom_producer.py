@@ -2,43 +2,25 @@
 # scripts/bom_producer.py
 # Transform technical BOM (JSONL) → production BOM (CSV/XLSX)
 
-import sys, json, csv, argparse, math
+import sys, json, csv, argparse, time
 from pathlib import Path
-from collections import defaultdict
-
-try:
-    import openpyxl
-    from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-    XLSX_AVAILABLE = True
-except ImportError:
-    XLSX_AVAILABLE = False
-    print("WARNING: openpyxl not installed; XLSX export disabled", file=sys.stderr)
+from stage_timing import StageTimer
+from product_registry import get_registry, ProductError
 
 p = argparse.ArgumentParser(description="Transform technical BOM (JSONL) → production BOM (CSV/XLSX)")
 p.add_argument("--jsonl", required=True, help="Input JSONL file (from render_bom.py)")
-p.add_argument("--parts", required=True, help="Parts catalog CSV (data/parts.csv)")
+p.add_argument("--parts", default="", help="Parts catalog CSV (default: [production].parts of the product manifest)")
+p.add_argument("--product", default="", help="Product (default: the 'product' field of the first BOM record)")
+p.add_argument("--version", default="", help="Product version (informational: BOM records carry their own)")
 p.add_argument("--csv", default="", help="Output CSV file")
 p.add_argument("--xlsx", default="", help="Output XLSX file (requires openpyxl)")
+p.add_argument("--stl", default="", help="Generated STL: measured quantities (mesh_measure.py) for the record "
+               "whose bom_tag is the STL's name, or the only record")
 p.add_argument("--debug", action="store_true", help="Print debug info")
+p.add_argument("--timings", action="store_true", help="Emit [SPAN] timing lines on stderr")
 args = p.parse_args()
 
-# --- Load parts catalog ---
-parts_catalog = defaultdict(lambda: defaultdict(dict))  # [category][enum_value] = {part_no, material_code, ...}
-with open(args.parts, encoding="utf-8") as f:
-    reader = csv.DictReader(f)
-    for row in reader:
-        category = row["category"]
-        enum_val = row["enum_value"]
-        parts_catalog[category][enum_val] = {
-            "material_code": row.get("material_code", ""),
-            "part_no": row.get("part_no", ""),
-            "description": row.get("description", ""),
-            "unit": row.get("unit", ""),
-            "supplier": row.get("supplier", ""),
-        }
-
-if args.debug:
-    sys.stderr.write(f"Loaded {len(parts_catalog)} categories\n")
+timer = StageTimer(emit=args.timings)
 
 # --- Load technical BOM ---
 bom_records = []
@@ -56,112 +38,44 @@ with open(args.jsonl, encoding="utf-8") as f:
 if args.debug:
     sys.stderr.write(f"Loaded {len(bom_records)} BOM records\n")
 
-# --- Transform to production BOM ---
-def lookup_part(category, enum_val):
-    """Lookup part info from catalog; return part_no or enum_val if not found."""
-    if category in parts_catalog and enum_val in parts_catalog[category]:
-        return parts_catalog[category][enum_val]
-    return {"part_no": f"UNMAPPED-{enum_val}", "material_code": enum_val, "description": "UNMAPPED", "unit": "?", "supplier": "?"}
+# --- Production mapping of the product ([production].module in products/<name>/manifest.toml) ---
+registry = get_registry()
+product_name = args.product or (bom_records[0].get("product") if bom_records else "") or "filterslang"
+try:
+    production = registry.production(product_name)
+except ProductError as e:
+    sys.stderr.write(f"ERROR: {e}\n")
+    sys.exit(1)
+if production is None:
+    sys.stderr.write(f"ERROR: product '{product_name}' has no production BOM mapping ([production] in manifest.toml)\n")
+    sys.exit(1)
 
-def calculate_surface_area(D, L):
-    """Calculate surface area of cylinder: π*D*L (outer surface)."""
-    return round(math.pi * D * L / 1_000_000, 4)  # mm² → m²
+# --- Load parts catalog ---
+parts_catalog = production.load_parts_catalog(args.parts or registry.get(product_name)["parts"])
 
-def calculate_cut_length(D, L, rings_count):
-    """Rough estimate: perimeter * L + ring cuts."""
-    perim = math.pi * D
-    ring_cuts = rings_count * perim
-    total = (perim * L + ring_cuts) / 1_000  # mm → m
-    return round(total, 2)
+if args.debug:
+    sys.stderr.write(f"Loaded {len(parts_catalog)} categories\n")
 
-production_bom = []
-for tech_bom in bom_records:
-    rec = {
-        "product": tech_bom.get("product", ""),
-        "version": tech_bom.get("version", ""),
-        "bom_tag": tech_bom.get("bom_tag", ""),
-    }
-    
-    # Basic dimensions
-    L = tech_bom.get("L", 0)
-    D = tech_bom.get("D", 0)
-    t = tech_bom.get("t", 0)
-    rec["length_mm"] = L
-    rec["diameter_mm"] = D
-    rec["thickness_mm"] = t
-    
-    # Material & codes
-    medium = tech_bom.get("medium", "")
-    material_info = lookup_part("material", medium)
-    rec["material"] = medium
-    rec["material_code"] = material_info.get("material_code", "")
-    rec["material_part_no"] = material_info.get("part_no", "")
-    rec["material_supplier"] = material_info.get("supplier", "")
-    
-    # Top
-    top = tech_bom.get("top", "")
-    open_top = tech_bom.get("open_top", False)
-    if not open_top and top:
-        top_info = lookup_part("top", top)
-        rec["top_type"] = top
-        rec["top_part_no"] = top_info.get("part_no", "")
-        rec["top_supplier"] = top_info.get("supplier", "")
-    else:
-        rec["top_type"] = "open" if open_top else ""
-        rec["top_part_no"] = ""
-        rec["top_supplier"] = ""
-    
-    # Bottom
-    bottom = tech_bom.get("bottom", "")
-    bottom_opt = tech_bom.get("bottom_opt", "")
-    bottom_info = lookup_part("bottom", bottom)
-    rec["bottom_type"] = bottom
-    rec["bottom_part_no"] = bottom_info.get("part_no", "")
-    
-    if bottom_opt and bottom_opt != "zonder":
-        bottom_opt_info = lookup_part("bottom_opt", bottom_opt)
-        rec["bottom_option"] = bottom_opt
-        rec["bottom_option_part_no"] = bottom_opt_info.get("part_no", "")
-    else:
-        rec["bottom_option"] = ""
-        rec["bottom_option_part_no"] = ""
-    
-    # Rings
-    rings = tech_bom.get("rings", [])
-    ring_count = len(rings) if rings else 0
-    ring_w = tech_bom.get("ring_w", 0)
-    ring_t = tech_bom.get("ring_t", 0)
-    rec["ring_count"] = ring_count
-    rec["ring_width_mm"] = ring_w
-    rec["ring_thickness_mm"] = ring_t
-    
-    # Reinforcement
-    reinforce_enable = tech_bom.get("reinforce", False)
-    reinforce_side = tech_bom.get("rein_side", "")
-    reinforce_spans = tech_bom.get("rein_spans", [])
-    rec["reinforce_enabled"] = "Yes" if reinforce_enable else "No"
-    
-    if reinforce_enable and reinforce_side:
-        reinf_info = lookup_part("reinforcement", reinforce_side)
-        rec["reinforcement_type"] = reinforce_side
-        rec["reinforcement_part_no"] = reinf_info.get("part_no", "")
-        # Calculate total reinforcement length (sum of spans)
-        total_reinf_length = sum(span[1] - span[0] for span in reinforce_spans if len(span) == 2)
-        rec["reinforcement_length_mm"] = total_reinf_length
-    else:
-        rec["reinforcement_type"] = ""
-        rec["reinforcement_part_no"] = ""
-        rec["reinforcement_length_mm"] = 0
-    
-    # Productzijde
-    productzijde = tech_bom.get("productzijde", "")
-    rec["productzijde"] = productzijde
-    
-    # Calculated fields
-    rec["surface_area_m2"] = calculate_surface_area(D, L)
-    rec["cut_length_estimate_m"] = calculate_cut_length(D, L, ring_count)
-    
-    production_bom.append(rec)
+# --- Transform to production BOM ---
+# --- Measured quantities from the generated STL (surface area, volume, extent) ---
+mesh = None
+if args.stl:
+    from mesh_measure import measure_stl
+    with timer.stage("mesh_measure"):
+        mesh = measure_stl(args.stl)
+    if args.debug:
+        sys.stderr.write(f"Measured {mesh['facets']} facets of {args.stl} ({mesh['engine']}, {mesh['seconds']}s)\n")
+    measured_tag = Path(args.stl).stem if len(bom_records) > 1 else None
+    if measured_tag is not None and all(r.get("bom_tag") != measured_tag for r in bom_records):
+        sys.stderr.write(f"WARNING: no BOM record has bom_tag '{measured_tag}' (the STL's name): "
+                         "measured quantities not applied\n")
+
+production_bom = [
+    production.production_record(tech_bom, parts_catalog, mesh)
+    if mesh is not None and measured_tag in (None, tech_bom.get("bom_tag"))
+    else production.production_record(tech_bom, parts_catalog)
+    for tech_bom in bom_records
+]
 
 if args.debug:
     sys.stderr.write(f"Produced {len(production_bom)} production records\n")
@@ -171,20 +85,9 @@ if args.csv:
     out_csv = Path(args.csv)
     out_csv.parent.mkdir(parents=True, exist_ok=True)
     
-    # Define column order
-    fieldnames = [
-        "product", "version", "bom_tag",
-        "material", "material_code", "material_part_no", "material_supplier",
-        "length_mm", "diameter_mm", "thickness_mm",
-        "top_type", "top_part_no", "top_supplier",
-        "bottom_type", "bottom_option", "bottom_part_no", "bottom_option_part_no",
-        "ring_count", "ring_width_mm", "ring_thickness_mm",
-        "reinforce_enabled", "reinforcement_type", "reinforcement_part_no", "reinforcement_length_mm",
-        "productzijde",
-        "surface_area_m2", "cut_length_estimate_m",
-    ]
+    fieldnames = production.CSV_FIELDS
     
-    with out_csv.open("w", newline="", encoding="utf-8") as f:
+    with timer.stage("csv_write"), out_csv.open("w", newline="", encoding="utf-8") as f:
         writer = csv.DictWriter(f, fieldnames=fieldnames, restval="")
         writer.writeheader()
         for rec in production_bom:
@@ -194,29 +97,23 @@ if args.csv:
 
 # --- Export XLSX ---
 if args.xlsx:
-    if not XLSX_AVAILABLE:
+    # openpyxl is imported only for XLSX output: CSV-only runs do not pay for its import
+    try:
+        import openpyxl
+        from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+    except ImportError:
         sys.stderr.write("ERROR: openpyxl required for XLSX export. Install: pip install openpyxl\n")
         sys.exit(1)
     
     out_xlsx = Path(args.xlsx)
     out_xlsx.parent.mkdir(parents=True, exist_ok=True)
     
+    xlsx_t0 = time.perf_counter()
     wb = openpyxl.Workbook()
     ws = wb.active
     ws.title = "BOM"
     
-    # Define columns
-    fieldnames = [
-        "product", "version", "bom_tag",
-        "material", "material_code", "material_part_no",
-        "length_mm", "diameter_mm", "thickness_mm",
-        "top_type", "top_part_no",
-        "bottom_type", "bottom_option",
-        "ring_count", "ring_width_mm", "ring_thickness_mm",
-        "reinforce_enabled", "reinforcement_type", "reinforcement_length_mm",
-        "productzijde",
-        "surface_area_m2", "cut_length_estimate_m",
-    ]
+    fieldnames = production.XLSX_FIELDS
     
     # Header styling
     header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
@@ -249,6 +146,7 @@ if args.xlsx:
         ws.column_dimensions[openpyxl.utils.get_column_letter(col_idx)].width = min(max_length, 30)
     
     wb.save(out_xlsx)
+    timer.record("xlsx_write", time.perf_counter() - xlsx_t0)
     print(f"✓ XLSX exported to {out_xlsx}")
 
 print("✓ BOM production complete")
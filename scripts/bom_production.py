@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# scripts/bom_production.py
+# Technical BOM record → production BOM record (shared by bom_producer.py, the API and batch tools)
+
+import csv, math
+from collections import defaultdict
+
+# Column order for the production CSV
+CSV_FIELDS = [
+    "product", "version", "bom_tag",
+    "material", "material_code", "material_part_no", "material_supplier",
+    "length_mm", "diameter_mm", "thickness_mm",
+    "top_type", "top_part_no", "top_supplier",
+    "bottom_type", "bottom_option", "bottom_part_no", "bottom_option_part_no",
+    "ring_count", "ring_width_mm", "ring_thickness_mm",
+    "reinforce_enabled", "reinforcement_type", "reinforcement_part_no", "reinforcement_length_mm",
+    "productzijde",
+    "surface_area_m2", "cut_length_estimate_m",
+    "measured_surface_area_m2", "measured_volume_cm3", "measured_sheet_area_m2",
+    "measured_length_mm", "measured_diameter_mm",
+]
+
+# Column order for the production XLSX (sheet "BOM")
+XLSX_FIELDS = [
+    "product", "version", "bom_tag",
+    "material", "material_code", "material_part_no",
+    "length_mm", "diameter_mm", "thickness_mm",
+    "top_type", "top_part_no",
+    "bottom_type", "bottom_option",
+    "ring_count", "ring_width_mm", "ring_thickness_mm",
+    "reinforce_enabled", "reinforcement_type", "reinforcement_length_mm",
+    "productzijde",
+    "surface_area_m2", "cut_length_estimate_m",
+    "measured_surface_area_m2", "measured_volume_cm3", "measured_sheet_area_m2",
+    "measured_length_mm", "measured_diameter_mm",
+]
+
+
+def load_parts_catalog(path):
+    """Read parts.csv into ``catalog[category][enum_value] = {part_no, material_code, ...}``."""
+    parts_catalog = defaultdict(lambda: defaultdict(dict))
+    with open(path, encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            category = row["category"]
+            enum_val = row["enum_value"]
+            parts_catalog[category][enum_val] = {
+                "material_code": row.get("material_code", ""),
+                "part_no": row.get("part_no", ""),
+                "description": row.get("description", ""),
+                "unit": row.get("unit", ""),
+                "supplier": row.get("supplier", ""),
+            }
+    return parts_catalog
+
+
+def lookup_part(parts_catalog, category, enum_val):
+    """Lookup part info from catalog; return part_no or enum_val if not found."""
+    if category in parts_catalog and enum_val in parts_catalog[category]:
+        return parts_catalog[category][enum_val]
+    return {"part_no": f"UNMAPPED-{enum_val}", "material_code": enum_val, "description": "UNMAPPED", "unit": "?", "supplier": "?"}
+
+
+def calculate_surface_area(D, L):
+    """Calculate surface area of cylinder: π*D*L (outer surface)."""
+    return round(math.pi * D * L / 1_000_000, 4)  # mm² → m²
+
+
+def calculate_cut_length(D, L, rings_count):
+    """Rough estimate: perimeter * L + ring cuts."""
+    perim = math.pi * D
+    ring_cuts = rings_count * perim
+    total = (perim * L + ring_cuts) / 1_000  # mm → m
+    return round(total, 2)
+
+
+def measured_quantities(mesh, t):
+    """Production fields from a mesh measurement (scripts/mesh_measure.py) of the generated STL.
+
+    The sheet area is the solid's volume over the nominal thickness: film incl. rings, bottom,
+    reinforcement and loops, where calculate_surface_area() only sees the cylinder.
+    """
+    volume = mesh["volume_mm3"]
+    return {
+        "measured_surface_area_m2": round(mesh["surface_area_mm2"] / 1_000_000, 4),
+        "measured_volume_cm3": round(volume / 1_000, 2),
+        "measured_sheet_area_m2": round(volume / t / 1_000_000, 4) if t else "",
+        "measured_length_mm": round(mesh["length_mm"], 1),
+        "measured_diameter_mm": round(mesh["max_diameter_mm"], 1),
+    }
+
+
+def production_record(tech_bom, parts_catalog, mesh=None):
+    """Transform one technical BOM record (render_bom.py output) into a production record.
+
+    ``mesh``: measurement of the record's STL (mesh_measure.measure_stl) for the measured_* fields.
+    """
+    rec = {
+        "product": tech_bom.get("product", ""),
+        "version": tech_bom.get("version", ""),
+        "bom_tag": tech_bom.get("bom_tag", ""),
+    }
+
+    # Basic dimensions
+    L = tech_bom.get("L", 0)
+    D = tech_bom.get("D", 0)
+    t = tech_bom.get("t", 0)
+    rec["length_mm"] = L
+    rec["diameter_mm"] = D
+    rec["thickness_mm"] = t
+
+    # Material & codes
+    medium = tech_bom.get("medium", "")
+    material_info = lookup_part(parts_catalog, "material", medium)
+    rec["material"] = medium
+    rec["material_code"] = material_info.get("material_code", "")
+    rec["material_part_no"] = material_info.get("part_no", "")
+    rec["material_supplier"] = material_info.get("supplier", "")
+
+    # Top
+    top = tech_bom.get("top", "")
+    open_top = tech_bom.get("open_top", False)
+    if not open_top and top:
+        top_info = lookup_part(parts_catalog, "top", top)
+        rec["top_type"] = top
+        rec["top_part_no"] = top_info.get("part_no", "")
+        rec["top_supplier"] = top_info.get("supplier", "")
+    else:
+        rec["top_type"] = "open" if open_top else ""
+        rec["top_part_no"] = ""
+        rec["top_supplier"] = ""
+
+    # Bottom
+    bottom = tech_bom.get("bottom", "")
+    bottom_opt = tech_bom.get("bottom_opt", "")
+    bottom_info = lookup_part(parts_catalog, "bottom", bottom)
+    rec["bottom_type"] = bottom
+    rec["bottom_part_no"] = bottom_info.get("part_no", "")
+
+    if bottom_opt and bottom_opt != "zonder":
+        bottom_opt_info = lookup_part(parts_catalog, "bottom_opt", bottom_opt)
+        rec["bottom_option"] = bottom_opt
+        rec["bottom_option_part_no"] = bottom_opt_info.get("part_no", "")
+    else:
+        rec["bottom_option"] = ""
+        rec["bottom_option_part_no"] = ""
+
+    # Rings
+    rings = tech_bom.get("rings", [])
+    ring_count = len(rings) if rings else 0
+    ring_w = tech_bom.get("ring_w", 0)
+    ring_t = tech_bom.get("ring_t", 0)
+    rec["ring_count"] = ring_count
+    rec["ring_width_mm"] = ring_w
+    rec["ring_thickness_mm"] = ring_t
+
+    # Reinforcement
+    reinforce_enable = tech_bom.get("reinforce", False)
+    reinforce_side = tech_bom.get("rein_side", "")
+    reinforce_spans = tech_bom.get("rein_spans", [])
+    rec["reinforce_enabled"] = "Yes" if reinforce_enable else "No"
+
+    if reinforce_enable and reinforce_side:
+        reinf_info = lookup_part(parts_catalog, "reinforcement", reinforce_side)
+        rec["reinforcement_type"] = reinforce_side
+        rec["reinforcement_part_no"] = reinf_info.get("part_no", "")
+        # Calculate total reinforcement length (sum of spans)
+        total_reinf_length = sum(span[1] - span[0] for span in reinforce_spans if len(span) == 2)
+        rec["reinforcement_length_mm"] = total_reinf_length
+    else:
+        rec["reinforcement_type"] = ""
+        rec["reinforcement_part_no"] = ""
+        rec["reinforcement_length_mm"] = 0
+
+    # Productzijde
+    productzijde = tech_bom.get("productzijde", "")
+    rec["productzijde"] = productzijde
+
+    # Calculated fields
+    rec["surface_area_m2"] = calculate_surface_area(D, L)
+    rec["cut_length_estimate_m"] = calculate_cut_length(D, L, ring_count)
+    if mesh is not None:
+        rec.update(measured_quantities(mesh, t))
+
+    return rec
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+# scripts/compatibility.py
+# Connector compatibility search for flexibele verbindingen: partial requirements (sector, medium,
+# pressure, temperature, diameter, length) → every feasible (end 1, end 2, BFM material, ring count), ranked.
+#
+# Constraint propagation over the compiled limit indexes (connector_data.py), never a brute-force product:
+#   1. unary pruning of the connector domain (pressure / temperature / hygiene / diameter)
+#   2. variant pruning (validate_limits_block limits, preset connector lists)
+#   3. pairs only within a variant (BFM needs bfm at both ends)
+#   4. BFM materials from the diameter bisect index, then temperature / pressure / hygiene
+#   5. ring counts bounded to an interval per material (length rules, spacing, max rings), then one
+#      combination per count in that interval
+# Results are memoised on the connector-data hash, the presets' variant → connector lists and the
+# normalised requirements (content keys: a reloaded presets file with the same connectors still hits)
+
+import sys, json, argparse
+from functools import lru_cache
+from pathlib import Path
+
+from connector_data import get_connector_data
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_PRESETS = ROOT / "products" / "flexibele_verbindingen" / "presets.yaml"
+
+PSI_PER_BAR = 14.5038
+
+# Request field → (type, SCAD parameter it constrains)
+REQUIREMENT_FIELDS = {
+    "sector": str,
+    "medium": str,
+    "hygiene_class": str,
+    "pressure": float,       # bar (process_pressure_max)
+    "temperature": float,    # °C surge peak (process_temp_surge)
+    "temp_cont": float,      # °C
+    "temp_min": float,       # °C
+    "diameter": float,       # mm D_out
+    "length": float,         # mm L
+}
+# Configurator field names accepted as aliases
+ALIASES = {"pressure_max": "pressure", "temp_max": "temperature", "diameter_outer": "diameter"}
+
+DEFAULT_LIMIT = 50
+
+
+class CompatibilityError(ValueError):
+    pass
+
+
+def load_presets(path=DEFAULT_PRESETS):
+    import yaml
+    with open(path, "r", encoding="utf-8") as f:
+        return yaml.safe_load(f)
+
+
+def normalise(requirements, presets_data):
+    """Typed requirement tuple (hashable, memo key); unknown values stay None (unconstrained)."""
+    req = {}
+    for key, value in (requirements or {}).items():
+        key = ALIASES.get(key, key)
+        if key not in REQUIREMENT_FIELDS or value in (None, ""):
+            continue
+        try:
+            req[key] = REQUIREMENT_FIELDS[key](value)
+        except (TypeError, ValueError):
+            raise CompatibilityError(f"Invalid {key}: {value!r}")
+
+    if "hygiene_class" not in req and "sector" in req:
+        req["hygiene_class"] = presets_data.get("sector_hygiene", {}).get(req["sector"], req["sector"])
+    if "medium" in req:
+        req["process_medium"] = presets_data.get("medium_map", {}).get(req["medium"], req["medium"])
+    req.pop("sector", None)
+    req.pop("medium", None)
+
+    valid = presets_data.get("valid_enums", {})
+    for field in ("hygiene_class", "process_medium"):
+        if field in req and valid.get(field) and req[field] not in valid[field]:
+            raise CompatibilityError(f"Invalid {field}: {req[field]}. Valid: {valid[field]}")
+    return tuple(sorted(req.items()))
+
+
+def _headroom(limit, required):
+    """Relative margin of ``required`` under ``limit`` (1.0 when unconstrained)."""
+    if required is None or not limit:
+        return 1.0
+    return (limit - required) / limit
+
+
+def _connector_reasons(data, conn, req):
+    limits = data.connector(conn)
+    reasons = []
+    if req.get("pressure") is not None and req["pressure"] > limits["max_pressure"]:
+        reasons.append(f"pressure {req['pressure']:g} bar > {limits['max_pressure']} bar")
+    if req.get("temperature") is not None and req["temperature"] > limits["max_temperature"]:
+        reasons.append(f"temperature {req['temperature']:g}°C > {limits['max_temperature']}°C")
+    if req.get("hygiene_class") and not data.supports_hygiene_class(conn, req["hygiene_class"]):
+        reasons.append(f"not approved for {req['hygiene_class']}")
+    d = req.get("diameter")
+    if d is not None and not limits["diameter_min"] <= d <= limits["diameter_max"]:
+        reasons.append(f"diameter {d:g} mm outside {limits['diameter_min']}-{limits['diameter_max']} mm")
+    return reasons
+
+
+def _variant_reasons(data, variant, req):
+    limits = data.variant_limits.get(variant, {})
+    reasons = []
+    for field, key, unit in (("length", "max_L", "mm"), ("diameter", "max_D", "mm"),
+                             ("pressure", "max_P", "bar"), ("temperature", "max_T", "°C")):
+        if req.get(field) is not None and key in limits and req[field] > limits[key]:
+            reasons.append(f"{field} {req[field]:g} {unit} > {variant} limit {limits[key]} {unit}")
+    t_min, t_cont, t_surge = req.get("temp_min"), req.get("temp_cont"), req.get("temperature")
+    if t_cont is not None and t_surge is not None and t_cont > t_surge:
+        reasons.append("temp_cont above surge temperature")
+    if t_min is not None and t_cont is not None and t_min > t_cont:
+        reasons.append("temp_min above temp_cont")
+    return reasons
+
+
+def _material_ok(product, req):
+    t_surge, t_cont, t_min = req.get("temperature"), req.get("temp_cont"), req.get("temp_min")
+    if t_surge is not None and t_surge > product["temp_surge_C"]:
+        return False
+    if t_cont is not None and t_cont > product["temp_cont_max_C"]:
+        return False
+    lower = product["temp_cont_min_C"]
+    if lower is not None and t_min is not None and t_min < lower:
+        return False
+    if req.get("pressure") is not None and req["pressure"] * PSI_PER_BAR > product["max_pressure_psi"]:
+        return False
+    if req.get("hygiene_class") in ("food", "pharma") and not product["foodsafe_approval"]:
+        return False
+    if req.get("hygiene_class") == "pharma" and not product["threeA_certified"]:
+        return False
+    return True
+
+
+def _ring_range(data, pid, req):
+    """Feasible ring counts for one BFM material as a list of ``(lo, hi)`` ranges (``(0, 0)`` = no rings)."""
+    d, L = req.get("diameter"), req.get("length")
+    counts = []
+    # Without rings
+    limits = data.connector_limits[pid]
+    max_L = data.bfm_max_length_no_rings(pid, d) if d is not None else limits["max_length_mm_for_dia_le_650_mm"]
+    if L is None or limits["min_length_mm"] <= L <= max_L:
+        counts.append((0, 0))
+    # With rings (PE rings: temperature cap; spacing spigot↔ring and ring↔ring)
+    ring = data.ring_limits.get(pid)
+    if ring is not None:
+        c = data.constants
+        temp_ok = req.get("temperature") is None or req["temperature"] <= c.get("BFM_RING_PE_MAX_TEMP_C", 1e9)
+        max_L = data.bfm_max_length_with_rings(pid, d) if d is not None else ring["max_length_mm_dia_le_500"]
+        if temp_ok and (L is None or ring["min_length_with_rings_mm"] <= L <= max_L):
+            hi = ring["max_rings"]
+            if L is not None:
+                spigot, pitch = c.get("BFM_RING_SPIGOT_MIN_DIST_MM", 0), c.get("BFM_RING_RING_MIN_DIST_MM", 1)
+                hi = min(hi, int((L - 2 * spigot) // pitch) + 1 if L >= 2 * spigot else 0)
+            if hi >= 1:
+                counts.append((1, hi))
+    return counts
+
+
+def variant_connectors(presets_data):
+    """``((variant, (connector, ...)), ...)``: the connectors the presets offer per variant (hashable)."""
+    variants = {}
+    for preset in presets_data.get("presets", {}).values():
+        variants.setdefault(preset.get("variant"), []).extend(preset.get("connectors", []))
+    return tuple(sorted((str(v), tuple(c)) for v, c in variants.items()))
+
+
+@lru_cache(maxsize=4096)
+def _search(source_hash, variants_key, req_items):
+    data = get_connector_data()
+    req = dict(req_items)
+
+    # 1. Unary connector pruning
+    pruned = {conn: _connector_reasons(data, conn, req) for conn in data.connectors}
+    domain = [conn for conn, reasons in pruned.items() if not reasons]
+
+    # 2. Variant pruning
+    offered = dict(variants_key)
+    variants = {}
+    for variant in data.variant_limits:
+        reasons = _variant_reasons(data, variant, req)
+        ends = [c for c in domain if c in offered.get(str(variant), ())
+                and data.connector(c)["variant"] == variant]
+        if not reasons and not ends:
+            reasons = ["no compatible connector"]
+        variants[variant] = {"feasible": not reasons, "reasons": reasons, "connectors": ends}
+
+    # 3-5. Pairs per variant, BFM materials and ring ranges
+    combos = []
+    for variant, info in variants.items():
+        if not info["feasible"]:
+            continue
+        ends = info["connectors"]
+        pairs = [(a, b) for a in ends for b in ends]
+        if variant == "bfm":
+            d = req.get("diameter")
+            candidates = data.bfm_products_for_diameter(d) if d is not None else tuple(data.connector_limits)
+            materials = []
+            for pid in candidates:
+                product = data.products.get(pid)
+                if product is None or not _material_ok(product, req):
+                    continue
+                for lo, hi in _ring_range(data, pid, req):
+                    materials.append((pid, product, lo, hi))
+            for a, b in pairs:
+                for pid, product, lo, hi in materials:
+                    for rings in range(lo, hi + 1):
+                        combos.append(_combo(data, variant, a, b, req, pid, product, rings))
+        else:
+            for a, b in pairs:
+                combos.append(_combo(data, variant, a, b, req))
+
+    combos.sort(key=lambda c: (-c["margin"], c["rings"], c["connector_end1"] != c["connector_end2"],
+                               c["connector_end1"], c["connector_end2"], c["bfm_material"] or ""))
+    for rank, combo in enumerate(combos, 1):
+        combo["rank"] = rank
+
+    return {
+        "requirements": req,
+        "connectors": {conn: {"feasible": not reasons, "reasons": reasons} for conn, reasons in pruned.items()},
+        "variants": variants,
+        "options": {
+            "connector_end1": sorted({c["connector_end1"] for c in combos}),
+            "connector_end2": sorted({c["connector_end2"] for c in combos}),
+            "bfm_material": sorted({c["bfm_material"] for c in combos if c["bfm_material"]}),
+            "rings": sorted({c["rings"] for c in combos}),
+        },
+        "count": len(combos),
+        "combinations": combos,
+    }
+
+
+def _combo(data, variant, end1, end2, req, pid=None, product=None, rings=0):
+    c1, c2 = data.connector(end1), data.connector(end2)
+    margins = [
+        _headroom(min(c1["max_pressure"], c2["max_pressure"]), req.get("pressure")),
+        _headroom(min(c1["max_temperature"], c2["max_temperature"]), req.get("temperature")),
+    ]
+    if product is not None:
+        margins.append(_headroom(product["max_pressure_psi"],
+                                 req["pressure"] * PSI_PER_BAR if req.get("pressure") is not None else None))
+        margins.append(_headroom(product["temp_surge_C"], req.get("temperature")))
+    combo = {
+        "connector_end1": end1,
+        "connector_end2": end2,
+        "variant": variant,
+        "bfm_material": pid,
+        "rings": rings,
+        "margin": round(min(margins), 4),
+        "max_pressure": min(c1["max_pressure"], c2["max_pressure"]),
+        "max_temperature": min(c1["max_temperature"], c2["max_temperature"]),
+    }
+    if product is not None:
+        combo["bfm_label"] = product["label"]
+        combo["rings_standard"] = data.ring_limits.get(pid, {}).get("rings_standard", False) if rings else None
+    return combo
+
+
+def find_compatible(requirements, presets_data=None, limit=DEFAULT_LIMIT):
+    """Ranked feasible combinations for partial ``requirements``; memoised on the normalised inputs."""
+    if presets_data is None:
+        presets_data = load_presets()
+    req_items = normalise(requirements, presets_data)
+    result = _search(get_connector_data().source_hash, variant_connectors(presets_data), req_items)
+    if limit is None:
+        return result
+    return {**result, "combinations": result["combinations"][:limit]}
+
+
+def main():
+    p = argparse.ArgumentParser(description="Feasible connector combinations for flexibele verbindingen")
+    for field, typ in REQUIREMENT_FIELDS.items():
+        p.add_argument(f"--{field.replace('_', '-')}", dest=field, type=typ)
+    p.add_argument("--presets", default=str(DEFAULT_PRESETS), help="Flexibele verbindingen presets YAML")
+    p.add_argument("--limit", type=int, default=DEFAULT_LIMIT, help="Max. combinations to list")
+    p.add_argument("--json", action="store_true", help="Print the full result as JSON")
+    args = p.parse_args()
+
+    requirements = {k: getattr(args, k) for k in REQUIREMENT_FIELDS}
+    try:
+        result = find_compatible(requirements, load_presets(args.presets), args.limit)
+    except CompatibilityError as e:
+        print(f"✗ {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.json:
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+        return
+    for conn, info in result["connectors"].items():
+        if not info["feasible"]:
+            print(f"  ✗ {conn}: {'; '.join(info['reasons'])}")
+    for variant, info in result["variants"].items():
+        if not info["feasible"]:
+            print(f"  ✗ {variant} variant: {'; '.join(info['reasons'])}")
+    for c in result["combinations"]:
+        material = f" {c['bfm_material']} rings={c['rings']}" if c["bfm_material"] else ""
+        print(f"{c['rank']:4d}. {c['connector_end1']:14s} {c['connector_end2']:14s} {c['variant']:6s}"
+              f"{material}  margin {c['margin']:.2f}")
+    print(f"✓ {result['count']} feasible combination(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,424 @@
+#!/usr/bin/env python3
+# scripts/connector_data.py
+# Connector + BFM limits compiled once from the SCAD sources (single source of truth):
+#   - general_end_type_selection.scad  → per-connector pressure/temperature/diameter limits + hygiene support
+#   - general_evaluation.scad          → per-variant technical limits (validate_limits_block)
+#   - general_application_context.scad → material requirement / certifications per medium / hygiene class
+#   - bfm_data.scad                    → BFM_PRODUCT_SPECS, BFM_CONNECTOR_LIMITS, BFM_CONNECTOR_LENGTH_BUCKETS,
+#                                        BFM_RING_LIMITS, BFM_SPIGOT_SPECS (+ scalar constants)
+# The parsed tables are cached in out/cache/connector_data.json keyed on the SCAD content hash and
+# indexed in memory (dict by id, sorted diameter edges for bisect lookups).
+
+import os, re, json, bisect, hashlib, argparse, threading
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+FV_LIB = ROOT / "lib" / "core" / "Products" / "flexibele_verbindingen"
+END_TYPE_SCAD = FV_LIB / "general" / "general_end_type_selection.scad"
+EVALUATION_SCAD = FV_LIB / "general" / "general_evaluation.scad"
+APPLICATION_SCAD = FV_LIB / "general" / "general_application_context.scad"
+BFM_DATA_SCAD = FV_LIB / "bfm_flexibele_verbinding" / "bfm_data.scad"
+DEFAULT_CACHE = ROOT / "out" / "cache" / "connector_data.json"
+
+# Bump when the compiled layout changes (part of the cache key next to the SCAD hash)
+SCHEMA_VERSION = 2
+
+# Field names per BFM table row (column comments in bfm_data.scad)
+BFM_TABLES = {
+    "BFM_PRODUCT_SPECS": ("id", "label", "temp_cont_min_C", "temp_cont_max_C", "temp_surge_C",
+                          "max_pressure_psi", "surface_resistivity", "foodsafe_approval",
+                          "threeA_certified", "atex_category"),
+    "BFM_CONNECTOR_LIMITS": ("id", "min_diameter_mm", "max_diameter_mm_without_rings",
+                             "min_length_mm", "max_length_mm_for_dia_le_650_mm"),
+    "BFM_CONNECTOR_LENGTH_BUCKETS": ("id", "min_diameter_mm", "max_diameter_mm", "max_length_mm"),
+    "BFM_RING_LIMITS": ("id", "min_length_with_rings_mm", "max_length_mm_dia_le_500",
+                        "max_length_mm_dia_550_1000", "max_length_mm_dia_1050_1650",
+                        "max_rings", "rings_standard"),
+    "BFM_SPIGOT_SPECS": ("id", "type", "min_diameter_mm", "max_diameter_mm", "total_length_mm",
+                         "head_length_mm", "tail_length_mm", "wall_thickness_mm"),
+}
+
+# Connector limit functions in general_end_type_selection.scad → dataset field
+CONNECTOR_FUNCTIONS = {
+    "get_connector_max_pressure": "max_pressure",
+    "get_connector_max_temperature": "max_temperature",
+    "get_connector_diameter_min": "diameter_min",
+    "get_connector_diameter_max": "diameter_max",
+}
+
+# Diameter edges of the length rules (bfm_get_max_length_no_rings / bfm_get_max_length_with_rings)
+BASE_LENGTH_MAX_DIA = 650
+RING_BUCKET_EDGES = (500, 1000)
+
+
+class ScadParseError(ValueError):
+    pass
+
+
+# ---------------------------------------------------------------------------
+# SCAD literal parsing
+# ---------------------------------------------------------------------------
+
+_TOKEN = re.compile(r'''
+    (?P<ws>\s+) | (?P<comment>//[^\n]*|/\*.*?\*/) |
+    (?P<str>"(?:\\.|[^"\\])*") |
+    (?P<num>\d+\.?\d*(?:[eE][-+]?\d+)?|\.\d+(?:[eE][-+]?\d+)?) |
+    (?P<ident>\$?[A-Za-z_]\w*) |
+    (?P<op>.)
+''', re.VERBOSE | re.DOTALL)
+
+_OPEN, _CLOSE = "([{", ")]}"
+
+
+def _tokens(text):
+    out = []
+    for m in _TOKEN.finditer(text):
+        kind = m.lastgroup
+        if kind not in ("ws", "comment"):
+            out.append((kind, m.group()))
+    return out
+
+
+def _literal(tokens, i):
+    """Parse a SCAD literal (number, string, bool, undef, nested list) at ``tokens[i]``; returns (value, next_i)."""
+    kind, tok = tokens[i]
+    if tok == "-" and i + 1 < len(tokens) and tokens[i + 1][0] == "num":
+        value, j = _literal(tokens, i + 1)
+        return -value, j
+    if kind == "num":
+        value = float(tok)
+        return (int(value) if value.is_integer() and "." not in tok else value), i + 1
+    if kind == "str":
+        return json.loads(tok), i + 1
+    if kind == "ident" and tok in ("true", "false", "undef"):
+        return {"true": True, "false": False, "undef": None}[tok], i + 1
+    if tok == "[":
+        items, i = [], i + 1
+        while tokens[i][1] != "]":
+            value, i = _literal(tokens, i)
+            items.append(value)
+            if tokens[i][1] == ",":
+                i += 1
+            elif tokens[i][1] != "]":
+                raise ScadParseError(f"unexpected {tokens[i][1]!r} in list")
+        return items, i + 1
+    raise ScadParseError(f"not a literal: {tok!r}")
+
+
+def _skip_statement(tokens, i):
+    """Index after the statement starting at ``i`` (``;`` at depth 0, or a closed ``{...}`` body)."""
+    depth = 0
+    while i < len(tokens):
+        tok = tokens[i][1]
+        if tok in _OPEN:
+            depth += 1
+        elif tok in _CLOSE:
+            depth -= 1
+            if depth == 0 and tok == "}":
+                return i + 1
+        elif tok == ";" and depth == 0:
+            return i + 1
+        i += 1
+    return i
+
+
+def scad_assignments(text):
+    """Top-level ``NAME = <literal>;`` assignments of a SCAD file (expressions, functions and modules skipped)."""
+    tokens = _tokens(text)
+    values, i = {}, 0
+    while i < len(tokens):
+        kind, tok = tokens[i]
+        if (kind == "ident" and tok not in ("function", "module", "use", "include")
+                and i + 1 < len(tokens) and tokens[i + 1][1] == "="):
+            try:
+                value, j = _literal(tokens, i + 2)
+                if j < len(tokens) and tokens[j][1] == ";":
+                    values[tok] = value
+                    i = j + 1
+                    continue
+            except (ScadParseError, IndexError):
+                pass
+        i = _skip_statement(tokens, i)
+    return values
+
+
+def _function_body(text, name):
+    m = re.search(rf"function\s+{name}\s*\([^)]*\)\s*=(.*?);", text, re.DOTALL)
+    if not m:
+        raise ScadParseError(f"function {name}() not found")
+    return re.sub(r"//[^\n]*", "", m.group(1))
+
+
+def ternary_table(text, name, arg="conn_type"):
+    """``{value: result}`` + default of a chained ``arg == "x" ? n : ... : default`` SCAD function."""
+    body = _function_body(text, name)
+    table = {k: _number(v) for k, v in re.findall(rf'{arg}\s*==\s*"(\w+)"\s*\?\s*([-\d.]+)', body)}
+    default = re.search(r":\s*([-\d.]+)\s*$", body.strip())
+    return table, (_number(default.group(1)) if default else None)
+
+
+def hygiene_support(text):
+    """``{hygiene_class: [connector, ...]}`` from supports_hygiene_class(); classes not listed allow all."""
+    body = _function_body(text, "supports_hygiene_class")
+    return {h: re.findall(r'conn_type\s*==\s*"(\w+)"', types)
+            for h, types in re.findall(r'hygiene\s*==\s*"(\w+)"\s*\?\s*\(([^)]*)\)', body)}
+
+
+def literal_ternary(text, name, arg):
+    """Like ternary_table() for functions returning string/list literals: ``({value: literal}, default)``."""
+    body = _function_body(text, name)
+    table = {}
+    for key, value in re.findall(rf'{arg}\s*==\s*"(\w+)"\s*\?\s*("(?:\\.|[^"\\])*"|\[[^\]]*\])', body):
+        table[key] = _literal(_tokens(value), 0)[0]
+    default = re.search(r':\s*("(?:\\.|[^"\\])*"|\[[^\]]*\])\s*$', body.strip())
+    return table, (_literal(_tokens(default.group(1)), 0)[0] if default else None)
+
+
+def variant_limits(text, variants):
+    """``({variant: {max_L, max_D, max_P, max_T}}, else-branch limits)`` from the
+    ``(variant == "x") ? a : b`` lets of validate_limits_block()."""
+    body = _function_body(text, "validate_limits_block")
+    limits = {v: {} for v in variants}
+    default = {}
+    for name, variant, a, b in re.findall(
+            r'(max_\w+)\s*=\s*\(variant\s*==\s*"(\w+)"\)\s*\?\s*([-\d.]+)\s*:\s*([-\d.]+)', body):
+        for v in limits:
+            limits[v][name] = _number(a if v == variant else b)
+        default[name] = _number(b)
+    return limits, default
+
+
+def _number(s):
+    value = float(s)
+    return int(value) if value.is_integer() else value
+
+
+# ---------------------------------------------------------------------------
+# Compile + cache
+# ---------------------------------------------------------------------------
+
+def source_hash(*paths):
+    h = hashlib.sha256(f"schema:{SCHEMA_VERSION}".encode())
+    for path in paths:
+        path = Path(path)
+        h.update(path.name.encode())
+        h.update(path.read_bytes() if path.exists() else b"")
+    return h.hexdigest()
+
+
+def compile_tables(end_type_scad=END_TYPE_SCAD, bfm_scad=BFM_DATA_SCAD, evaluation_scad=EVALUATION_SCAD,
+                   application_scad=APPLICATION_SCAD):
+    """Parse the SCAD files into plain JSON-able tables (rows as dicts with named fields)."""
+    end_text = Path(end_type_scad).read_text(encoding="utf-8")
+    bfm_text = Path(bfm_scad).read_text(encoding="utf-8")
+    evaluation_text = Path(evaluation_scad).read_text(encoding="utf-8")
+    application_text = Path(application_scad).read_text(encoding="utf-8")
+    end_values = scad_assignments(end_text)
+    bfm_values = scad_assignments(bfm_text)
+
+    connectors = {c: {} for c in end_values.get("ALL_CONNECTORS", [])}
+    for fn, field in CONNECTOR_FUNCTIONS.items():
+        table, _ = ternary_table(end_text, fn)
+        for conn, value in table.items():
+            connectors.setdefault(conn, {})[field] = value
+    for conn in connectors:
+        connectors[conn]["variant"] = "bfm" if conn in end_values.get("BFM_CONNECTORS", []) else "lampe"
+
+    tables = {}
+    for name, fields in BFM_TABLES.items():
+        rows = bfm_values.get(name)
+        if rows is None:
+            raise ScadParseError(f"{name} not found in {bfm_scad}")
+        for row in rows:
+            if len(row) != len(fields):
+                raise ScadParseError(f"{name} row {row[0]!r}: {len(row)} columns, expected {len(fields)}")
+        tables[name] = [dict(zip(fields, row)) for row in rows]
+
+    limits, limits_default = variant_limits(evaluation_text, sorted({c["variant"] for c in connectors.values()}))
+    materials, material_default = literal_ternary(application_text, "get_material_requirement", "medium")
+    certifications, certification_default = literal_ternary(application_text, "get_required_certifications", "hygiene")
+    return {
+        "connectors": connectors,
+        "connector_list": end_values.get("ALL_CONNECTORS", []),
+        "hygiene_support": hygiene_support(end_text),
+        "variant_limits": limits,
+        "variant_limits_default": limits_default,
+        "material_requirements": {"by_medium": materials, "default": material_default},
+        "certifications": {"by_hygiene": certifications, "default": certification_default},
+        "bfm": tables,
+        "bfm_constants": {k: v for k, v in bfm_values.items() if k not in BFM_TABLES and not isinstance(v, list)},
+    }
+
+
+class ConnectorData:
+    """Indexed view of the compiled tables; lookups mirror the SCAD helper functions."""
+
+    def __init__(self, tables, source_hash=None):
+        self.tables = tables
+        self.source_hash = source_hash
+        self.connectors = tables["connectors"]
+        self.hygiene = tables["hygiene_support"]
+        self.variant_limits = tables["variant_limits"]
+        self.variant_limits_default = tables["variant_limits_default"]
+        self.material_requirements = tables["material_requirements"]
+        self.certifications = tables["certifications"]
+        self.constants = tables["bfm_constants"]
+        bfm = tables["bfm"]
+        self.products = {r["id"]: r for r in bfm["BFM_PRODUCT_SPECS"]}
+        self.connector_limits = {r["id"]: r for r in bfm["BFM_CONNECTOR_LIMITS"]}
+        self.ring_limits = {r["id"]: r for r in bfm["BFM_RING_LIMITS"]}
+        self.spigots = {r["id"]: r for r in bfm["BFM_SPIGOT_SPECS"]}
+
+        # Length-without-rings rule: Ø ≤ 650 → type limit, then the length buckets (ascending Ø)
+        buckets = sorted(bfm["BFM_CONNECTOR_LENGTH_BUCKETS"], key=lambda b: b["max_diameter_mm"])
+        self._length_edges = [BASE_LENGTH_MAX_DIA] + [b["max_diameter_mm"] for b in buckets[:-1]]
+        self._length_values = [b["max_length_mm"] for b in buckets]
+
+        # Diameter → BFM product ids available without rings: sorted edges + id set per interval
+        edges = sorted({r["min_diameter_mm"] for r in self.connector_limits.values()} |
+                       {r["max_diameter_mm_without_rings"] for r in self.connector_limits.values()})
+        self._dia_edges = edges
+        self._dia_products = [
+            tuple(sorted(pid for pid, r in self.connector_limits.items()
+                         if r["min_diameter_mm"] <= d <= r["max_diameter_mm_without_rings"]))
+            for d in edges
+        ]
+        self._dia_between = [
+            tuple(sorted(pid for pid, r in self.connector_limits.items()
+                         if r["min_diameter_mm"] <= lo and hi <= r["max_diameter_mm_without_rings"]))
+            for lo, hi in zip(edges, edges[1:])
+        ]
+
+    # ---- connectors (general_end_type_selection.scad) ----
+
+    def connector(self, conn_type):
+        return self.connectors.get(conn_type)
+
+    def is_valid_connector_type(self, conn_type):
+        return conn_type in self.tables["connector_list"]
+
+    def supports_hygiene_class(self, conn_type, hygiene):
+        allowed = self.hygiene.get(hygiene)
+        return True if allowed is None else conn_type in allowed
+
+    def hygiene_classes(self, conn_type, classes):
+        return [h for h in classes if self.supports_hygiene_class(conn_type, h)]
+
+    # ---- variants / environment (general_evaluation.scad, general_application_context.scad) ----
+
+    def limits_for_variant(self, variant):
+        """validate_limits_block() limits; any variant other than the named one takes the else branch."""
+        return self.variant_limits.get(variant, self.variant_limits_default)
+
+    def material_requirement(self, medium):
+        return self.material_requirements["by_medium"].get(medium, self.material_requirements["default"])
+
+    def required_certifications(self, hygiene):
+        return self.certifications["by_hygiene"].get(hygiene, self.certifications["default"])
+
+    # ---- BFM (bfm_data.scad) ----
+
+    def bfm_products_for_diameter(self, dia_mm):
+        """BFM product ids available at ``dia_mm`` without rings (bisect over the diameter edges)."""
+        i = bisect.bisect_left(self._dia_edges, dia_mm)
+        if i < len(self._dia_edges) and self._dia_edges[i] == dia_mm:
+            return self._dia_products[i]
+        if i == 0 or i == len(self._dia_edges):
+            return ()
+        return self._dia_between[i - 1]
+
+    def bfm_max_length_no_rings(self, pid, dia_mm):
+        """bfm_get_max_length_no_rings(): 0 when the type is not available at ``dia_mm``."""
+        r = self.connector_limits.get(pid)
+        if r is None or dia_mm < r["min_diameter_mm"] or dia_mm > r["max_diameter_mm_without_rings"]:
+            return 0
+        i = bisect.bisect_left(self._length_edges, dia_mm)
+        return r["max_length_mm_for_dia_le_650_mm"] if i == 0 else self._length_values[min(i - 1, len(self._length_values) - 1)]
+
+    def bfm_max_length_with_rings(self, pid, dia_mm):
+        """bfm_get_max_length_with_rings(): 0 when there is no ring data for the type."""
+        r = self.ring_limits.get(pid)
+        if r is None:
+            return 0
+        return (r["max_length_mm_dia_le_500"], r["max_length_mm_dia_550_1000"],
+                r["max_length_mm_dia_1050_1650"])[bisect.bisect_left(RING_BUCKET_EDGES, dia_mm)]
+
+    def bfm_max_rings(self, pid):
+        r = self.ring_limits.get(pid)
+        return r["max_rings"] if r else 0
+
+    def bfm_max_pressure_psi(self, pid):
+        r = self.products.get(pid)
+        return r["max_pressure_psi"] if r else 0
+
+    def to_json(self):
+        return {"source_hash": self.source_hash, **self.tables}
+
+
+def build_cache(cache_path=DEFAULT_CACHE, end_type_scad=END_TYPE_SCAD, bfm_scad=BFM_DATA_SCAD,
+                evaluation_scad=EVALUATION_SCAD, application_scad=APPLICATION_SCAD):
+    """Compile the SCAD tables and write them (with their source hash) to ``cache_path``."""
+    digest = source_hash(end_type_scad, bfm_scad, evaluation_scad, application_scad)
+    tables = compile_tables(end_type_scad, bfm_scad, evaluation_scad, application_scad)
+    cache_path = Path(cache_path)
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = cache_path.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_text(json.dumps({"source_hash": digest, "tables": tables}, ensure_ascii=False), encoding="utf-8")
+    tmp.replace(cache_path)
+    return digest, tables
+
+
+def _load_cache(cache_path, digest):
+    try:
+        cached = json.loads(Path(cache_path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    return cached["tables"] if cached.get("source_hash") == digest else None
+
+
+_DATA = {}
+_LOCK = threading.Lock()
+
+
+def get_connector_data(cache_path=DEFAULT_CACHE, end_type_scad=END_TYPE_SCAD, bfm_scad=BFM_DATA_SCAD,
+                       evaluation_scad=EVALUATION_SCAD, application_scad=APPLICATION_SCAD):
+    """Process-wide dataset; re-read only when a SCAD source's mtime/size changed, recompiled when its hash did."""
+    sources = (Path(end_type_scad), Path(bfm_scad), Path(evaluation_scad), Path(application_scad))
+    stamp = tuple((p.stat().st_mtime_ns, p.stat().st_size) for p in sources)
+    key = (str(cache_path), *map(str, sources))
+    with _LOCK:
+        entry = _DATA.get(key)
+        if entry is None or entry[0] != stamp:
+            digest = source_hash(*sources)
+            if entry is not None and entry[1].source_hash == digest:
+                data = entry[1]
+            else:
+                tables = _load_cache(cache_path, digest)
+                if tables is None:
+                    digest, tables = build_cache(cache_path, *sources)
+                data = ConnectorData(tables, digest)
+            _DATA[key] = (stamp, data)
+        return _DATA[key][1]
+
+
+def main():
+    p = argparse.ArgumentParser(description="Compile connector/BFM limits from the SCAD tables")
+    p.add_argument("--cache", default=str(DEFAULT_CACHE), help="Compiled dataset (JSON) path")
+    p.add_argument("--json", action="store_true", help="Print the compiled dataset")
+    p.add_argument("--diameter", type=float, help="List BFM types available at this diameter (mm)")
+    args = p.parse_args()
+
+    data = get_connector_data(args.cache)
+    if args.json:
+        print(json.dumps(data.to_json(), indent=2, ensure_ascii=False))
+    elif args.diameter is not None:
+        for pid in data.bfm_products_for_diameter(args.diameter):
+            print(f"{pid:8s} max L {data.bfm_max_length_no_rings(pid, args.diameter):>5} mm (no rings), "
+                  f"{data.bfm_max_length_with_rings(pid, args.diameter):>5} mm (rings, max {data.bfm_max_rings(pid)})")
+    else:
+        print(f"✓ {len(data.connectors)} connectors, {len(data.products)} BFM products, "
+              f"{len(data.ring_limits)} ring limits, {len(data.spigots)} spigots → {args.cache}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# scripts/evaluation_parity.py
+# Parity check: scripts/flexibele_evaluation.py vs the OpenSCAD 4-block validation functions.
+#
+#   python scripts/evaluation_parity.py                       # Python evaluator vs recorded corpus
+#   python scripts/evaluation_parity.py --write-scad tests/smoke_flexibele_evaluation.scad
+#   openscad -o out/evaluation.echo tests/smoke_flexibele_evaluation.scad
+#   python scripts/evaluation_parity.py --echo out/evaluation.echo            # OpenSCAD vs Python + corpus
+#   python scripts/evaluation_parity.py --echo out/evaluation.echo --record   # re-record the corpus
+
+import re, sys, json, argparse
+from pathlib import Path
+
+from flexibele_evaluation import (
+    BLOCKS, product_variant, validate_identity_block, validate_geometry_block,
+    validate_connections_block, validate_limits_block,
+)
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_CORPUS = ROOT / "tests" / "golden" / "evaluation_cases.jsonl"
+FV_GENERAL = "../lib/core/Products/flexibele_verbindingen/general"
+
+ECHO_LINE = re.compile(r'^ECHO:\s*"EVAL:",\s*"([^"]+)",\s*(\[.*\])\s*$')
+
+
+def load_corpus(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def python_blocks(params):
+    p = params
+    variant = product_variant(p["end_type_1"], p["end_type_2"])
+    try:
+        wall = (p["D_out"] - p["D_in"]) / 2
+    except TypeError:
+        wall = None
+    return [
+        validate_identity_block(p["process_medium"], p["hygiene_class"], 0, variant),
+        validate_geometry_block(p["L"], p["D_in"], p["D_out"], wall, p["gap"]),
+        validate_connections_block(p["end_type_1"], p["end_type_2"], p["D_out"], p["pressure_max"],
+                                   p["temp_surge"], p["hygiene_class"]),
+        validate_limits_block(p["L"], p["D_out"], wall, p["pressure_max"], p["temp_cont"], p["temp_surge"],
+                              p["temp_min"], variant),
+    ]
+
+
+def _scad(value):
+    if value is None:
+        return "undef"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return json.dumps(value)
+
+
+def write_scad(cases, path):
+    """One echo per case calling the general_evaluation.scad block functions directly."""
+    lines = [
+        "// tests/smoke_flexibele_evaluation.scad",
+        "// GENERATED by scripts/evaluation_parity.py --write-scad from tests/golden/evaluation_cases.jsonl",
+        "// Echoes the Phase E 4-block results per case: ECHO: \"EVAL:\", \"<case>\", [identity, geometry, connections, limits]",
+        f"use <{FV_GENERAL}/general_end_type_selection.scad>;",
+        f"use <{FV_GENERAL}/general_evaluation.scad>;",
+        "",
+        "function eval_case(L, D_in, D_out, gap, medium, hygiene, temp_cont, temp_surge, temp_min, pressure, e1, e2) =",
+        "    let (wall = (D_out - D_in) / 2, variant = get_product_variant(e1, e2))",
+        "    [validate_identity_block(medium, hygiene, 0, variant),",
+        "     validate_geometry_block(L, D_in, D_out, wall, gap),",
+        "     validate_connections_block(e1, e2, D_out, pressure, temp_surge, hygiene),",
+        "     validate_limits_block(L, D_out, wall, pressure, temp_cont, temp_surge, temp_min, variant)];",
+        "",
+    ]
+    for case in cases:
+        p = case["params"]
+        args = ", ".join(_scad(p[k]) for k in (
+            "L", "D_in", "D_out", "gap", "process_medium", "hygiene_class", "temp_cont", "temp_surge",
+            "temp_min", "pressure_max", "end_type_1", "end_type_2"))
+        lines.append(f'echo("EVAL:", "{case["case"]}", eval_case({args}));')
+    Path(path).write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def read_echo(path):
+    results = {}
+    for line in Path(path).read_text(encoding="utf-8", errors="replace").splitlines():
+        m = ECHO_LINE.match(line.strip())
+        if m:
+            results[m.group(1)] = json.loads(m.group(2))
+    return results
+
+
+def parity_mismatches(cases, scad=None):
+    """One line per case/source where the Python evaluator differs from the corpus or the OpenSCAD echo."""
+    lines = []
+    for c in cases:
+        got = python_blocks(c["params"])
+        expected = {"corpus": c["blocks"]}
+        if scad is not None:
+            expected["openscad"] = scad[c["case"]]
+        for source, blocks in expected.items():
+            if got != blocks:
+                diff = [b for b, x, y in zip(BLOCKS, got, blocks) if x != y]
+                lines.append(f"✗ {c['case']}: python {got} != {source} {blocks} (blocks: {', '.join(diff)})")
+    return lines
+
+
+def main():
+    p = argparse.ArgumentParser(description="Parity of the Python Phase E evaluator with general_evaluation.scad")
+    p.add_argument("--corpus", default=str(DEFAULT_CORPUS), help="Recorded cases (JSONL: case, params, blocks)")
+    p.add_argument("--echo", help="OpenSCAD .echo of tests/smoke_flexibele_evaluation.scad")
+    p.add_argument("--record", action="store_true", help="Rewrite the corpus blocks from --echo")
+    p.add_argument("--write-scad", help="Write the SCAD echo file for the corpus and exit")
+    args = p.parse_args()
+
+    cases = load_corpus(args.corpus)
+    if args.write_scad:
+        write_scad(cases, args.write_scad)
+        print(f"✓ {len(cases)} case(s) → {args.write_scad}")
+        return
+
+    scad = read_echo(args.echo) if args.echo else None
+    if scad is not None:
+        missing = [c["case"] for c in cases if c["case"] not in scad]
+        if missing:
+            print(f"✗ {len(missing)} case(s) missing from {args.echo}: {missing[:10]}", file=sys.stderr)
+            sys.exit(1)
+        if args.record:
+            with open(args.corpus, "w", encoding="utf-8") as f:
+                for c in cases:
+                    f.write(json.dumps({**c, "blocks": scad[c["case"]]}) + "\n")
+            print(f"✓ Recorded {len(cases)} case(s) from {args.echo} → {args.corpus}")
+            return
+
+    mismatches = parity_mismatches(cases, scad)
+    for line in mismatches:
+        print(line)
+    failures = len(mismatches)
+
+    sources = "corpus + OpenSCAD echo" if scad is not None else "corpus"
+    if failures:
+        print(f"✗ {failures} mismatch(es) over {len(cases)} case(s) ({sources})")
+        sys.exit(1)
+    print(f"✓ {len(cases)} case(s) match ({sources})")
+
+
+if __name__ == "__main__":
+    main()
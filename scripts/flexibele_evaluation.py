@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+# scripts/flexibele_evaluation.py
+# Phase E 4-block evaluation (general_evaluation.scad) without OpenSCAD: same block semantics and
+# assert messages, returned as a structured JSON report. Memoised on the normalised inputs, so the
+# configurator and the job API can reject invalid designs before a render is queued.
+#
+# Parity with OpenSCAD: scripts/evaluation_parity.py + tests/golden/evaluation_cases.jsonl
+
+import sys, json, argparse
+from functools import lru_cache
+
+from connector_data import get_connector_data
+
+# Inputs of generate_summary_report() (flexibele_verbinding.scad passes these through)
+EVALUATION_PARAMS = (
+    "L", "D_in", "D_out", "gap", "process_medium", "hygiene_class", "atex_zone",
+    "temp_cont", "temp_surge", "temp_min", "pressure_max", "pressure_surge", "end_type_1", "end_type_2",
+)
+
+BLOCKS = ("identity", "geometry", "connections", "limits")
+
+INTENDED_USE = {
+    "lampe": "Laboratory/Medical/Pharma flexible connections",
+    "bfm": "Industrial hydraulic/pneumatic fittings",
+}
+DEFAULT_USE = "General purpose flexible connector"
+
+PI = 3.14159  # as in the SCAD summary
+
+
+def _cmp(op, a, b):
+    """OpenSCAD comparison: mismatched types / undef compare false instead of raising."""
+    try:
+        return bool(op(a, b))
+    except TypeError:
+        return False
+
+
+def _le(a, b):
+    return _cmp(lambda x, y: x <= y, a, b)
+
+
+def _lt(a, b):
+    return _cmp(lambda x, y: x < y, a, b)
+
+
+def _ge(a, b):
+    return _cmp(lambda x, y: x >= y, a, b)
+
+
+def _gt(a, b):
+    return _cmp(lambda x, y: x > y, a, b)
+
+
+def scad_str(value):
+    """Value formatted like OpenSCAD's str()."""
+    if value is None:
+        return "undef"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        return f"{value:g}"
+    if isinstance(value, (list, tuple)):
+        return "[" + ", ".join(json.dumps(v) if isinstance(v, str) else scad_str(v) for v in value) + "]"
+    return str(value)
+
+
+def product_variant(end_type_1, end_type_2):
+    """get_product_variant() in general_end_type_selection.scad"""
+    return "bfm" if "bfm" in (end_type_1, end_type_2) else "lampe"
+
+
+# ---------------------------------------------------------------------------
+# The four validation blocks (general_evaluation.scad)
+# ---------------------------------------------------------------------------
+
+def validate_identity_block(process_medium, hygiene_class, atex_zone, variant):
+    return process_medium != "" and hygiene_class != "" and variant != ""
+
+
+def validate_geometry_block(L, D_in, D_out, wall, gap_length):
+    return (_gt(L, 0) and _gt(D_in, 0) and _gt(D_out, D_in) and _gt(wall, 0) and _ge(gap_length, 0)
+            and _ge(wall, 0.5) and _le(wall, 15))
+
+
+def _connector_vs_geometry(data, conn_type, D_out):
+    limits = data.connector(conn_type) or {"diameter_min": 0, "diameter_max": 1000}
+    return _ge(D_out, limits["diameter_min"]) and _le(D_out, limits["diameter_max"])
+
+
+def _connector_vs_environment(data, conn_type, temp_surge, pressure_max, hygiene):
+    limits = data.connector(conn_type) or {"max_pressure": 0, "max_temperature": 0}
+    return (_le(pressure_max, limits["max_pressure"]) and _le(temp_surge, limits["max_temperature"])
+            and data.supports_hygiene_class(conn_type, hygiene))
+
+
+def validate_connections_block(end_type_1, end_type_2, D_out, pressure_max, temp_surge, hygiene_class, data=None):
+    data = data or get_connector_data()
+    return (data.is_valid_connector_type(end_type_1) and data.is_valid_connector_type(end_type_2)
+            and _connector_vs_geometry(data, end_type_1, D_out)
+            and _connector_vs_geometry(data, end_type_2, D_out)
+            and _connector_vs_environment(data, end_type_1, temp_surge, pressure_max, hygiene_class)
+            and _connector_vs_environment(data, end_type_2, temp_surge, pressure_max, hygiene_class))
+
+
+def validate_limits_block(L, D_out, wall, pressure_max, temp_cont, temp_surge, temp_min, variant, data=None):
+    data = data or get_connector_data()
+    limits = data.limits_for_variant(variant)
+    return (_le(L, limits["max_L"]) and _le(D_out, limits["max_D"]) and _le(pressure_max, limits["max_P"])
+            and _le(temp_surge, limits["max_T"]) and _le(temp_cont, temp_surge) and _le(temp_min, temp_cont))
+
+
+# ---------------------------------------------------------------------------
+# Report
+# ---------------------------------------------------------------------------
+
+def _normalise(params):
+    values = []
+    for name in EVALUATION_PARAMS:
+        value = params.get(name)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            value = float(value)
+        values.append((name, value))
+    return tuple(values)
+
+
+def _connector_summary(data, conn_type):
+    limits = data.connector(conn_type) or {}
+    return {
+        "type": conn_type,
+        "max_pressure": limits.get("max_pressure", 0),
+        "max_temperature": limits.get("max_temperature", 0),
+        "diameter_min": limits.get("diameter_min", 0),
+        "diameter_max": limits.get("diameter_max", 1000),
+    }
+
+
+def _number(value):
+    return int(value) if isinstance(value, float) and value.is_integer() else value
+
+
+@lru_cache(maxsize=8192)
+def _evaluate(source_hash, items):
+    data = get_connector_data()
+    p = {k: _number(v) for k, v in items}
+    L, D_in, D_out, gap = p["L"], p["D_in"], p["D_out"], p["gap"]
+    e1, e2 = p["end_type_1"], p["end_type_2"]
+    medium, hygiene = p["process_medium"], p["hygiene_class"]
+    variant = product_variant(e1, e2)
+    try:
+        wall = _number((D_out - D_in) / 2)
+    except TypeError:
+        wall = None
+
+    errors = []
+    # flexibele_verbinding.scad routing assert
+    if not (variant == "lampe" or (e1 == "bfm" and e2 == "bfm")):
+        errors.append(f"BFM assembly needs bfm at both ends (end_type_1={e1}, end_type_2={e2})")
+
+    valid = {
+        "identity": validate_identity_block(medium, hygiene, 0, variant),
+        "geometry": validate_geometry_block(L, D_in, D_out, wall, gap),
+        "connections": validate_connections_block(e1, e2, D_out, p["pressure_max"], p["temp_surge"], hygiene, data),
+        "limits": validate_limits_block(L, D_out, wall, p["pressure_max"], p["temp_cont"], p["temp_surge"],
+                                        p["temp_min"], variant, data),
+    }
+    # general_validation() assert messages, in block order
+    messages = {
+        "identity": "VALIDATION FAILED: Identity/use case block",
+        "geometry": f"VALIDATION FAILED: Geometry block (L={scad_str(L)}, D_in={scad_str(D_in)}, "
+                    f"D_out={scad_str(D_out)}, wall={scad_str(wall)})",
+        "connections": f"VALIDATION FAILED: Connections block (end_1={scad_str(e1)}, end_2={scad_str(e2)})",
+        "limits": f"VALIDATION FAILED: Technical limits block (variant={variant}, "
+                  f"pressure={scad_str(p['pressure_max'])} bar)",
+    }
+    errors += [messages[block] for block in BLOCKS if not valid[block]]
+
+    c1, c2 = _connector_summary(data, e1), _connector_summary(data, e2)
+    identity = {"valid": valid["identity"], "process_medium": medium, "hygiene_class": hygiene,
+                "variant": variant, "intended_use": INTENDED_USE.get(variant, DEFAULT_USE)}
+    if hygiene == "atex":
+        identity["atex_zone"] = p["atex_zone"]
+    geometry = {"valid": valid["geometry"], "L": L, "D_out": D_out, "D_in": D_in, "wall": wall, "gap": gap}
+    try:
+        geometry["cross_section_area_mm2"] = (D_out ** 2 - D_in ** 2) * PI / 4
+        geometry["volume_mm3"] = (D_out ** 2 - D_in ** 2) * PI * L / 4
+    except TypeError:
+        pass
+
+    return {
+        "valid": not errors,
+        "errors": errors,
+        "variant": variant,
+        "blocks": {
+            "identity": identity,
+            "geometry": geometry,
+            "connections": {"valid": valid["connections"], "end_1": c1, "end_2": c2},
+            "limits": {
+                "valid": valid["limits"],
+                "pressure": {"continuous": p["pressure_max"], "surge": p["pressure_surge"],
+                             "limiting_connector": min(c1["max_pressure"], c2["max_pressure"])},
+                "temperature": {"min": p["temp_min"], "continuous": p["temp_cont"], "surge": p["temp_surge"],
+                                "limiting_connector": min(c1["max_temperature"], c2["max_temperature"])},
+                "material_requirement": data.material_requirement(medium),
+                "certifications": data.required_certifications(hygiene),
+                "variant_limits": data.limits_for_variant(variant),
+            },
+        },
+    }
+
+
+def evaluate(params):
+    """4-block evaluation report for resolved flexibele parameters (flexibele_params.build_params output)."""
+    return _evaluate(get_connector_data().source_hash, _normalise(params))
+
+
+def main():
+    p = argparse.ArgumentParser(description="Evaluate a flexibele verbindingen config (Phase E 4-block validation)")
+    p.add_argument("--config", required=True, help="Config YAML (configurator fields or overrides)")
+    p.add_argument("--presets", default="products/flexibele_verbindingen/presets.yaml", help="Presets YAML")
+    args = p.parse_args()
+
+    import yaml
+    from flexibele_params import build_params
+    with open(args.config, "r", encoding="utf-8") as f:
+        config = yaml.safe_load(f)
+    with open(args.presets, "r", encoding="utf-8") as f:
+        presets_data = yaml.safe_load(f)
+
+    report = evaluate(build_params(config, presets_data))
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    sys.exit(0 if report["valid"] else 1)
+
+
+if __name__ == "__main__":
+    main()
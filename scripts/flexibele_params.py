@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# scripts/flexibele_params.py
+# Flexibele verbindingen config (configurator UI or YAML) + presets → OpenSCAD parameters and validation errors
+
+from params_resolver import ConfigError
+from flexibele_evaluation import evaluate
+
+REQUIRED_PARAMS = ["L", "D_in", "D_out", "end_type_1", "end_type_2", "process_medium", "hygiene_class"]
+
+# Configurator field → SCAD parameter(s)
+UI_FIELDS = {
+    "length": ["L"],
+    "diameter_inner": ["D_in"],
+    "diameter_outer": ["D_out"],
+    "connector_end1": ["end_type_1"],
+    "connector_end2": ["end_type_2"],
+    "material": ["material"],
+    "temp_min": ["temp_min"],
+    "temp_max": ["temp_cont", "temp_surge"],
+    "pressure_max": ["pressure_max", "pressure_surge"],
+}
+
+
+def select_preset(end_type_1, end_type_2, presets):
+    """Variant routing as get_product_variant() in general_end_type_selection.scad."""
+    variant = "bfm" if "bfm" in (end_type_1, end_type_2) else "lampe"
+    for name, preset in presets.items():
+        if preset.get("variant") == variant:
+            return name
+    raise ConfigError(f"No preset for variant '{variant}'")
+
+
+def build_params(user_config, presets_data):
+    """Merge variant preset defaults, environment defaults, UI fields and overrides into one params dict."""
+    presets = presets_data.get("presets", {})
+    overrides = user_config.get("overrides", {}) or {}
+
+    ends = {}
+    for key, ui_key in (("end_type_1", "connector_end1"), ("end_type_2", "connector_end2")):
+        ends[key] = overrides.get(key, user_config.get(ui_key))
+    preset_name = user_config.get("preset") or select_preset(ends["end_type_1"], ends["end_type_2"], presets)
+    if preset_name not in presets:
+        raise ConfigError(f"Unknown preset '{preset_name}'. Available: {list(presets.keys())}")
+    preset = presets[preset_name]
+
+    params = {"bom_tag": user_config.get("name", "unnamed")}
+    params.update(presets_data.get("environment_defaults", {}))
+    params.update(preset.get("defaults", {}))
+
+    # Configurator UI fields
+    for ui_key, names in UI_FIELDS.items():
+        if user_config.get(ui_key) is not None:
+            for name in names:
+                params[name] = user_config[ui_key]
+    if user_config.get("sector") is not None:
+        params["hygiene_class"] = presets_data.get("sector_hygiene", {}).get(user_config["sector"], user_config["sector"])
+    if user_config.get("medium") is not None:
+        params["process_medium"] = presets_data.get("medium_map", {}).get(user_config["medium"], user_config["medium"])
+
+    # Explicit SCAD parameters win
+    params.update(overrides)
+    params["preset"] = preset_name
+    params["variant"] = preset.get("variant", "lampe")
+
+    # Quality tier → $fn
+    quality_tiers = presets_data.get("quality_tiers", {})
+    quality = user_config.get("quality", presets_data.get("default_quality", "production"))
+    params["quality"] = quality
+    params["fn"] = quality_tiers.get(quality, {}).get("fn", 96)
+
+    return params
+
+
+def validate_params(params, preset, presets_data):
+    """Return a list of validation error strings (empty when valid)."""
+    valid_enums = presets_data.get("valid_enums", {})
+    quality_tiers = presets_data.get("quality_tiers", {})
+    errors = []
+
+    for field in REQUIRED_PARAMS:
+        if params.get(field) is None:
+            errors.append(f"Missing required parameter: {field}")
+
+    for field in ("end_type_1", "end_type_2"):
+        if field in params and params[field] not in valid_enums.get("end_type", []):
+            errors.append(f"Invalid {field}: {params[field]}")
+        elif params.get(field) not in preset.get("connectors", []):
+            errors.append(f"{field} '{params.get(field)}' not available for {params['variant'].upper()} "
+                          f"(valid: {preset.get('connectors', [])})")
+
+    for field in ("coupling_type_1", "coupling_type_2"):
+        if field in params and params[field] not in valid_enums.get("coupling_type", []):
+            errors.append(f"Invalid {field}: {params[field]}")
+
+    for field, enum in (("material", "material"), ("process_medium", "process_medium"),
+                        ("hygiene_class", "hygiene_class")):
+        if field in params and params[field] not in valid_enums.get(enum, []):
+            errors.append(f"Invalid {field}: {params[field]}")
+
+    quality = params.get("quality")
+    if quality_tiers and quality not in quality_tiers:
+        errors.append(f"Invalid quality tier '{quality}'. Valid: {list(quality_tiers)}")
+
+    # Phase E 4-block evaluation (same asserts as the render, without OpenSCAD)
+    if not errors:
+        errors.extend(evaluate(params)["errors"])
+
+    return errors
+
+
+def resolve_params(user_config, presets_data):
+    """Build and validate; returns ``(params, errors)``. Raises ConfigError for unusable configs."""
+    params = build_params(user_config, presets_data)
+    preset = presets_data["presets"][params["preset"]]
+    return params, validate_params(params, preset, presets_data)
@@ -2,32 +2,82 @@
 # scripts/generate_model.py
 # Orchestrate: config YAML → .scad render → BOM extraction → DXF export
 
-import sys, json, subprocess, argparse, tempfile, shutil, os
+import sys, json, subprocess, argparse, tempfile, shutil, os, time, importlib.util
 from pathlib import Path
-from jinja2 import Template
+from stage_timing import StageTimer
+from render_cache import RenderCache, render_key, sources_hash, DEFAULT_DIR as RENDER_CACHE_DIR
+import scad_templates
+from product_registry import get_registry
 
-p = argparse.ArgumentParser(description="Generate filterslang model from YAML config")
+# Products (BOM version, render-cache sources, production BOM) come from products/*/manifest.toml
+registry = get_registry()
+
+p = argparse.ArgumentParser(description="Generate a product model (filterslang, flexibele verbindingen) from YAML config")
 p.add_argument("--config", required=True, help="User config YAML file")
 p.add_argument("--presets", required=True, help="Presets YAML file")
 p.add_argument("--output-dir", default="out", help="Output directory")
+p.add_argument("--product", default="filterslang", choices=registry.names(), help="Product to generate")
 p.add_argument("--skip-render", action="store_true", help="Skip OpenSCAD render (use existing .echo)")
 p.add_argument("--skip-dxf", action="store_true", help="Skip DXF export")
 p.add_argument("--skip-stl", action="store_true", help="Skip STL export (3D model)")
+p.add_argument("--skip-lod", action="store_true", help="Skip the viewer LOD meshes (built on first view instead)")
+p.add_argument("--skip-thumbnail", action="store_true", help="Skip the PNG thumbnail")
 p.add_argument("--skip-bom", action="store_true", help="Skip BOM extraction")
 p.add_argument("--debug", action="store_true", help="Print extensive debug info")
+p.add_argument("--timings", action="store_true", help="Emit [SPAN] timing lines on stderr")
+p.add_argument("--render-cache", default=str(RENDER_CACHE_DIR), help="Render cache directory")
+p.add_argument("--no-render-cache", action="store_true", help="Always run OpenSCAD (no cache lookup or store)")
+p.add_argument("--scad-dir", help="Directory for the generated .scad files (default: project root; render workers "
+                                  "use their task's work dir so same-named configs do not collide)")
 args = p.parse_args()
 
+product = registry.get(args.product)
+
 output_dir = Path(args.output_dir)
 output_dir.mkdir(parents=True, exist_ok=True)
 
-DEBUG = args.debug or True  # Always enable for now
+DEBUG = args.debug
+
+# OpenSCAD executable (e.g. openscad.com on Windows, or a stub for benchmarks)
+OPENSCAD = os.environ.get("OPENSCAD", "openscad")
 
 def debug_log(msg, level="INFO"):
-    """Print debug message with level indicator."""
-    prefix = f"[{level}]" if DEBUG else ""
-    print(f"{prefix} {msg}", file=sys.stderr)
+    """Print message with level indicator; DEBUG-level messages only with --debug."""
+    if level == "DEBUG" and not DEBUG:
+        return
+    print(f"[{level}] {msg}", file=sys.stderr)
+
+timer = StageTimer(emit=args.timings)
+cache = RenderCache(args.render_cache, enabled=not args.no_render_cache)
+
+
+def render_scad(variant):
+    """SCAD source for one output variant (echo/stl/dxf) of the configured product."""
+    with timer.stage("scad_template", variant=variant):
+        return scad_templates.render_scad(args.product, variant, params, config_name, args.config)
+
 
-debug_log("=== GENERATE_MODEL DEBUG START ===")
+def run_openscad(kind, scad_path, out_file, stage):
+    """Render with OpenSCAD, or copy the output from the render cache.
+
+    Returns the CompletedProcess, or None on a cache hit.
+    """
+    key = render_key(args.product, kind, params, sources_hash(product["sources"]))
+    started_at, t0 = time.time(), time.perf_counter()
+    if cache.fetch(kind, key, out_file):
+        timer.record(stage, time.perf_counter() - t0, started_at=started_at, cache="hit")
+        debug_log(f"Render cache hit ({kind}): {key[:12]}", "INFO")
+        return None
+    cmd = [OPENSCAD, "-o", str(out_file.absolute()), str(scad_path.absolute())]
+    debug_log(f"OpenSCAD command: {' '.join(cmd)}", "DEBUG")
+    result = subprocess.run(cmd, capture_output=True, text=True, cwd=str(Path.cwd()))
+    timer.record(stage, time.perf_counter() - t0, started_at=started_at, cache="miss")
+    if result.returncode == 0:
+        cache.store(kind, key, out_file)
+    return result
+
+
+debug_log("=== GENERATE_MODEL DEBUG START ===", "DEBUG")
 debug_log(f"Current working directory: {os.getcwd()}", "DEBUG")
 debug_log(f"Script location: {Path(__file__).absolute()}", "DEBUG")
 debug_log(f"Output directory: {output_dir.absolute()}", "DEBUG")
@@ -38,18 +88,20 @@ debug_log("[1/6] Parsing configuration...", "INFO")
 debug_log(f"Config file: {args.config}", "DEBUG")
 debug_log(f"Presets file: {args.presets}", "DEBUG")
 
-config_json = output_dir / ".config_params.json"
+config_json = output_dir / f".config_params_{os.getpid()}.json"  # per process: jobs run concurrently
 cmd = [
     sys.executable, "scripts/config_to_params.py",
     "--config", args.config,
     "--presets", args.presets,
+    "--product", args.product,
     "--output", str(config_json),
 ]
 if args.debug:
     cmd.append("--debug")
 
 debug_log(f"Running: {' '.join(cmd)}", "DEBUG")
-result = subprocess.run(cmd, capture_output=True, text=True)
+with timer.stage("config_parse"):
+    result = subprocess.run(cmd, capture_output=True, text=True)
 if result.returncode != 0:
     debug_log(f"STDERR: {result.stderr}", "ERROR")
     debug_log(f"STDOUT: {result.stdout}", "ERROR")
@@ -58,7 +110,9 @@ if result.returncode != 0:
 debug_log(result.stdout.strip(), "DEBUG")
 
 params = json.loads(config_json.read_text(encoding="utf-8"))
+config_json.unlink()
 config_name = params.get("bom_tag", "unnamed")
+timer.labels["quality"] = params.get("quality", "production")
 debug_log(f"Config name: {config_name}", "DEBUG")
 debug_log(f"Parameters loaded: {list(params.keys())}", "DEBUG")
 
@@ -66,49 +120,21 @@ debug_log(f"Parameters loaded: {list(params.keys())}", "DEBUG")
 debug_log("", "INFO")
 debug_log("[2/6] Generating OpenSCAD file...", "INFO")
 
-scad_template = '''// Generated by config: {{ config_name }}
-// DO NOT EDIT - Generated from {{ config_file }}
-use <products/filterslang/filterslang.scad>;
-
-filterslang(
-  L={{ L }},
-  D={{ D }},
-  t={{ t }},
-  medium="{{ medium }}",
-  top="{{ top }}",
-  open_top={{ open_top | default(false) | lower }},
-  bottom="{{ bottom }}",
-  bottom_opt="{{ bottom_opt | default('zonder') }}",
-  rings_auto={{ rings_auto | default(true) | lower }},
-  rings_count={{ rings_count | default(0) }},
-  rings_positions={{ rings_positions | default([]) }},
-  ring_w={{ ring_w | default(10) }},
-  ring_t={{ ring_t | default(2) }},
-  reinforce_enable={{ reinforce_enable | default(false) | lower }},
-  reinforce_side="{{ reinforce_side | default('boven') }}",
-  reinforce_spans={{ reinforce_spans | default([]) }},
-  productzijde="{{ productzijde | default('buiten') }}",
-  bom_tag="{{ bom_tag }}",
-  $fn=96
-);
-'''
-
-template = Template(scad_template)
-scad_content = template.render(
-    config_name=config_name,
-    config_file=args.config,
-    **params
-)
+scad_content = render_scad("echo")
 
 # IMPORTANT: Generate in project root so that relative library paths resolve correctly
-# OpenSCAD looks for `use <>` imports relative to the file being rendered
+# OpenSCAD looks for `use <>` imports relative to the file being rendered, then on OPENSCADPATH
 project_root = Path.cwd()
-scad_file = project_root / f".gen_{config_name}.scad"
+scad_dir = Path(args.scad_dir).resolve() if args.scad_dir else project_root
+if scad_dir != project_root:
+    os.environ["OPENSCADPATH"] = os.pathsep.join(filter(None, [str(project_root), os.environ.get("OPENSCADPATH")]))
+scad_file = scad_dir / f".gen_{config_name}.scad"
 scad_file.write_text(scad_content, encoding="utf-8")
 debug_log(f"Generated SCAD file: {scad_file.absolute()}", "DEBUG")
 debug_log(f"SCAD file in project root for library resolution: {scad_file.name}", "DEBUG")
 debug_log(f"SCAD file size: {len(scad_content)} bytes", "DEBUG")
-debug_log(f"SCAD content (first 500 chars):\n{scad_content[:500]}", "DEBUG")
+if DEBUG:
+    debug_log(f"SCAD content (first 500 chars):\n{scad_content[:500]}", "DEBUG")
 
 # --- Step 3: Render with OpenSCAD ---
 if not args.skip_render:
@@ -125,27 +151,27 @@ if not args.skip_render:
     debug_log(f"SCAD file (absolute): {scad_file.absolute()}", "DEBUG")
     
     # Check if files exist
-    debug_log(f"SCAD file exists: {scad_file.exists()}", "DEBUG")
-    debug_log(f"products/filterslang/filterslang.scad exists (from cwd): {(cwd / 'products/filterslang/filterslang.scad').exists()}", "DEBUG")
+    if DEBUG:
+        debug_log(f"SCAD file exists: {scad_file.exists()}", "DEBUG")
+        debug_log(f"products/filterslang/filterslang.scad exists (from cwd): {(cwd / 'products/filterslang/filterslang.scad').exists()}", "DEBUG")
     
     # Method 1: Use absolute paths, run from project root
-    cmd = ["openscad", "-o", str(echo_file.absolute()), str(scad_file.absolute())]
-    debug_log(f"OpenSCAD command: {' '.join(cmd)}", "DEBUG")
     debug_log(f"OpenSCAD running from: {cwd}", "DEBUG")
+    result = run_openscad("echo", scad_file, echo_file, "render_echo")
     
-    result = subprocess.run(cmd, capture_output=True, text=True, cwd=str(cwd))
+    if result is not None:
+        debug_log(f"OpenSCAD return code: {result.returncode}", "DEBUG")
+        debug_log(f"OpenSCAD stdout:\n{result.stdout}", "DEBUG")
+        debug_log(f"OpenSCAD stderr:\n{result.stderr}", "DEBUG")
     
-    debug_log(f"OpenSCAD return code: {result.returncode}", "DEBUG")
-    debug_log(f"OpenSCAD stdout:\n{result.stdout}", "DEBUG")
-    debug_log(f"OpenSCAD stderr:\n{result.stderr}", "DEBUG")
-    
-    if result.returncode != 0:
+    if result is not None and result.returncode != 0:
         debug_log(f"OpenSCAD render failed (return code {result.returncode})", "ERROR")
+        debug_log(f"OpenSCAD stderr:\n{result.stderr[-1000:]}", "ERROR")
         sys.exit(1)
     
-    # Check echo file
+    # Check echo file (reading it back is debug-only I/O)
     debug_log(f"Echo file exists after render: {echo_file.exists()}", "DEBUG")
-    if echo_file.exists():
+    if DEBUG and echo_file.exists():
         echo_content = echo_file.read_text(encoding="utf-8", errors="ignore")
         debug_log(f"Echo file size: {len(echo_content)} bytes", "DEBUG")
         debug_log(f"Echo content (first 1000 chars):\n{echo_content[:1000]}", "DEBUG")
@@ -172,16 +198,18 @@ if not args.skip_bom:
     
     cmd = [
         sys.executable, "scripts/render_bom.py",
-        "--product", "filterslang",
-        "--version", "1.0.0",
+        "--product", args.product,
+        "--version", product["version"],
         "--echo", str(echo_file),
         "--jsonl", str(jsonl_file),
         "--csv", str(csv_file),
-        "--debug",
     ]
+    if DEBUG:
+        cmd.append("--debug")
     
     debug_log(f"BOM extraction command: {' '.join(cmd)}", "DEBUG")
-    result = subprocess.run(cmd, capture_output=True, text=True)
+    with timer.stage("bom_parse"):
+        result = subprocess.run(cmd, capture_output=True, text=True)
     
     debug_log(f"BOM extraction return code: {result.returncode}", "DEBUG")
     debug_log(f"BOM extraction stdout:\n{result.stdout}", "DEBUG")
@@ -189,26 +217,11 @@ if not args.skip_bom:
     
     if result.returncode != 0:
         debug_log(f"BOM extraction failed", "ERROR")
+        debug_log(f"BOM extraction stderr:\n{result.stderr}", "ERROR")
         sys.exit(1)
     
-    # Also produce Excel BOM
-    cmd = [
-        sys.executable, "scripts/bom_producer.py",
-        "--jsonl", str(jsonl_file),
-        "--parts", "data/parts.csv",
-        "--xlsx", str(xlsx_file),
-    ]
-    
-    debug_log(f"BOM producer command: {' '.join(cmd)}", "DEBUG")
-    result = subprocess.run(cmd, capture_output=True, text=True)
-    
-    debug_log(f"BOM producer return code: {result.returncode}", "DEBUG")
-    if result.returncode != 0:
-        debug_log(f"BOM production stdout:\n{result.stdout}", "ERROR")
-        debug_log(f"BOM production stderr:\n{result.stderr}", "ERROR")
-        sys.exit(1)
-    
-    debug_log(f"✓ Extracted BOM to {jsonl_file}, {csv_file}, {xlsx_file}", "INFO")
+    # The production BOM (Excel) follows the STL: it carries the quantities measured on the mesh
+    debug_log(f"✓ Extracted BOM to {jsonl_file}, {csv_file}", "INFO")
 else:
     debug_log("⊘ Skipping BOM extraction", "INFO")
 
@@ -217,60 +230,58 @@ if not args.skip_stl:
     debug_log("", "INFO")
     debug_log("[5/6] Generating STL (3D model)...", "INFO")
     
-    stl_template = '''// 3D model for STL export - {{ config_name }}
-// DO NOT EDIT - Generated from {{ config_file }}
-use <products/filterslang/filterslang.scad>;
-
-filterslang(
-  L={{ L }},
-  D={{ D }},
-  t={{ t }},
-  medium="{{ medium }}",
-  top="{{ top }}",
-  open_top={{ open_top | default(false) | lower }},
-  bottom="{{ bottom }}",
-  bottom_opt="{{ bottom_opt | default('zonder') }}",
-  rings_auto={{ rings_auto | default(true) | lower }},
-  rings_count={{ rings_count | default(0) }},
-  rings_positions={{ rings_positions | default([]) }},
-  ring_w={{ ring_w | default(10) }},
-  ring_t={{ ring_t | default(2) }},
-  reinforce_enable={{ reinforce_enable | default(false) | lower }},
-  reinforce_side="{{ reinforce_side | default('boven') }}",
-  reinforce_spans={{ reinforce_spans | default([]) }},
-  productzijde="{{ productzijde | default('buiten') }}",
-  bom_tag="{{ bom_tag }}_3d",
-  $fn=96
-);
-'''
-    
-    template = Template(stl_template)
-    stl_scad_content = template.render(
-        config_name=config_name,
-        config_file=args.config,
-        **params
-    )
+    stl_scad_content = render_scad("stl")
     
     # Generate STL .scad in project root (for library resolution)
-    stl_scad_file = project_root / f".gen_{config_name}_stl.scad"
+    stl_scad_file = scad_dir / f".gen_{config_name}_stl.scad"
     stl_scad_file.write_text(stl_scad_content, encoding="utf-8")
     
     debug_log(f"Generated STL SCAD file: {stl_scad_file.absolute()}", "DEBUG")
     
     stl_file = output_dir / f"{config_name}.stl"
-    cmd = ["openscad", "-o", str(stl_file.absolute()), str(stl_scad_file.absolute())]
+    result = run_openscad("stl", stl_scad_file, stl_file, "render_stl")
     
-    debug_log(f"STL render command: {' '.join(cmd)}", "DEBUG")
-    result = subprocess.run(cmd, capture_output=True, text=True, cwd=str(Path.cwd()))
-    
-    debug_log(f"STL render return code: {result.returncode}", "DEBUG")
-    if result.returncode != 0:
+    if result is not None:
+        debug_log(f"STL render return code: {result.returncode}", "DEBUG")
+    if result is not None and result.returncode != 0:
         debug_log(f"STL render stdout:\n{result.stdout}", "ERROR")
         debug_log(f"STL render stderr:\n{result.stderr}", "ERROR")
         sys.exit(1)
     
     debug_log(f"✓ Generated STL to {stl_file}", "INFO")
     
+    # Viewer LOD meshes (cached under the STL hash; the web viewer loads them progressively)
+    if not args.skip_lod:
+        import mesh_lod
+        try:
+            with timer.stage("mesh_lod"):
+                levels = mesh_lod.build_lods(stl_file)
+            debug_log(f"✓ Built {len(levels)} viewer LOD mesh(es) for {stl_file.name}", "INFO")
+        except (OSError, ValueError) as e:
+            debug_log(f"Viewer LOD meshes not built: {e}", "WARN")
+    
+    # PNG thumbnail, cached under the geometry parameters hash (any quality tier)
+    if not args.skip_thumbnail:
+        import thumbnails
+        thumb_key = thumbnails.thumbnail_key(args.product, params, sources_hash(product["sources"]))
+        png_file = output_dir / f"{config_name}.png"
+        started_at, t0 = time.time(), time.perf_counter()
+        if cache.fetch("png", thumb_key, png_file):
+            timer.record("thumbnail", time.perf_counter() - t0, started_at=started_at, cache="hit")
+            debug_log(f"✓ Thumbnail {png_file.name} (cached)", "INFO")
+        else:
+            try:
+                png_file.write_bytes(thumbnails.render_png(stl_file))
+            except (OSError, ValueError) as e:
+                debug_log(f"Thumbnail not rendered: {e}", "WARN")
+            else:
+                debug_log(f"✓ Thumbnail {png_file.name}", "INFO")
+                try:
+                    cache.store("png", thumb_key, png_file)
+                except OSError as e:
+                    debug_log(f"Thumbnail not cached: {e}", "WARN")
+            timer.record("thumbnail", time.perf_counter() - t0, started_at=started_at, cache="miss")
+    
     # Clean up temp SCAD file
     if stl_scad_file.exists():
         stl_scad_file.unlink()
@@ -278,60 +289,62 @@ filterslang(
 else:
     debug_log("⊘ Skipping STL export", "INFO")
 
+# --- Production BOM (Excel), after step 5: measured quantities from the STL ---
+# Products with a production mapping in data/parts.csv; the mesh measurement (surface area, volume,
+# z-band sections; scripts/mesh_measure.py) runs inside bom_producer.py
+if not args.skip_bom and product["production"]:
+    cmd = [
+        sys.executable, "scripts/bom_producer.py",
+        "--product", args.product,
+        "--jsonl", str(jsonl_file),
+        "--parts", product["parts"],
+        "--xlsx", str(xlsx_file),
+    ]
+    stl_file = output_dir / f"{config_name}.stl"
+    if not args.skip_stl and stl_file.exists():
+        # Measuring a large mesh in pure Python takes seconds; without NumPy keep the parametric quantities
+        if importlib.util.find_spec("numpy") is not None:
+            cmd += ["--stl", str(stl_file)]
+        else:
+            debug_log("Measured quantities skipped (NumPy not installed: pip install numpy)", "WARN")
+    if args.timings:
+        cmd.append("--timings")
+    
+    debug_log(f"BOM producer command: {' '.join(cmd)}", "DEBUG")
+    with timer.stage("bom_production"):
+        result = subprocess.run(cmd, capture_output=True, text=True)
+    timer.forward(result.stderr, parent="bom_production")
+    
+    debug_log(f"BOM producer return code: {result.returncode}", "DEBUG")
+    if result.returncode != 0:
+        debug_log(f"BOM production stdout:\n{result.stdout}", "ERROR")
+        debug_log(f"BOM production stderr:\n{result.stderr}", "ERROR")
+        sys.exit(1)
+    for line in result.stderr.splitlines():
+        if line.startswith("WARNING: "):
+            debug_log(line[len("WARNING: "):], "WARN")
+    
+    debug_log(f"✓ Production BOM {xlsx_file}" + (" (measured on the STL)" if "--stl" in cmd else ""), "INFO")
+
 # --- Step 6: Generate DXF (2D projection) ---
 if not args.skip_dxf:
     debug_log("", "INFO")
     debug_log("[6/6] Generating DXF (2D projection)...", "INFO")
     
-    dxf_template = '''// 2D projection for DXF export - {{ config_name }}
-// DO NOT EDIT - Generated from {{ config_file }}
-use <products/filterslang/filterslang.scad>;
-
-projection(cut=false)
-filterslang(
-  L={{ L }},
-  D={{ D }},
-  t={{ t }},
-  medium="{{ medium }}",
-  top="{{ top }}",
-  open_top={{ open_top | default(false) | lower }},
-  bottom="{{ bottom }}",
-  bottom_opt="{{ bottom_opt | default('zonder') }}",
-  rings_auto={{ rings_auto | default(true) | lower }},
-  rings_count={{ rings_count | default(0) }},
-  rings_positions={{ rings_positions | default([]) }},
-  ring_w={{ ring_w | default(10) }},
-  ring_t={{ ring_t | default(2) }},
-  reinforce_enable={{ reinforce_enable | default(false) | lower }},
-  reinforce_side="{{ reinforce_side | default('boven') }}",
-  reinforce_spans={{ reinforce_spans | default([]) }},
-  productzijde="{{ productzijde | default('buiten') }}",
-  bom_tag="{{ bom_tag }}_dxf",
-  $fn=96
-);
-'''
-    
-    template = Template(dxf_template)
-    dxf_scad_content = template.render(
-        config_name=config_name,
-        config_file=args.config,
-        **params
-    )
+    dxf_scad_content = render_scad("dxf")
     
     # Generate DXF .scad in project root (for library resolution)
-    dxf_scad_file = project_root / f".gen_{config_name}_dxf.scad"
+    dxf_scad_file = scad_dir / f".gen_{config_name}_dxf.scad"
     dxf_scad_file.write_text(dxf_scad_content, encoding="utf-8")
     
     debug_log(f"Generated DXF SCAD file: {dxf_scad_file.absolute()}", "DEBUG")
     
     dxf_file = output_dir / f"{config_name}.dxf"
-    cmd = ["openscad", "-o", str(dxf_file.absolute()), str(dxf_scad_file.absolute())]
+    result = run_openscad("dxf", dxf_scad_file, dxf_file, "render_dxf")
     
-    debug_log(f"DXF render command: {' '.join(cmd)}", "DEBUG")
-    result = subprocess.run(cmd, capture_output=True, text=True, cwd=str(Path.cwd()))
-    
-    debug_log(f"DXF render return code: {result.returncode}", "DEBUG")
-    if result.returncode != 0:
+    if result is not None:
+        debug_log(f"DXF render return code: {result.returncode}", "DEBUG")
+    if result is not None and result.returncode != 0:
         debug_log(f"DXF render stdout:\n{result.stdout}", "ERROR")
         debug_log(f"DXF render stderr:\n{result.stderr}", "ERROR")
         sys.exit(1)
@@ -345,6 +358,7 @@ debug_log("✓ Model generation complete!", "INFO")
 debug_log(f"  Config:  {args.config}", "INFO")
 debug_log(f"  Output:  {output_dir}/", "INFO")
 debug_log(f"  Files:   {config_name}.*", "INFO")
+debug_log(f"  Timed:   {timer.total():.3f}s over {len(timer.spans)} stages", "INFO")
 debug_log("=== GENERATE_MODEL DEBUG END ===", "DEBUG")
 
 # Cleanup temporary .scad files from project root
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# scripts/http_payloads.py
+# Precomputed responses for read-mostly endpoints (presets, connectors, examples, the configurator page):
+# built once, rebuilt when a source file's mtime/size changes, held as encoded bytes plus a gzip
+# (and brotli, when installed) copy with a strong ETag per encoding. ``conditional()`` answers
+# If-None-Match with 304 and picks the encoding from Accept-Encoding; the Flask and Quart apps only
+# wrap its (status, headers, body) in their response type.
+
+import gzip, json, time, hashlib, threading
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Seconds between source stat() checks of one payload (requests in between are served as is)
+CHECK_INTERVAL = 1.0
+
+JSON_TYPE = "application/json"
+HTML_TYPE = "text/html; charset=utf-8"
+
+
+def source_stamp(paths):
+    """(path, mtime_ns, size) of existing sources; directories count too (files added or removed)."""
+    stamp = []
+    for p in paths:
+        try:
+            st = Path(p).stat()
+        except OSError:
+            continue
+        stamp.append((str(p), st.st_mtime_ns, st.st_size))
+    return tuple(stamp)
+
+
+def json_bytes(data):
+    """Compact UTF-8 JSON (sorted keys, as jsonify sent them)."""
+    return json.dumps(data, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+
+class Payload:
+    """One response body in every encoding it is served in, with its ETags."""
+
+    def __init__(self, body, content_type, cache_control, stamp):
+        self.content_type = content_type
+        self.cache_control = cache_control
+        self.stamp = stamp
+        self.checked = time.monotonic()
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        self.encodings = {"identity": (body, f'"{digest}"')}
+        if len(body) >= 512:
+            self.encodings["gzip"] = (gzip.compress(body, 9, mtime=0), f'"{digest}-gz"')
+            if brotli is not None:
+                self.encodings["br"] = (brotli.compress(body), f'"{digest}-br"')
+        self.etags = {etag for _, etag in self.encodings.values()}
+
+
+class PayloadCache:
+    """Named payloads, each rebuilt by its builder when its sources change."""
+
+    def __init__(self, check_interval=CHECK_INTERVAL):
+        self.check_interval = check_interval
+        self._payloads = {}
+        self._lock = threading.Lock()
+
+    def get(self, name, sources, build, content_type=JSON_TYPE, cache_control="public, max-age=60"):
+        """Payload ``name``; ``sources`` is a callable returning the files it derives from, ``build`` its body
+        (bytes, or data for JSON)."""
+        payload = self._payloads.get(name)
+        now = time.monotonic()
+        if payload is not None and now - payload.checked < self.check_interval:
+            return payload
+        with self._lock:
+            payload = self._payloads.get(name)
+            stamp = source_stamp(sources())
+            if payload is not None and payload.stamp == stamp:
+                payload.checked = now
+                return payload
+            body = build()
+            if not isinstance(body, bytes):
+                body = json_bytes(body)
+            payload = self._payloads[name] = Payload(body, content_type, cache_control, stamp)
+            return payload
+
+    def clear(self):
+        with self._lock:
+            self._payloads.clear()
+
+
+def accepted_encoding(payload, accept_encoding):
+    """Best encoding of ``payload`` the client accepts (br > gzip > identity; ``q=0`` excludes)."""
+    accepted = set()
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q=") and q[2:].strip() in ("0", "0.0", "0.00", "0.000"):
+            continue
+        accepted.add(coding.strip().lower())
+    for coding in ("br", "gzip"):
+        if coding in payload.encodings and (coding in accepted or "*" in accepted):
+            return coding
+    return "identity"
+
+
+def conditional(payload, if_none_match=None, accept_encoding=None):
+    """``(status, headers, body)`` for a request: 304 when an ETag matches, else the encoded body."""
+    coding = accepted_encoding(payload, accept_encoding)
+    body, etag = payload.encodings[coding]
+    headers = {"ETag": etag, "Cache-Control": payload.cache_control, "Vary": "Accept-Encoding"}
+    if if_none_match:
+        tags = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+        # Any representation of the same content is still valid for this client
+        if "*" in tags or tags & payload.etags:
+            return 304, headers, b""
+    headers["Content-Type"] = payload.content_type
+    if coding != "identity":
+        headers["Content-Encoding"] = coding
+    return 200, headers, body
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# scripts/import_budget.py
+# Import-time budget: runs `python -X importtime` for the web apps and every script, reports the
+# wall time, the import time and the heaviest top-level imports, and (with --check) fails when a
+# target exceeds its budget. --first-request also measures process start → first HTTP response.
+#
+#   python scripts/import_budget.py
+#   python scripts/import_budget.py --check --json out/import_budget.json
+#   python scripts/import_budget.py --only app asgi_app --first-request
+
+import re, sys, json, time, argparse, subprocess
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+SCRIPTS = ROOT / "scripts"
+
+# Budgets in ms of import time (-X importtime, excludes interpreter start-up)
+# (generate_model / bom_producer: jinja2 ~70 ms and openpyxl ~150 ms must stay lazy)
+BUDGETS_MS = {
+    "app": 400,
+    "asgi_app": 700,
+    "generate_model": 100,
+    "bom_producer": 100,
+    "config_to_params": 120,
+}
+DEFAULT_BUDGET_MS = 150
+
+# Test doubles, not shipped code
+SKIP = {"stub_openscad", "import_budget"}
+
+IMPORT_LINE = re.compile(r"^import time:\s*(\d+)\s*\|\s*(\d+)\s*\|(\s*)(\S+)\s*$")
+
+FIRST_REQUEST = """
+import time
+started = time.perf_counter()
+import {module} as web
+imported = time.perf_counter()
+{request}
+print(f"{{(imported - started) * 1000:.1f}} {{(time.perf_counter() - started) * 1000:.1f}} {{status}}")
+"""
+FLASK_REQUEST = "status = web.app.test_client().get('{path}').status_code"
+QUART_REQUEST = """import asyncio
+async def first():
+    async with web.app.test_app() as test_app:
+        return (await test_app.test_client().get('{path}')).status_code
+status = asyncio.run(first())"""
+
+
+def targets():
+    """(name, argv) per target: web apps and library modules are imported, argparse scripts run --help."""
+    yield "app", ["-c", "import app"]
+    yield "asgi_app", ["-c", "import asgi_app"]
+    for path in sorted(SCRIPTS.glob("*.py")):
+        if path.stem in SKIP:
+            continue
+        text = path.read_text(encoding="utf-8")
+        if re.search(r"^args = .*parse_args\(\)", text, re.M):
+            yield path.stem, [str(path), "--help"]
+        else:
+            yield path.stem, ["-c", f"import sys; sys.path.insert(0, 'scripts'); import {path.stem}"]
+
+
+def parse_importtime(stderr):
+    """``[(depth, cumulative_us, module)]`` in -X importtime order (children before their parent)."""
+    entries = []
+    for line in stderr.splitlines():
+        m = IMPORT_LINE.match(line)
+        if m:
+            entries.append(((len(m.group(3)) - 1) // 2, int(m.group(2)), m.group(4)))
+    return entries
+
+
+def target_imports(entries, name, baseline):
+    """Import µs of a target and its direct imports: the children of ``name``, or for scripts run
+    as __main__ the top-level imports that a bare interpreter does not do."""
+    for i, (depth, us, module) in enumerate(entries):
+        if depth == 0 and module == name:
+            children = []
+            for d, child_us, child in reversed(entries[:i]):
+                if d == 0:
+                    break
+                if d == 1:
+                    children.append((child_us, child))
+            return us, children
+    top = [(us, module) for depth, us, module in entries if depth == 0 and module not in baseline]
+    return sum(us for us, _ in top), top
+
+
+def baseline_modules():
+    """Modules a bare interpreter imports at start-up (site, encodings, ...)."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "pass"], capture_output=True, text=True)
+    return {module for _, _, module in parse_importtime(result.stderr)}
+
+
+def measure(name, argv, repeat, baseline):
+    """Best of ``repeat`` runs (cold-ish: each run is a fresh interpreter)."""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = subprocess.run([sys.executable, "-X", "importtime", *argv], capture_output=True, text=True,
+                                cwd=str(ROOT))
+        wall = time.perf_counter() - started
+        if result.returncode != 0:
+            return {"target": name, "error": result.stderr.strip().splitlines()[-1:] or ["exit %d" % result.returncode]}
+        total_us, imports = target_imports(parse_importtime(result.stderr), name, baseline)
+        run = {"target": name, "wall_ms": round(wall * 1000, 1), "import_ms": round(total_us / 1000, 1),
+               "heaviest": [{"module": mod, "ms": round(us / 1000, 1)} for us, mod in sorted(imports, reverse=True)[:3]]}
+        if best is None or run["import_ms"] < best["import_ms"]:
+            best = run
+    return best
+
+
+def first_request(module, path, repeat):
+    """Process start → first response of ``path`` (in-process test client), best of ``repeat``."""
+    request = (QUART_REQUEST if module == "asgi_app" else FLASK_REQUEST).format(path=path)
+    code = FIRST_REQUEST.format(module=module, request=request)
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=str(ROOT))
+        total = (time.perf_counter() - started) * 1000
+        if result.returncode != 0:
+            return {"target": module, "path": path, "error": result.stderr.strip().splitlines()[-1:]}
+        import_ms, response_ms, status = result.stdout.split()[-3:]
+        run = {"target": module, "path": path, "status": int(status), "process_ms": round(total, 1),
+               "import_ms": float(import_ms), "first_response_ms": float(response_ms)}
+        if best is None or run["process_ms"] < best["process_ms"]:
+            best = run
+    return best
+
+
+def main():
+    p = argparse.ArgumentParser(description="Report (and check) import time of the apps and scripts")
+    p.add_argument("--only", nargs="*", help="Targets to measure (default: all)")
+    p.add_argument("--repeat", type=int, default=3, help="Runs per target; the fastest counts")
+    p.add_argument("--check", action="store_true", help="Exit 1 when a target exceeds its budget")
+    p.add_argument("--budget", nargs="*", default=[], help="Override budgets: name=ms")
+    p.add_argument("--first-request", nargs="*", metavar="PATH",
+                   help="Also time process start → first response for app/asgi_app (default: / /api/presets)")
+    p.add_argument("--json", help="Write the report as JSON")
+    args = p.parse_args()
+
+    budgets = dict(BUDGETS_MS)
+    for item in args.budget:
+        name, _, ms = item.partition("=")
+        budgets[name] = float(ms)
+
+    baseline = baseline_modules()
+    report, over = [], []
+    for name, argv in targets():
+        if args.only and name not in args.only:
+            continue
+        row = measure(name, argv, args.repeat, baseline)
+        row["budget_ms"] = budgets.get(name, DEFAULT_BUDGET_MS)
+        report.append(row)
+        if "error" in row:
+            print(f"  {name:<22} ERROR {row['error']}")
+            over.append(name)
+            continue
+        status = "ok" if row["import_ms"] <= row["budget_ms"] else "OVER"
+        if status == "OVER":
+            over.append(name)
+        heaviest = ", ".join(f"{h['module']} {h['ms']:.0f}" for h in row["heaviest"])
+        print(f"  {name:<22} import {row['import_ms']:7.1f} ms / {row['budget_ms']:5.0f}  "
+              f"wall {row['wall_ms']:7.1f} ms  {status:<4}  [{heaviest}]")
+
+    requests = []
+    if args.first_request is not None:
+        for module in ("app", "asgi_app"):
+            if args.only and module not in args.only:
+                continue
+            for path in args.first_request or ["/", "/api/presets"]:
+                row = first_request(module, path, args.repeat)
+                requests.append(row)
+                if "error" in row:
+                    print(f"  {module:<10} {path:<16} ERROR {row['error']}")
+                else:
+                    print(f"  {module:<10} {path:<16} first response {row['first_response_ms']:7.1f} ms "
+                          f"(import {row['import_ms']:.1f} ms, process {row['process_ms']:.1f} ms, "
+                          f"HTTP {row['status']})")
+
+    if args.json:
+        Path(args.json).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.json).write_text(json.dumps({"imports": report, "first_request": requests}, indent=2),
+                                   encoding="utf-8")
+    if over:
+        print(f"✗ Over budget: {', '.join(over)}" if args.check else f"Over budget (report only): {', '.join(over)}")
+        if args.check:
+            sys.exit(1)
+    else:
+        print(f"✓ {len(report)} target(s) within budget")
+
+
+if __name__ == "__main__":
+    main()
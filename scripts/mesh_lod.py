@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+# scripts/mesh_lod.py
+# Level-of-detail meshes for the 3D viewer: an STL (ASCII or binary) is decimated by vertex
+# clustering on grids of increasing resolution and each level is written as a compact GLB with
+# quantised attributes (KHR_mesh_quantization: uint16 positions de-quantised by the node's
+# translation/scale, int8 normals, uint16/uint32 indices). LOD 0 is the coarsest; the last level is
+# the full mesh. Levels are cached under the STL's SHA-256:
+#
+#   out/cache/mesh/<sha[:2]>/<sha>.lod<n>.glb
+#
+#   python scripts/mesh_lod.py out/custom_models/PE500_Medium_Standard.stl
+#   python scripts/mesh_lod.py model.stl --out-dir /tmp/lods
+
+import sys, json, math, time, struct, hashlib, argparse, threading
+from array import array
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_DIR = ROOT / "out" / "cache" / "mesh"
+
+# Clustering grid cells per axis per level (a 2 m sleeve keeps its round section); None = full resolution
+LOD_GRIDS = (8, 20, 48, None)
+
+Q_MAX = 65535
+GLB_MAGIC, GLB_VERSION = 0x46546C67, 2     # "glTF"
+CHUNK_JSON, CHUNK_BIN = 0x4E4F534A, 0x004E4942
+ARRAY_BUFFER, ELEMENT_ARRAY_BUFFER = 34962, 34963
+BYTE, UNSIGNED_SHORT, UNSIGNED_INT = 5120, 5123, 5125
+
+
+def read_stl(path):
+    """Triangles of an ASCII or binary STL as a flat list of 9 floats per facet."""
+    data = Path(path).read_bytes()
+    if len(data) >= 84:
+        (count,) = struct.unpack_from("<I", data, 80)
+        if 84 + count * 50 == len(data):
+            coords = []
+            for facet in struct.iter_unpack("<12fH", data[84:]):
+                coords.extend(facet[3:12])
+            return coords
+    coords = []
+    for line in data.decode("utf-8", errors="replace").splitlines():
+        parts = line.split()
+        if len(parts) == 4 and parts[0] == "vertex":
+            coords.extend((float(parts[1]), float(parts[2]), float(parts[3])))
+    return coords
+
+
+def index_mesh(coords):
+    """Shared vertices ``[(x, y, z)]`` and triangles ``[(a, b, c)]`` of flat facet coordinates."""
+    lookup, vertices, triangles = {}, [], []
+    tri = []
+    for i in range(0, len(coords) - len(coords) % 3, 3):
+        v = (coords[i], coords[i + 1], coords[i + 2])
+        index = lookup.get(v)
+        if index is None:
+            index = lookup[v] = len(vertices)
+            vertices.append(v)
+        tri.append(index)
+        if len(tri) == 3:
+            if tri[0] != tri[1] and tri[1] != tri[2] and tri[0] != tri[2]:
+                triangles.append(tuple(tri))
+            tri = []
+    return vertices, triangles
+
+
+def bounds(vertices):
+    xs, ys, zs = zip(*vertices) if vertices else ((0,), (0,), (0,))
+    return (min(xs), min(ys), min(zs)), (max(xs), max(ys), max(zs))
+
+
+def cluster(vertices, triangles, grid, lo, hi):
+    """Vertex clustering: vertices in one grid cell merge into their mean; collapsed and duplicate
+    triangles (also the mirrored inner/outer faces of a collapsed thin wall) are dropped."""
+    sx, sy, sz = ((h - l) / grid or 1.0 for l, h in zip(lo, hi))
+    cells, sums, remap = {}, [], []
+    for x, y, z in vertices:
+        key = (int((x - lo[0]) / sx), int((y - lo[1]) / sy), int((z - lo[2]) / sz))
+        index = cells.get(key)
+        if index is None:
+            index = cells[key] = len(sums)
+            sums.append([0.0, 0.0, 0.0, 0])
+        s = sums[index]
+        s[0] += x
+        s[1] += y
+        s[2] += z
+        s[3] += 1
+        remap.append(index)
+    merged = [(s[0] / s[3], s[1] / s[3], s[2] / s[3]) for s in sums]
+    seen, kept = set(), []
+    for a, b, c in triangles:
+        a, b, c = remap[a], remap[b], remap[c]
+        if a == b or b == c or a == c:
+            continue
+        key = tuple(sorted((a, b, c)))
+        if key in seen:
+            continue
+        seen.add(key)
+        kept.append((a, b, c))
+    # Drop vertices no triangle uses any more
+    used = sorted({i for t in kept for i in t})
+    compact = {old: new for new, old in enumerate(used)}
+    return [merged[i] for i in used], [(compact[a], compact[b], compact[c]) for a, b, c in kept]
+
+
+def vertex_normals(vertices, triangles):
+    """Area-weighted vertex normals."""
+    acc = [[0.0, 0.0, 0.0] for _ in vertices]
+    for a, b, c in triangles:
+        (ax, ay, az), (bx, by, bz), (cx, cy, cz) = vertices[a], vertices[b], vertices[c]
+        ux, uy, uz = bx - ax, by - ay, bz - az
+        vx, vy, vz = cx - ax, cy - ay, cz - az
+        nx, ny, nz = uy * vz - uz * vy, uz * vx - ux * vz, ux * vy - uy * vx
+        for i in (a, b, c):
+            n = acc[i]
+            n[0] += nx
+            n[1] += ny
+            n[2] += nz
+    result = []
+    for nx, ny, nz in acc:
+        length = math.sqrt(nx * nx + ny * ny + nz * nz) or 1.0
+        result.append((nx / length, ny / length, nz / length))
+    return result
+
+
+def _pad(data, fill=b"\0"):
+    return data + fill * (-len(data) % 4)
+
+
+def glb_bytes(vertices, triangles, lo, hi):
+    """GLB with KHR_mesh_quantization: positions uint16 (stride 8), normals int8 (stride 4)."""
+    extent = [(h - l) or 1.0 for l, h in zip(lo, hi)]
+    positions = array("H")
+    qmin, qmax = [Q_MAX] * 3, [0] * 3
+    for v in vertices:
+        q = [int(round((v[k] - lo[k]) / extent[k] * Q_MAX)) for k in range(3)]
+        for k in range(3):
+            if q[k] < qmin[k]:
+                qmin[k] = q[k]
+            if q[k] > qmax[k]:
+                qmax[k] = q[k]
+        positions.extend((q[0], q[1], q[2], 0))
+    normals = array("b")
+    for nx, ny, nz in vertex_normals(vertices, triangles):
+        normals.extend((int(round(nx * 127)), int(round(ny * 127)), int(round(nz * 127)), 0))
+    indices = array("H" if len(vertices) <= Q_MAX else "I", (i for t in triangles for i in t))
+    if sys.byteorder != "little":
+        for a in (positions, indices):
+            a.byteswap()
+
+    blobs = [_pad(positions.tobytes()), _pad(normals.tobytes()), _pad(indices.tobytes())]
+    views, offset = [], 0
+    for blob, stride, target in zip(blobs, (8, 4, None), (ARRAY_BUFFER, ARRAY_BUFFER, ELEMENT_ARRAY_BUFFER)):
+        view = {"buffer": 0, "byteOffset": offset, "byteLength": len(blob), "target": target}
+        if stride:
+            view["byteStride"] = stride
+        views.append(view)
+        offset += len(blob)
+    n = len(vertices)
+    gltf = {
+        "asset": {"version": "2.0", "generator": "scripts/mesh_lod.py"},
+        "extensionsUsed": ["KHR_mesh_quantization"],
+        "extensionsRequired": ["KHR_mesh_quantization"],
+        "scene": 0,
+        "scenes": [{"nodes": [0]}],
+        "nodes": [{"mesh": 0, "translation": list(lo), "scale": [e / Q_MAX for e in extent]}],
+        "meshes": [{"primitives": [{"attributes": {"POSITION": 0, "NORMAL": 1}, "indices": 2, "material": 0}]}],
+        "materials": [{"pbrMetallicRoughness": {"baseColorFactor": [0.82, 0.82, 0.82, 1.0],
+                                                "metallicFactor": 0.0, "roughnessFactor": 0.6},
+                       "doubleSided": True}],
+        "buffers": [{"byteLength": offset}],
+        "bufferViews": views,
+        "accessors": [
+            {"bufferView": 0, "componentType": UNSIGNED_SHORT, "count": n, "type": "VEC3",
+             "min": qmin if n else [0, 0, 0], "max": qmax if n else [0, 0, 0]},
+            {"bufferView": 1, "componentType": BYTE, "normalized": True, "count": n, "type": "VEC3"},
+            {"bufferView": 2, "componentType": UNSIGNED_SHORT if indices.typecode == "H" else UNSIGNED_INT,
+             "count": len(indices), "type": "SCALAR"},
+        ],
+    }
+    json_chunk = _pad(json.dumps(gltf, separators=(",", ":")).encode("utf-8"), b" ")
+    bin_chunk = b"".join(blobs)
+    total = 12 + 8 + len(json_chunk) + 8 + len(bin_chunk)
+    return b"".join((struct.pack("<III", GLB_MAGIC, GLB_VERSION, total),
+                     struct.pack("<II", len(json_chunk), CHUNK_JSON), json_chunk,
+                     struct.pack("<II", len(bin_chunk), CHUNK_BIN), bin_chunk))
+
+
+def stl_sha256(path):
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+def lod_path(sha, level, root=DEFAULT_DIR):
+    return Path(root) / sha[:2] / f"{sha}.lod{level}.glb"
+
+
+def build_lods(stl, sha=None, root=DEFAULT_DIR, grids=LOD_GRIDS):
+    """Write all LOD levels of an STL (skipped when cached); returns ``[{level, path, triangles, bytes}]``."""
+    sha = sha or stl_sha256(stl)
+    paths = [lod_path(sha, level, root) for level in range(len(grids))]
+    if all(p.exists() for p in paths):
+        return [{"level": level, "path": str(p), "bytes": p.stat().st_size} for level, p in enumerate(paths)]
+    vertices, triangles = index_mesh(read_stl(stl))
+    lo, hi = bounds(vertices)
+    levels = []
+    for level, (grid, path) in enumerate(zip(grids, paths)):
+        verts, tris = cluster(vertices, triangles, grid, lo, hi) if grid else (vertices, triangles)
+        data = glb_bytes(verts, tris, lo, hi)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+        tmp.write_bytes(data)
+        tmp.replace(path)
+        levels.append({"level": level, "path": str(path), "triangles": len(tris), "bytes": len(data)})
+    return levels
+
+
+_LOCKS = {}
+_LOCKS_LOCK = threading.Lock()
+
+
+def get_lod(stl, level, sha=None, root=DEFAULT_DIR):
+    """Path of one LOD level of an STL, building all levels once on first request."""
+    sha = sha or stl_sha256(stl)
+    path = lod_path(sha, level, root)
+    if path.exists():
+        return path
+    with _LOCKS_LOCK:
+        lock = _LOCKS.setdefault(sha, threading.Lock())
+    with lock:
+        if not path.exists():
+            build_lods(stl, sha, root)
+    return path
+
+
+def main():
+    p = argparse.ArgumentParser(description="Build quantised GLB level-of-detail meshes from an STL")
+    p.add_argument("stl", help="STL file (ASCII or binary)")
+    p.add_argument("--out-dir", default=str(DEFAULT_DIR), help="LOD cache directory")
+    args = p.parse_args()
+
+    started = time.perf_counter()
+    size = Path(args.stl).stat().st_size
+    levels = build_lods(args.stl, root=args.out_dir)
+    elapsed = time.perf_counter() - started
+    for lod in levels:
+        triangles = f"{lod['triangles']:7d} triangles  " if "triangles" in lod else ""
+        print(f"  lod{lod['level']}  {triangles}{lod['bytes'] / 1024:8.1f} KiB  {lod['path']}")
+    print(f"✓ {len(levels)} level(s) from {args.stl} ({size / 1024:.1f} KiB) in {elapsed * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
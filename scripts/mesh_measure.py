@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+# scripts/mesh_measure.py
+# Measured material quantities of a generated STL: surface area, enclosed volume and, per z band, the
+# cross-section at the band's mid-plane (material area, contour length, radial extent around the z axis,
+# the product axis). Binary STLs are memory-mapped, ASCII STLs read in chunks, so memory stays flat for any
+# mesh size. With NumPy every chunk is processed vectorised; without it facet by facet (same numbers, far
+# slower). bom_producer.py --stl writes the results into the production BOM as measured_* columns.
+#
+#   python scripts/mesh_measure.py out/custom_models/PE500_Medium_Standard.stl
+#   python scripts/mesh_measure.py model.stl --band-mm 5 --json out/model_mesh.json
+#
+# Volume by the divergence theorem (F = (x, y, 0) / 2: a facet contributes F(centroid)·n·A, exact for a
+# closed mesh). Sections: every facet crossing a mid-plane z = (k + ½)·band adds one contour segment,
+# oriented by the facet normal so that the shoelace sum over the segments is the enclosed material area.
+
+import os, re, json, math, mmap, time, struct, argparse
+from pathlib import Path
+
+BAND_MM = 10.0                 # height of the z bands
+CHUNK_FACETS = 1 << 18         # facets per vectorised chunk (binary)
+CHUNK_BYTES = 32 << 20         # bytes per chunk (ASCII)
+VERTEX_RE = rb"vertex\s+([^\r\n]+)"
+
+
+def _numpy():
+    """NumPy when installed (imported on first use: generate_model.py does not pay for it), else None."""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+class Measure:
+    """Running totals (area, volume, facets, bounds) and per-plane section sums:
+    plane index → [area, contour length, r_min, r_max, segments]."""
+
+    def __init__(self, band_mm):
+        self.band_mm = band_mm
+        self.area = self.volume = 0.0
+        self.facets = 0
+        self.lo = [math.inf] * 3
+        self.hi = [-math.inf] * 3
+        self.sections = {}
+
+    def add_section(self, k, area, length, r_min, r_max, segments):
+        entry = self.sections.get(k)
+        if entry is None:
+            self.sections[k] = [area, length, r_min, r_max, segments]
+        else:
+            entry[0] += area
+            entry[1] += length
+            entry[2] = min(entry[2], r_min)
+            entry[3] = max(entry[3], r_max)
+            entry[4] += segments
+
+    def bound(self, lo, hi):
+        self.lo = [min(a, b) for a, b in zip(self.lo, lo)]
+        self.hi = [max(a, b) for a, b in zip(self.hi, hi)]
+
+    def result(self):
+        sign = -1.0 if self.volume < 0 else 1.0       # inward-facing facets: flip
+        empty = not self.facets
+        sections = sorted(self.sections.items())
+        return {
+            "facets": self.facets,
+            "surface_area_mm2": round(self.area, 3),
+            "volume_mm3": round(sign * self.volume, 3),
+            "bounds": [[0.0] * 3, [0.0] * 3] if empty else [[round(v, 4) for v in self.lo],
+                                                            [round(v, 4) for v in self.hi]],
+            "length_mm": 0.0 if empty else round(self.hi[2] - self.lo[2], 4),
+            "max_diameter_mm": round(2 * max((s[3] for _, s in sections), default=0.0), 4),
+            "band_mm": self.band_mm,
+            "bands": [{"z_mm": round((k + 0.5) * self.band_mm, 4), "section_mm2": round(sign * s[0], 3),
+                       "contour_mm": round(s[1], 3), "r_min_mm": round(s[2], 4), "r_max_mm": round(s[3], 4)}
+                      for k, s in sections],
+        }
+
+
+def _binary_count(f, size):
+    """Facet count of a binary STL, or None when the file is ASCII."""
+    header = f.read(84)
+    if len(header) == 84:
+        (count,) = struct.unpack_from("<I", header, 80)
+        if 84 + count * 50 == size:
+            return count
+    return None
+
+
+def _ascii_chunks(f):
+    """Vertex lines of an ASCII STL as bytes chunks cut at line ends."""
+    f.seek(0)
+    tail = b""
+    while True:
+        block = f.read(CHUNK_BYTES)
+        if not block:
+            break
+        block = tail + block
+        cut = block.rfind(b"\n") + 1
+        block, tail = block[:cut], block[cut:]
+        yield b" ".join(re.findall(VERTEX_RE, block))
+    if tail:
+        yield b" ".join(re.findall(VERTEX_RE, tail))
+
+
+def _measure_numpy(np, f, size, measure):
+    band = measure.band_mm
+
+    def sections(v, n, z_min, z_max):
+        """Contour segments of the facets ``v`` (normals ``n``) on every mid-plane they cross."""
+        k_lo = np.floor(z_min / band - 0.5).astype(np.int64) + 1
+        k_hi = np.ceil(z_max / band - 0.5).astype(np.int64) - 1
+        counts = np.clip(k_hi - k_lo + 1, 0, None)
+        total = int(counts.sum())
+        if not total:
+            return
+        facet = np.repeat(np.arange(len(v)), counts)
+        k = np.repeat(k_lo, counts) + np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+        v, n, zp = v[facet], n[facet], (k + 0.5) * band
+        above = v[:, :, 2] > zp[:, None]
+        a, b = v, v[:, [1, 2, 0]]                    # edges 0-1, 1-2, 2-0
+        cross = above != above[:, [1, 2, 0]]
+        dz = np.where(cross, b[:, :, 2] - a[:, :, 2], 1.0)
+        t = np.where(cross, (zp[:, None] - a[:, :, 2]) / dz, 0.0)
+        points = a[:, :, :2] + t[:, :, None] * (b[:, :, :2] - a[:, :, :2])
+        ok = cross.sum(axis=1) == 2                  # a vertex exactly on the plane: no segment
+        order = np.argsort(~cross, axis=1, kind="stable")[:, :2]
+        rows = np.arange(len(v))
+        p, q = points[rows, order[:, 0]][ok], points[rows, order[:, 1]][ok]
+        n, k = n[ok], k[ok]
+        d = q - p
+        # Contour runs with the material on its left: direction along z × n
+        orient = np.sign(d[:, 1] * n[:, 0] - d[:, 0] * n[:, 1])
+        area = 0.5 * (p[:, 0] * q[:, 1] - q[:, 0] * p[:, 1]) * orient
+        length = np.hypot(d[:, 0], d[:, 1])
+        r_p, r_q = np.hypot(p[:, 0], p[:, 1]), np.hypot(q[:, 0], q[:, 1])
+        k0 = int(k.min())
+        idx = k - k0
+        m = int(idx.max()) + 1
+        areas, lengths = np.bincount(idx, area, m), np.bincount(idx, length, m)
+        segments = np.bincount(idx, minlength=m)
+        r_min, r_max = np.full(m, np.inf), np.zeros(m)
+        np.minimum.at(r_min, idx, np.minimum(r_p, r_q))
+        np.maximum.at(r_max, idx, np.maximum(r_p, r_q))
+        for i in np.flatnonzero(segments).tolist():
+            measure.add_section(k0 + i, float(areas[i]), float(lengths[i]), float(r_min[i]), float(r_max[i]),
+                                int(segments[i]))
+
+    def chunk(v):
+        """``v``: (n, 3, 3) float64 facet vertices."""
+        if not len(v):
+            return
+        # Contiguous coordinate columns: (vertex, axis) → array over the facets
+        (ax, ay, az), (bx, by, bz), (cx, cy, cz) = np.ascontiguousarray(v.transpose(1, 2, 0))
+        ux, uy, uz = bx - ax, by - ay, bz - az
+        wx, wy, wz = cx - ax, cy - ay, cz - az
+        nx, ny, nz = uy * wz - uz * wy, uz * wx - ux * wz, ux * wy - uy * wx
+        measure.facets += len(v)
+        measure.area += 0.5 * float(np.sqrt(nx * nx + ny * ny + nz * nz).sum())
+        measure.volume += float(np.dot(ax + bx + cx, nx) + np.dot(ay + by + cy, ny)) / 12.0
+        lo = [np.minimum(np.minimum(p, q), r) for p, q, r in ((ax, bx, cx), (ay, by, cy), (az, bz, cz))]
+        hi = [np.maximum(np.maximum(p, q), r) for p, q, r in ((ax, bx, cx), (ay, by, cy), (az, bz, cz))]
+        measure.bound([float(x.min()) for x in lo], [float(x.max()) for x in hi])
+        sections(v, np.stack((nx, ny), axis=1), lo[2], hi[2])
+
+    count = _binary_count(f, size)
+    if count is not None:
+        if not count:
+            return
+        facet = np.dtype([("normal", "<f4", (3,)), ("v", "<f4", (3, 3)), ("attr", "<u2")])
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            facets = np.frombuffer(mm, dtype=facet, count=count, offset=84)
+            try:
+                for start in range(0, count, CHUNK_FACETS):
+                    chunk(facets["v"][start:start + CHUNK_FACETS].astype(np.float64))
+            finally:
+                del facets              # release the buffer before the map closes
+        return
+    pending = np.empty(0)
+    for text in _ascii_chunks(f):
+        values = np.concatenate((pending, np.fromstring(text, dtype=np.float64, sep=" ")))
+        usable = len(values) - len(values) % 9         # a facet's vertices may straddle two chunks
+        chunk(values[:usable].reshape(-1, 3, 3))
+        pending = values[usable:]
+
+
+def _python_facets(f, size):
+    """9-tuples of facet coordinates, streamed from a binary or ASCII STL."""
+    count = _binary_count(f, size)
+    if count is not None:
+        if not count:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            view = memoryview(mm)[84:84 + 50 * count]
+            try:
+                for facet in struct.iter_unpack("<12fH", view):
+                    yield facet[3:12]
+            finally:
+                view.release()
+        return
+    pending = []
+    for text in _ascii_chunks(f):
+        values = pending + [float(x) for x in text.split()]
+        usable = len(values) - len(values) % 9
+        for i in range(0, usable, 9):
+            yield values[i:i + 9]
+        pending = values[usable:]
+
+
+def _measure_python(f, size, measure):
+    band = measure.band_mm
+    lo, hi = [math.inf] * 3, [-math.inf] * 3
+    for coords in _python_facets(f, size):
+        ax, ay, az, bx, by, bz, cx, cy, cz = coords
+        ux, uy, uz = bx - ax, by - ay, bz - az
+        vx, vy, vz = cx - ax, cy - ay, cz - az
+        nx, ny, nz = uy * vz - uz * vy, uz * vx - ux * vz, ux * vy - uy * vx
+        measure.facets += 1
+        measure.area += 0.5 * math.sqrt(nx * nx + ny * ny + nz * nz)
+        measure.volume += ((ax + bx + cx) * nx + (ay + by + cy) * ny) / 12.0
+        for i, value in enumerate(coords):
+            axis = i % 3
+            if value < lo[axis]:
+                lo[axis] = value
+            if value > hi[axis]:
+                hi[axis] = value
+        vertices = ((ax, ay, az), (bx, by, bz), (cx, cy, cz))
+        for k in range(math.floor(min(az, bz, cz) / band - 0.5) + 1, math.ceil(max(az, bz, cz) / band - 0.5)):
+            zp = (k + 0.5) * band
+            points = []
+            for (x0, y0, z0), (x1, y1, z1) in zip(vertices, vertices[1:] + vertices[:1]):
+                if (z0 > zp) != (z1 > zp):
+                    t = (zp - z0) / (z1 - z0)
+                    points.append((x0 + t * (x1 - x0), y0 + t * (y1 - y0)))
+            if len(points) != 2:
+                continue
+            (px, py), (qx, qy) = points
+            dx, dy = qx - px, qy - py
+            orient = math.copysign(1.0, dy * nx - dx * ny) if dy * nx - dx * ny else 0.0
+            r_p, r_q = math.hypot(px, py), math.hypot(qx, qy)
+            measure.add_section(k, 0.5 * (px * qy - qx * py) * orient, math.hypot(dx, dy),
+                                min(r_p, r_q), max(r_p, r_q), 1)
+    if measure.facets:
+        measure.bound(lo, hi)
+
+
+def measure_stl(path, band_mm=BAND_MM):
+    """Surface area, enclosed volume, extent and mid-plane sections per z band of an ASCII or binary STL (mm)."""
+    started = time.perf_counter()
+    np = _numpy()
+    measure = Measure(band_mm)
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if np is not None:
+            _measure_numpy(np, f, size, measure)
+        else:
+            _measure_python(f, size, measure)
+    result = measure.result()
+    result["engine"] = "numpy" if np is not None else "python"
+    result["seconds"] = round(time.perf_counter() - started, 4)
+    return result
+
+
+def main():
+    p = argparse.ArgumentParser(description="Surface area, volume and z-band sections of an STL")
+    p.add_argument("stl", help="ASCII or binary STL")
+    p.add_argument("--band-mm", type=float, default=BAND_MM, help="Height of the z bands (mm)")
+    p.add_argument("--json", default="", help="Write the full result (with the band sections) to this file")
+    args = p.parse_args()
+
+    result = measure_stl(args.stl, args.band_mm)
+    if args.json:
+        Path(args.json).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.json).write_text(json.dumps(result, indent=1), encoding="utf-8")
+    print(f"{result['facets']} facets ({result['engine']}, {result['seconds'] * 1000:.0f} ms)")
+    print(f"  surface area   {result['surface_area_mm2'] / 1e6:.4f} m2")
+    print(f"  volume         {result['volume_mm3'] / 1e3:.2f} cm3")
+    print(f"  length         {result['length_mm']:.1f} mm, max diameter {result['max_diameter_mm']:.1f} mm")
+    print(f"  {len(result['bands'])} band(s) of {args.band_mm:g} mm")
+    if not args.json:
+        for b in result["bands"]:
+            print(f"    z {b['z_mm']:8.1f}  section {b['section_mm2']:9.1f} mm2  contour {b['contour_mm']:8.1f} mm  "
+                  f"r {b['r_min_mm']:6.1f}–{b['r_max_mm']:6.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+# scripts/nesting.py
+# Nesting stage: cut pieces of a batch of production BOM records (sleeves, ring bands, reinforcement
+# strips) packed onto fixed-width roll stock → roll metres, waste % and a cut list.
+#
+#   python scripts/nesting.py --jsonl out/bom_default.jsonl --quantity 20 --json out/bom_default_nesting.json
+#
+# Packing is shelf based (guillotine cuts): pieces are sorted by length along the roll and placed
+# best-fit across the roll width; shelves are then packed best-fit-decreasing onto rolls of fixed
+# length (1D). Orientation strategies are tried until the time budget runs out; the shortest layout
+# per roll stock wins. The first strategy always completes, so a result is always returned.
+
+import sys, json, csv, math, time, bisect, argparse
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_ROLLS = ROOT / "data" / "roll_stock.csv"
+DEFAULT_BUDGET_S = 2.0
+
+# long_across: longest side across the roll when it fits (short shelves)
+# short_across: shortest side across (long shelves, many pieces side by side)
+STRATEGIES = ("long_across", "short_across")
+
+CUT_LIST_FIELDS = ["stock", "roll", "x_mm", "y_mm", "across_mm", "along_mm", "rotated",
+                   "bom_tag", "piece", "copy"]
+
+
+class NestingError(ValueError):
+    """Roll stock or input cannot be nested."""
+
+
+def load_roll_stock(path=DEFAULT_ROLLS):
+    """Read roll_stock.csv into ``{part_no: {roll_width_mm, roll_length_m, kerf_mm, seam_allowance_mm, ...}}``."""
+    rolls = {}
+    with open(path, encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            rolls[row["part_no"]] = {
+                "description": row.get("description", ""),
+                "roll_width_mm": float(row["roll_width_mm"]),
+                "roll_length_m": float(row.get("roll_length_m") or 0),
+                "kerf_mm": float(row.get("kerf_mm") or 0),
+                "seam_allowance_mm": float(row.get("seam_allowance_mm") or 0),
+            }
+    return rolls
+
+
+def cut_pieces(tech_bom, prod_rec, rolls):
+    """Rectangular pieces for one filterslang: ``[(part_no, piece, width_mm, length_mm)]``.
+
+    Sleeve: film of circumference + seam × L. Each ring gets a film band of circumference + seam ×
+    ring width + 2 × seam (folded over the ring). Each reinforcement span is a strip of circumference
+    + seam × span length, cut from the reinforcement stock.
+    """
+    pieces = []
+    D = prod_rec.get("diameter_mm") or 0
+    L = prod_rec.get("length_mm") or 0
+    film = prod_rec.get("material_part_no")
+    circumference = math.pi * D
+
+    if film in rolls and D > 0 and L > 0:
+        seam = rolls[film]["seam_allowance_mm"]
+        pieces.append((film, "sleeve", circumference + seam, L))
+        ring_w = prod_rec.get("ring_width_mm") or 0
+        for i in range(prod_rec.get("ring_count") or 0):
+            pieces.append((film, f"ring_{i + 1}", circumference + seam, ring_w + 2 * seam))
+
+    strip = prod_rec.get("reinforcement_part_no")
+    if strip in rolls and D > 0:
+        seam = rolls[strip]["seam_allowance_mm"]
+        spans = [s for s in tech_bom.get("rein_spans", []) if len(s) == 2 and s[1] > s[0]]
+        for i, (a, b) in enumerate(spans):
+            pieces.append((strip, f"reinforcement_{i + 1}", circumference + seam, b - a))
+    return pieces
+
+
+def _orient(w, h, width, strategy):
+    """``(across, along, rotated)`` for a piece on a roll of effective ``width``, or None if it never fits."""
+    long_side, short_side = (w, h) if w >= h else (h, w)
+    options = [(long_side, short_side), (short_side, long_side)]
+    if strategy == "short_across":
+        options.reverse()
+    for across, along in options:
+        if across <= width:
+            return across, along, across != w
+    return None
+
+
+def _pack_shelves(items, width, deadline=None):
+    """Best-fit decreasing-height shelf packing across ``width``.
+
+    ``items`` are ``(across, along, rotated, ref)`` incl. kerf. Returns ``(shelves, placements)`` with
+    shelves ``[height]`` and placements ``(shelf, x, item)``, or None when the deadline passed.
+    """
+    items = sorted(items, key=lambda it: (-it[1], -it[0]))
+    shelves = []
+    free = []  # sorted (remaining width, shelf index) of open shelves
+    placements = []
+    used = []
+    for n, item in enumerate(items):
+        if deadline is not None and not n & 1023 and time.perf_counter() > deadline:
+            return None
+        across = item[0]
+        k = bisect.bisect_left(free, (across, -1))
+        if k < len(free):
+            remaining, s = free.pop(k)
+        else:
+            s = len(shelves)
+            shelves.append(item[1])  # sorted by height: the first piece sets the shelf height
+            used.append(0.0)
+            remaining = width
+        placements.append((s, used[s], item))
+        used[s] += across
+        remaining -= across
+        if remaining > 0:
+            bisect.insort(free, (remaining, s))
+    return shelves, placements
+
+
+def _pack_rolls(shelves, roll_length):
+    """1D best-fit decreasing of shelf heights onto rolls; returns ``(roll_of_shelf, y_of_shelf, roll_used)``."""
+    order = sorted(range(len(shelves)), key=lambda s: -shelves[s])
+    roll_of = [0] * len(shelves)
+    y_of = [0.0] * len(shelves)
+    roll_used = []
+    free = []  # sorted (remaining length, roll index)
+    for s in order:
+        h = shelves[s]
+        k = bisect.bisect_left(free, (h, -1)) if roll_length else len(free)
+        if roll_length and k < len(free):
+            remaining, r = free.pop(k)
+        elif not roll_length and roll_used:
+            remaining, r = math.inf, 0
+        else:
+            r = len(roll_used)
+            roll_used.append(0.0)
+            remaining = roll_length if roll_length else math.inf
+        roll_of[s], y_of[s] = r, roll_used[r]
+        roll_used[r] += h
+        if roll_length and remaining - h > 0:
+            bisect.insort(free, (remaining - h, r))
+    return roll_of, y_of, roll_used
+
+
+def nest_stock(pieces, stock, deadline=None):
+    """Nest the ``(w, h, ref)`` pieces of one roll stock; best completed strategy wins."""
+    kerf = stock["kerf_mm"]
+    width = stock["roll_width_mm"] + kerf  # no kerf needed after the last piece on the edge
+    roll_length = stock["roll_length_m"] * 1000 + kerf if stock["roll_length_m"] else 0
+
+    best = None
+    unplaced = []
+    for n, strategy in enumerate(STRATEGIES):
+        if n and deadline is not None and time.perf_counter() > deadline:
+            break
+        items = []
+        unplaced = []
+        for w, h, ref in pieces:
+            o = _orient(w + kerf, h + kerf, width, strategy)
+            if o is None or (roll_length and o[1] > roll_length):
+                unplaced.append(ref)
+            else:
+                items.append((o[0], o[1], o[2], ref))
+        packed = _pack_shelves(items, width, deadline if n else None)
+        if packed is None:
+            break
+        shelves, placements = packed
+        length = sum(shelves)
+        if best is None or length < best[0]:
+            best = (length, strategy, shelves, placements, unplaced)
+    length, strategy, shelves, placements, unplaced = best
+    roll_of, y_of, roll_used = _pack_rolls(shelves, roll_length)
+    return {
+        "strategy": strategy,
+        "shelves": len(shelves),
+        "roll_used_mm": roll_used,
+        "cuts": [(roll_of[s], x, y_of[s], item) for s, x, item in placements],
+        "unplaced": unplaced,
+    }
+
+
+def nest_batch(tech_boms, prod_records, rolls, quantity=1, time_budget=DEFAULT_BUDGET_S, cut_list=True):
+    """Nest all cut pieces of a batch (each record ordered ``quantity`` times) per roll stock."""
+    if quantity < 1:
+        raise NestingError("quantity must be >= 1")
+    t0 = time.perf_counter()
+    deadline = t0 + time_budget if time_budget else None
+
+    by_stock = {}
+    missing_stock = set()
+    for idx, (tech, prod) in enumerate(zip(tech_boms, prod_records)):
+        for key in ("material_part_no", "reinforcement_part_no"):
+            if prod.get(key) and prod[key] not in rolls:
+                missing_stock.add(prod[key])
+        for part_no, piece, w, h in cut_pieces(tech, prod, rolls):
+            bucket = by_stock.setdefault(part_no, [])
+            for copy in range(quantity):
+                bucket.append((w, h, (idx, piece, copy)))
+
+    stocks = []
+    cuts = []
+    unplaced = []
+    for part_no in sorted(by_stock):
+        stock = rolls[part_no]
+        pieces = by_stock[part_no]
+        res = nest_stock(pieces, stock, deadline)
+        kerf = stock["kerf_mm"]
+        roll_metres = sum(res["roll_used_mm"]) / 1000
+        piece_area = sum(w * h for w, h, _ in pieces) / 1e6
+        unplaced_refs = set(res["unplaced"])
+        placed_area = piece_area - sum(w * h for w, h, ref in pieces if ref in unplaced_refs) / 1e6
+        used_area = stock["roll_width_mm"] * roll_metres / 1000
+        stocks.append({
+            "part_no": part_no,
+            "description": stock["description"],
+            "roll_width_mm": stock["roll_width_mm"],
+            "roll_length_m": stock["roll_length_m"],
+            "pieces": len(pieces) - len(unplaced_refs),
+            "strategy": res["strategy"],
+            "shelves": res["shelves"],
+            "rolls": len(res["roll_used_mm"]),
+            "roll_metres": round(roll_metres, 3),
+            "piece_area_m2": round(placed_area, 4),
+            "used_area_m2": round(used_area, 4),
+            "waste_pct": round(100 * (1 - placed_area / used_area), 2) if used_area else 0.0,
+        })
+        for idx, piece, copy in res["unplaced"]:
+            unplaced.append({"stock": part_no, "bom_tag": prod_records[idx].get("bom_tag", ""),
+                             "piece": piece, "copy": copy, "reason": "does not fit roll stock"})
+        if cut_list:
+            for roll, x, y, (across, along, rotated, (idx, piece, copy)) in res["cuts"]:
+                cuts.append({
+                    "stock": part_no, "roll": roll + 1,
+                    "x_mm": round(x, 1), "y_mm": round(y, 1),
+                    "across_mm": round(across - kerf, 1), "along_mm": round(along - kerf, 1),
+                    "rotated": rotated,
+                    "bom_tag": prod_records[idx].get("bom_tag", ""), "piece": piece, "copy": copy,
+                })
+
+    return {
+        "quantity": quantity,
+        "records": len(prod_records),
+        "stocks": stocks,
+        "roll_metres": round(sum(s["roll_metres"] for s in stocks), 3),
+        "waste_pct": round(100 * (1 - sum(s["piece_area_m2"] for s in stocks)
+                                  / sum(s["used_area_m2"] for s in stocks)), 2)
+        if any(s["used_area_m2"] for s in stocks) else 0.0,
+        "unplaced": unplaced,
+        "missing_roll_stock": sorted(missing_stock),
+        "elapsed_s": round(time.perf_counter() - t0, 4),
+        **({"cut_list": cuts} if cut_list else {}),
+    }
+
+
+if __name__ == "__main__":
+    from parts_catalog import get_catalog, DEFAULT_PARTS, DEFAULT_PRICES, DEFAULT_DB
+    from bom_production import production_record
+
+    p = argparse.ArgumentParser(description="Nest cut pieces of technical BOM records (JSONL) onto roll stock")
+    p.add_argument("--jsonl", required=True, help="Input JSONL file (from render_bom.py)")
+    p.add_argument("--parts", default=str(DEFAULT_PARTS), help="Parts catalog CSV")
+    p.add_argument("--prices", default=str(DEFAULT_PRICES), help="Price breaks CSV")
+    p.add_argument("--db", default=str(DEFAULT_DB), help="SQLite catalog index (rebuilt when sources change)")
+    p.add_argument("--rolls", default=str(DEFAULT_ROLLS), help="Roll stock CSV (width, length, kerf, seam)")
+    p.add_argument("--quantity", type=int, default=1, help="Pieces ordered per BOM record")
+    p.add_argument("--time-budget", type=float, default=DEFAULT_BUDGET_S, help="Seconds for trying packing strategies (0 = try all)")
+    p.add_argument("--json", default="", help="Write the nesting summary (and cut list) as JSON")
+    p.add_argument("--cut-list", default="", help="Write the cut list as CSV")
+    args = p.parse_args()
+
+    catalog = get_catalog(args.parts, args.prices, args.db)
+    with open(args.jsonl, encoding="utf-8") as f:
+        tech = [json.loads(line) for line in f if line.strip()]
+    rolls = load_roll_stock(args.rolls)
+    prod = [production_record(rec, catalog.by_enum) for rec in tech]
+    result = nest_batch(tech, prod, rolls, args.quantity, args.time_budget,
+                        cut_list=bool(args.json or args.cut_list))
+
+    if args.cut_list:
+        Path(args.cut_list).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.cut_list, "w", newline="", encoding="utf-8") as f:
+            w = csv.DictWriter(f, fieldnames=CUT_LIST_FIELDS)
+            w.writeheader()
+            w.writerows(result["cut_list"])
+    if args.json:
+        Path(args.json).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.json).write_text(json.dumps(result, indent=2, ensure_ascii=False), encoding="utf-8")
+    if result["missing_roll_stock"]:
+        sys.stderr.write(f"WARNING: no roll stock for {', '.join(result['missing_roll_stock'])}\n")
+    if result["unplaced"]:
+        sys.stderr.write(f"WARNING: {len(result['unplaced'])} piece(s) do not fit their roll stock\n")
+    for s in result["stocks"]:
+        print(f"  {s['part_no']:<10} {s['pieces']:>7} pieces  {s['roll_metres']:>10.2f} m on {s['rolls']} roll(s)"
+              f"  waste {s['waste_pct']:.1f}%  ({s['strategy']})")
+    print(f"✓ {len(tech)} BOM record(s) × {args.quantity}: {result['roll_metres']} roll metres, "
+          f"waste {result['waste_pct']}% in {result['elapsed_s']} s")
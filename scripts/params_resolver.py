@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# scripts/params_resolver.py
+# User config + presets → OpenSCAD parameters and validation errors (shared by config_to_params.py and the API)
+
+REQUIRED_PARAMS = ["L", "D", "t", "top", "bottom", "productzijde"]
+
+
+class ConfigError(ValueError):
+    """Config cannot be resolved at all (no or unknown preset)."""
+
+
+def build_params(user_config, presets_data):
+    """Merge preset defaults, user overrides and the quality tier into one params dict."""
+    presets = presets_data.get("presets", {})
+
+    config_name = user_config.get("name", "unnamed")
+    preset_name = user_config.get("preset")
+    overrides = user_config.get("overrides", {}) or {}
+
+    if not preset_name:
+        raise ConfigError("'preset' field required in config")
+    if preset_name not in presets:
+        raise ConfigError(f"Unknown preset '{preset_name}'. Available: {list(presets.keys())}")
+
+    preset = presets[preset_name]
+
+    # --- Build parameters (preset defaults + user overrides) ---
+    params = {
+        "medium": preset["material"],
+        "bom_tag": config_name,
+    }
+
+    # Set defaults from preset
+    if "defaults" in preset:
+        params.update(preset["defaults"])
+
+    # Apply user overrides
+    params.update(overrides)
+
+    # Quality tier → $fn
+    quality_tiers = presets_data.get("quality_tiers", {})
+    quality = user_config.get("quality", presets_data.get("default_quality", "production"))
+    params["quality"] = quality
+    params["fn"] = quality_tiers.get(quality, {}).get("fn", 96)
+
+    return params
+
+
+def validate_params(params, preset, presets_data):
+    """Return a list of validation error strings (empty when valid)."""
+    valid_enums = presets_data.get("valid_enums", {})
+    quality_tiers = presets_data.get("quality_tiers", {})
+    errors = []
+
+    # Check required fields
+    for field in REQUIRED_PARAMS:
+        if field not in params:
+            errors.append(f"Missing required parameter: {field}")
+
+    # Validate enum values
+    if "top" in params and params["top"] not in valid_enums.get("top", []):
+        errors.append(f"Invalid top value: {params['top']}")
+
+    if "bottom" in params and params["bottom"] not in valid_enums.get("bottom", []):
+        errors.append(f"Invalid bottom value: {params['bottom']}")
+
+    # Validate bottom_opt based on bottom type
+    if "bottom_opt" in params and "bottom" in params:
+        bottom_type = params["bottom"]
+        bottom_opt_val = params["bottom_opt"]
+        valid_opts = valid_enums.get("bottom_opt", {}).get(bottom_type, [])
+        if bottom_opt_val not in valid_opts:
+            errors.append(f"Invalid bottom_opt '{bottom_opt_val}' for bottom type '{bottom_type}'. Valid: {valid_opts}")
+
+    if "productzijde" in params and params["productzijde"] not in valid_enums.get("productzijde", []):
+        errors.append(f"Invalid productzijde: {params['productzijde']}")
+
+    if "reinforce_side" in params and params["reinforce_side"] not in valid_enums.get("reinforce_side", []):
+        errors.append(f"Invalid reinforce_side: {params['reinforce_side']}")
+
+    quality = params.get("quality")
+    if quality_tiers and quality not in quality_tiers:
+        errors.append(f"Invalid quality tier '{quality}'. Valid: {list(quality_tiers)}")
+
+    # Check dimension ranges
+    preset_defaults = preset.get("defaults", {})
+    if "diameter_min" in preset_defaults and params.get("D", 0) < preset_defaults["diameter_min"]:
+        errors.append(f"Diameter {params['D']} below preset minimum {preset_defaults['diameter_min']}")
+    if "diameter_max" in preset_defaults and params.get("D", 0) > preset_defaults["diameter_max"]:
+        errors.append(f"Diameter {params['D']} above preset maximum {preset_defaults['diameter_max']}")
+
+    return errors
+
+
+def resolve_params(user_config, presets_data):
+    """Build and validate; returns ``(params, errors)``. Raises ConfigError for unusable configs."""
+    params = build_params(user_config, presets_data)
+    preset = presets_data["presets"][user_config["preset"]]
+    return params, validate_params(params, preset, presets_data)
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# scripts/parts_catalog.py
+# Indexed parts catalog: parts.csv + prices.csv compiled into SQLite, loaded once per process
+# into in-memory indexes (enum → part, part_no → part, part_no → price breaks).
+
+import os, csv, sqlite3, hashlib, bisect, threading
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_PARTS = ROOT / "data" / "parts.csv"
+DEFAULT_PRICES = ROOT / "data" / "prices.csv"
+DEFAULT_DB = ROOT / "out" / "cache" / "parts_catalog.sqlite"
+
+SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE parts (
+    category TEXT NOT NULL, enum_value TEXT NOT NULL,
+    material_code TEXT, part_no TEXT, description TEXT, unit TEXT, supplier TEXT,
+    PRIMARY KEY (category, enum_value)
+);
+CREATE INDEX parts_by_part_no ON parts (part_no);
+CREATE TABLE price_breaks (
+    part_no TEXT NOT NULL, min_qty REAL NOT NULL, unit_price REAL NOT NULL,
+    price_unit TEXT, currency TEXT, lead_time_days INTEGER,
+    PRIMARY KEY (part_no, min_qty)
+);
+"""
+
+PART_FIELDS = ("material_code", "part_no", "description", "unit", "supplier")
+
+
+def source_hash(*paths):
+    h = hashlib.sha256()
+    for path in paths:
+        path = Path(path)
+        h.update(path.name.encode())
+        h.update(path.read_bytes() if path.exists() else b"")
+    return h.hexdigest()
+
+
+def build_catalog_db(db_path, parts_path=DEFAULT_PARTS, prices_path=DEFAULT_PRICES):
+    """(Re)compile the CSV sources into a fresh SQLite file."""
+    db_path = Path(db_path)
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = db_path.with_suffix(f".{os.getpid()}.tmp")
+    if tmp.exists():
+        tmp.unlink()
+    con = sqlite3.connect(tmp)
+    try:
+        con.executescript(SCHEMA)
+        with open(parts_path, encoding="utf-8") as f:
+            con.executemany(
+                "INSERT OR REPLACE INTO parts VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(r["category"], r["enum_value"], *(r.get(k, "") for k in PART_FIELDS)) for r in csv.DictReader(f)])
+        if Path(prices_path).exists():
+            with open(prices_path, encoding="utf-8") as f:
+                con.executemany(
+                    "INSERT OR REPLACE INTO price_breaks VALUES (?, ?, ?, ?, ?, ?)",
+                    [(r["part_no"], float(r["min_qty"]), float(r["unit_price"]), r.get("price_unit", ""),
+                      r.get("currency", "EUR"), int(r.get("lead_time_days") or 0)) for r in csv.DictReader(f)])
+        con.execute("INSERT INTO meta VALUES ('source_hash', ?)", (source_hash(parts_path, prices_path),))
+        con.commit()
+    finally:
+        con.close()
+    tmp.replace(db_path)
+    return db_path
+
+
+def _db_hash(db_path):
+    try:
+        con = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        try:
+            row = con.execute("SELECT value FROM meta WHERE key = 'source_hash'").fetchone()
+        finally:
+            con.close()
+        return row[0] if row else None
+    except sqlite3.Error:
+        return None
+
+
+class PartsCatalog:
+    """In-memory view of the SQLite catalog.
+
+    ``by_enum`` has the ``[category][enum_value] → part`` shape used by
+    ``bom_production.production_record``; ``price()`` resolves price breaks.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = Path(db_path)
+        self.by_enum = {}
+        self.by_part_no = {}
+        self._breaks = {}  # part_no → ([min_qty ascending], [row])
+        con = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True)
+        try:
+            for category, enum_value, *values in con.execute(
+                    "SELECT category, enum_value, material_code, part_no, description, unit, supplier FROM parts"):
+                part = dict(zip(PART_FIELDS, values))
+                self.by_enum.setdefault(category, {})[enum_value] = part
+                self.by_part_no.setdefault(part["part_no"], {**part, "category": category})
+            for part_no, min_qty, unit_price, price_unit, currency, lead in con.execute(
+                    "SELECT part_no, min_qty, unit_price, price_unit, currency, lead_time_days "
+                    "FROM price_breaks ORDER BY part_no, min_qty"):
+                qtys, rows = self._breaks.setdefault(part_no, ([], []))
+                qtys.append(min_qty)
+                rows.append({"unit_price": unit_price, "price_unit": price_unit,
+                             "currency": currency, "lead_time_days": lead, "min_qty": min_qty})
+        finally:
+            con.close()
+
+    def lookup(self, category, enum_val):
+        """Same contract as ``bom_production.lookup_part``."""
+        part = self.by_enum.get(category, {}).get(enum_val)
+        if part is not None:
+            return part
+        return {"part_no": f"UNMAPPED-{enum_val}", "material_code": enum_val, "description": "UNMAPPED", "unit": "?", "supplier": "?"}
+
+    def price(self, part_no, qty):
+        """Price break applicable to ``qty`` (largest min_qty <= qty), or None if unpriced."""
+        entry = self._breaks.get(part_no)
+        if not entry:
+            return None
+        qtys, rows = entry
+        i = bisect.bisect_right(qtys, qty) - 1
+        return rows[max(i, 0)]
+
+    def price_breaks(self, part_no):
+        return list(self._breaks.get(part_no, ([], []))[1])
+
+
+_CATALOGS = {}
+_LOCK = threading.Lock()
+
+
+def get_catalog(parts_path=DEFAULT_PARTS, prices_path=DEFAULT_PRICES, db_path=DEFAULT_DB):
+    """Process-wide catalog; the SQLite index is rebuilt only when the CSV sources changed."""
+    key = (str(parts_path), str(prices_path), str(db_path))
+    with _LOCK:
+        catalog = _CATALOGS.get(key)
+        if catalog is None:
+            if _db_hash(db_path) != source_hash(parts_path, prices_path):
+                build_catalog_db(db_path, parts_path, prices_path)
+            catalog = _CATALOGS[key] = PartsCatalog(db_path)
+        return catalog
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+# scripts/product_registry.py
+# Product registry: discovers products/*/manifest.toml once per process and indexes per product the
+# entry module, BOM keys, enums, presets, config resolver, render-cache sources and production BOM
+# mapping. Dispatch (generate_model.py, config_to_params.py, render_bom.py, bom_producer.py, the API)
+# is a dict lookup; resolvers, production modules and config-schema validators are loaded on first use
+# and then kept.
+#
+#   python scripts/product_registry.py                 # list discovered products
+#   python scripts/product_registry.py --product filterslang --validate configs/example_pe500_medium.yaml
+
+import sys, json, argparse, importlib, threading
+from pathlib import Path
+
+from scad_templates import load_manifest, TemplateError
+
+ROOT = Path(__file__).resolve().parent.parent
+PRODUCTS_DIR = ROOT / "products"
+
+# Manifest [generate] defaults
+DEFAULT_PRESETS = "presets.yaml"
+
+SCHEMA_TYPES = {
+    "object": dict,
+    "array": list,
+    "string": str,
+    "boolean": bool,
+    "integer": int,
+    "number": (int, float),
+}
+
+
+class ProductError(ValueError):
+    """Unknown product, or a product manifest the registry cannot use."""
+
+
+def check_type(value, expected):
+    """True when ``value`` has JSON-Schema type ``expected`` (booleans are not numbers)."""
+    if isinstance(value, bool) and expected != "boolean":
+        return False
+    return isinstance(value, SCHEMA_TYPES[expected])
+
+
+def compile_schema(schema, path="config"):
+    """Compile the JSON-Schema subset used by products/*/config_schema.json (type, enum, minimum,
+    maximum, minItems, maxItems, properties, items, required, additionalProperties) into a checker
+    ``value → [error, ...]``; used when the jsonschema package is not installed."""
+    checks = []
+    expected = schema.get("type")
+    if expected in SCHEMA_TYPES:
+        checks.append(lambda v, p: [] if check_type(v, expected) else [f"{p}: expected {expected}"])
+    if "enum" in schema:
+        allowed = schema["enum"]
+        checks.append(lambda v, p: [] if v in allowed else [f"{p}: {v!r} is not one of {allowed}"])
+    for key, test, word in (("minimum", lambda v, b: v >= b, ">="), ("maximum", lambda v, b: v <= b, "<=")):
+        if key in schema:
+            bound = schema[key]
+            checks.append(lambda v, p, bound=bound, test=test, word=word:
+                          [] if not isinstance(v, (int, float)) or isinstance(v, bool) or test(v, bound)
+                          else [f"{p}: {v} must be {word} {bound}"])
+    if "minItems" in schema or "maxItems" in schema:
+        lo, hi = schema.get("minItems", 0), schema.get("maxItems")
+        checks.append(lambda v, p: [] if not isinstance(v, list) or (len(v) >= lo and (hi is None or len(v) <= hi))
+                      else [f"{p}: expected {lo}..{hi if hi is not None else ''} items, got {len(v)}"])
+    if "properties" in schema or "required" in schema or schema.get("additionalProperties") is False:
+        props = {k: compile_schema(s, f"{path}.{k}") for k, s in schema.get("properties", {}).items()}
+        required = schema.get("required", [])
+        closed = schema.get("additionalProperties") is False
+
+        def check_object(v, p):
+            if not isinstance(v, dict):
+                return []
+            errors = [f"{p}: '{k}' is required" for k in required if k not in v]
+            for k, item in v.items():
+                if k in props:
+                    errors.extend(props[k](item, f"{p}.{k}"))
+                elif closed:
+                    errors.append(f"{p}: unknown property '{k}'")
+            return errors
+        checks.append(check_object)
+    if isinstance(schema.get("items"), dict):
+        item_check = compile_schema(schema["items"], f"{path}[]")
+        checks.append(lambda v, p: [e for i, item in enumerate(v) for e in item_check(item, f"{p}[{i}]")]
+                      if isinstance(v, list) else [])
+
+    def check(value, p=path):
+        errors = []
+        for c in checks:
+            errors.extend(c(value, p))
+        return errors
+    return check
+
+
+def _jsonschema_validator(schema):
+    """Error-list validator backed by jsonschema, or None when it is not installed."""
+    try:
+        import jsonschema
+    except ImportError:
+        return None
+    validator = jsonschema.validators.validator_for(schema)(schema)
+
+    def check(value):
+        return ["config" + "".join(f"[{p!r}]" if isinstance(p, int) else f".{p}" for p in e.absolute_path)
+                + f": {e.message}" for e in validator.iter_errors(value)]
+    return check
+
+
+def _product_entry(name, directory, manifest):
+    """Index entry of one product; paths are absolute, render-cache sources are ROOT-relative."""
+    for key in ("entry", "version"):
+        if key not in manifest:
+            raise ProductError(f"manifest of '{name}' has no '{key}'")
+    generate = manifest.get("generate", {})
+    production = manifest.get("production", {})
+    try:
+        rel_dir = directory.relative_to(ROOT).as_posix()
+    except ValueError:
+        rel_dir = directory.as_posix()
+    schema = generate.get("config_schema")
+    return {
+        "name": name,
+        "version": manifest["version"],
+        "dir": directory,
+        "entry": directory / manifest["entry"],
+        "module": manifest.get("scad", {}).get("module", Path(manifest["entry"]).stem),
+        "bom_tag": manifest.get("bom", {}).get("tag", "bom_tag"),
+        "bom_keys": list(manifest.get("bom", {}).get("keys", [])),
+        "enums": manifest.get("enums", {}),
+        "presets": directory / generate.get("presets", DEFAULT_PRESETS),
+        "config_schema": directory / schema if schema else None,
+        "resolver": generate.get("resolver"),
+        "sources": [rel_dir] + list(generate.get("sources", [])),
+        "production": production.get("module"),
+        "parts": production.get("parts", "data/parts.csv"),
+    }
+
+
+class ProductRegistry:
+    """All products under ``products_dir`` that have a manifest.toml, indexed by name."""
+
+    def __init__(self, products_dir=PRODUCTS_DIR):
+        self.products_dir = Path(products_dir)
+        self.products = {}
+        for path in sorted(self.products_dir.glob("*/manifest.toml")):
+            name = path.parent.name
+            try:
+                manifest = load_manifest(name, self.products_dir)
+            except (TemplateError, ValueError) as e:
+                raise ProductError(f"{path}: {e}")
+            self.products[name] = _product_entry(name, path.parent, manifest)
+        self._resolvers = {}
+        self._production = {}
+        self._validators = {}
+        self._schemas = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, name):
+        return name in self.products
+
+    def names(self):
+        return sorted(self.products)
+
+    def get(self, name):
+        try:
+            return self.products[name]
+        except KeyError:
+            raise ProductError(f"Unknown product '{name}'. Known: {', '.join(self.names())}") from None
+
+    def _load(self, cache, name, spec):
+        """``module:attr`` from the manifest, imported once (None when the manifest names none)."""
+        if name not in cache:
+            with self._lock:
+                if name not in cache:
+                    if not spec:
+                        cache[name] = None
+                    else:
+                        module, _, attr = spec.partition(":")
+                        loaded = importlib.import_module(module)
+                        cache[name] = getattr(loaded, attr) if attr else loaded
+        return cache[name]
+
+    def resolver(self, name):
+        """Config resolver ``(user_config, presets_data) → (params, errors)`` of a product."""
+        resolver = self._load(self._resolvers, name, self.get(name)["resolver"])
+        if resolver is None:
+            raise ProductError(f"manifest of '{name}' names no [generate].resolver")
+        return resolver
+
+    def production(self, name):
+        """Production BOM module (CSV_FIELDS, XLSX_FIELDS, load_parts_catalog, production_record) or None."""
+        return self._load(self._production, name, self.get(name)["production"])
+
+    def schema(self, name):
+        """Parsed config schema of a product, or None without one."""
+        if name not in self._schemas:
+            path = self.get(name)["config_schema"]
+            self._schemas[name] = (json.loads(path.read_text(encoding="utf-8"))
+                                   if path is not None and path.exists() else None)
+        return self._schemas[name]
+
+    def validator(self, name):
+        """Config-schema checker ``config → [error, ...]`` of a product, or None without a schema."""
+        if name not in self._validators:
+            schema = self.schema(name)
+            self._validators[name] = (_jsonschema_validator(schema) or compile_schema(schema)
+                                      if schema is not None else None)
+        return self._validators[name]
+
+    def validate(self, name, config):
+        check = self.validator(name)
+        return check(config) if check else []
+
+
+_REGISTRY = None
+
+
+def get_registry():
+    """Process-wide registry, discovered on first use."""
+    global _REGISTRY
+    if _REGISTRY is None:
+        _REGISTRY = ProductRegistry()
+    return _REGISTRY
+
+
+def main():
+    p = argparse.ArgumentParser(description="List the products discovered from products/*/manifest.toml")
+    p.add_argument("--product", help="Show one product")
+    p.add_argument("--validate", help="Check a config YAML against the product's config schema")
+    args = p.parse_args()
+
+    registry = get_registry()
+    try:
+        if args.validate:
+            import yaml
+            with open(args.validate, "r", encoding="utf-8") as f:
+                config = yaml.safe_load(f)
+            errors = registry.validate(args.product or "filterslang", config)
+            for e in errors:
+                print(f"  - {e}")
+            if errors:
+                sys.exit(1)
+            print(f"✓ {args.validate} matches the {args.product or 'filterslang'} config schema")
+            return
+        for name in ([args.product] if args.product else registry.names()):
+            entry = registry.get(name)
+            print(f"{name} {entry['version']}: {entry['entry'].relative_to(ROOT)} ({entry['module']})")
+            print(f"  presets     {entry['presets'].relative_to(ROOT)}")
+            print(f"  resolver    {entry['resolver']}")
+            print(f"  schema      {entry['config_schema'].relative_to(ROOT) if entry['config_schema'] else '-'}")
+            print(f"  production  {entry['production'] or '-'}")
+            print(f"  sources     {', '.join(entry['sources'])}")
+            print(f"  bom keys    {', '.join(entry['bom_keys'])}")
+            print(f"  enums       {', '.join(entry['enums'])}")
+    except ProductError as e:
+        sys.exit(f"ERROR: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+# scripts/purchase_bom.py
+# Purchase aggregation: the BOMs of many jobs (a day's orders) → totals per part_no and supplier in the
+# catalog's order unit, as one purchase-order workbook with a sheet per supplier.
+#
+#   python scripts/purchase_bom.py --jsonl out/custom_models/*_bom.jsonl --xlsx out/purchase.xlsx
+#   python scripts/purchase_bom.py --day 2026-10-19 --xlsx out/purchase_2026-10-19.xlsx   # jobs in out/blobs
+#   python scripts/purchase_bom.py --csv-in out/bom_default_production.csv --json out/purchase.json
+#
+# Records are streamed and hash-aggregated on (part_no, unit); identical configurations are mapped to
+# part lines once. Totals follow the unit of parts.csv: film area (m2) becomes running metres of roll
+# (roll width from roll_stock.csv), pcs stay counts, m stay metres. A part whose unit cannot be
+# converted is reported with its source unit instead of guessed.
+
+import sys, csv, json, math, time, argparse
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+from bom_costing import part_quantities
+from bom_production import production_record
+
+# Production record fields part_quantities() reads (memo key of a production record's part lines)
+PART_FIELDS = ("material_part_no", "surface_area_m2", "top_part_no", "bottom_part_no",
+               "bottom_option_part_no", "ring_count", "reinforcement_part_no", "reinforcement_length_mm")
+NUMERIC_FIELDS = ("surface_area_m2", "ring_count", "reinforcement_length_mm")
+
+SHEET_FIELDS = ["part_no", "description", "material_code", "quantity", "unit", "rolls", "bom_lines", "pieces"]
+CSV_FIELDS = ["supplier", *SHEET_FIELDS]
+
+
+def read_jsonl(paths):
+    """BOM records (technical or production) of JSONL files, one line at a time."""
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def read_production_csv(paths):
+    """Production records of bom_producer.py CSV files (numeric columns converted)."""
+    for path in paths:
+        with open(path, newline="", encoding="utf-8") as f:
+            for rec in csv.DictReader(f):
+                for field in NUMERIC_FIELDS + ("quantity",):
+                    if rec.get(field) not in (None, ""):
+                        rec[field] = float(rec[field])
+                yield rec
+
+
+def order_quantity(part_no, qty, unit, catalog, rolls):
+    """``(qty, unit)`` converted to the catalog unit of ``part_no``; unchanged when no rule applies."""
+    target = catalog.by_part_no.get(part_no, {}).get("unit") or unit
+    if target == unit:
+        return qty, unit
+    width_m = rolls.get(part_no, {}).get("roll_width_mm", 0) / 1000
+    if unit == "m2" and target == "m" and width_m:
+        return qty / width_m, "m"              # running metres of roll
+    if unit == "m" and target == "m2" and width_m:
+        return qty * width_m, "m2"
+    if unit == "mm" and target == "m":
+        return qty / 1000, "m"
+    return qty, unit
+
+
+def tech_key(rec):
+    """Memo key of a technical BOM record: the fields production_record() derives part lines from."""
+    g = rec.get
+    return ("tech", g("medium"), g("top"), g("open_top"), g("bottom"), g("bottom_opt"), len(g("rings") or ()),
+            g("reinforce"), g("rein_side"), str(g("rein_spans")), g("L"), g("D"))
+
+
+class PurchaseAggregator:
+    """Hash aggregation of part quantities over a stream of BOM records."""
+
+    def __init__(self, catalog, rolls=None, quantity=1):
+        self.catalog = catalog
+        self.rolls = rolls or {}
+        self.quantity = quantity
+        self.totals = {}        # (part_no, unit) → [quantity, bom_lines, pieces]
+        self.records = 0
+        self.pieces = 0
+        self._lines = {}        # memo: configuration → part lines
+
+    def add(self, rec):
+        """Add one technical or production BOM record (``quantity`` field: pieces ordered, default 1)."""
+        production = "material_part_no" in rec
+        key = tuple(rec.get(f) for f in PART_FIELDS) if production else tech_key(rec)
+        lines = self._lines.get(key)
+        if lines is None:
+            prod = rec if production else production_record(rec, self.catalog.by_enum)
+            lines = self._lines[key] = part_quantities(prod, self.catalog)
+        pieces = (rec.get("quantity") or 1) * self.quantity
+        totals = self.totals
+        for part_no, qty, unit, _what in lines:
+            entry = totals.get((part_no, unit))
+            if entry is None:
+                entry = totals[(part_no, unit)] = [0.0, 0, 0]
+            entry[0] += qty * pieces
+            entry[1] += 1
+            entry[2] += pieces
+        self.records += 1
+        self.pieces += pieces
+
+    def extend(self, records):
+        for rec in records:
+            self.add(rec)
+        return self
+
+    def result(self):
+        """Order lines per supplier (sorted by part_no) plus unit mismatches."""
+        merged, mismatches = {}, []
+        for (part_no, unit), (qty, bom_lines, pieces) in self.totals.items():
+            qty, unit = order_quantity(part_no, qty, unit, self.catalog, self.rolls)
+            part = self.catalog.by_part_no.get(part_no, {})
+            if part and part.get("unit") and part["unit"] != unit:
+                mismatches.append({"part_no": part_no, "unit": unit, "catalog_unit": part["unit"]})
+            entry = merged.get((part_no, unit))
+            if entry is None:
+                entry = merged[(part_no, unit)] = {
+                    "supplier": part.get("supplier") or "?",
+                    "part_no": part_no,
+                    "description": part.get("description", "UNMAPPED"),
+                    "material_code": part.get("material_code", ""),
+                    "quantity": 0.0, "unit": unit, "rolls": None, "bom_lines": 0, "pieces": 0,
+                }
+            entry["quantity"] += qty
+            entry["bom_lines"] += bom_lines
+            entry["pieces"] += pieces
+        suppliers = {}
+        for entry in sorted(merged.values(), key=lambda e: (e["supplier"], e["part_no"], e["unit"])):
+            roll_m = self.rolls.get(entry["part_no"], {}).get("roll_length_m")
+            if entry["unit"] == "m" and roll_m:
+                entry["rolls"] = math.ceil(entry["quantity"] / roll_m - 1e-9)
+            entry["quantity"] = round(entry["quantity"]) if entry["unit"] == "pcs" else round(entry["quantity"], 3)
+            suppliers.setdefault(entry.pop("supplier"), []).append(entry)
+        return {"records": self.records, "pieces": self.pieces, "suppliers": suppliers, "unit_mismatches": mismatches}
+
+
+def sheet_title(name, used):
+    """Excel sheet name: at most 31 characters, none of []:*?/\\, unique."""
+    title = "".join("_" if c in '[]:*?/\\' else c for c in (name if name != "?" else "Unmapped"))[:31] or "Supplier"
+    base, n = title, 2
+    while title.lower() in used:
+        suffix = f" ({n})"
+        title = base[:31 - len(suffix)] + suffix
+        n += 1
+    used.add(title.lower())
+    return title
+
+
+def write_workbook(result, path, meta=""):
+    """Purchase-order workbook: one sheet per supplier."""
+    import openpyxl
+    from openpyxl.styles import Font, PatternFill, Alignment
+
+    wb = openpyxl.Workbook()
+    wb.remove(wb.active)
+    header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
+    header_font = Font(bold=True, color="FFFFFF")
+    used = set()
+    for supplier, lines in result["suppliers"].items():
+        ws = wb.create_sheet(sheet_title(supplier, used))
+        ws.append([f"Purchase order — {supplier}", meta])
+        ws["A1"].font = Font(bold=True, size=12)
+        ws.append(SHEET_FIELDS)
+        for cell in ws[2]:
+            cell.fill = header_fill
+            cell.font = header_font
+            cell.alignment = Alignment(horizontal="center")
+        for line in lines:
+            ws.append([line[f] for f in SHEET_FIELDS])
+            ws.cell(row=ws.max_row, column=4).number_format = "0" if line["unit"] == "pcs" else "0.00"
+        for col_idx, field in enumerate(SHEET_FIELDS, 1):
+            width = max([len(field)] + [len(str(line[field])) for line in lines]) + 2
+            ws.column_dimensions[openpyxl.utils.get_column_letter(col_idx)].width = min(width, 40)
+        ws.freeze_panes = "A3"
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    wb.save(path)
+
+
+def day_bounds(day):
+    """Local-time epoch seconds of ``[day 00:00, next day 00:00)``."""
+    start = datetime.combine(date.fromisoformat(day), datetime.min.time())
+    return start.timestamp(), (start + timedelta(days=1)).timestamp()
+
+
+if __name__ == "__main__":
+    from parts_catalog import get_catalog, DEFAULT_PARTS, DEFAULT_PRICES, DEFAULT_DB
+    from nesting import load_roll_stock, DEFAULT_ROLLS
+
+    p = argparse.ArgumentParser(description="Aggregate the BOMs of many jobs into purchase orders per supplier")
+    p.add_argument("--jsonl", nargs="*", default=[], help="Technical or production BOM JSONL files")
+    p.add_argument("--csv-in", nargs="*", default=[], help="Production BOM CSV files (bom_producer.py --csv)")
+    p.add_argument("--day", default="", help="BOMs of all jobs stored that day (YYYY-MM-DD, artifact store)")
+    p.add_argument("--store", default="", help="Artifact store directory (default: out/blobs)")
+    p.add_argument("--quantity", type=int, default=1, help="Pieces ordered per BOM record (× its own 'quantity')")
+    p.add_argument("--parts", default=str(DEFAULT_PARTS), help="Parts catalog CSV")
+    p.add_argument("--prices", default=str(DEFAULT_PRICES), help="Price breaks CSV")
+    p.add_argument("--db", default=str(DEFAULT_DB), help="SQLite catalog index (rebuilt when sources change)")
+    p.add_argument("--rolls", default=str(DEFAULT_ROLLS), help="Roll stock CSV (film width for m2 → m)")
+    p.add_argument("--xlsx", default="", help="Purchase-order workbook (one sheet per supplier, requires openpyxl)")
+    p.add_argument("--csv", default="", help="All order lines as CSV (with a supplier column)")
+    p.add_argument("--json", default="", help="Full result as JSON")
+    args = p.parse_args()
+
+    jsonl = list(args.jsonl)
+    if args.day:
+        from artifact_store import get_artifact_store, DEFAULT_DIR as STORE_DIR
+        jsonl += [path for _job, path in get_artifact_store(args.store or STORE_DIR).outputs("jsonl", *day_bounds(args.day))]
+    if not jsonl and not args.csv_in:
+        p.error("no input: give --jsonl, --csv-in or --day")
+
+    started = time.perf_counter()
+    agg = PurchaseAggregator(get_catalog(args.parts, args.prices, args.db), load_roll_stock(args.rolls), args.quantity)
+    agg.extend(read_jsonl(jsonl)).extend(read_production_csv(args.csv_in))
+    result = agg.result()
+    elapsed = time.perf_counter() - started
+
+    if args.xlsx:
+        try:
+            write_workbook(result, args.xlsx, args.day or datetime.now().strftime("%Y-%m-%d"))
+        except ImportError:
+            sys.stderr.write("ERROR: openpyxl required for XLSX export. Install: pip install openpyxl\n")
+            sys.exit(1)
+        print(f"✓ Purchase orders written to {args.xlsx}")
+    if args.csv:
+        Path(args.csv).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.csv, "w", newline="", encoding="utf-8") as f:
+            w = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+            w.writeheader()
+            for supplier, lines in result["suppliers"].items():
+                w.writerows({"supplier": supplier, **line} for line in lines)
+    if args.json:
+        Path(args.json).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.json).write_text(json.dumps(result, indent=2, ensure_ascii=False), encoding="utf-8")
+    for m in result["unit_mismatches"]:
+        sys.stderr.write(f"WARNING: {m['part_no']} totalled in {m['unit']}, catalog orders in {m['catalog_unit']}\n")
+    for supplier, lines in result["suppliers"].items():
+        print(f"  {supplier}")
+        for line in lines:
+            rolls = f"  ({line['rolls']} roll(s))" if line["rolls"] else ""
+            print(f"    {line['part_no']:<14} {line['quantity']:>12} {line['unit']:<4} {line['description']}{rolls}")
+    print(f"✓ {result['records']} BOM record(s), {result['pieces']} piece(s) aggregated in {elapsed:.2f} s")
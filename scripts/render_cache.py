@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# scripts/render_cache.py
+# Cache of OpenSCAD outputs (.echo/.stl/.dxf) keyed on the product's SCAD sources (with every file they
+# use/include) + render parameters.
+# A job whose parameters (incl. quality tier → $fn) were rendered before gets its files copied
+# from the cache instead of running OpenSCAD again.
+#
+#   out/cache/renders/<kind>/<key[:2]>/<key><suffix>
+
+import os, json, shutil, hashlib
+from pathlib import Path
+
+from scad_deps import get_graph, expand
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_DIR = ROOT / "out" / "cache" / "renders"
+
+# Parameters that do not change the geometry (only the echoed BOM tag)
+GEOMETRY_IGNORE = ("bom_tag",)
+
+
+def sources_hash(paths, root=ROOT):
+    """Hash of the SCAD sources under ``paths`` (files or directories) and of everything they use/include,
+    transitively (scripts/scad_deps.py); a file is re-hashed only when its mtime/size changed."""
+    return get_graph(root).closure_hash(expand(paths, root))
+
+
+def render_key(product, kind, params, sources):
+    """Cache key for one render; geometry renders (stl/dxf) ignore the BOM tag."""
+    ignore = GEOMETRY_IGNORE if kind != "echo" else ()
+    payload = {
+        "product": product,
+        "kind": kind,
+        "sources": sources,
+        "params": {k: v for k, v in params.items() if k not in ignore},
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class RenderCache:
+    """Directory-backed render cache; ``enabled=False`` turns fetch/store into no-ops."""
+
+    def __init__(self, root=DEFAULT_DIR, enabled=True):
+        self.root = Path(root)
+        self.enabled = enabled
+
+    def path(self, kind, key, suffix):
+        return self.root / kind / key[:2] / f"{key}{suffix}"
+
+    def fetch(self, kind, key, dest):
+        """Copy a cached output to ``dest``; returns True on a hit."""
+        if not self.enabled:
+            return False
+        src = self.path(kind, key, Path(dest).suffix)
+        if not src.exists():
+            return False
+        Path(dest).parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(src, dest)
+        return True
+
+    def store(self, kind, key, src):
+        """Add a freshly rendered file (atomic: concurrent jobs may store the same key)."""
+        if not self.enabled or not Path(src).exists():
+            return
+        dest = self.path(kind, key, Path(src).suffix)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        tmp = dest.with_name(f"{dest.name}.{os.getpid()}.tmp")
+        shutil.copyfile(src, tmp)
+        os.replace(tmp, dest)
@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+# scripts/render_estimate.py
+# Render-time prediction and render lanes. A log-linear cost model per product, fitted on the timings of
+# completed jobs (journal out/cache/render_timings.jsonl) over features of the resolved params ($fn, L, D,
+# rings, reinforcement spans), predicts a job's generator time. The API uses the prediction for the ETA
+# in the job status, for the lane (interactive: previews and quick jobs; batch: long renders, shortest
+# first) and for the generator timeout.
+#
+#   python scripts/render_estimate.py --report
+#   python scripts/render_estimate.py --config configs/example_pe500_large.yaml --quality production
+
+import sys, json, math, time, argparse, threading
+from pathlib import Path
+
+from variant_index import PRODUCT_FIELDS
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_JOURNAL = ROOT / "out" / "cache" / "render_timings.jsonl"
+
+# Features: log(value / reference); the intercept is the render time of the reference variant
+FEATURES = ("fn", "L", "D", "rings", "spans")
+REFERENCE = {"fn": 64, "L": 2000, "D": 160, "rings": 7, "spans": 2}   # rings/spans as count + 1
+# Prior exponents (render time ∝ $fn · L^0.3 · D^0.5 …) until enough jobs were measured; the fit is
+# a ridge regression towards them with PRIOR_WEIGHT pseudo-observations
+PRIOR = {"intercept": math.log(1.5), "fn": 1.0, "L": 0.3, "D": 0.5, "rings": 0.4, "spans": 0.2}
+PRIOR_WEIGHT = 2.0
+PRIOR_SIGMA = 0.6
+PRIOR_OVERHEAD_S = 3.0   # generator time besides OpenSCAD (config, BOM, LOD, thumbnail)
+
+MIN_SAMPLES = 8          # measured renders of a product before its fit replaces the prior timeout floor
+MAX_SAMPLES = 2000       # most recent journal entries kept per product
+# Share of the render time per OpenSCAD output (a cached output costs nothing)
+KIND_SHARE = {"echo": 0.2, "stl": 0.6, "dxf": 0.2}
+
+INTERACTIVE_S = 20.0     # predicted seconds up to which a job runs on the interactive lane
+DEFAULT_TIMEOUT = 300    # floor of the timeout while a product has fewer than MIN_SAMPLES
+TIMEOUT_FACTOR = 4.0     # timeout = factor × p90 prediction, within [MIN_TIMEOUT, MAX_TIMEOUT]
+MIN_TIMEOUT = 60
+MAX_TIMEOUT = 1800
+Z90 = 1.2816
+
+
+def features(product, params):
+    """Cost features of resolved SCAD params."""
+    axes = PRODUCT_FIELDS.get(product, ({},))[0]
+    if params.get("rings_auto", True):
+        rings = params.get("rings_count", 0)
+    else:
+        rings = len(params.get("rings_positions") or [])
+    spans = len(params.get("reinforce_spans") or []) if params.get("reinforce_enable") else 0
+    return {
+        "fn": params.get("fn", 96),
+        "L": params.get(axes.get("L", "L"), REFERENCE["L"]),
+        "D": params.get(axes.get("D", "D"), REFERENCE["D"]),
+        "rings": rings,
+        "spans": spans,
+    }
+
+
+def design_row(f):
+    row = [1.0]
+    for name in FEATURES:
+        value = float(f.get(name) or 0) + (1 if name in ("rings", "spans") else 0)
+        row.append(math.log(max(value, 1e-3) / REFERENCE[name]))
+    return row
+
+
+def render_sample(timings):
+    """(render seconds or None, generator seconds) of a completed job's spans.
+
+    Render seconds only when every OpenSCAD run missed the cache (a complete measurement).
+    """
+    renders = [s for s in timings if s["stage"].startswith("render_")]
+    total = sum(s["seconds"] for s in timings if s["stage"] == "generate_total")
+    if renders and all(s.get("cache") == "miss" for s in renders):
+        return sum(s["seconds"] for s in renders), total
+    return None, total
+
+
+def _solve(a, b):
+    """Gaussian elimination with partial pivoting (a is small and positive definite here)."""
+    n = len(b)
+    m = [row[:] + [b[i]] for i, row in enumerate(a)]
+    for col in range(n):
+        pivot = max(range(col, n), key=lambda r: abs(m[r][col]))
+        m[col], m[pivot] = m[pivot], m[col]
+        for r in range(col + 1, n):
+            factor = m[r][col] / m[col][col]
+            for c in range(col, n + 1):
+                m[r][c] -= factor * m[col][c]
+    x = [0.0] * n
+    for r in range(n - 1, -1, -1):
+        x[r] = (m[r][n] - sum(m[r][c] * x[c] for c in range(r + 1, n))) / m[r][r]
+    return x
+
+
+class Fit:
+    """Fitted model of one product: log render seconds = weights · design_row."""
+
+    def __init__(self, samples):
+        prior = [PRIOR["intercept"]] + [PRIOR[name] for name in FEATURES]
+        rendered = [(design_row(s["features"]), math.log(max(s["render_s"], 1e-3)))
+                    for s in samples if s.get("render_s")]
+        k = len(prior)
+        xtx = [[PRIOR_WEIGHT if i == j else 0.0 for j in range(k)] for i in range(k)]
+        xty = [PRIOR_WEIGHT * w for w in prior]
+        for x, y in rendered:
+            for i in range(k):
+                xty[i] += x[i] * y
+                for j in range(k):
+                    xtx[i][j] += x[i] * x[j]
+        self.weights = _solve(xtx, xty)
+        self.samples = len(rendered)
+        residuals = [y - self._log(x) for x, y in rendered]
+        self.sigma = (math.sqrt((sum(r * r for r in residuals) + PRIOR_WEIGHT * PRIOR_SIGMA ** 2)
+                                / (len(residuals) + PRIOR_WEIGHT)))
+        overheads = sorted(max(s["total_s"] - (s.get("render_s") or 0), 0) for s in samples if s.get("total_s"))
+        self.overhead = overheads[len(overheads) // 2] if overheads else PRIOR_OVERHEAD_S
+        self.mape = (sum(abs(math.exp(r) - 1) for r in residuals) / len(residuals)) if residuals else None
+
+    def _log(self, x):
+        return sum(w * v for w, v in zip(self.weights, x))
+
+    def render_seconds(self, f):
+        return math.exp(self._log(design_row(f)))
+
+
+class CostModel:
+    """Per-product fits over the timing journal; lines appended by any process are read on the next use and
+    refit the products they belong to."""
+
+    def __init__(self, journal=DEFAULT_JOURNAL, max_samples=MAX_SAMPLES):
+        self.journal = Path(journal)
+        self.max_samples = max_samples
+        self._samples = {}
+        self._offset = 0
+        self._fits = {}
+        self._lock = threading.Lock()
+
+    def _load(self):
+        """Samples per product, after reading the journal lines added since the last call."""
+        try:
+            size = self.journal.stat().st_size
+        except OSError:
+            return self._samples
+        if size < self._offset:             # journal replaced: start over
+            self._samples, self._offset, self._fits = {}, 0, {}
+        if size > self._offset:
+            with open(self.journal, "rb") as f:
+                f.seek(self._offset)
+                data = f.read(size - self._offset)
+            complete = data.rfind(b"\n") + 1   # a line still being written is read next time
+            self._offset += complete
+            for line in data[:complete].splitlines():
+                try:
+                    self._add(json.loads(line))
+                except (ValueError, KeyError):
+                    continue
+        return self._samples
+
+    def _add(self, sample):
+        samples = self._samples.setdefault(sample["product"], [])
+        samples.append(sample)
+        if len(samples) > self.max_samples:
+            del samples[:len(samples) - self.max_samples]
+        self._fits.pop(sample["product"], None)
+
+    def observe(self, product, f, timings):
+        """Record a completed job (its features and spans); False when the spans hold no generator run."""
+        render_s, total_s = render_sample(timings)
+        if not total_s:
+            return False
+        sample = {"product": product, "features": f, "render_s": render_s and round(render_s, 4),
+                  "total_s": round(total_s, 4), "at": round(time.time(), 3)}
+        with self._lock:
+            self.journal.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.journal, "a", encoding="utf-8") as out:
+                out.write(json.dumps(sample) + "\n")
+        return True
+
+    def fit(self, product):
+        with self._lock:
+            samples = self._load().get(product, [])
+            if product not in self._fits:
+                self._fits[product] = Fit(samples)
+            return self._fits[product]
+
+    def estimate(self, product, f, quality=None, cached=()):
+        """Prediction for one job: seconds, p90, lane and generator timeout.
+
+        ``cached``: OpenSCAD outputs (echo/stl/dxf) already in the render cache.
+        """
+        fit = self.fit(product)
+        render = fit.render_seconds(f) * sum(share for kind, share in KIND_SHARE.items() if kind not in cached)
+        seconds = fit.overhead + render
+        p90 = fit.overhead + render * math.exp(Z90 * fit.sigma)
+        timeout = min(max(TIMEOUT_FACTOR * p90, MIN_TIMEOUT), MAX_TIMEOUT)
+        if fit.samples < MIN_SAMPLES:
+            timeout = max(timeout, DEFAULT_TIMEOUT)
+        lane = "interactive" if quality == "preview" or seconds <= INTERACTIVE_S else "batch"
+        return {"seconds": round(seconds, 1), "p90": round(p90, 1), "lane": lane, "timeout": round(timeout),
+                "samples": fit.samples, "features": f}
+
+    def report(self):
+        products = sorted(self._load_locked())
+        report = {}
+        for product in products:
+            fit = self.fit(product)
+            report[product] = {
+                "samples": fit.samples,
+                "overhead_s": round(fit.overhead, 2),
+                "sigma": round(fit.sigma, 3),
+                "mape": fit.mape and round(fit.mape, 3),
+                "weights": dict(zip(("intercept",) + FEATURES, (round(w, 3) for w in fit.weights))),
+            }
+        return report
+
+    def _load_locked(self):
+        with self._lock:
+            return dict(self._load())
+
+
+class LaneQueue:
+    """Waiting jobs of the interactive lane (FIFO, always first) and the batch lane (shortest predicted job
+    first; waiting lowers a job's rank by AGING seconds per second so long renders are not starved).
+    With more than one slot, ``reserved`` slots are kept free of batch jobs."""
+
+    AGING = 0.5
+
+    def __init__(self, slots, reserved=1):
+        self.slots = slots
+        self.reserved = reserved if slots > 1 else 0
+        self.running = {"interactive": 0, "batch": 0}
+        self._waiting = []
+        self._active = {}        # id(item) → (predicted seconds, monotonic start) of the running jobs
+        self._seq = 0
+
+    def __len__(self):
+        return len(self._waiting)
+
+    def push(self, item, lane, cost, key=None):
+        """Queue ``item``; ``key`` (a job id) identifies it for backlog()."""
+        self._seq += 1
+        self._waiting.append((self._seq, lane, cost, time.monotonic(), item, key))
+
+    def remove(self, item):
+        self._waiting = [w for w in self._waiting if w[4] is not item]
+
+    def _rank(self, entry, now):
+        seq, lane, cost, enqueued = entry[:4]
+        if lane == "interactive":
+            return (0, seq)
+        return (1, cost - self.AGING * (now - enqueued), seq)
+
+    def order(self):
+        """Waiting items in the order they would start."""
+        now = time.monotonic()
+        return [(w[4], w[1], w[2]) for w in sorted(self._waiting, key=lambda w: self._rank(w, now))]
+
+    def backlog(self, key):
+        """Predicted seconds of work before waiting job ``key`` starts: the remainder of the running jobs
+        plus the waiting jobs that start before it (None when ``key`` is not waiting)."""
+        now = time.monotonic()
+        ahead = 0.0
+        for w in sorted(self._waiting, key=lambda w: self._rank(w, now)):
+            if w[5] == key:
+                return ahead + sum(max(cost - (now - started), 0) for cost, started in self._active.values())
+            ahead += w[2]
+        return None
+
+    def pop(self):
+        """``(item, lane)`` of the next job that may start now, or None."""
+        if sum(self.running.values()) >= self.slots:
+            return None
+        batch_ok = self.running["batch"] < self.slots - self.reserved
+        now = time.monotonic()
+        eligible = [w for w in self._waiting if w[1] == "interactive" or batch_ok]
+        if not eligible:
+            return None
+        entry = min(eligible, key=lambda w: self._rank(w, now))
+        self._waiting.remove(entry)
+        self.running[entry[1]] += 1
+        self._active[id(entry[4])] = (entry[2], now)
+        return entry[4], entry[1]
+
+    def done(self, lane, item=None):
+        """Free the slot of a popped ``item``."""
+        self.running[lane] -= 1
+        self._active.pop(id(item), None)
+
+
+class LaneScheduler:
+    """Thread pool of ``slots`` render threads (started with the first job) taking jobs from a LaneQueue."""
+
+    def __init__(self, slots, reserved=1, thread_name_prefix="render"):
+        self.queue = LaneQueue(slots, reserved)
+        self.thread_name_prefix = thread_name_prefix
+        self._cond = threading.Condition()
+        self._threads = []
+
+    def submit(self, fn, *args, lane="batch", cost=0.0, key=None):
+        with self._cond:
+            if not self._threads:
+                self._threads = [threading.Thread(target=self._run, name=f"{self.thread_name_prefix}-{i}", daemon=True)
+                                 for i in range(self.queue.slots)]
+                for t in self._threads:
+                    t.start()
+            self.queue.push((fn, args), lane, cost, key)
+            self._cond.notify_all()
+
+    def backlog(self, key):
+        """LaneQueue.backlog() of a job submitted with ``key``."""
+        with self._cond:
+            return self.queue.backlog(key)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while (picked := self.queue.pop()) is None:
+                    self._cond.wait()
+            item, lane = picked
+            fn, args = item
+            try:
+                fn(*args)
+            except Exception as e:
+                print(f"[ERROR] render job failed: {e}", file=sys.stderr)
+            finally:
+                with self._cond:
+                    self.queue.done(lane, item)
+                    self._cond.notify_all()
+
+
+_MODEL = None
+_MODEL_LOCK = threading.Lock()
+
+
+def get_cost_model():
+    """Process-wide cost model over the default journal."""
+    global _MODEL
+    with _MODEL_LOCK:
+        if _MODEL is None:
+            _MODEL = CostModel()
+        return _MODEL
+
+
+def main():
+    p = argparse.ArgumentParser(description="Render-time cost model: fit report and predictions")
+    p.add_argument("--journal", default=str(DEFAULT_JOURNAL), help="Timing journal (JSONL)")
+    p.add_argument("--report", action="store_true", help="Fitted weights, spread and error per product")
+    p.add_argument("--config", help="Predict a config YAML")
+    p.add_argument("--product", default="filterslang", help="Product of --config")
+    p.add_argument("--quality", help="Quality tier (default: the config's)")
+    args = p.parse_args()
+
+    model = CostModel(args.journal)
+    if args.config:
+        import yaml
+        from product_registry import get_registry
+        with open(args.config, encoding="utf-8") as f:
+            config = yaml.safe_load(f)
+        if args.quality:
+            config["quality"] = args.quality
+        registry = get_registry()
+        with open(registry.get(args.product)["presets"], encoding="utf-8") as f:
+            presets = yaml.safe_load(f)
+        params, _ = registry.resolver(args.product)(config, presets)
+        print(json.dumps(model.estimate(args.product, features(args.product, params), params.get("quality")), indent=2))
+    if args.report or not args.config:
+        print(json.dumps(model.report(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+# scripts/render_queue.py
+# Shared render-task queue between the API nodes (enqueue, follow progress) and render workers
+# (scripts/render_worker.py: claim, heartbeat, finish). A claimed task is leased to one worker; the
+# worker extends the lease with every heartbeat, and a task whose lease expired (dead or stuck worker)
+# is queued again until it used up MAX_ATTEMPTS.
+#
+#   RENDER_QUEUE=sqlite:///out/queue/render_queue.sqlite   (default; a file on storage all nodes share)
+#   RENDER_QUEUE=redis://host:6379/0                        (requires the redis package)
+#
+#   python scripts/render_queue.py --stats
+#   python scripts/render_queue.py --release-expired
+
+import os, json, time, sqlite3, argparse, threading
+from contextlib import contextmanager
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_DB = ROOT / "out" / "queue" / "render_queue.sqlite"
+
+LEASE_S = 30          # a worker that misses heartbeats this long loses its task
+MAX_ATTEMPTS = 3      # claims per task before it is given up ("dead")
+# Priorities below BATCH_PRIORITY are the interactive lane (workers started with --lane interactive
+# claim only those); within a lane the lowest value (predicted seconds) goes first. SQLite ages waiting
+# tasks by AGING per second so long batch renders are not starved.
+BATCH_PRIORITY = 1_000_000
+AGING = 0.5
+WORKER_STALE_S = 60   # workers without a heartbeat this long are not listed as alive
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT, id TEXT UNIQUE NOT NULL, payload TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0, status TEXT NOT NULL, worker TEXT, attempts INTEGER NOT NULL DEFAULT 0,
+    lease_expires REAL, created_at REAL NOT NULL, started_at REAL, finished_at REAL, result TEXT
+);
+CREATE INDEX IF NOT EXISTS tasks_ready ON tasks (status, priority, seq);
+CREATE INDEX IF NOT EXISTS tasks_leases ON tasks (status, lease_expires);
+CREATE TABLE IF NOT EXISTS task_lines (
+    task_id TEXT NOT NULL, seq INTEGER NOT NULL, line TEXT NOT NULL, PRIMARY KEY (task_id, seq)
+);
+CREATE TABLE IF NOT EXISTS workers (
+    worker TEXT PRIMARY KEY, info TEXT, started_at REAL, heartbeat_at REAL, tasks_done INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+class QueueError(ValueError):
+    """Unknown queue URL or missing backend."""
+
+
+class SQLiteQueue:
+    """Task queue in one SQLite file (rollback journal: usable on a filesystem several nodes share)."""
+
+    def __init__(self, path=DEFAULT_DB, lease_s=LEASE_S, max_attempts=MAX_ATTEMPTS):
+        self.path = Path(path)
+        self.lease_s = lease_s
+        self.max_attempts = max_attempts
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        con = sqlite3.connect(self.path, timeout=30)
+        try:
+            con.executescript(SCHEMA)
+        finally:
+            con.close()
+
+    @contextmanager
+    def _connect(self, mode="IMMEDIATE"):
+        """One transaction, closed afterwards. IMMEDIATE (writes: claims are serialised) takes the write
+        lock up front; DEFERRED (reads) only a shared lock, so polls do not queue behind writers."""
+        con = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            con.execute(f"BEGIN {mode}")
+            try:
+                yield con
+            except BaseException:
+                con.execute("ROLLBACK")
+                raise
+            con.execute("COMMIT")
+        finally:
+            con.close()
+
+    def enqueue(self, task_id, payload, priority=0):
+        with self._connect() as con:
+            con.execute("INSERT INTO tasks (id, payload, priority, status, created_at) VALUES (?, ?, ?, 'queued', ?)",
+                        (task_id, json.dumps(payload), priority, time.time()))
+
+    def claim(self, worker, max_priority=None):
+        """Lease the next queued task (lowest aged priority first, then FIFO): ``{id, payload, attempts}`` or None.
+
+        ``max_priority``: only tasks with a priority below it (BATCH_PRIORITY: the interactive lane).
+        """
+        now = time.time()
+        with self._connect() as con:
+            row = con.execute("SELECT id, payload, attempts FROM tasks WHERE status = 'queued' AND priority < ? "
+                              "ORDER BY priority - ? * (? - created_at), seq LIMIT 1",
+                              (max_priority if max_priority is not None else 2 ** 62, AGING, now)).fetchone()
+            if row is None:
+                return None
+            con.execute("UPDATE tasks SET status = 'leased', worker = ?, lease_expires = ?, attempts = attempts + 1, "
+                        "started_at = ? WHERE id = ?", (worker, now + self.lease_s, now, row[0]))
+        return {"id": row[0], "payload": json.loads(row[1]), "attempts": row[2] + 1}
+
+    def heartbeat(self, task_id, worker, lines=()):
+        """Extend the lease and append log lines; False when the task is no longer leased to ``worker``."""
+        now = time.time()
+        with self._connect() as con:
+            held = con.execute("UPDATE tasks SET lease_expires = ? WHERE id = ? AND worker = ? AND status = 'leased'",
+                               (now + self.lease_s, task_id, worker)).rowcount
+            if held and lines:
+                start = con.execute("SELECT COALESCE(MAX(seq), 0) FROM task_lines WHERE task_id = ?",
+                                    (task_id,)).fetchone()[0]
+                con.executemany("INSERT INTO task_lines VALUES (?, ?, ?)",
+                                [(task_id, start + i, line) for i, line in enumerate(lines, 1)])
+            con.execute("UPDATE workers SET heartbeat_at = ? WHERE worker = ?", (now, worker))
+        return bool(held)
+
+    def finish(self, task_id, worker, result):
+        """Store the result of a leased task; False when the lease was lost (another worker retries it)."""
+        now = time.time()
+        with self._connect() as con:
+            done = con.execute("UPDATE tasks SET status = 'done', result = ?, finished_at = ?, lease_expires = NULL "
+                               "WHERE id = ? AND worker = ? AND status = 'leased'",
+                               (json.dumps(result), now, task_id, worker)).rowcount
+            if done:
+                con.execute("UPDATE workers SET tasks_done = tasks_done + 1, heartbeat_at = ? WHERE worker = ?",
+                            (now, worker))
+        return bool(done)
+
+    def release_expired(self, now=None):
+        """Requeue tasks whose lease expired (or give them up after max_attempts): ``[(task_id, status)]``."""
+        now = now or time.time()
+        with self._connect() as con:
+            expired = con.execute("SELECT id, attempts FROM tasks WHERE status = 'leased' AND lease_expires < ?",
+                                  (now,)).fetchall()
+            released = [(task_id, "queued" if attempts < self.max_attempts else "dead") for task_id, attempts in expired]
+            con.executemany("UPDATE tasks SET status = ?, worker = NULL, lease_expires = NULL WHERE id = ?",
+                            [(status, task_id) for task_id, status in released])
+        return released
+
+    def get(self, task_id):
+        with self._connect("DEFERRED") as con:
+            row = con.execute("SELECT status, worker, attempts, created_at, started_at, finished_at, result "
+                              "FROM tasks WHERE id = ?", (task_id,)).fetchone()
+        if row is None:
+            return None
+        status, worker, attempts, created, started, finished, result = row
+        return {"id": task_id, "status": status, "worker": worker, "attempts": attempts, "created_at": created,
+                "started_at": started, "finished_at": finished, "result": json.loads(result) if result else None}
+
+    def lines(self, task_id, after=0):
+        """Log lines of a task after sequence number ``after``: ``[(seq, line)]``."""
+        with self._connect("DEFERRED") as con:
+            return con.execute("SELECT seq, line FROM task_lines WHERE task_id = ? AND seq > ? ORDER BY seq",
+                               (task_id, after)).fetchall()
+
+    def register_worker(self, worker, info):
+        now = time.time()
+        with self._connect() as con:
+            con.execute("INSERT OR REPLACE INTO workers VALUES (?, ?, ?, ?, 0)", (worker, json.dumps(info), now, now))
+
+    def stats(self, now=None):
+        """Task counts per status and the workers seen within WORKER_STALE_S."""
+        now = now or time.time()
+        with self._connect("DEFERRED") as con:
+            counts = dict(con.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status").fetchall())
+            workers = [{"worker": w, **json.loads(info or "{}"), "heartbeat_age_s": round(now - hb, 1), "tasks_done": n}
+                       for w, info, hb, n in con.execute(
+                           "SELECT worker, info, heartbeat_at, tasks_done FROM workers WHERE heartbeat_at > ? "
+                           "ORDER BY worker", (now - WORKER_STALE_S,))]
+        return {"tasks": counts, "workers": workers}
+
+
+# Redis: every state transition is one Lua script (atomic on the server), so two workers cannot pop the
+# same task and a lease check cannot be overtaken by release_expired() between check and write.
+# Task hash keys are derived inside the scripts from the prefix: use a single Redis node (not Cluster).
+CLAIM_LUA = """
+local head = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, 1)
+if #head == 0 then return false end
+local id = head[1]
+redis.call('ZREM', KEYS[1], id)
+local key = ARGV[2] .. id
+local attempts = redis.call('HINCRBY', key, 'attempts', 1)
+redis.call('HSET', key, 'status', 'leased', 'worker', ARGV[3], 'started_at', ARGV[4])
+redis.call('ZADD', KEYS[2], ARGV[5], id)
+return {id, redis.call('HGET', key, 'payload'), attempts}
+"""
+
+HEARTBEAT_LUA = """
+if redis.call('HGET', KEYS[1], 'status') ~= 'leased' or redis.call('HGET', KEYS[1], 'worker') ~= ARGV[1] then
+    return 0
+end
+redis.call('ZADD', KEYS[2], ARGV[2], ARGV[3])
+for i = 4, #ARGV do redis.call('RPUSH', KEYS[3], ARGV[i]) end
+return 1
+"""
+
+FINISH_LUA = """
+if redis.call('HGET', KEYS[1], 'status') ~= 'leased' or redis.call('HGET', KEYS[1], 'worker') ~= ARGV[1] then
+    return 0
+end
+redis.call('HSET', KEYS[1], 'status', 'done', 'result', ARGV[2], 'finished_at', ARGV[3])
+redis.call('ZREM', KEYS[2], ARGV[4])
+return 1
+"""
+
+RELEASE_LUA = """
+local id = ARGV[4]
+local expires = redis.call('ZSCORE', KEYS[1], id)
+if not expires or tonumber(expires) >= tonumber(ARGV[2]) then return false end
+redis.call('ZREM', KEYS[1], id)
+local key = ARGV[1] .. id
+if redis.call('HGET', key, 'status') ~= 'leased' then return false end
+if tonumber(redis.call('HGET', key, 'attempts') or '0') < tonumber(ARGV[3]) then
+    local score = tonumber(redis.call('HGET', key, 'priority') or '0') * 1e9 + tonumber(redis.call('HGET', key, 'seq') or '0')
+    redis.call('HSET', key, 'status', 'queued', 'worker', '')
+    redis.call('ZADD', KEYS[2], string.format('%.17g', score), id)
+    return 'queued'
+end
+redis.call('HSET', key, 'status', 'dead', 'worker', '')
+return 'dead'
+"""
+
+
+class RedisQueue:
+    """Same protocol on Redis (one sorted set of ready tasks, one of leases; a hash per task)."""
+
+    def __init__(self, client, prefix="render", lease_s=LEASE_S, max_attempts=MAX_ATTEMPTS):
+        self.r = client
+        self.prefix = prefix
+        self.lease_s = lease_s
+        self.max_attempts = max_attempts
+        self._claim = client.register_script(CLAIM_LUA)
+        self._heartbeat = client.register_script(HEARTBEAT_LUA)
+        self._finish = client.register_script(FINISH_LUA)
+        self._release = client.register_script(RELEASE_LUA)
+
+    def _k(self, *parts):
+        return ":".join((self.prefix, *parts))
+
+    def enqueue(self, task_id, payload, priority=0):
+        seq = self.r.incr(self._k("seq"))
+        self.r.hset(self._k("task", task_id), mapping={
+            "payload": json.dumps(payload), "priority": priority, "seq": seq, "status": "queued",
+            "attempts": 0, "created_at": time.time()})
+        self.r.zadd(self._k("ready"), {task_id: _score(priority, seq)})
+
+    def claim(self, worker, max_priority=None):
+        """Lease the next ready task (lowest priority, then FIFO; no aging on Redis)."""
+        now = time.time()
+        bound = "+inf" if max_priority is None else f"({_score(max_priority, 0)}"
+        claimed = self._claim(keys=[self._k("ready"), self._k("leases")],
+                              args=[bound, self._k("task", ""), worker, now, now + self.lease_s])
+        if not claimed:
+            return None
+        task_id, payload, attempts = claimed
+        return {"id": _str(task_id), "payload": json.loads(_str(payload)), "attempts": int(attempts)}
+
+    def heartbeat(self, task_id, worker, lines=()):
+        now = time.time()
+        self.r.hset(self._k("workers"), worker, json.dumps({**self._worker(worker), "heartbeat_at": now}))
+        return bool(self._heartbeat(keys=[self._k("task", task_id), self._k("leases"), self._k("lines", task_id)],
+                                    args=[worker, now + self.lease_s, task_id, *lines]))
+
+    def finish(self, task_id, worker, result):
+        now = time.time()
+        if not self._finish(keys=[self._k("task", task_id), self._k("leases")],
+                            args=[worker, json.dumps(result), now, task_id]):
+            return False
+        info = self._worker(worker)
+        info["tasks_done"] = info.get("tasks_done", 0) + 1
+        self.r.hset(self._k("workers"), worker, json.dumps({**info, "heartbeat_at": now}))
+        return True
+
+    def release_expired(self, now=None):
+        now = now or time.time()
+        released = []
+        for raw in self.r.zrangebyscore(self._k("leases"), 0, f"({now}"):
+            task_id = _str(raw)
+            status = self._release(keys=[self._k("leases"), self._k("ready")],
+                                   args=[self._k("task", ""), now, self.max_attempts, task_id])
+            if status:          # else renewed, finished or released by another node meanwhile
+                released.append((task_id, _str(status)))
+        return released
+
+    def get(self, task_id):
+        data = {_str(k): _str(v) for k, v in self.r.hgetall(self._k("task", task_id)).items()}
+        if not data:
+            return None
+        number = lambda k: float(data[k]) if data.get(k) else None
+        return {"id": task_id, "status": data["status"], "worker": data.get("worker") or None,
+                "attempts": int(data.get("attempts") or 0), "created_at": number("created_at"),
+                "started_at": number("started_at"), "finished_at": number("finished_at"),
+                "result": json.loads(data["result"]) if data.get("result") else None}
+
+    def lines(self, task_id, after=0):
+        return [(after + i, _str(line)) for i, line in enumerate(self.r.lrange(self._k("lines", task_id), after, -1), 1)]
+
+    def _worker(self, worker):
+        raw = self.r.hget(self._k("workers"), worker)
+        return json.loads(_str(raw)) if raw else {}
+
+    def register_worker(self, worker, info):
+        now = time.time()
+        self.r.hset(self._k("workers"), worker, json.dumps({**info, "started_at": now, "heartbeat_at": now,
+                                                            "tasks_done": 0}))
+
+    def stats(self, now=None):
+        now = now or time.time()
+        counts = {}
+        for key in self.r.scan_iter(self._k("task", "*")):
+            status = _str(self.r.hget(key, "status"))
+            counts[status] = counts.get(status, 0) + 1
+        workers = []
+        for worker, raw in sorted(self.r.hgetall(self._k("workers")).items()):
+            info = json.loads(_str(raw))
+            if now - info.get("heartbeat_at", 0) < WORKER_STALE_S:
+                hb = info.pop("heartbeat_at")
+                info.pop("started_at", None)
+                workers.append({"worker": _str(worker), **info, "heartbeat_age_s": round(now - hb, 1)})
+        return {"tasks": counts, "workers": workers}
+
+
+def _score(priority, seq):
+    """Sorted-set score: priority, then enqueue order (exact in a double up to priority ~9e6)."""
+    return priority * 1e9 + seq
+
+
+def _str(value):
+    return value.decode("utf-8") if isinstance(value, bytes) else value
+
+
+def open_queue(url=None, **kwargs):
+    """Queue for a ``sqlite:///path`` / ``redis://`` URL (default: RENDER_QUEUE, else the SQLite file)."""
+    url = url or os.environ.get("RENDER_QUEUE", "")
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        try:
+            import redis           # imported here: ~200 ms that SQLite deployments need not pay
+        except ImportError:
+            raise QueueError("RENDER_QUEUE is a Redis URL but the redis package is not installed (pip install redis)")
+        return RedisQueue(redis.Redis.from_url(url), **kwargs)
+    if url.startswith("sqlite:///"):
+        return SQLiteQueue(url[len("sqlite:///"):], **kwargs)
+    if url:
+        raise QueueError(f"unsupported RENDER_QUEUE URL: {url}")
+    return SQLiteQueue(DEFAULT_DB, **kwargs)
+
+
+_QUEUES = {}
+_QUEUES_LOCK = threading.Lock()
+
+
+def get_render_queue(url=None):
+    """Process-wide queue for ``url`` (default: RENDER_QUEUE)."""
+    key = url or os.environ.get("RENDER_QUEUE", "")
+    with _QUEUES_LOCK:
+        if key not in _QUEUES:
+            _QUEUES[key] = open_queue(url)
+        return _QUEUES[key]
+
+
+def main():
+    p = argparse.ArgumentParser(description="Render task queue status")
+    p.add_argument("--queue", default="", help="Queue URL (default: RENDER_QUEUE or the SQLite file)")
+    p.add_argument("--stats", action="store_true", help="Task counts per status and live workers (JSON)")
+    p.add_argument("--release-expired", action="store_true", help="Requeue tasks of workers whose lease expired")
+    args = p.parse_args()
+
+    queue = open_queue(args.queue or None)
+    if args.release_expired:
+        for task_id, status in queue.release_expired():
+            print(f"  {task_id} → {status}")
+    print(json.dumps(queue.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+# scripts/render_queue_check.py
+# Protocol check of the render queue backends (scripts/render_queue.py): workers claiming at the same time
+# get distinct tasks, lanes are respected, an expired lease can no longer be heartbeated or finished (the
+# task runs again, or goes dead after MAX_ATTEMPTS), and finish/release races never leave a task both done
+# and queued. Runs on a temporary SQLite file and on Redis: a real server (--redis URL, a scratch database:
+# keys under a random prefix) or the in-process fakeredis stand-in (pip install "fakeredis[lua]").
+#
+#   python scripts/render_queue_check.py
+#   python scripts/render_queue_check.py --redis redis://localhost:6379/15 --tasks 1000
+
+import sys, time, uuid, sqlite3, argparse, tempfile, threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+from render_queue import SQLiteQueue, RedisQueue, BATCH_PRIORITY, MAX_ATTEMPTS
+
+
+class CheckError(AssertionError):
+    pass
+
+
+def check(condition, message):
+    if not condition:
+        raise CheckError(message)
+
+
+def check_concurrent_claims(queue, tasks, workers):
+    ids = [f"c{i}" for i in range(tasks)]
+    for task_id in ids:
+        queue.enqueue(task_id, {"n": task_id})
+
+    def drain(worker):
+        mine = []
+        while (task := queue.claim(worker)) is not None:
+            check(task["payload"] == {"n": task["id"]}, f"payload of {task['id']} mixed up")
+            check(queue.finish(task["id"], worker, {"ok": True}), f"{worker} lost the lease of {task['id']}")
+            mine.append(task["id"])
+        return mine
+
+    with ThreadPoolExecutor(workers) as pool:
+        claimed = [task_id for mine in pool.map(drain, [f"w{i}" for i in range(workers)]) for task_id in mine]
+    check(len(claimed) == len(set(claimed)), f"{len(claimed) - len(set(claimed))} task(s) claimed twice")
+    check(sorted(claimed) == sorted(ids), f"{len(ids) - len(claimed)} task(s) never claimed")
+    check(all(queue.get(task_id)["status"] == "done" for task_id in ids), "finished tasks not done")
+    return f"{tasks} tasks, {workers} concurrent workers: each claimed exactly once"
+
+
+def check_lanes(queue):
+    queue.enqueue("batch", {}, priority=BATCH_PRIORITY + 5)
+    queue.enqueue("interactive", {}, priority=3)
+    task = queue.claim("w-int", max_priority=BATCH_PRIORITY)
+    check(task and task["id"] == "interactive", f"interactive lane claimed {task}")
+    check(queue.claim("w-int", max_priority=BATCH_PRIORITY) is None, "interactive worker claimed a batch task")
+    check(queue.claim("w-batch")["id"] == "batch", "batch task not claimable")
+    return "interactive workers claim only interactive tasks"
+
+
+def check_lost_lease(queue):
+    queue.enqueue("lost", {})
+    first = queue.claim("w1")
+    check(queue.heartbeat("lost", "w1", ["line 1"]), "holder's heartbeat rejected")
+    released = queue.release_expired(now=time.time() + queue.lease_s + 1)
+    check(released == [("lost", "queued")], f"expired lease released as {released}")
+    check(not queue.heartbeat("lost", "w1", ["late"]), "heartbeat accepted after the lease expired")
+    check(not queue.finish("lost", "w1", {"by": "w1"}), "finish accepted after the lease expired")
+    second = queue.claim("w2")
+    check(second["id"] == "lost" and second["attempts"] == first["attempts"] + 1, f"retry claimed as {second}")
+    check(queue.finish("lost", "w2", {"by": "w2"}), "retrying worker could not finish")
+    task = queue.get("lost")
+    check(task["status"] == "done" and task["result"] == {"by": "w2"}, f"retried task ended as {task}")
+    check([line for _, line in queue.lines("lost")] == ["line 1"], "lines after the lost lease were kept")
+
+    queue.enqueue("doomed", {})
+    for attempt in range(MAX_ATTEMPTS):
+        check(queue.claim("w3")["id"] == "doomed", f"attempt {attempt + 1} not claimable")
+        status = queue.release_expired(now=time.time() + queue.lease_s + 1)
+    check(status == [("doomed", "dead")] and queue.claim("w3") is None, f"task not given up: {status}")
+    return f"expired leases cannot heartbeat or finish; retried, dead after {MAX_ATTEMPTS} attempts"
+
+
+def check_finish_release_race(queue, tasks):
+    ids = [f"r{i}" for i in range(tasks)]
+    for task_id in ids:
+        queue.enqueue(task_id, {})
+    for task_id in ids:
+        check(queue.claim(f"h-{task_id}")["id"] == task_id, "claim order")
+    later = time.time() + queue.lease_s + 1
+    finished = {}
+    with ThreadPoolExecutor(2) as pool:
+        releasing = pool.submit(lambda: [queue.release_expired(now=later) for _ in range(3)])
+        for task_id in ids:
+            finished[task_id] = queue.finish(task_id, f"h-{task_id}", {})
+        releasing.result()
+    requeued = set()
+    while (task := queue.claim("sweeper")) is not None:
+        requeued.add(task["id"])
+    for task_id in ids:
+        done = queue.get(task_id)["status"] == "done"
+        check(done == finished[task_id], f"{task_id}: finish returned {finished[task_id]}, status done={done}")
+        check(done != (task_id in requeued), f"{task_id}: done={done} but requeued={task_id in requeued}")
+    return (f"finish vs release_expired on {tasks} leases: {sum(finished.values())} finished, "
+            f"{len(requeued)} requeued, none both")
+
+
+def check_sqlite_reads(queue):
+    """get()/lines()/stats() take only a shared lock: they answer while a writer holds the write lock."""
+    queue.enqueue("read", {})
+    writer = sqlite3.connect(queue.path, timeout=30, isolation_level=None)
+    writer.execute("BEGIN IMMEDIATE")
+    try:
+        started = time.perf_counter()
+        result = {}
+        reader = threading.Thread(target=lambda: result.update(task=queue.get("read"), lines=queue.lines("read"),
+                                                               stats=queue.stats()), daemon=True)
+        reader.start()
+        reader.join(5)
+        check(not reader.is_alive(), "reads waited for the write lock")
+        check(result["task"]["status"] == "queued", f"read returned {result['task']}")
+    finally:
+        writer.execute("ROLLBACK")
+        writer.close()
+    return f"reads during an open write transaction answered in {(time.perf_counter() - started) * 1000:.1f} ms"
+
+
+def run(name, make_queue, args, extra=()):
+    checks = [
+        lambda q: check_concurrent_claims(q, args.tasks, args.workers),
+        check_lanes,
+        check_lost_lease,
+        lambda q: check_finish_release_race(q, min(args.tasks, 200)),
+        *extra,
+    ]
+    failed = 0
+    for test in checks:
+        try:
+            print(f"  ✓ {name}: {test(make_queue())}")
+        except CheckError as e:
+            print(f"  ✗ {name}: {e}")
+            failed += 1
+    return failed
+
+
+def redis_client(url):
+    if url:
+        try:
+            import redis
+        except ImportError:
+            sys.exit("ERROR: --redis needs the redis package (pip install redis)")
+        return redis.Redis.from_url(url), url
+    try:
+        import fakeredis
+    except ImportError:
+        return None, None
+    return fakeredis.FakeRedis(), "fakeredis"
+
+
+def main():
+    p = argparse.ArgumentParser(description="Check the render queue protocol on SQLite and Redis")
+    p.add_argument("--redis", default="", help="Redis URL to test against (default: fakeredis when installed)")
+    p.add_argument("--tasks", type=int, default=300, help="Tasks in the concurrent-claim check")
+    p.add_argument("--workers", type=int, default=8, help="Concurrent claiming workers")
+    args = p.parse_args()
+
+    failed = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = (Path(tmp) / f"q{i}.sqlite" for i in range(100))
+        failed += run("sqlite", lambda: SQLiteQueue(next(paths)), args, extra=[check_sqlite_reads])
+
+    client, label = redis_client(args.redis)
+    if client is None:
+        print("  - redis: skipped (no --redis URL and fakeredis is not installed)")
+    else:
+        prefix = f"render_check_{uuid.uuid4().hex[:8]}"
+        counter = iter(range(100))
+        try:
+            failed += run(f"redis ({label})", lambda: RedisQueue(client, prefix=f"{prefix}_{next(counter)}"), args)
+        finally:
+            for key in client.scan_iter(f"{prefix}_*"):
+                client.delete(key)
+
+    if failed:
+        sys.exit(f"✗ {failed} check(s) failed")
+    print("✓ render queue protocol holds")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# scripts/render_worker.py
+# Render worker: claims generation tasks from the shared queue (scripts/render_queue.py), runs
+# generate_model.py (OpenSCAD, DXF, BOM) in a private work directory, streams the generator's stderr
+# lines back with every heartbeat and publishes the outputs to the shared artifact store. Start as many
+# as the hardware allows, on as many machines as share the queue and the store:
+#
+#   RENDER_QUEUE=sqlite:///mnt/shared/render_queue.sqlite \
+#     python scripts/render_worker.py --store /mnt/shared/blobs --concurrency 4
+#   python scripts/render_worker.py --lane interactive      # only previews and quick jobs
+#
+# A worker that dies stops heartbeating; its lease expires and another worker (or the API) requeues
+# the task. A worker that lost its lease kills its generator and drops the result.
+
+import os, sys, time, shutil, socket, argparse, threading, subprocess
+from pathlib import Path
+
+from render_queue import open_queue, LEASE_S, BATCH_PRIORITY
+from artifact_store import ArtifactStore, ADOPT_KINDS, DEFAULT_DIR as STORE_DIR
+from product_registry import get_registry
+
+ROOT = Path(__file__).resolve().parent.parent
+WORK_DIR = ROOT / "out" / "work"
+
+HEARTBEAT_S = 2       # lease renewal and log streaming interval (well below LEASE_S)
+IDLE_POLL_S = 1.0     # wait between claims while the queue is empty
+GENERATE_TIMEOUT = 300
+TAIL_CHARS = 4000     # generator output kept in a failed task's result
+
+
+class Worker:
+    def __init__(self, queue, store, worker_id, timeout=GENERATE_TIMEOUT, ttl_s=None, work_dir=WORK_DIR,
+                 lane="any"):
+        self.queue = queue
+        self.max_priority = BATCH_PRIORITY if lane == "interactive" else None
+        self.store = store
+        self.worker_id = worker_id
+        self.timeout = timeout
+        self.ttl_s = ttl_s
+        self.work_dir = Path(work_dir)
+        self.stopping = threading.Event()
+
+    def run(self, slots=1, once=False):
+        """Claim and run tasks in ``slots`` threads; with ``once`` stop when the queue is empty."""
+        threads = [threading.Thread(target=self._loop, args=(once,), name=f"slot-{i}", daemon=True)
+                   for i in range(slots)]
+        for t in threads:
+            t.start()
+        try:
+            for t in threads:
+                while t.is_alive():
+                    t.join(0.5)
+        except KeyboardInterrupt:
+            self.stopping.set()
+            print(f"[INFO] {self.worker_id}: stopping (running tasks are retried elsewhere)", file=sys.stderr)
+
+    def _loop(self, once):
+        while not self.stopping.is_set():
+            for task_id, status in self.queue.release_expired():
+                print(f"[WARN] lease of task {task_id} expired → {status}", file=sys.stderr)
+            task = self.queue.claim(self.worker_id, self.max_priority)
+            if task is None:
+                if once:
+                    return
+                self.stopping.wait(IDLE_POLL_S)
+                continue
+            self.run_task(task)
+
+    def run_task(self, task):
+        """Run one claimed task and finish it (unless the lease was lost meanwhile)."""
+        task_id = task["id"]
+        payload = task["payload"]
+        work = self.work_dir / f"{task_id}-{self.worker_id}"
+        shutil.rmtree(work, ignore_errors=True)
+        work.mkdir(parents=True)
+        started = time.time()
+        print(f"[INFO] {self.worker_id}: task {task_id} (attempt {task['attempts']})", file=sys.stderr)
+        try:
+            result = self.generate(task_id, payload, work)
+        except Exception as e:
+            result = {"status": "error", "error": str(e)}
+        finally:
+            shutil.rmtree(work, ignore_errors=True)
+        if result is None:
+            print(f"[WARN] {self.worker_id}: lost the lease of task {task_id}; result dropped", file=sys.stderr)
+            return
+        result.update(worker=self.worker_id, seconds=round(time.time() - started, 3))
+        if not self.queue.finish(task_id, self.worker_id, result):
+            print(f"[WARN] {self.worker_id}: task {task_id} was released before it finished", file=sys.stderr)
+
+    def generate(self, task_id, payload, work):
+        """Result dict of one generate_model.py run, or None when the lease was lost."""
+        import yaml
+        config = payload["config"]
+        product = payload.get("product", "filterslang")
+        config_name = config.get("name", "unnamed")
+        config_file = work / f"{config_name}_config.yaml"
+        with open(config_file, "w", encoding="utf-8") as f:
+            yaml.dump(config, f)
+
+        cmd = [sys.executable, "scripts/generate_model.py",
+               "--config", str(config_file),
+               "--product", product,
+               "--presets", str(get_registry().get(product)["presets"]),
+               "--output-dir", str(work),
+               "--scad-dir", str(work),
+               "--timings"]
+        if payload.get("debug"):
+            cmd.append("--debug")
+        self.queue.heartbeat(task_id, self.worker_id, [f"[INFO] Executing on {self.worker_id}: {' '.join(cmd)}"])
+
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, cwd=str(ROOT))
+        stderr, stdout, pending = [], [], []
+        lock = threading.Lock()
+
+        def read_stderr():
+            for line in proc.stderr:
+                line = line.rstrip("\n")
+                with lock:
+                    stderr.append(line)
+                    pending.append(line)
+
+        readers = [threading.Thread(target=read_stderr, daemon=True),
+                   threading.Thread(target=lambda: stdout.extend(proc.stdout), daemon=True)]
+        for t in readers:
+            t.start()
+
+        deadline = time.monotonic() + payload.get("timeout", self.timeout)
+        while True:
+            try:
+                proc.wait(timeout=HEARTBEAT_S)
+                break
+            except subprocess.TimeoutExpired:
+                pass
+            with lock:
+                lines, pending[:] = pending[:], []
+            if not self.queue.heartbeat(task_id, self.worker_id, lines):
+                proc.kill()
+                proc.wait()
+                return None
+            if time.monotonic() > deadline:
+                proc.kill()
+                proc.wait()
+                return {"status": "timeout", "cmd": " ".join(cmd)}
+        for t in readers:
+            t.join()
+        if not self.queue.heartbeat(task_id, self.worker_id, pending):
+            return None
+
+        if proc.returncode != 0:
+            return {"status": "failed", "returncode": proc.returncode,
+                    "stderr": "\n".join(stderr)[-TAIL_CHARS:], "stdout": "".join(stdout)[-TAIL_CHARS:]}
+        return {"status": "completed", "config_name": config_name,
+                "outputs": self.publish(payload["job_id"], work, config_name)}
+
+    def publish(self, job_id, work, config_name):
+        """Move the outputs into the shared artifact store: job outputs in the API's format."""
+        outputs = {}
+        for suffix, kind in ADOPT_KINDS.items():
+            path = work / f"{config_name}{suffix}"
+            if not path.is_file():
+                continue
+            stored = self.store.ingest(job_id, kind, path, self.ttl_s)
+            outputs[kind] = {"filename": path.name, "size": stored["size"], "path": stored["path"],
+                             "sha256": stored["sha256"], "deduplicated": stored["deduplicated"]}
+        return outputs
+
+
+def main():
+    p = argparse.ArgumentParser(description="Render worker for the shared generation queue")
+    p.add_argument("--queue", default="", help="Queue URL (default: RENDER_QUEUE or out/queue/render_queue.sqlite)")
+    p.add_argument("--store", default=str(STORE_DIR),
+                   help="Shared artifact store directory (default: ARTIFACT_STORE or out/blobs)")
+    p.add_argument("--concurrency", type=int, default=1, help="Tasks run in parallel by this worker")
+    p.add_argument("--worker-id", default=f"{socket.gethostname()}-{os.getpid()}", help="Name in the queue")
+    p.add_argument("--lane", choices=("any", "interactive"), default="any",
+                   help="interactive: claim only interactive-lane tasks (keeps quick jobs off a busy batch)")
+    p.add_argument("--timeout", type=float, default=GENERATE_TIMEOUT,
+                   help="Seconds per generator run when the task names none")
+    p.add_argument("--ttl-hours", type=float, default=float(os.environ.get("JOB_TTL_HOURS", 168)),
+                   help="Expiry of published outputs (0 = keep)")
+    p.add_argument("--once", action="store_true", help="Exit when the queue is empty")
+    args = p.parse_args()
+
+    queue = open_queue(args.queue or None, lease_s=LEASE_S)
+    # The work directory is private and removed per task: no named hardlinks next to the blobs
+    store = ArtifactStore(args.store, link=False)
+    queue.register_worker(args.worker_id, {"host": socket.gethostname(), "pid": os.getpid(),
+                                           "concurrency": args.concurrency, "lane": args.lane})
+    print(f"[INFO] worker {args.worker_id}: {args.concurrency} slot(s), store {args.store}", file=sys.stderr)
+    worker = Worker(queue, store, args.worker_id, args.timeout, args.ttl_hours * 3600 or None, lane=args.lane)
+    worker.run(args.concurrency, args.once)
+
+
+if __name__ == "__main__":
+    main()
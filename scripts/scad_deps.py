@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+# scripts/scad_deps.py
+# SCAD dependency graph: the use <…> / include <…> statements (and import("…") data files) of .scad
+# files, resolved like OpenSCAD does (the including file's directory, then OPENSCADPATH). Per set of
+# root files the transitive closure and one content hash over it; the render cache keys a product on the
+# hash of its directory's SCAD (scripts/render_cache.py), so a library edit invalidates exactly the
+# products that reach it. Files are parsed and hashed again only when their mtime/size change.
+#
+#   python scripts/scad_deps.py --product filterslang            # closure + hash of a product
+#   python scripts/scad_deps.py --affected lib/core/geom.scad    # products and smoke tests reaching a file
+#   python scripts/scad_deps.py --check                          # unresolved use/include statements
+#   python scripts/scad_deps.py --watch                          # re-run affected smoke tests on change
+
+import os, re, sys, json, time, hashlib, argparse, threading
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+# Directories whose .scad files make up the graph (--affected, --check, --watch)
+SCAN_DIRS = ("lib", "products", "tests")
+
+# Patterns (compiled on first use by re's cache, not at import)
+COMMENT_RE = rb"(?s)//[^\n]*|/\*.*?\*/"
+USE_RE = rb"\b(use|include)\s*<([^>\r\n]+)>"
+IMPORT_RE = rb"\b(?:import|surface)\s*\(\s*(?:file\s*=\s*)?\"([^\"]+)\""
+
+
+class Node:
+    """One parsed file: content hash and resolved dependencies at a (mtime_ns, size) stamp."""
+
+    __slots__ = ("stamp", "sha256", "deps", "missing")
+
+    def __init__(self, stamp, sha256, deps, missing):
+        self.stamp = stamp
+        self.sha256 = sha256
+        self.deps = deps
+        self.missing = missing
+
+
+class ScadGraph:
+    def __init__(self, root=ROOT, library_path=None):
+        self.root = Path(root).resolve()
+        if library_path is None:
+            library_path = [p for p in os.environ.get("OPENSCADPATH", "").split(os.pathsep) if p]
+        self.library_path = [Path(p) for p in library_path]
+        self._nodes = {}
+        self._lock = threading.Lock()
+
+    def _resolve(self, name, base):
+        """Path of a use/include target, or None (OpenSCAD: including file's directory, then OPENSCADPATH)."""
+        for directory in (base, *self.library_path):
+            candidate = directory / name
+            if candidate.is_file():
+                return candidate.resolve()
+        return None
+
+    def node(self, path):
+        """Parsed node of ``path`` (None when it does not exist); re-parsed when the file changed."""
+        try:
+            st = path.stat()
+        except OSError:
+            return None
+        stamp = (st.st_mtime_ns, st.st_size)
+        node = self._nodes.get(path)
+        if node is not None and node.stamp == stamp:
+            return node
+        data = path.read_bytes()
+        deps, missing = [], []
+        if path.suffix == ".scad":
+            code = re.sub(COMMENT_RE, b"", data)
+            refs = [m.group(2) for m in re.finditer(USE_RE, code)]
+            # Data files (import/surface) resolve against the file's directory only
+            imports = [m.group(1) for m in re.finditer(IMPORT_RE, code)]
+            for raw, search in [(r, True) for r in refs] + [(r, False) for r in imports]:
+                name = raw.decode("utf-8", "replace").strip()
+                target = self._resolve(name, path.parent) if search else (path.parent / name)
+                if target is not None and target.is_file():
+                    deps.append(target.resolve())
+                else:
+                    missing.append(name)
+        node = Node(stamp, hashlib.sha256(data).hexdigest(), tuple(deps), tuple(missing))
+        self._nodes[path] = node
+        return node
+
+    def closure(self, roots):
+        """All files ``roots`` reach through use/include/import (roots included), sorted."""
+        with self._lock:
+            seen = set()
+            stack = [Path(r).resolve() for r in roots]
+            while stack:
+                path = stack.pop()
+                if path in seen:
+                    continue
+                node = self.node(path)
+                if node is None:
+                    continue
+                seen.add(path)
+                stack.extend(d for d in node.deps if d not in seen)
+            return sorted(seen)
+
+    def closure_hash(self, roots):
+        """SHA-256 over (root-relative path, content hash) of the closure of ``roots``."""
+        h = hashlib.sha256()
+        for path in self.closure(roots):
+            node = self._nodes[path]
+            h.update(self.relative(path).encode())
+            h.update(b"\0")
+            h.update(node.sha256.encode())
+        return h.hexdigest()
+
+    def missing(self, roots):
+        """``[(file, unresolved name)]`` within the closure of ``roots``."""
+        return [(self.relative(p), name) for p in self.closure(roots) for name in self._nodes[p].missing]
+
+    def relative(self, path):
+        try:
+            return path.relative_to(self.root).as_posix()
+        except ValueError:
+            return path.as_posix()        # library outside the repo (OPENSCADPATH)
+
+    def scan(self, dirs=SCAN_DIRS):
+        """All .scad files under ``dirs`` (root-relative)."""
+        files = []
+        for d in dirs:
+            files.extend((self.root / d).rglob("*.scad"))
+        return sorted(p.resolve() for p in files)
+
+
+def expand(paths, root=ROOT):
+    """Root files for a list of sources: files as given, directories as the .scad files below them."""
+    files = []
+    for p in paths:
+        p = Path(root) / p
+        if p.is_dir():
+            files.extend(sorted(p.rglob("*.scad")))
+        elif p.exists():
+            files.append(p)
+    return files
+
+
+_GRAPHS = {}
+_GRAPHS_LOCK = threading.Lock()
+
+
+def get_graph(root=ROOT):
+    """Process-wide graph for ``root`` (nodes stay cached across calls, re-parsed on change)."""
+    key = str(root)
+    with _GRAPHS_LOCK:
+        if key not in _GRAPHS:
+            _GRAPHS[key] = ScadGraph(root)
+        return _GRAPHS[key]
+
+
+def product_roots(registry):
+    """Product name → render-cache source files (its directory's SCAD + manifest extras)."""
+    return {name: expand(registry.get(name)["sources"]) for name in registry.names()}
+
+
+def affected(graph, changed, registry=None):
+    """Products and smoke tests a change to ``changed`` files invalidates."""
+    from smoke_tests import discover, test_inputs
+    changed = {Path(c).resolve() for c in changed}
+    products = []
+    if registry is not None:
+        products = [name for name, roots in product_roots(registry).items()
+                    if changed & set(graph.closure(roots))]
+    tests = [name for name, test in discover(graph.root).items() if changed & set(test_inputs(graph, test))]
+    return products, tests
+
+
+def watch(graph, interval=1.0, run=True, registry=None):
+    """Poll the graph's files (and smoke test inputs); on a change re-run only the smoke tests it affects."""
+    from smoke_tests import discover, test_inputs, run_cases, report
+
+    def watched():
+        files = set(graph.scan())
+        for test in discover(graph.root).values():
+            files.update(test_inputs(graph, test))
+        stamps = {}
+        for f in files:
+            try:
+                st = f.stat()
+                stamps[f] = (st.st_mtime_ns, st.st_size)
+            except OSError:
+                pass
+        return stamps
+
+    before = watched()
+    print(f"[INFO] watching {len(before)} file(s) (Ctrl+C to stop)", file=sys.stderr)
+    try:
+        while True:
+            time.sleep(interval)
+            now = watched()
+            changed = {f for f in before.keys() | now.keys() if before.get(f) != now.get(f)}
+            before = now
+            if not changed:
+                continue
+            products, tests = affected(graph, changed, registry)
+            print(f"[INFO] changed: {', '.join(graph.relative(f) for f in sorted(changed))}", file=sys.stderr)
+            print(f"[INFO] render cache invalidated for: {', '.join(products) or '-'}; "
+                  f"smoke tests: {', '.join(tests) or '-'}", file=sys.stderr)
+            if run and tests:
+                cases = discover(graph.root)
+                report(run_cases({name: cases[name] for name in tests}, force=True, root=graph.root))
+    except KeyboardInterrupt:
+        pass
+
+
+def main():
+    p = argparse.ArgumentParser(description="SCAD use/include dependency graph, closure hashes and watch mode")
+    p.add_argument("--product", action="append", default=[], help="Closure and hash of a product (repeatable)")
+    p.add_argument("--affected", nargs="+", metavar="FILE", help="Products and smoke tests a change to FILE affects")
+    p.add_argument("--check", action="store_true", help="List unresolved use/include statements (exit 1 if any)")
+    p.add_argument("--graph", action="store_true", help="Print every file with its dependencies")
+    p.add_argument("--watch", action="store_true", help="Re-run affected smoke tests when SCAD or golden files change")
+    p.add_argument("--interval", type=float, default=1.0, help="Watch poll interval (s)")
+    p.add_argument("--no-run", action="store_true", help="Watch: only report what is affected")
+    p.add_argument("--json", action="store_true", help="JSON output")
+    args = p.parse_args()
+
+    from product_registry import get_registry
+    graph = get_graph()
+    registry = get_registry()
+
+    if args.watch:
+        watch(graph, args.interval, not args.no_run, registry)
+        return
+    result = {}
+    for name in args.product:
+        roots = product_roots(registry)[name]
+        result[name] = {"hash": graph.closure_hash(roots),
+                        "files": [graph.relative(f) for f in graph.closure(roots)]}
+    if args.affected:
+        products, tests = affected(graph, [ROOT / f for f in args.affected], registry)
+        result["affected"] = {"products": products, "smoke_tests": tests}
+    if args.graph:
+        result["graph"] = {graph.relative(f): [graph.relative(d) for d in graph.node(f).deps] for f in graph.scan()}
+    missing = graph.missing(graph.scan()) if args.check else []
+    if args.check:
+        result["missing"] = [{"file": f, "name": n} for f, n in missing]
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        for name in args.product:
+            print(f"{name}: {result[name]['hash'][:16]}  ({len(result[name]['files'])} files)")
+            for f in result[name]["files"]:
+                print(f"  {f}")
+        if args.affected:
+            print(f"products:    {', '.join(result['affected']['products']) or '-'}")
+            print(f"smoke tests: {', '.join(result['affected']['smoke_tests']) or '-'}")
+        if args.graph:
+            for f, deps in result["graph"].items():
+                print(f"{f}" + "".join(f"\n  → {d}" for d in deps))
+        if args.check:
+            for f, n in missing:
+                print(f"✗ {f}: unresolved '{n}'")
+            print(f"{'✓' if not missing else '✗'} {len(missing)} unresolved reference(s)")
+    if missing:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# scripts/scad_templates.py
+# SCAD template registry: one product-generic template, specialised per product from its
+# products/<name>/manifest.toml (entry, [scad].args, [bom].tag) and compiled once. Compiled
+# templates are kept per process (keyed on the manifest stamp) and in Jinja's bytecode cache
+# under out/cache/jinja, so a generate_model.py subprocess does not recompile either.
+#
+#   python scripts/scad_templates.py --product filterslang --show-template
+#   python scripts/scad_templates.py --product filterslang --config configs/example_pe500_medium.yaml \
+#       --presets products/filterslang/presets.yaml --variant dxf
+
+import sys, json, string, argparse, threading
+from pathlib import Path
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    import tomli as tomllib
+
+ROOT = Path(__file__).resolve().parent.parent
+PRODUCTS_DIR = ROOT / "products"
+BYTECODE_DIR = ROOT / "out" / "cache" / "jinja"
+
+# Output variant → (header comment, wrapper before the module call, bom_tag suffix)
+SCAD_VARIANTS = {
+    "echo": ("Generated by config: {name}", "", ""),
+    "stl": ("3D model for STL export - {name}", "", "_3d"),
+    "dxf": ("2D projection for DXF export - {name}", "projection(cut=false)\n", "_dxf"),
+}
+
+# The product-generic template: $-fields come from the manifest (product_source), {{ }} per render
+GENERIC_TEMPLATE = string.Template("""// {{ header }}
+// DO NOT EDIT - Generated from {{ config_file }}
+use <products/$product/$entry>;
+
+{{ wrapper }}$module(
+$args
+  $tag="{{ $tag }}{{ tag_suffix }}",
+  $$fn={{ fn | default(96) }}
+);
+""")
+
+_MANIFESTS = {}   # manifest path → (stamp, manifest)
+_SOURCES = {}     # template name (manifest path) → product template source
+_ENV = None
+_LOCK = threading.Lock()
+
+
+class TemplateError(ValueError):
+    """Product or manifest cannot be turned into a SCAD template."""
+
+
+def scad_value(value):
+    """Python value → OpenSCAD literal (Jinja filter ``scad``)."""
+    if value is None:
+        return "undef"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, str):
+        return json.dumps(value, ensure_ascii=False)
+    if isinstance(value, (list, tuple)):
+        return "[" + ", ".join(scad_value(v) for v in value) + "]"
+    return str(value)
+
+
+def _jinja_literal(value):
+    """Default value as a Jinja expression literal."""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return json.dumps(value, ensure_ascii=False)
+
+
+def manifest_path(product, products_dir=PRODUCTS_DIR):
+    return Path(products_dir) / product / "manifest.toml"
+
+
+def _stamp(path):
+    st = path.stat()
+    return (st.st_mtime_ns, st.st_size)
+
+
+def load_manifest(product, products_dir=PRODUCTS_DIR):
+    """Parsed manifest.toml of a product, re-read only when the file changes."""
+    path = manifest_path(product, products_dir)
+    if not path.exists():
+        raise TemplateError(f"No manifest for product '{product}' ({path})")
+    stamp = _stamp(path)
+    cached = _MANIFESTS.get(path)
+    if cached and cached[0] == stamp:
+        return cached[1]
+    with open(path, "rb") as f:
+        manifest = tomllib.load(f)
+    _MANIFESTS[path] = (stamp, manifest)
+    return manifest
+
+
+def product_source(product, manifest):
+    """Product template source: the generic template with entry, module and argument list filled in."""
+    if "entry" not in manifest:
+        raise TemplateError(f"manifest of '{product}' has no 'entry'")
+    scad = manifest.get("scad", {})
+    tag = manifest.get("bom", {}).get("tag", "bom_tag")
+    lines = []
+    for arg in scad.get("args", []):
+        if isinstance(arg, str):
+            lines.append(f"  {arg}={{{{ {arg} | scad }}}},")
+        elif "default" in arg:
+            lines.append(f"  {arg['name']}={{{{ {arg['name']} | default({_jinja_literal(arg['default'])}) | scad }}}},")
+        else:
+            lines.append(f"  {arg['name']}={{{{ {arg['name']} | scad }}}},")
+    return GENERIC_TEMPLATE.substitute(product=product, entry=manifest["entry"], args="\n".join(lines), tag=tag,
+                                       module=scad.get("module", Path(manifest["entry"]).stem))
+
+
+def _load_source(name):
+    source = _SOURCES.get(name)
+    if source is None:
+        return None
+    return source, None, lambda: _SOURCES.get(name) is source
+
+
+def _environment():
+    """Shared Jinja environment (``scad`` filter, bytecode cache); jinja2 is imported on first use."""
+    global _ENV
+    if _ENV is None:
+        from jinja2 import Environment, FileSystemBytecodeCache, FunctionLoader
+        try:
+            BYTECODE_DIR.mkdir(parents=True, exist_ok=True)
+            cache = FileSystemBytecodeCache(str(BYTECODE_DIR))
+        except OSError:
+            cache = None
+        _ENV = Environment(loader=FunctionLoader(_load_source), bytecode_cache=cache)
+        _ENV.filters["scad"] = scad_value
+    return _ENV
+
+
+def get_template(product, products_dir=PRODUCTS_DIR):
+    """Compiled SCAD template of a product; recompiled only when its manifest changes."""
+    name = str(manifest_path(product, products_dir))
+    with _LOCK:
+        stamp_before = _MANIFESTS.get(Path(name), (None,))[0]
+        manifest = load_manifest(product, products_dir)
+        if name not in _SOURCES or _MANIFESTS[Path(name)][0] != stamp_before:
+            _SOURCES[name] = product_source(product, manifest)
+        return _environment().get_template(name)
+
+
+def render_scad(product, variant, params, config_name, config_file, products_dir=PRODUCTS_DIR):
+    """SCAD source for one output variant (echo/stl/dxf) of a product."""
+    header, wrapper, tag_suffix = SCAD_VARIANTS[variant]
+    return get_template(product, products_dir).render(
+        config_name=config_name,
+        config_file=config_file,
+        header=header.format(name=config_name),
+        wrapper=wrapper,
+        tag_suffix=tag_suffix,
+        **params
+    )
+
+
+def main():
+    p = argparse.ArgumentParser(description="Show or render the manifest-driven SCAD template of a product")
+    p.add_argument("--product", required=True, help="Product directory name under products/")
+    p.add_argument("--show-template", action="store_true", help="Print the product template source")
+    p.add_argument("--config", help="Config YAML to render")
+    p.add_argument("--presets", help="Presets YAML (default: products/<product>/presets.yaml)")
+    p.add_argument("--variant", default="echo", choices=sorted(SCAD_VARIANTS))
+    args = p.parse_args()
+
+    try:
+        if args.show_template or not args.config:
+            print(product_source(args.product, load_manifest(args.product)))
+            return
+        import yaml
+        from product_registry import get_registry
+        registry = get_registry()
+        with open(args.config, "r", encoding="utf-8") as f:
+            config = yaml.safe_load(f)
+        with open(args.presets or registry.get(args.product)["presets"], "r", encoding="utf-8") as f:
+            presets_data = yaml.safe_load(f)
+        params, errors = registry.resolver(args.product)(config, presets_data)
+        if errors:
+            sys.exit("Config validation failed:\n  " + "\n  ".join(errors))
+        print(render_scad(args.product, args.variant, params, config.get("name", "unnamed"), args.config))
+    except ValueError as e:  # TemplateError, unknown product, config errors
+        sys.exit(f"ERROR: {e}")
+
+
+if __name__ == "__main__":
+    main()
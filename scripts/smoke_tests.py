@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+# scripts/smoke_tests.py
+# Smoke/golden regression runner for tests/ (CI and scripts/ci_smoke.sh). Cases are found by convention:
+#
+#   tests/smoke_<product>_*.scad   BOM case, named after its bom_tag without "SMOKE_" (bom_tag="SMOKE_EDGE" → edge):
+#                                  echo render, plus <stem>_dxf.scad when present; the BOM is parsed and diffed
+#                                  in-process against tests/golden/bom_<case>.jsonl, then the production BOM is built
+#   PARITY_CASES                   OpenSCAD echo vs the Python evaluator and its corpus (evaluation_parity.py)
+#
+# All renders of all cases go to one pool of OpenSCAD processes, longest first (durations of the previous
+# run); a case is checked as soon as its renders are done. A case whose inputs hash — the include closure
+# of its SCAD (scad_deps.py), golden, parts catalog, checker scripts, OpenSCAD version — is unchanged since
+# it last passed is skipped (out/cache/smoke_state.json). Results as JUnit XML with per-step timings.
+#
+#   python scripts/smoke_tests.py                                 # changed cases, one render per CPU
+#   python scripts/smoke_tests.py --all --jobs 8 --junit out/smoke_junit.xml
+#   python scripts/smoke_tests.py --list
+#   python scripts/smoke_tests.py default edge                    # named cases (always run)
+
+import os, re, sys, json, time, hashlib, argparse, subprocess
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+OPENSCAD = os.environ.get("OPENSCAD", "openscad")
+STATE_FILE = ROOT / "out" / "cache" / "smoke_state.json"
+EPSILON = 0.0005
+TAIL_CHARS = 4000     # OpenSCAD / producer output kept in a failure
+
+BOM_TAG_RE = r'\bbom_tag\s*=\s*"([^"]+)"'
+# Checker code a case's result depends on besides its SCAD and data (part of the case hash)
+BOM_CODE = ("scripts/smoke_tests.py", "scripts/render_bom.py", "scripts/bom_diff.py",
+            "scripts/bom_producer.py", "scripts/product_registry.py")
+PARITY_CODE = ("scripts/smoke_tests.py", "scripts/evaluation_parity.py", "scripts/flexibele_evaluation.py",
+               "scripts/connector_data.py")
+
+# SCAD files checked by evaluation_parity.py instead of a BOM golden
+PARITY_CASES = {
+    "flexibele_evaluation": {"product": "flexibele_verbindingen", "scad": "tests/smoke_flexibele_evaluation.scad",
+                             "corpus": "tests/golden/evaluation_cases.jsonl"},
+}
+
+
+def discover(root=ROOT):
+    """Case name → case: kind, product, scad (render roots), renders [(kind, scad, output)], inputs
+    (other files read), code (checker scripts) and the outputs it writes."""
+    from product_registry import get_registry
+    registry = get_registry()
+    cases = {}
+    for scad in sorted((root / "tests").glob("smoke_*.scad")):
+        if scad.stem.endswith("_dxf"):
+            continue
+        product = next((p for p in registry.names() if scad.stem.startswith(f"smoke_{p}_")), None)
+        if product is None:
+            continue
+        m = re.search(BOM_TAG_RE, scad.read_text(encoding="utf-8", errors="replace"))
+        name = (m.group(1) if m else scad.stem[len(f"smoke_{product}_"):]).lower()
+        name = name[len("smoke_"):] if name.startswith("smoke_") else name
+        golden = f"tests/golden/bom_{name}.jsonl"
+        if not (root / golden).exists():
+            continue
+        entry = registry.get(product)
+        renders = [("echo", f"tests/{scad.name}", f"out/smoke_{name}.echo")]
+        if (root / "tests" / f"{scad.stem}_dxf.scad").exists():
+            renders.append(("dxf", f"tests/{scad.stem}_dxf.scad", f"out/smoke_{name}.dxf"))
+        code = list(BOM_CODE) + [f"products/{product}/manifest.toml"]
+        if entry["production"]:
+            code.append(f"scripts/{entry['production']}.py")
+        bom = {"jsonl": f"out/bom_{name}.jsonl", "csv": f"out/bom_{name}_production.csv",
+               "xlsx": f"out/bom_{name}_production.xlsx"}
+        cases[name] = {
+            "kind": "bom", "product": product,
+            "scad": [r[1] for r in renders], "renders": renders,
+            "golden": golden, "parts": entry["parts"], "bom": bom,
+            "inputs": [golden, entry["parts"]], "code": code,
+            "outputs": [r[2] for r in renders] + list(bom.values()),
+        }
+    for name, spec in PARITY_CASES.items():
+        if not (root / spec["scad"]).exists():
+            continue
+        echo = f"out/{name}.echo"
+        cases[name] = {
+            "kind": "parity", "product": spec["product"],
+            "scad": [spec["scad"]], "renders": [("echo", spec["scad"], echo)],
+            "corpus": spec["corpus"], "inputs": [spec["corpus"]], "code": list(PARITY_CODE),
+            "outputs": [echo],
+        }
+    return cases
+
+
+def test_inputs(graph, test, root=ROOT):
+    """Every file a case depends on: the closure of its SCAD files, its data and its checker code."""
+    return (graph.closure([root / f for f in test["scad"]])
+            + [(root / f).resolve() for f in test["inputs"] + test["code"]])
+
+
+_OPENSCAD_VERSION = []
+
+
+def openscad_version():
+    """``openscad --version`` (printed on stderr), "" when it cannot tell; part of every case hash."""
+    if not _OPENSCAD_VERSION:
+        try:
+            proc = subprocess.run([OPENSCAD, "--version"], capture_output=True, text=True, timeout=60)
+            _OPENSCAD_VERSION.append((proc.stderr + proc.stdout).strip() if proc.returncode == 0 else "")
+        except (OSError, subprocess.TimeoutExpired):
+            _OPENSCAD_VERSION.append("")
+    return _OPENSCAD_VERSION[0]
+
+
+def case_hash(graph, case, epsilon, root=ROOT):
+    """Hash over everything a case's verdict depends on."""
+    h = hashlib.sha256()
+    h.update(graph.closure_hash([root / f for f in case["scad"]]).encode())
+    for f in sorted(set(case["inputs"] + case["code"])):
+        node = graph.node((root / f).resolve())
+        h.update(f"\0{f}\0{node.sha256 if node else '-'}".encode())
+    h.update(f"\0{epsilon}\0{OPENSCAD}\0{openscad_version()}".encode())
+    return h.hexdigest()
+
+
+def load_state(path=STATE_FILE):
+    try:
+        return json.loads(Path(path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(state, path=STATE_FILE):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(state, indent=1, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def render(scad, output, root=ROOT):
+    """One OpenSCAD render; returns (ok, seconds, output text)."""
+    started = time.perf_counter()
+    (root / output).unlink(missing_ok=True)
+    try:
+        proc = subprocess.run([OPENSCAD, "-o", output, scad], cwd=str(root), capture_output=True, text=True)
+    except OSError as e:
+        return False, time.perf_counter() - started, f"{OPENSCAD}: {e}"
+    seconds = time.perf_counter() - started
+    text = (proc.stderr + proc.stdout).strip()
+    if proc.returncode != 0:
+        return False, seconds, f"{text[-TAIL_CHARS:]}\nexit code {proc.returncode}"
+    if not (root / output).exists():
+        return False, seconds, f"{text[-TAIL_CHARS:]}\n{output} not generated"
+    return True, seconds, ""
+
+
+def check_bom(case, epsilon, root=ROOT):
+    """BOM from the echo vs the golden (in-process), then the production BOM; returns (ok, log)."""
+    from render_bom import parse_bom
+    from bom_diff import load_jsonl_from_handle, diff_records
+    from product_registry import get_registry
+    product = case["product"]
+    echo, bom = case["renders"][0][2], case["bom"]
+    items = parse_bom((root / echo).read_text(encoding="utf-8", errors="ignore"), product,
+                      get_registry().get(product)["version"])
+    if not items:
+        return False, f"No BOM_ITEM records found in {echo}"
+    (root / bom["jsonl"]).write_text("".join(json.dumps(d, ensure_ascii=False) + "\n" for d in items), encoding="utf-8")
+    with open(root / case["golden"], encoding="utf-8-sig") as f:
+        golden = load_jsonl_from_handle(f)
+    mismatches = diff_records(golden, items, epsilon)
+    if mismatches:
+        return False, f"BOM differs from {case['golden']}:\n" + "\n".join(mismatches)
+    proc = subprocess.run([sys.executable, "scripts/bom_producer.py", "--product", product,
+                           "--jsonl", bom["jsonl"], "--parts", case["parts"],
+                           "--csv", bom["csv"], "--xlsx", bom["xlsx"]],
+                          cwd=str(root), capture_output=True, text=True)
+    if proc.returncode != 0:
+        return False, f"bom_producer.py exit code {proc.returncode}\n{(proc.stderr + proc.stdout)[-TAIL_CHARS:]}"
+    return True, f"{len(items)} BOM record(s) match {case['golden']}"
+
+
+def check_parity(case, epsilon, root=ROOT):
+    """OpenSCAD evaluation echo vs the Python evaluator and the corpus; returns (ok, log)."""
+    from evaluation_parity import load_corpus, read_echo, parity_mismatches
+    cases = load_corpus(root / case["corpus"])
+    scad = read_echo(root / case["renders"][0][2])
+    missing = [c["case"] for c in cases if c["case"] not in scad]
+    if missing:
+        return False, f"{len(missing)} case(s) missing from the echo: {missing[:10]}"
+    mismatches = parity_mismatches(cases, scad)
+    if mismatches:
+        return False, "\n".join(mismatches)
+    return True, f"{len(cases)} case(s) match (corpus + OpenSCAD echo)"
+
+
+CHECKS = {"bom": check_bom, "parity": check_parity}
+
+
+def run_cases(cases, jobs=None, epsilon=EPSILON, force=False, state_path=STATE_FILE, root=ROOT):
+    """Run ``cases`` (name → case); returns name → result (status passed/failed/skipped, seconds, steps, log).
+
+    Every render is a task on one pool of ``jobs`` workers; a case's check is queued on the same pool when
+    its last render finishes. Unchanged cases (same hash as their last pass) are skipped unless ``force``.
+    """
+    from scad_deps import get_graph
+    graph = get_graph(root)
+    state = load_state(state_path)
+    (root / "out").mkdir(exist_ok=True)
+    hashes = {name: case_hash(graph, case, epsilon, root) for name, case in cases.items()}
+    results = {}
+    todo = []
+    for name in cases:
+        previous = state.get(name, {})
+        if not force and previous.get("hash") == hashes[name]:
+            results[name] = {"status": "skipped", "seconds": 0.0, "steps": [],
+                             "log": f"unchanged since the last pass (hash {hashes[name][:12]})"}
+        else:
+            todo.append(name)
+            results[name] = {"status": "running", "seconds": 0.0, "steps": [], "log": ""}
+    # Longest first: with hundreds of cases the makespan is set by the slow ones
+    todo.sort(key=lambda n: -state.get(n, {}).get("seconds", float("inf")))
+
+    jobs = jobs or os.cpu_count() or 1
+    with ThreadPoolExecutor(max_workers=jobs, thread_name_prefix="smoke") as pool:
+        pending = {}
+        remaining = {}
+        for name in todo:
+            remaining[name] = len(cases[name]["renders"])
+            for kind, scad, output in cases[name]["renders"]:
+                pending[pool.submit(render, scad, output, root)] = (name, f"render {kind}")
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                name, step = pending.pop(future)
+                result = results[name]
+                ok, seconds, log = future.result()
+                result["steps"].append((step, seconds))
+                if step == "check":
+                    result["status"] = "passed" if ok else "failed"
+                    result["log"] = log
+                    continue
+                if not ok:
+                    result["status"] = "failed"
+                    result["log"] = f"{step}: {log}"
+                remaining[name] -= 1
+                if remaining[name] == 0 and result["status"] == "running":
+                    pending[pool.submit(_timed_check, cases[name], epsilon, root)] = (name, "check")
+
+    for name in todo:
+        result = results[name]
+        result["seconds"] = sum(seconds for _, seconds in result["steps"])
+        if result["status"] == "passed":
+            state[name] = {"hash": hashes[name], "seconds": round(result["seconds"], 3)}
+        else:
+            state.pop(name, None)
+    save_state(state, state_path)
+    return results
+
+
+def _timed_check(case, epsilon, root):
+    started = time.perf_counter()
+    try:
+        ok, log = CHECKS[case["kind"]](case, epsilon, root)
+    except Exception as e:
+        ok, log = False, f"{type(e).__name__}: {e}"
+    return ok, time.perf_counter() - started, log
+
+
+def run_test(name, root=ROOT):
+    """Run one case regardless of its hash; returns (ok, seconds, log)."""
+    result = run_cases({name: discover(root)[name]}, force=True, root=root)[name]
+    return result["status"] == "passed", result["seconds"], result["log"]
+
+
+def write_junit(cases, results, path, elapsed):
+    """JUnit XML: one testcase per case (time = sum of its steps), step timings in system-out."""
+    import xml.etree.ElementTree as ET
+    counts = {s: sum(r["status"] == s for r in results.values()) for s in ("failed", "skipped")}
+    suites = ET.Element("testsuites", name="smoke", tests=str(len(results)), failures=str(counts["failed"]),
+                        time=f"{elapsed:.3f}")
+    suite = ET.SubElement(suites, "testsuite", name="smoke", tests=str(len(results)),
+                          failures=str(counts["failed"]), errors="0", skipped=str(counts["skipped"]),
+                          time=f"{elapsed:.3f}")
+    for name, result in results.items():
+        case = cases[name]
+        testcase = ET.SubElement(suite, "testcase", classname=f"smoke.{case['product']}", name=name,
+                                 file=case["scad"][0], time=f"{result['seconds']:.3f}")
+        if result["status"] == "failed":
+            failure = ET.SubElement(testcase, "failure", message=(result["log"].splitlines() or ["failed"])[0])
+            failure.text = result["log"]
+        elif result["status"] == "skipped":
+            ET.SubElement(testcase, "skipped", message=result["log"])
+        if result["steps"]:
+            ET.SubElement(testcase, "system-out").text = "\n".join(
+                f"{step}: {seconds:.3f} s" for step, seconds in result["steps"])
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    ET.ElementTree(suites).write(path, encoding="utf-8", xml_declaration=True)
+
+
+def report(results, verbose=False):
+    """Print one line per case (and the log of failures); returns the number of failures."""
+    failed = 0
+    for name, result in results.items():
+        mark = {"passed": "✓", "failed": "✗", "skipped": "-"}[result["status"]]
+        detail = f"{result['seconds']:.1f} s" if result["status"] != "skipped" else "unchanged, skipped"
+        print(f"{mark} {name} ({detail})")
+        if result["status"] == "failed":
+            failed += 1
+        if result["status"] == "failed" or (verbose and result["log"]):
+            print("    " + result["log"].replace("\n", "\n    "))
+    return failed
+
+
+def main():
+    p = argparse.ArgumentParser(description="Parallel smoke/golden regression runner for tests/")
+    p.add_argument("tests", nargs="*", help="Cases to run regardless of their hash (default: all changed cases)")
+    p.add_argument("--list", action="store_true", help="List the discovered cases and their inputs")
+    p.add_argument("--all", action="store_true", help="Run every case, also the unchanged ones")
+    p.add_argument("--jobs", "-j", type=int, default=0, help="Parallel renders (default: CPU count)")
+    p.add_argument("--epsilon", type=float, default=EPSILON, help="Float tolerance of the BOM diff")
+    p.add_argument("--junit", default="", help="Write JUnit XML to this file")
+    p.add_argument("--state", default=str(STATE_FILE), help="Hashes and durations of passed cases")
+    p.add_argument("--verbose", "-v", action="store_true", help="Also print the log of passing cases")
+    args = p.parse_args()
+
+    cases = discover()
+    if args.list:
+        for name, case in cases.items():
+            print(f"{name} [{case['kind']}]: {', '.join(case['scad'] + case['inputs'])}")
+        return
+    unknown = [t for t in args.tests if t not in cases]
+    if unknown:
+        p.error(f"unknown case(s) {', '.join(unknown)}; known: {', '.join(cases)}")
+    if args.tests:
+        cases = {name: cases[name] for name in args.tests}
+
+    started = time.perf_counter()
+    results = run_cases(cases, args.jobs or None, args.epsilon, args.all or bool(args.tests), args.state)
+    elapsed = time.perf_counter() - started
+    if args.junit:
+        write_junit(cases, results, args.junit, elapsed)
+    failed = report(results, args.verbose)
+    ran = sum(r["status"] != "skipped" for r in results.values())
+    print(f"{'✓' if not failed else '✗'} {ran - failed}/{ran} passed, {len(results) - ran} unchanged "
+          f"({elapsed:.1f} s wall, {sum(r['seconds'] for r in results.values()):.1f} s of renders and checks)")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
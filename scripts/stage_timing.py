@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# scripts/stage_timing.py
+# Structured per-stage timing spans for the generation pipeline
+
+import sys, json, time
+from contextlib import contextmanager
+
+# Spans travel between processes as single stderr lines: "[SPAN] {json}"
+SPAN_PREFIX = "[SPAN]"
+
+
+class StageTimer:
+    """Record wall-clock spans per pipeline stage.
+
+    Every finished span is kept in ``spans`` and, when ``emit`` is set, written
+    to stderr as a ``[SPAN]`` line so a parent process can collect it.
+    Extra keyword arguments become labels on every span (e.g. quality tier).
+    """
+
+    def __init__(self, emit=True, stream=None, **labels):
+        self.emit = emit
+        self.stream = stream
+        self.labels = labels
+        self.spans = []
+
+    @contextmanager
+    def stage(self, name, **labels):
+        started_at = time.time()
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - t0, started_at=started_at, **labels)
+
+    def record(self, name, seconds, started_at=None, **labels):
+        """Add a span measured elsewhere (e.g. forwarded from a child process)."""
+        span = {"stage": name, "seconds": round(seconds, 6)}
+        if started_at is not None:
+            span["started_at"] = round(started_at, 6)
+        span.update(self.labels)
+        span.update(labels)
+        self.spans.append(span)
+        if self.emit:
+            emit_span(span, self.stream)
+        return span
+
+    def forward(self, text, parent=None):
+        """Re-record [SPAN] lines found in a child process' stderr.
+
+        With ``parent`` (the stage that ran the child) each span is labelled
+        ``parent`` so ``total()`` does not count its time twice.
+        """
+        for line in text.splitlines():
+            span = parse_span_line(line)
+            if span:
+                labels = {k: v for k, v in span.items() if k not in ("stage", "seconds", "started_at")}
+                if parent is not None:
+                    labels.setdefault("parent", parent)
+                self.record(span["stage"], span["seconds"], started_at=span.get("started_at"), **labels)
+
+    def total(self):
+        """Sum of the top-level spans (nested spans carry a ``parent`` label)."""
+        return round(sum(s["seconds"] for s in self.spans if "parent" not in s), 6)
+
+
+def emit_span(span, stream=None):
+    out = stream or sys.stderr
+    out.write(f"{SPAN_PREFIX} {json.dumps(span, ensure_ascii=False)}\n")
+    out.flush()
+
+
+def parse_span_line(line):
+    """Return the span dict for a ``[SPAN]`` line, or None for any other line."""
+    line = line.strip()
+    if not line.startswith(SPAN_PREFIX):
+        return None
+    try:
+        span = json.loads(line[len(SPAN_PREFIX):])
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(span, dict) or "stage" not in span or "seconds" not in span:
+        return None
+    return span
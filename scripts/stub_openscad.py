@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# scripts/stub_openscad.py
+# Stand-in for `openscad -o OUT IN.scad` used by benchmarks: sleeps, then writes canned output.
+# scripts/benchmark.py writes an executable shim for it and points $OPENSCAD at that shim.
+#
+# Environment:
+#   STUB_OPENSCAD_DELAY   seconds to sleep per render (default 0.2)
+
+import sys, os, re, time, json
+from pathlib import Path
+
+argv = sys.argv[1:]
+if "-o" not in argv or len(argv) < 3:
+    sys.stderr.write("usage: stub_openscad.py -o OUTPUT INPUT.scad\n")
+    sys.exit(2)
+
+out = Path(argv[argv.index("-o") + 1])
+src_path = Path(argv[-1])
+src = src_path.read_text(encoding="utf-8", errors="ignore") if src_path.exists() else ""
+
+time.sleep(float(os.environ.get("STUB_OPENSCAD_DELAY", "0.2")))
+
+def _num(name, default):
+    m = re.search(rf"\b{name}\s*=\s*([-0-9.]+)", src)
+    return float(m.group(1)) if m else default
+
+def _str(name, default):
+    m = re.search(rf'\b{name}\s*=\s*"([^"]*)"', src)
+    return m.group(1) if m else default
+
+def _bool(name, default):
+    m = re.search(rf"\b{name}\s*=\s*(true|false)", src)
+    return (m.group(1) == "true") if m else default
+
+def _list(name, default):
+    m = re.search(rf"\b{name}\s*=\s*(\[[^;]*?\])\s*,\n", src)
+    try:
+        return json.loads(m.group(1)) if m else default
+    except json.JSONDecodeError:
+        return default
+
+def _int_or_float(v):
+    return int(v) if float(v).is_integer() else v
+
+if "flexibele_verbinding(" in src:
+    # Same BOM_ITEM layout as products/flexibele_verbindingen/flexibele_verbinding.scad
+    e1, e2 = _str("end_type_1", "jacob"), _str("end_type_2", "jacob")
+    D_in, D_out = _num("D_in", 50), _num("D_out", 60)
+    kv = [
+        "variant", "bfm" if "bfm" in (e1, e2) else "lampe",
+        "L", _int_or_float(_num("L", 500)), "D_in", _int_or_float(D_in), "D_out", _int_or_float(D_out),
+        "wall", _int_or_float((D_out - D_in) / 2), "gap", _int_or_float(_num("gap", 10)),
+        "material", _str("material", "PU"), "end_type_1", e1, "end_type_2", e2,
+        "coupling_type_1", _str("coupling_type_1", "male"), "coupling_type_2", _str("coupling_type_2", "female"),
+        "process_medium", _str("process_medium", "water"), "hygiene_class", _str("hygiene_class", "general"),
+        "pressure_max", _int_or_float(_num("pressure_max", 10)), "temp_surge", _int_or_float(_num("temp_surge", 60)),
+    ]
+else:
+    L = _num("L", 2000)
+    n = int(_num("rings_count", 0))
+    rings = _list("rings_positions", []) if not _bool("rings_auto", True) else [
+        round(L * i / (n + 1), 3) for i in range(1, n + 1)]
+
+    kv = [
+        "L", _int_or_float(L), "D", _int_or_float(_num("D", 160)), "t", _int_or_float(_num("t", 2)),
+        "medium", _str("medium", "PE_500"),
+        "top", _str("top", "snapring"), "open_top", _bool("open_top", False),
+        "bottom", _str("bottom", "enkel"), "bottom_opt", _str("bottom_opt", "zonder"),
+        "rings", rings, "ring_w", _int_or_float(_num("ring_w", 10)), "ring_t", _int_or_float(_num("ring_t", 2)),
+        "reinforce", _bool("reinforce_enable", False), "rein_side", _str("reinforce_side", "boven"),
+        "rein_spans", _list("reinforce_spans", []),
+        "productzijde", _str("productzijde", "buiten"),
+    ]
+bom_tag = _str("bom_tag", "stub")
+
+out.parent.mkdir(parents=True, exist_ok=True)
+suffix = out.suffix.lower()
+if suffix == ".echo":
+    out.write_text(f'ECHO: "BOM_ITEM:", "{bom_tag}", {json.dumps(kv)}\n', encoding="utf-8")
+elif suffix == ".stl":
+    # Unit tetrahedron
+    v = [(0, 0, 0), (1, 0, 0), (0, 1, 0), (0, 0, 1)]
+    faces = [(0, 2, 1), (0, 1, 3), (0, 3, 2), (1, 2, 3)]
+    lines = ["solid stub"]
+    for a, b, c in faces:
+        lines += ["  facet normal 0 0 0", "    outer loop"]
+        lines += [f"      vertex {x} {y} {z}" for x, y, z in (v[a], v[b], v[c])]
+        lines += ["    endloop", "  endfacet"]
+    lines.append("endsolid stub")
+    out.write_text("\n".join(lines) + "\n", encoding="utf-8")
+elif suffix == ".dxf":
+    out.write_text("0\nSECTION\n2\nENTITIES\n0\nENDSEC\n0\nEOF\n", encoding="utf-8")
+else:
+    out.write_text("", encoding="utf-8")
+
+sys.stderr.write(f"ECHO: \"BOM_ITEM:\", \"{bom_tag}\", {json.dumps(kv)}\n")
+sys.exit(0)
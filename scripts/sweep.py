@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+# scripts/sweep.py
+# Parametric sweep: lazy cartesian expansion of parameter ranges → validation, predicted BOM and
+# production metrics per point (JSONL). Used by /api/sweep and as a CLI:
+#
+#   python scripts/sweep.py --spec sweep.json --presets products/filterslang/presets.yaml \
+#       --parts data/parts.csv --output out/sweep.jsonl
+#
+# Spec (JSON/YAML):
+#   preset: PE_500
+#   base:   {t: 2.0, productzijde: buiten, rings_count: 6}      # fixed overrides
+#   axes:   {D: {min: 80, max: 500, step: 10}, L: [1000, 2000], top: "*", bottom: "*", bottom_opt: "*"}
+#   quality, name_prefix, limit (max points emitted), only_valid
+
+import sys, json, math, heapq, argparse, itertools
+from pathlib import Path
+
+from params_resolver import build_params, validate_params, ConfigError
+from product_registry import SCHEMA_TYPES, check_type
+from bom_production import production_record
+from bom_costing import unit_cost
+
+ALL = "*"
+MAX_POINTS = 5_000_000
+METRIC_FIELDS = ("surface_area_m2", "cut_length_estimate_m", "ring_count", "reinforcement_length_mm")
+RANK_FIELDS = METRIC_FIELDS + ("unit_cost",)
+
+
+class SweepError(ValueError):
+    """Sweep spec is malformed."""
+
+
+def _scad_num(x):
+    """Format like OpenSCAD echo (6 significant digits); integral values stay ints."""
+    v = float(f"{x:.6g}")
+    return int(v) if v.is_integer() else v
+
+
+def _num_range(name, spec):
+    lo, hi, step = spec.get("min"), spec.get("max"), spec.get("step")
+    if not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in (lo, hi, step)):
+        raise SweepError(f"Axis '{name}': min, max and step must be numbers")
+    if lo is None or hi is None or not step or step <= 0 or hi < lo:
+        raise SweepError(f"Axis '{name}': range needs min <= max and step > 0")
+    count = int(math.floor((hi - lo) / step + 1e-9)) + 1
+    return [_scad_num(lo + i * step) for i in range(count)]
+
+
+def expand_axis(name, spec, valid_enums):
+    """Values of one axis: list, scalar, {min, max, step} range or "*" (all valid enum values)."""
+    if spec == ALL:
+        values = valid_enums.get(name)
+        if not isinstance(values, list):
+            raise SweepError(f"Axis '{name}': '*' only works for enum parameters")
+        return list(values)
+    if isinstance(spec, dict):
+        return _num_range(name, spec)
+    if isinstance(spec, list):
+        if not spec:
+            raise SweepError(f"Axis '{name}' is empty")
+        return list(spec)
+    return [spec]
+
+
+def build_axes(axes_spec, valid_enums):
+    """Return ``[(names, values)]``; ``bottom_opt: "*"`` is expanded jointly with ``bottom``
+    so only the options valid for each bottom type are generated."""
+    if not isinstance(axes_spec or {}, dict):
+        raise SweepError("'axes' must be a mapping of parameter → values")
+    axes_spec = dict(axes_spec or {})
+    axes = []
+    if axes_spec.get("bottom_opt") == ALL and "bottom" in axes_spec:
+        bottoms = expand_axis("bottom", axes_spec.pop("bottom"), valid_enums)
+        axes_spec.pop("bottom_opt")
+        opts = valid_enums.get("bottom_opt", {})
+        axes.append((("bottom", "bottom_opt"), [(b, o) for b in bottoms for o in opts.get(b, [])]))
+    for name, spec in axes_spec.items():
+        if name == "bottom_opt" and spec == ALL:
+            raise SweepError("Axis 'bottom_opt': '*' needs a 'bottom' axis (or set bottom_opt per bottom)")
+        axes.append(((name,), [(v,) for v in expand_axis(name, spec, valid_enums)]))
+    return axes
+
+
+def _type_errors(name, value, schema):
+    expected = schema.get("type")
+    if expected in SCHEMA_TYPES and not check_type(value, expected):
+        return [f"'{name}': {value!r} is not of type {expected}"]
+    if isinstance(value, list) and isinstance(schema.get("items"), dict):
+        return [e for item in value for e in _type_errors(f"{name}[]", item, schema["items"])]
+    return []
+
+
+def check_value_types(axes, base, schema):
+    """Raise SweepError when a base or axis value does not have the type the product's config schema
+    gives its override (checked up front: a string diameter would otherwise fail mid-stream)."""
+    props = (((schema or {}).get("properties") or {}).get("overrides") or {}).get("properties", {})
+    errors = []
+    for name, value in base.items():
+        errors.extend(_type_errors(f"base.{name}", value, props.get(name, {})))
+    for names, values in axes:
+        for combo in values:
+            for name, value in zip(names, combo):
+                errors.extend(e for e in _type_errors(f"axes.{name}", value, props.get(name, {})) if e not in errors)
+    if errors:
+        raise SweepError("; ".join(errors[:10]))
+
+
+def count_points(axes):
+    return math.prod(len(values) for _, values in axes)
+
+
+def iter_points(axes):
+    """Lazily yield one ``{param: value}`` dict per cartesian point."""
+    names = [n for group, _ in axes for n in group]
+    for combo in itertools.product(*(values for _, values in axes)):
+        yield dict(zip(names, itertools.chain.from_iterable(combo)))
+
+
+def technical_bom(params, product="filterslang", version="1.0.0"):
+    """Predict the BOM_ITEM record filterslang() would echo for these params (no render)."""
+    L = params["L"]
+    if params.get("rings_auto", True):
+        n = int(params.get("rings_count", 0) or 0)
+        rings = [_scad_num(L * i / (n + 1)) for i in range(1, n + 1)] if n > 0 else []
+    else:
+        rings = list(params.get("rings_positions", []))
+    return {
+        "product": product, "version": version, "bom_tag": params.get("bom_tag", ""),
+        "L": L, "D": params["D"], "t": params["t"], "medium": params.get("medium", ""),
+        "top": params["top"], "open_top": params.get("open_top", False),
+        "bottom": params["bottom"], "bottom_opt": params.get("bottom_opt", "zonder"),
+        "rings": rings, "ring_w": params.get("ring_w", 10), "ring_t": params.get("ring_t", 2),
+        "reinforce": params.get("reinforce_enable", False), "rein_side": params.get("reinforce_side", "boven"),
+        "rein_spans": params.get("reinforce_spans", []),
+        "productzijde": params.get("productzijde", "buiten"),
+    }
+
+
+def geometry_errors(params, bom, preset):
+    """Preset length limits plus the assertions filterslang() would fail on."""
+    errors = []
+    defaults = preset.get("defaults", {})
+    L = params.get("L", 0)
+    if "length_min" in defaults and L < defaults["length_min"]:
+        errors.append(f"Length {L} below preset minimum {defaults['length_min']}")
+    if "length_max" in defaults and L > defaults["length_max"]:
+        errors.append(f"Length {L} above preset maximum {defaults['length_max']}")
+    if not (L > 0 and params.get("D", 0) > 0 and params.get("t", 0) > 0):
+        errors.append("L,D,t must be > 0")
+    if not (bom["ring_w"] > 0 and bom["ring_t"] > 0):
+        errors.append("ring_w, ring_t must be > 0")
+    if any(not (0 < p < L) for p in bom["rings"]):
+        errors.append("ring position must be within (0,L)")
+    if bom["reinforce"]:
+        for span in bom["rein_spans"]:
+            if len(span) != 2 or not (span[1] > span[0] >= 0 and span[1] <= L):
+                errors.append(f"reinforce span invalid: {span}")
+    return errors
+
+
+def run_sweep(spec, presets_data, parts_catalog, pricing=None, schema=None):
+    """Validate the spec (raises SweepError) and return a lazy iterator of per-point results,
+    in cartesian order. With a ``pricing`` catalog each point also gets ``unit_cost``; with the
+    product's config ``schema`` every base and axis value is type-checked before the first point."""
+    presets = presets_data.get("presets", {})
+    preset_name = spec.get("preset")
+    if preset_name not in presets:
+        raise SweepError(f"Unknown preset '{preset_name}'. Available: {list(presets.keys())}")
+    preset = presets[preset_name]
+    valid_enums = presets_data.get("valid_enums", {})
+
+    axes = build_axes(spec.get("axes"), valid_enums)
+    total = count_points(axes)
+    try:
+        limit = int(spec.get("limit") or 0)
+    except (TypeError, ValueError):
+        raise SweepError(f"'limit' must be an integer, got {spec.get('limit')!r}")
+    if total > MAX_POINTS and not (0 < limit <= MAX_POINTS):
+        raise SweepError(f"Sweep expands to {total} points (max {MAX_POINTS}); narrow the axes or set 'limit'")
+
+    if not isinstance(spec.get("base") or {}, dict):
+        raise SweepError("'base' must be a mapping of parameter overrides")
+    base = dict(spec.get("base") or {})
+    check_value_types(axes, base, schema)
+    prefix = spec.get("name_prefix", f"sweep_{preset_name}")
+    only_valid = bool(spec.get("only_valid", False))
+    user_config = {"preset": preset_name, "quality": spec.get("quality", presets_data.get("default_quality", "production"))}
+    return _iter_results(axes, base, prefix, only_valid, limit, user_config, preset, presets_data,
+                         parts_catalog, pricing)
+
+
+def _iter_results(axes, base, prefix, only_valid, limit, user_config, preset, presets_data, parts_catalog, pricing):
+    emitted = 0
+    for index, point in enumerate(iter_points(axes)):
+        if limit and emitted >= limit:
+            break
+        user_config["name"] = f"{prefix}_{index}"
+        user_config["overrides"] = {**base, **point}
+        try:
+            params = build_params(user_config, presets_data)
+        except ConfigError as e:
+            raise SweepError(str(e))
+        errors = validate_params(params, preset, presets_data)
+        result = {"index": index, "point": point}
+        if not errors:
+            bom = technical_bom(params)
+            errors = geometry_errors(params, bom, preset)
+        if errors:
+            if only_valid:
+                continue
+            result.update(valid=False, errors=errors)
+        else:
+            prod = production_record(bom, parts_catalog)
+            metrics = {k: prod[k] for k in METRIC_FIELDS}
+            if pricing is not None:
+                metrics["unit_cost"] = unit_cost(prod, pricing)
+            result.update(valid=True, bom=bom, metrics=metrics)
+        emitted += 1
+        yield result
+
+
+class BestPoints:
+    """Keep the ``k`` valid points with the lowest ``metrics[by]`` (streaming, O(k) memory)."""
+
+    def __init__(self, k, by="surface_area_m2"):
+        if by not in RANK_FIELDS:
+            raise SweepError(f"Cannot rank by '{by}'. Valid: {list(RANK_FIELDS)}")
+        try:
+            self.k = int(k)
+        except (TypeError, ValueError):
+            raise SweepError(f"'best' must be an integer, got {k!r}")
+        self.by = by
+        self._heap = []  # max-heap via negated metric
+
+    def offer(self, result):
+        if self.k <= 0 or not result.get("valid") or self.by not in result["metrics"]:
+            return
+        item = (-result["metrics"][self.by], -result["index"], result)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, item)
+        elif item > self._heap[0]:
+            heapq.heapreplace(self._heap, item)
+
+    def results(self):
+        return [r for _, _, r in sorted(self._heap, key=lambda it: (-it[0], -it[1]))]
+
+
+def sweep_config(spec, result):
+    """User config (as accepted by /api/generate) for one sweep point."""
+    config = {
+        "name": f"{spec.get('name_prefix', 'sweep_' + spec['preset'])}_{result['index']}",
+        "preset": spec["preset"],
+        "overrides": {**(spec.get("base") or {}), **result["point"]},
+    }
+    if "quality" in spec:
+        config["quality"] = spec["quality"]
+    return config
+
+
+if __name__ == "__main__":
+    import yaml
+    from parts_catalog import get_catalog, DEFAULT_PRICES
+    from product_registry import get_registry
+
+    p = argparse.ArgumentParser(description="Expand a parameter sweep → JSONL (validation, BOM, production metrics)")
+    p.add_argument("--spec", required=True, help="Sweep spec (JSON or YAML)")
+    p.add_argument("--presets", required=True, help="Presets YAML file")
+    p.add_argument("--parts", default="data/parts.csv", help="Parts catalog CSV")
+    p.add_argument("--prices", default=str(DEFAULT_PRICES), help="Price breaks CSV (adds unit_cost)")
+    p.add_argument("--output", default="", help="Output JSONL (stdout if omitted)")
+    p.add_argument("--count", action="store_true", help="Only print the number of points")
+    args = p.parse_args()
+
+    spec = yaml.safe_load(Path(args.spec).read_text(encoding="utf-8"))
+    presets_data = yaml.safe_load(Path(args.presets).read_text(encoding="utf-8"))
+
+    try:
+        if args.count:
+            print(count_points(build_axes(spec.get("axes"), presets_data.get("valid_enums", {}))))
+            sys.exit(0)
+        catalog = get_catalog(args.parts, args.prices)
+        out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+        n = valid = 0
+        for res in run_sweep(spec, presets_data, catalog.by_enum, catalog, get_registry().schema("filterslang")):
+            out.write(json.dumps(res, ensure_ascii=False) + "\n")
+            n += 1
+            valid += res["valid"]
+        if args.output:
+            out.close()
+    except SweepError as e:
+        sys.stderr.write(f"ERROR: {e}\n")
+        sys.exit(1)
+    sys.stderr.write(f"✓ {n} points ({valid} valid)\n")
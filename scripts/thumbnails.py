@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+# scripts/thumbnails.py
+# PNG thumbnails per configuration: a small software rasteriser (orthographic three-quarter view,
+# flat shading, z-buffer, 2x supersampling) over the STL mesh, no OpenGL or display needed.
+# Thumbnails live in the render cache under the geometry parameters hash (quality tier and $fn
+# excluded: a preview render gives the same picture):
+#
+#   out/cache/renders/png/<key[:2]>/<key>.png
+#
+#   python scripts/thumbnails.py model.stl thumb.png           # one STL
+#   python scripts/thumbnails.py --batch [--jobs 4]            # presets' recommended + configs/example_*.yaml
+#   python scripts/thumbnails.py --list                        # catalogue entries and cache state
+
+import os, sys, math, zlib, struct, argparse, subprocess, tempfile, time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from mesh_lod import read_stl, index_mesh, bounds, cluster
+from render_cache import RenderCache, render_key, sources_hash, DEFAULT_DIR as RENDER_CACHE_DIR
+from product_registry import get_registry
+
+ROOT = Path(__file__).resolve().parent.parent
+
+THUMB_SIZE = 256
+SUPERSAMPLE = 2
+# Meshes above this many triangles are clustered first (a 256 px picture cannot show more)
+MAX_TRIANGLES = 20000
+AZIMUTH, ELEVATION = math.radians(40), math.radians(22)
+BASE_COLOUR = (208, 208, 212)
+
+# Parameters that do not change the picture
+THUMB_IGNORE = ("quality", "fn")
+
+
+def thumbnail_key(product, params, sources):
+    """Render-cache key of a configuration's thumbnail."""
+    return render_key(product, "png", {k: v for k, v in params.items() if k not in THUMB_IGNORE}, sources)
+
+
+def _view_basis():
+    ca, sa, ce, se = math.cos(AZIMUTH), math.sin(AZIMUTH), math.cos(ELEVATION), math.sin(ELEVATION)
+    back = (ce * ca, ce * sa, se)                      # towards the camera
+    right = (-sa, ca, 0.0)
+    up = (back[1] * right[2] - back[2] * right[1],
+          back[2] * right[0] - back[0] * right[2],
+          back[0] * right[1] - back[1] * right[0])
+    return right, up, back
+
+
+def rasterise(vertices, triangles, size=THUMB_SIZE):
+    """RGBA pixels (bytes, row-major) of a mesh, standing on its z axis, on a transparent background."""
+    right, up, back = _view_basis()
+    light = [back[k] + 0.6 * up[k] - 0.4 * right[k] for k in range(3)]
+    norm = math.sqrt(sum(c * c for c in light))
+    light = [c / norm for c in light]
+
+    width = size * SUPERSAMPLE
+    proj = [(x * right[0] + y * right[1] + z * right[2],
+             x * up[0] + y * up[1] + z * up[2],
+             x * back[0] + y * back[1] + z * back[2]) for x, y, z in vertices]
+    if proj:
+        xs, ys = [p[0] for p in proj], [p[1] for p in proj]
+        cx, cy = (min(xs) + max(xs)) / 2, (min(ys) + max(ys)) / 2
+        span = max(max(xs) - min(xs), max(ys) - min(ys)) or 1.0
+    else:
+        cx = cy = 0.0
+        span = 1.0
+    scale = width * 0.92 / span
+    half = width / 2
+    screen = [((px - cx) * scale + half, half - (py - cy) * scale, pz) for px, py, pz in proj]
+
+    depth = [-math.inf] * (width * width)
+    shade = bytearray(width * width)
+    for a, b, c in triangles:
+        (x0, y0, z0), (x1, y1, z1), (x2, y2, z2) = screen[a], screen[b], screen[c]
+        area = (x1 - x0) * (y2 - y0) - (x2 - x0) * (y1 - y0)
+        if area == 0:
+            continue
+        # Flat shading from the world-space face normal (double sided)
+        (ax, ay, az), (bx, by, bz), (qx, qy, qz) = vertices[a], vertices[b], vertices[c]
+        ux, uy, uz, vx, vy, vz = bx - ax, by - ay, bz - az, qx - ax, qy - ay, qz - az
+        nx, ny, nz = uy * vz - uz * vy, uz * vx - ux * vz, ux * vy - uy * vx
+        length = math.sqrt(nx * nx + ny * ny + nz * nz) or 1.0
+        lit = abs(nx * light[0] + ny * light[1] + nz * light[2]) / length
+        level = int(255 * (0.3 + 0.7 * lit))
+
+        lo_x, hi_x = max(int(min(x0, x1, x2)), 0), min(int(max(x0, x1, x2)), width - 1)
+        lo_y, hi_y = max(int(min(y0, y1, y2)), 0), min(int(max(y0, y1, y2)), width - 1)
+        if lo_x > hi_x or lo_y > hi_y:
+            continue
+        inv = 1.0 / area
+        # Edge functions w_i(x, y) = A_i x + B_i y + C_i, normalised so inside is >= 0 for both windings
+        a0, b0, c0 = (y1 - y2) * inv, (x2 - x1) * inv, (x1 * y2 - x2 * y1) * inv
+        a1, b1, c1 = (y2 - y0) * inv, (x0 - x2) * inv, (x2 * y0 - x0 * y2) * inv
+        a2, b2, c2 = (y0 - y1) * inv, (x1 - x0) * inv, (x0 * y1 - x1 * y0) * inv
+        for py in range(lo_y, hi_y + 1):
+            y = py + 0.5
+            x = lo_x + 0.5
+            w0, w1, w2 = a0 * x + b0 * y + c0, a1 * x + b1 * y + c1, a2 * x + b2 * y + c2
+            row = py * width
+            for px in range(lo_x, hi_x + 1):
+                if w0 >= 0 and w1 >= 0 and w2 >= 0:
+                    z = w0 * z0 + w1 * z1 + w2 * z2
+                    i = row + px
+                    if z > depth[i]:
+                        depth[i] = z
+                        shade[i] = level
+                w0 += a0
+                w1 += a1
+                w2 += a2
+
+    # Box-filter the supersampled image down; coverage becomes alpha
+    pixels = bytearray(size * size * 4)
+    samples = SUPERSAMPLE * SUPERSAMPLE
+    for oy in range(size):
+        for ox in range(size):
+            total = covered = 0
+            for sy in range(SUPERSAMPLE):
+                base = (oy * SUPERSAMPLE + sy) * width + ox * SUPERSAMPLE
+                for sx in range(SUPERSAMPLE):
+                    if depth[base + sx] != -math.inf:
+                        covered += 1
+                        total += shade[base + sx]
+            if covered:
+                o = (oy * size + ox) * 4
+                mean = total / covered
+                pixels[o] = int(BASE_COLOUR[0] * mean / 255)
+                pixels[o + 1] = int(BASE_COLOUR[1] * mean / 255)
+                pixels[o + 2] = int(BASE_COLOUR[2] * mean / 255)
+                pixels[o + 3] = 255 * covered // samples
+    return bytes(pixels)
+
+
+def png_bytes(pixels, width, height):
+    """8-bit RGBA PNG of row-major pixels."""
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+    stride = width * 4
+    raw = b"".join(b"\0" + pixels[y * stride:(y + 1) * stride] for y in range(height))
+    return b"".join((b"\x89PNG\r\n\x1a\n",
+                     chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)),
+                     chunk(b"IDAT", zlib.compress(raw, 9)),
+                     chunk(b"IEND", b"")))
+
+
+def render_png(stl, size=THUMB_SIZE):
+    """PNG thumbnail of an STL file."""
+    vertices, triangles = index_mesh(read_stl(stl))
+    if len(triangles) > MAX_TRIANGLES:
+        lo, hi = bounds(vertices)
+        vertices, triangles = cluster(vertices, triangles, 64, lo, hi)
+    return png_bytes(rasterise(vertices, triangles, size), size, size)
+
+
+# --- Catalogue: recommended preset variants and example configs ---
+
+def catalogue_configs(registry=None):
+    """``(label, product, config)`` for every ``recommended`` preset variant and configs/example_*.yaml."""
+    import yaml  # only catalogue work parses YAML: importing the module for job thumbnails stays cheap
+    registry = registry or get_registry()
+    entries = []
+    for product in registry.names():
+        presets_path = Path(registry.get(product)["presets"])
+        if not presets_path.exists():
+            continue
+        data = yaml.safe_load(presets_path.read_text(encoding="utf-8")) or {}
+        for preset_id, preset in data.get("presets", {}).items():
+            # Enums the preset leaves open take their first valid value, as in the configurator's selects
+            choices = {k: v[0] for k, v in data.get("valid_enums", {}).items()
+                       if isinstance(v, list) and v and k not in preset.get("defaults", {})}
+            for rec in preset.get("recommended", []) or []:
+                overrides = {**choices, **{k: v for k, v in rec.items() if k != "name"}}
+                name = f"{preset_id}_{rec.get('name', len(entries))}"
+                entries.append((name, product, {"name": name, "preset": preset_id, "overrides": overrides}))
+    for path in sorted((ROOT / "configs").glob("example_*.yaml")):
+        config = yaml.safe_load(path.read_text(encoding="utf-8")) or {}
+        entries.append((path.stem, config.get("product", "filterslang"), config))
+    return entries
+
+
+def catalogue(cache_root=RENDER_CACHE_DIR, registry=None):
+    """Catalogue entries with their thumbnail key and whether it is rendered (unresolvable configs skipped)."""
+    import yaml
+    registry = registry or get_registry()
+    cache = RenderCache(cache_root)
+    presets = {}
+    result = []
+    for label, product, config in catalogue_configs(registry):
+        entry = registry.get(product)
+        if product not in presets:
+            presets[product] = yaml.safe_load(Path(entry["presets"]).read_text(encoding="utf-8"))
+        params, errors = registry.resolver(product)(config, presets[product])
+        if errors:
+            continue
+        key = thumbnail_key(product, params, sources_hash(entry["sources"]))
+        result.append({
+            "label": label,
+            "product": product,
+            "config": config,
+            "key": key,
+            "rendered": cache.path("png", key, ".png").exists(),
+        })
+    return result
+
+
+def prerender(entry, cache_root, timeout):
+    """Render one catalogue entry's thumbnail through generate_model.py (STL at preview quality)."""
+    import yaml
+    with tempfile.TemporaryDirectory(prefix="thumb_") as tmp:
+        config = {**entry["config"], "name": f"thumb_{entry['key'][:12]}", "quality": "preview"}
+        config_file = Path(tmp) / "config.yaml"
+        config_file.write_text(yaml.dump(config), encoding="utf-8")
+        cmd = [sys.executable, "scripts/generate_model.py", "--config", str(config_file),
+               "--product", entry["product"], "--presets", str(get_registry().get(entry["product"])["presets"]),
+               "--output-dir", tmp, "--render-cache", str(cache_root), "--skip-bom", "--skip-dxf", "--skip-lod"]
+        started = time.perf_counter()
+        result = subprocess.run(cmd, capture_output=True, text=True, cwd=str(ROOT), timeout=timeout)
+        ok = result.returncode == 0 and RenderCache(cache_root).path("png", entry["key"], ".png").exists()
+        return ok, time.perf_counter() - started, result.stderr.strip().splitlines()[-1:] if not ok else []
+
+
+def main():
+    p = argparse.ArgumentParser(description="PNG thumbnails per configuration (software rasteriser over the STL)")
+    p.add_argument("stl", nargs="?", help="STL file to render")
+    p.add_argument("png", nargs="?", help="Output PNG (default: next to the STL)")
+    p.add_argument("--size", type=int, default=THUMB_SIZE, help="Thumbnail size in pixels")
+    p.add_argument("--batch", action="store_true", help="Pre-render all catalogue entries missing from the cache")
+    p.add_argument("--list", action="store_true", help="List catalogue entries and their cache state")
+    p.add_argument("--jobs", type=int, default=os.cpu_count() or 2, help="Parallel renders for --batch")
+    p.add_argument("--timeout", type=int, default=600, help="Seconds per render for --batch")
+    p.add_argument("--render-cache", default=str(RENDER_CACHE_DIR), help="Render cache directory")
+    args = p.parse_args()
+
+    if args.list or args.batch:
+        entries = catalogue(args.render_cache)
+        if args.list:
+            for e in entries:
+                print(f"  {'✓' if e['rendered'] else '·'} {e['product']:<24} {e['label']:<28} {e['key'][:12]}")
+            return
+        todo = [e for e in entries if not e["rendered"]]
+        print(f"{len(entries)} catalogue entries, {len(todo)} to render")
+        failures = 0
+        with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+            for e, (ok, elapsed, tail) in zip(todo, pool.map(lambda e: prerender(e, args.render_cache, args.timeout), todo)):
+                failures += not ok
+                print(f"  {'✓' if ok else '✗'} {e['label']:<28} {elapsed:6.1f} s {' '.join(tail)}")
+        sys.exit(1 if failures else 0)
+
+    if not args.stl:
+        p.error("an STL file, --batch or --list is required")
+    out = Path(args.png or Path(args.stl).with_suffix(".png"))
+    started = time.perf_counter()
+    out.write_bytes(render_png(args.stl, args.size))
+    print(f"✓ {out} ({args.size}px) in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
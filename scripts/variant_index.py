@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+# scripts/variant_index.py
+# Nearest-variant index over completed generation jobs: per product and per combination of enum
+# values (preset, top/bottom, connectors, ...) a KD-tree on (L, D, t), so "closest already rendered
+# variant to D=172, L=2300" is answered without scanning all past jobs.
+#
+# Completed jobs are appended to out/cache/variant_index.jsonl and inserted incrementally: new
+# points go to a small buffer that is scanned linearly; a full buffer becomes a tree and is merged
+# with the smaller trees (logarithmic method), so an insert never rebuilds the whole partition.
+# A later job with the same product + name overwrites the artifacts on disk, so it
+# supersedes the older entry; jobs whose artifacts expired (artifact_store gc) are removed with a
+# {"removed": job_id} journal line. Superseded and removed entries are dropped at the next compaction,
+# which builds the new trees in a background thread (queries keep using the old ones meanwhile). The
+# process-wide index replays its journal in the background too, started when the server starts.
+#
+#   python scripts/variant_index.py --query D=172 L=2300 --k 3
+#   python scripts/variant_index.py --bench 200000
+
+import json, math, time, heapq, random, argparse, threading
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_JOURNAL = ROOT / "out" / "cache" / "variant_index.jsonl"
+
+AXES = ("L", "D", "t")
+# Distance units: 100 mm length ≈ 10 mm diameter ≈ 0.1 mm wall
+SCALES = {"L": 100.0, "D": 10.0, "t": 0.1}
+
+# Product → (SCAD parameter per axis, enum parameters that partition the index)
+PRODUCT_FIELDS = {
+    "filterslang": ({"L": "L", "D": "D", "t": "t"},
+                    ("preset", "top", "bottom", "bottom_opt", "productzijde")),
+    "flexibele_verbindingen": ({"L": "L", "D": "D_out", "t": "wall"},
+                               ("preset", "end_type_1", "end_type_2", "hygiene_class")),
+}
+
+LEAF_SIZE = 8
+BUFFER_SIZE = 32
+PARTITION_SCAN = 4
+MERGE_RATIO = 4      # a new tree absorbs smaller trees up to this factor of its size
+
+
+# ---------------------------------------------------------------------------
+# Static KD-tree (pure Python). Points are stored in scaled units; leaves are lists of
+# (point, id), inner nodes (axis, split, left, right) split on the widest axis.
+# ---------------------------------------------------------------------------
+
+def build_tree(items):
+    """KD-tree over ``[(point, id), ...]``; ``None`` when empty."""
+    if len(items) <= LEAF_SIZE:
+        return items or None
+    dims = len(items[0][0])
+    spreads = [max(p[a] for p, _ in items) - min(p[a] for p, _ in items) for a in range(dims)]
+    axis = spreads.index(max(spreads))
+    if not spreads[axis]:
+        return items
+    items.sort(key=lambda item: item[0][axis])
+    mid = len(items) // 2
+    split = items[mid][0][axis]
+    return (axis, split, build_tree(items[:mid]), build_tree(items[mid:]))
+
+
+def _scan(items, target, weights, k, heap, accept):
+    t0, t1, t2 = target
+    w0, w1, w2 = weights
+    full = len(heap) >= k
+    worst = -heap[0][0] if full else math.inf
+    for (x0, x1, x2), ident in items:
+        d = w0 * (x0 - t0) ** 2 + w1 * (x1 - t1) ** 2 + w2 * (x2 - t2) ** 2
+        if d < worst and accept(ident):
+            if full:
+                heapq.heapreplace(heap, (-d, ident))
+            else:
+                heapq.heappush(heap, (-d, ident))
+                full = len(heap) >= k
+            if full:
+                worst = -heap[0][0]
+
+
+def search_tree(node, target, weights, k, heap, accept):
+    """Push the k nearest accepted ids under ``node`` onto ``heap`` (max-heap of ``(-d², id)``)."""
+    while node is not None:
+        if isinstance(node, list):
+            _scan(node, target, weights, k, heap, accept)
+            return
+        axis, split, left, right = node
+        diff = target[axis] - split
+        near, far = (left, right) if diff < 0 else (right, left)
+        search_tree(near, target, weights, k, heap, accept)
+        if len(heap) == k and weights[axis] and diff * diff >= -heap[0][0]:
+            return
+        node = far
+
+
+def _tree_items(node):
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            yield from node
+        elif node is not None:
+            stack.extend(node[2:])
+
+
+# ---------------------------------------------------------------------------
+# Partitioned index
+# ---------------------------------------------------------------------------
+
+class _Forest:
+    """Logarithmic method: a few static trees of decreasing size plus a small linear buffer."""
+    __slots__ = ("trees", "buffer")
+
+    def __init__(self):
+        self.trees, self.buffer = [], []   # trees: [(size, tree)], largest first
+
+    def add(self, point, ident, merge=True):
+        self.buffer.append((point, ident))
+        if merge and len(self.buffer) >= BUFFER_SIZE:
+            items, self.buffer = self.buffer, []
+            while self.trees and self.trees[-1][0] <= MERGE_RATIO * len(items):
+                items.extend(_tree_items(self.trees.pop()[1]))
+            self.trees.append((len(items), build_tree(items)))
+
+    @classmethod
+    def rebuilt(cls, trees, buffer, dead=()):
+        """One tree over the live items of ``trees`` + ``buffer`` (a snapshot: the trees are never mutated)."""
+        items = [item for _, tree in trees for item in _tree_items(tree)] + buffer
+        items = [item for item in items if item[1] not in dead]
+        forest = cls()
+        forest.trees = [(len(items), build_tree(items))] if items else []
+        return forest
+
+    def search(self, target, weights, k, heap, accept):
+        for _, tree in self.trees:
+            search_tree(tree, target, weights, k, heap, accept)
+        _scan(self.buffer, target, weights, k, heap, accept)
+
+
+def _scaled(point):
+    return tuple(v / SCALES[a] for a, v in zip(AXES, point))
+
+
+def variant_entry(job_id, product, name, params, outputs, completed_at=None):
+    """Index record for a completed job from its resolved SCAD parameters; ``None`` if not indexable."""
+    if product not in PRODUCT_FIELDS:
+        return None
+    axes, enums = PRODUCT_FIELDS[product]
+    params = dict(params)
+    if "wall" not in params and isinstance(params.get("D_out"), (int, float)) and isinstance(params.get("D_in"), (int, float)):
+        params["wall"] = (params["D_out"] - params["D_in"]) / 2
+    try:
+        point = [float(params[axes[a]]) for a in AXES]
+    except (KeyError, TypeError, ValueError):
+        return None
+    return {
+        "job_id": job_id,
+        "product": product,
+        "name": name,
+        "point": point,
+        "enums": {field: params.get(field) for field in enums if params.get(field) is not None},
+        "outputs": {kind: {k: v for k, v in info.items() if k in ("filename", "size", "path")}
+                    for kind, info in outputs.items()},
+        "completed_at": completed_at or time.time(),
+    }
+
+
+class VariantIndex:
+    """Completed jobs per product, as one forest per enum partition plus one per product."""
+
+    def __init__(self, journal=None, background=False):
+        self.journal = Path(journal) if journal else None
+        self.entries = []        # id → entry
+        self.keys = []           # id → partition key
+        self.by_job = {}         # job_id → id
+        self.by_name = {}        # (product, name) → id of the live entry
+        self.dead = set()        # superseded ids
+        self.compacted = 0       # len(dead) at the last compaction
+        self.partitions = {}     # (product, ((field, value), ...)) → _Forest
+        self.products = {}       # product → _Forest over all its partitions
+        self.lock = threading.Lock()
+        self.loaded = threading.Event()   # set once the journal is replayed
+        self.compacting = False
+        if background:
+            threading.Thread(target=self._load, name="variant-index-load", daemon=True).start()
+        else:
+            self._load()
+
+    def _load(self):
+        """Replay the journal (callers wait for this part only), then compact it into trees."""
+        try:
+            if self.journal and self.journal.exists():
+                with self.lock, open(self.journal, encoding="utf-8") as f:
+                    for line in f:
+                        if line.strip():
+                            record = json.loads(line)
+                            if "removed" in record:
+                                self._remove(record["removed"])
+                            else:
+                                self._insert(record, merge=False)
+        finally:
+            self.loaded.set()
+        self.compact()
+
+    def __len__(self):
+        self.loaded.wait()
+        return len(self.entries) - len(self.dead)
+
+    def _insert(self, entry, merge=True):
+        ident = len(self.entries)
+        key = (entry["product"], tuple(sorted(entry["enums"].items())))
+        self.entries.append(entry)
+        self.keys.append(key)
+        self.by_job[entry["job_id"]] = ident
+        previous = self.by_name.get((entry["product"], entry["name"]))
+        if previous is not None:
+            self.dead.add(previous)
+        self.by_name[(entry["product"], entry["name"])] = ident
+        point = _scaled(entry["point"])
+        self.partitions.setdefault(key, _Forest()).add(point, ident, merge)
+        self.products.setdefault(entry["product"], _Forest()).add(point, ident, merge)
+
+    def _remove(self, job_id):
+        ident = self.by_job.get(job_id)
+        if ident is None or ident in self.dead:
+            return False
+        self.dead.add(ident)
+        entry = self.entries[ident]
+        if self.by_name.get((entry["product"], entry["name"])) == ident:
+            del self.by_name[(entry["product"], entry["name"])]
+        return True
+
+    def compact(self):
+        """Rebuild every forest without the dead entries. The trees are built outside the lock from a
+        snapshot; entries inserted meanwhile are added to the new forests when they are swapped in."""
+        with self.lock:
+            if self.compacting:
+                return
+            self.compacting = True
+        self._compact()
+
+    def _compact(self):
+        with self.lock:
+            upto, dead = len(self.entries), set(self.dead)
+            snapshot = [{key: (list(forest.trees), list(forest.buffer)) for key, forest in forests.items()}
+                        for forests in (self.partitions, self.products)]
+        try:
+            partitions, products = [{key: _Forest.rebuilt(trees, buffer, dead)
+                                     for key, (trees, buffer) in forests.items()} for forests in snapshot]
+            with self.lock:
+                for ident in range(upto, len(self.entries)):
+                    entry, point = self.entries[ident], _scaled(self.entries[ident]["point"])
+                    partitions.setdefault(self.keys[ident], _Forest()).add(point, ident)
+                    products.setdefault(entry["product"], _Forest()).add(point, ident)
+                self.partitions, self.products = partitions, products
+                self.compacted = len(dead)
+        finally:
+            self.compacting = False
+
+    def _journal(self, records):
+        if self.journal and records:
+            self.journal.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.journal, "a", encoding="utf-8") as f:
+                f.writelines(json.dumps(record, separators=(",", ":")) + "\n" for record in records)
+        if not self.compacting and len(self.dead) - self.compacted > max(BUFFER_SIZE, len(self.entries) // 4):
+            self.compacting = True
+            threading.Thread(target=self._compact, name="variant-index-compact", daemon=True).start()
+
+    def add(self, entry):
+        """Insert a completed job and append it to the journal."""
+        self.loaded.wait()
+        with self.lock:
+            self._insert(entry)
+            self._journal([entry])
+
+    def remove(self, job_ids):
+        """Drop jobs whose artifacts expired; returns how many live entries were removed."""
+        self.loaded.wait()
+        with self.lock:
+            removed = [job_id for job_id in job_ids if self._remove(job_id)]
+            self._journal([{"removed": job_id} for job_id in removed])
+        return len(removed)
+
+    def get(self, job_id):
+        """Live entry of a job id (superseded entries have lost their artifacts)."""
+        self.loaded.wait()
+        ident = self.by_job.get(job_id)
+        return None if ident is None or ident in self.dead else self.entries[ident]
+
+    def nearest(self, product, query, k=5, enums=None):
+        """k nearest live entries to ``query`` (axis → value; missing axes are ignored) as ``(distance, entry)``.
+
+        Enum filters select whole partitions; when they leave more than PARTITION_SCAN partitions,
+        the product forest is searched with a partition filter instead.
+        """
+        target = _scaled(float(query.get(a) or 0.0) for a in AXES)
+        weights = tuple(1.0 if query.get(a) is not None else 0.0 for a in AXES)
+        wanted = set((enums or {}).items())
+        heap = []
+        self.loaded.wait()
+        with self.lock:
+            dead, keys = self.dead, self.keys
+            matching = {key for key in self.partitions if key[0] == product and wanted.issubset(key[1])}
+            if not wanted and product in self.products:
+                self.products[product].search(target, weights, k, heap, lambda i: i not in dead)
+            elif len(matching) <= PARTITION_SCAN:
+                for key in matching:
+                    self.partitions[key].search(target, weights, k, heap, lambda i: i not in dead)
+            else:
+                self.products[product].search(target, weights, k, heap,
+                                              lambda i: keys[i] in matching and i not in dead)
+            found = sorted((-d, ident) for d, ident in heap)
+            return [(math.sqrt(d), self.entries[ident]) for d, ident in found]
+
+
+_INDEX = {}
+_LOCK = threading.Lock()
+
+
+def get_variant_index(journal=DEFAULT_JOURNAL):
+    """Process-wide index; the journal is replayed in a background thread from the first call (the
+    servers make it at start-up), and its methods wait for the replay only, not the compaction."""
+    key = str(journal)
+    with _LOCK:
+        if key not in _INDEX:
+            _INDEX[key] = VariantIndex(journal, background=True)
+        return _INDEX[key]
+
+
+def _bench(n, k):
+    rng = random.Random(36)
+    index = VariantIndex()
+    tops, bottoms = ["klemband", "kopring", "snapring"], ["enkel", "dubbel", "platdicht"]
+    started = time.perf_counter()
+    for i in range(n):
+        params = {"L": rng.randint(300, 6000), "D": rng.randint(60, 400), "t": rng.choice([1.2, 1.5, 1.8, 2.0, 2.5]),
+                  "preset": rng.choice(["PE_500", "PPS_550"]), "top": rng.choice(tops), "bottom": rng.choice(bottoms)}
+        index.add(variant_entry(f"b{i}", "filterslang", f"bench_{i}", params, {}))
+    build = time.perf_counter() - started
+    queries = [{"L": rng.randint(300, 6000), "D": rng.randint(60, 400)} for _ in range(2000)]
+    one = {"preset": "PE_500", "top": "klemband", "bottom": "enkel"}
+    print(f"{n} jobs indexed incrementally in {build:.2f}s ({len(index.partitions)} partitions)")
+    for state in ("incremental", "compacted"):
+        if state == "compacted":
+            started = time.perf_counter()
+            index.compact()
+            print(f"compacted in {time.perf_counter() - started:.2f}s (as after loading the journal)")
+        started = time.perf_counter()
+        for q in queries:
+            index.nearest("filterslang", q, k)
+        per_query = (time.perf_counter() - started) / len(queries)
+        started = time.perf_counter()
+        for q in queries:
+            index.nearest("filterslang", q, k, one)
+        per_filtered = (time.perf_counter() - started) / len(queries)
+        print(f"{state}: nearest k={k}: {per_query * 1e6:.0f} µs/query (all variants), "
+              f"{per_filtered * 1e6:.0f} µs/query (one enum partition)")
+
+
+def main():
+    p = argparse.ArgumentParser(description="Query the nearest-variant index of completed jobs")
+    p.add_argument("--journal", default=str(DEFAULT_JOURNAL), help="Index journal (JSONL)")
+    p.add_argument("--product", default="filterslang", choices=sorted(PRODUCT_FIELDS))
+    p.add_argument("--query", nargs="*", default=[], help="L=…, D=…, t=… and enum filters (top=klemband)")
+    p.add_argument("--k", type=int, default=5)
+    p.add_argument("--bench", type=int, help="Benchmark on N synthetic jobs instead of the journal")
+    args = p.parse_args()
+
+    if args.bench:
+        _bench(args.bench, args.k)
+        return
+
+    query, enums = {}, {}
+    for item in args.query:
+        field, _, value = item.partition("=")
+        if field in AXES:
+            query[field] = float(value)
+        else:
+            enums[field] = value
+    index = get_variant_index(args.journal)
+    for distance, entry in index.nearest(args.product, query, args.k, enums):
+        dims = ", ".join(f"{a}={v:g}" for a, v in zip(AXES, entry["point"]))
+        print(f"{distance:8.3f}  {entry['job_id']}  {entry['name']}  ({dims})  {sorted(entry['outputs'])}")
+    print(f"({len(index)} indexed)")
+
+
+if __name__ == "__main__":
+    main()